@@ -23,12 +23,12 @@ from .gelu_asm import gelu_asm
 from .im2col_asm import im2col_asm
 from .im2col_asm_no_shift import im2col_asm_no_shift
 from .lm_head import lm_head_asm
-from .normalization_asm import layer_norm_asm, rms_norm_asm
+from .normalization_asm import layer_norm_asm, rms_norm_asm, rms_norm_stats_asm
 from .preload_act import preload_act_asm
 from .preload_addr_reg import preload_addr_reg_asm
 from .projection_asm import projection_asm, projection_T_asm
 from .reset_reg_asm import reset_fpreg_asm, reset_reg_asm
-from .rope_asm import rope_asm
+from .rope_asm import rope_asm, rope_rotate_half_asm
 from .silu_asm import silu_asm
 from .store_act_asm import store_act_asm
 from .gemv_asm import gemv_asm
@@ -54,7 +54,9 @@ __all__ = [
     "reset_fpreg_asm",
     "reset_reg_asm",
     "rms_norm_asm",
+    "rms_norm_stats_asm",
     "rope_asm",
+    "rope_rotate_half_asm",
     "silu_asm",
     "store_act_asm",
 ]
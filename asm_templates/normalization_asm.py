@@ -102,6 +102,70 @@ def rms_norm_asm(
     return generated_code
 
 
+def rms_norm_stats_asm(
+    _eps_offset: int,
+    reci_hid_offset: int,
+    alive_registers: list[int],
+    activation_base_address: int,
+    scratchpad_base_address: int,
+    stats_fpram_address: int,
+    vlen: int,
+    batch_size: int,
+    hidden_dim: int,
+    unroll: bool = True,
+) -> str:
+    """
+    Generate assembly code for the RMS norm reduction only.
+
+    Stores 1 / sqrt(mean(x^2) + eps) of every row to
+    FPRAM[stats_fpram_address + row] and leaves the activation untouched, so a
+    following projection can scale its output rows instead.
+    """
+    fp_addr = alive_registers[0]
+    scratchpad_addr = alive_registers[1]
+    stats_addr = alive_registers[2]
+    loop_addr = alive_registers[3] if not unroll else None
+
+    generated_code = "; RMS Norm stats generation \n"
+    generated_code += _load_large_int(scratchpad_addr, scratchpad_base_address)
+    generated_code += _load_large_int(fp_addr, stats_fpram_address)
+
+    generated_code += f"S_LD_FP f1, gp0, {_eps_offset} \n"
+    generated_code += "S_ADD_FP f2, f0, f0 \n"
+    generated_code += f"S_LD_FP f3, gp0, {reci_hid_offset} \n"
+
+    for batch in range(batch_size):
+        generated_code += _load_large_int(stats_addr, activation_base_address + vlen * batch)
+
+        # Same reduction order as rms_norm_asm, so the stored scale is bit-identical.
+        if unroll:
+            for i in range(hidden_dim // vlen):
+                generated_code += f"V_MUL_VV gp{scratchpad_addr}, gp{stats_addr}, gp{stats_addr}, 0 \n"
+                generated_code += f"V_RED_SUM f2, gp{scratchpad_addr} \n"
+                generated_code += f"S_ADDI_INT gp{stats_addr}, gp{stats_addr}, {vlen * batch_size} \n"
+        else:
+            generated_code += f"C_LOOP_START gp{loop_addr}, {hidden_dim // vlen} \n"
+            generated_code += f"V_MUL_VV gp{scratchpad_addr}, gp{stats_addr}, gp{stats_addr}, 0 \n"
+            generated_code += f"V_RED_SUM f2, gp{scratchpad_addr} \n"
+            generated_code += f"S_ADDI_INT gp{stats_addr}, gp{stats_addr}, {vlen * batch_size} \n"
+            generated_code += f"C_LOOP_END gp{loop_addr} \n"
+
+        generated_code += "S_MUL_FP f2, f2, f3 \n"
+        generated_code += "S_ADD_FP f2, f2, f1 \n"
+        generated_code += "S_SQRT_FP f2, f2 \n"
+        generated_code += "S_RECI_FP f2, f2 \n"
+
+        # Spacer so the multi-cycle S_RECI_FP retires before S_ST_FP reads f2.
+        for _ in range(4):
+            generated_code += "S_ADDI_INT gp0, gp0, 0 \n"
+
+        generated_code += f"S_ST_FP f2, gp{fp_addr}, 0 \n"
+        generated_code += f"S_ADDI_INT gp{fp_addr}, gp{fp_addr}, 1 \n"
+        generated_code += "S_ADD_FP f2, f0, f0 \n"
+
+    return generated_code
+
+
 def layer_norm_asm(
     _eps_offset: int,
     reci_hid_offset: int,
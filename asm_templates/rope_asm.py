@@ -79,3 +79,81 @@ def rope_asm(
         lines.append(f"C_LOOP_END gp{loop_addr}")
 
     return "\n".join(lines) + "\n"
+
+
+def rope_rotate_half_asm(
+    alive_registers: list,
+    x_base_address: int,
+    cos_base_address: int,
+    sin_base_address: int,
+    scratchpad_base_address: int,
+    vlen: int,
+    seq_len: int,
+    head_dim: int,
+    unroll: bool = True,
+) -> str:
+    """
+    Generate vector-only RoPE for heads whose halves are whole VLEN chunks:
+        x_lo = x_lo * cos_lo - x_hi * sin_lo
+        x_hi = x_hi * cos_hi + x_lo * sin_hi
+
+    rotate_half(x) = [-x_hi, x_lo] is a chunk swap with a sign flip, so it is
+    folded into V_SUB_VV / V_ADD_VV instead of a rotate-half matmul: no MRAM
+    traffic and no matrix unit. Every product and sum rounds exactly like
+    ``rope_asm`` fed with ``x @ R`` (the matmul only moves and negates values).
+
+    Memory layout as for ``rope_asm``; the hi half of chunk j sits
+    ``(head_dim // vlen // 2) * seq_len * vlen`` after its lo half.
+
+    Args:
+        alive_registers: GP registers [x_lo, x_hi, cos_lo, cos_hi, sin_lo, sin_hi, scratch_lo, scratch_hi]
+            (a 9th [loop] is required for the rolled path)
+        scratchpad_base_address: 2-row VRAM scratch
+        head_dim: head dimension (must be a multiple of 2 * vlen)
+    """
+    assert head_dim % (2 * vlen) == 0, f"head_dim ({head_dim}) must be divisible by 2 * vlen ({2 * vlen})"
+
+    x_lo, x_hi, cos_lo, cos_hi, sin_lo, sin_hi, scratch_lo, scratch_hi = alive_registers[:8]
+
+    half_rows = (head_dim // vlen // 2) * seq_len
+    half_offset = half_rows * vlen
+
+    def body() -> list[str]:
+        return [
+            f"V_MUL_VV gp{scratch_lo}, gp{x_hi}, gp{sin_lo}, 0 ",
+            f"V_MUL_VV gp{scratch_hi}, gp{x_lo}, gp{sin_hi}, 0 ",
+            f"V_MUL_VV gp{x_lo}, gp{x_lo}, gp{cos_lo}, 0 ",
+            f"V_SUB_VV gp{x_lo}, gp{x_lo}, gp{scratch_lo}, 0 ",
+            f"V_MUL_VV gp{x_hi}, gp{x_hi}, gp{cos_hi}, 0 ",
+            f"V_ADD_VV gp{x_hi}, gp{x_hi}, gp{scratch_hi}, 0 ",
+        ]
+
+    lines = ["; RoPE (vector rotate-half): x = x * cos + [-x_hi, x_lo] * sin  (in-place)"]
+    lines.extend(_load_large_int_list(scratch_lo, scratchpad_base_address))
+    lines.extend(_load_large_int_list(scratch_hi, scratchpad_base_address + vlen))
+
+    pointers = (
+        (x_lo, x_hi, x_base_address),
+        (cos_lo, cos_hi, cos_base_address),
+        (sin_lo, sin_hi, sin_base_address),
+    )
+    if unroll:
+        for row in range(half_rows):
+            for lo_reg, hi_reg, base in pointers:
+                lines.extend(_load_large_int_list(lo_reg, base + row * vlen))
+                lines.extend(_load_large_int_list(hi_reg, base + half_offset + row * vlen))
+            lines.extend(body())
+    else:
+        # Like rope_asm, (chunk, row) over the lo half is one linear walk.
+        loop_reg = alive_registers[8]
+        for lo_reg, hi_reg, base in pointers:
+            lines.extend(_load_large_int_list(lo_reg, base))
+            lines.extend(_load_large_int_list(hi_reg, base + half_offset))
+        lines.append(f"C_LOOP_START gp{loop_reg}, {half_rows}")
+        lines.extend(body())
+        for lo_reg, hi_reg, _base in pointers:
+            lines.append(f"S_ADDI_INT gp{lo_reg}, gp{lo_reg}, {vlen} ")
+            lines.append(f"S_ADDI_INT gp{hi_reg}, gp{hi_reg}, {vlen} ")
+        lines.append(f"C_LOOP_END gp{loop_reg}")
+
+    return "\n".join(lines) + "\n"
@@ -15,7 +15,10 @@ sys.path.insert(0, str(_PROJECT_ROOT / "tools"))  # `quant` package lives here
 
 import unittest  # noqa: E402
 
-from compiler.asm_templates.vram_sub_projection_asm import vram_sub_projection_asm_impl  # noqa: E402
+from compiler.asm_templates.vram_sub_projection_asm import (  # noqa: E402
+    vram_sub_projection_accumulate_asm_impl,
+    vram_sub_projection_asm_impl,
+)
 
 
 def _base_kwargs(**overrides):
@@ -124,5 +127,53 @@ class TestVramSubProjectionAsmImpl(unittest.TestCase):
         self.assertEqual(method_out, free_out)
 
 
+def _accumulate_kwargs(**overrides):
+    kwargs = {
+        "mlen": 64,
+        "blen": 4,
+        "unroll_loops": False,
+        "header_lines": ["; header"],
+        "vram_row_start_addr": 0,
+        "mram_start_addr": 100,
+        "result_vram_addr": 8192,
+        "scratch_vram_addr": 12288,
+        "full_batch": 64,
+        "num_hidden_blocks": 2,
+        "mat_col_stride": 256,
+        "gp_regs": list(range(1, 10)),
+        "caller_name": "test",
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
+class TestVramSubProjectionAccumulateAsmImpl(unittest.TestCase):
+    def test_requires_9_gp_regs(self):
+        with self.assertRaises(ValueError) as cm:
+            vram_sub_projection_accumulate_asm_impl(**_accumulate_kwargs(gp_regs=list(range(1, 9))))
+        self.assertIn("requires at least 9 gp registers", str(cm.exception))
+
+    def test_looped_adds_strip_after_each_row_group(self):
+        """Row groups are the outer loop; the strip is added blen rows at a time."""
+        asm = vram_sub_projection_accumulate_asm_impl(**_accumulate_kwargs(row_loop_count=1))
+
+        self.assertIn("C_LOOP_START gp4, 1", asm)
+        self.assertIn("C_LOOP_START gp5, 16", asm)
+        self.assertIn("C_LOOP_START gp6, 4", asm)
+        self.assertIn("V_ADD_VV gp2, gp2, gp3, 0", asm)
+        self.assertEqual(asm.count("C_LOOP_END"), 4)
+        # The write-out must land in the strip, never in the result tile.
+        self.assertLess(asm.index("M_MM_WO"), asm.index("V_ADD_VV"))
+
+    def test_unrolled_touches_only_computed_rows(self):
+        """Unrolled: one V_ADD_VV per computed result row, none for skipped row groups."""
+        asm = vram_sub_projection_accumulate_asm_impl(**_accumulate_kwargs(unroll_loops=True, row_loop_count=2))
+
+        self.assertNotIn("C_LOOP_START", asm)
+        self.assertEqual(asm.count("M_MM_WO"), 2 * 16)
+        self.assertEqual(asm.count("M_MM 0,"), 2 * 16 * 2)
+        self.assertEqual(asm.count("V_ADD_VV"), 2 * 4)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -127,3 +127,107 @@ def vram_sub_projection_asm_impl(
         lines.append(f"C_LOOP_END gp{gp_loop_outer}")
 
     return "\n".join(lines) + "\n"
+
+
+def vram_sub_projection_accumulate_asm_impl(
+    mlen: int,
+    blen: int,
+    unroll_loops: bool,
+    header_lines: list[str],
+    vram_row_start_addr: int,
+    mram_start_addr: int,
+    result_vram_addr: int,
+    scratch_vram_addr: int,
+    full_batch: int,
+    num_hidden_blocks: int,
+    mat_col_stride: int,
+    gp_regs: list[int],
+    caller_name: str,
+    row_loop_count: int | None = None,
+) -> str:
+    """
+    K-split partial projection added in place into an existing result tile:
+        result[:, :] += VRAM A[row][k chunk] @ MRAM W[k chunk][col]
+
+    For each BLEN-row group the partial product is written (M_MM_WO) into a
+    (BLEN, MLEN) scratch strip and immediately added into the result rows with
+    V_ADD_VV. Each chunk is rounded on write-out and the sum rounded again,
+    exactly like writing the chunk to a temp tile and adding the two tiles,
+    but only the computed row groups are touched and no temp tile is needed.
+
+    Parameters as for ``vram_sub_projection_asm_impl`` (non-transposed), plus:
+        scratch_vram_addr -- VRAM address of a (blen, mlen) scratch strip
+
+    gp_regs needs at least 9 registers.
+    """
+    if len(gp_regs) < 9:
+        raise ValueError(f"{caller_name} requires at least 9 gp registers, got {len(gp_regs)}")
+
+    gp_act = gp_regs[0]
+    gp_mat = gp_regs[1]
+    gp_result = gp_regs[2]
+    gp_loop_outer = gp_regs[3]
+    gp_loop_middle = gp_regs[4]
+    gp_loop_inner = gp_regs[5]
+    gp_act_row_base = gp_regs[6]
+    gp_mat_col_base = gp_regs[7]
+    gp_out_row_base = gp_regs[8]
+
+    tiles_per_mlen = mlen // blen
+    vram_hidden_block_stride = full_batch * mlen
+    mram_hidden_block_stride = mlen * mlen
+    output_row_stride = blen * mlen
+    if row_loop_count is None:
+        row_loop_count = min(tiles_per_mlen, math.ceil(full_batch / blen))
+    else:
+        row_loop_count = min(tiles_per_mlen, row_loop_count)
+
+    lines = list(header_lines)
+
+    if unroll_loops:
+        for or_ in range(row_loop_count):
+            act_row_addr = vram_row_start_addr + or_ * output_row_stride
+            for oc in range(tiles_per_mlen):
+                mat_col_addr = mram_start_addr + oc * mat_col_stride
+                for ih in range(num_hidden_blocks):
+                    lines.extend(_load_large_int_list(gp_act, act_row_addr + ih * vram_hidden_block_stride))
+                    lines.extend(_load_large_int_list(gp_mat, mat_col_addr + ih * mram_hidden_block_stride))
+                    lines.append(f"M_MM 0, gp{gp_mat}, gp{gp_act}")
+                lines.extend(_load_large_int_list(gp_result, scratch_vram_addr + oc * blen))
+                lines.append(f"M_MM_WO gp{gp_result}, gp0, 0")
+            out_row_addr = result_vram_addr + or_ * output_row_stride
+            for r in range(blen):
+                lines.extend(_load_large_int_list(gp_mat, out_row_addr + r * mlen))
+                lines.extend(_load_large_int_list(gp_result, scratch_vram_addr + r * mlen))
+                lines.append(f"V_ADD_VV gp{gp_mat}, gp{gp_mat}, gp{gp_result}, 0")
+    else:
+        lines.extend(_load_large_int_list(gp_act_row_base, vram_row_start_addr))
+        lines.extend(_load_large_int_list(gp_out_row_base, result_vram_addr))
+        lines.append(f"C_LOOP_START gp{gp_loop_outer}, {row_loop_count}")
+        lines.extend(_load_large_int_list(gp_mat_col_base, mram_start_addr))
+        lines.extend(_load_large_int_list(gp_result, scratch_vram_addr))
+        lines.append(f"C_LOOP_START gp{gp_loop_middle}, {tiles_per_mlen}")
+        lines.append(f"S_ADDI_INT gp{gp_act}, gp{gp_act_row_base}, 0")
+        lines.append(f"S_ADDI_INT gp{gp_mat}, gp{gp_mat_col_base}, 0")
+        lines.append(f"C_LOOP_START gp{gp_loop_inner}, {num_hidden_blocks}")
+        lines.append(f"M_MM 0, gp{gp_mat}, gp{gp_act}")
+        lines.append(f"S_ADDI_INT gp{gp_act}, gp{gp_act}, {vram_hidden_block_stride}")
+        lines.append(f"S_ADDI_INT gp{gp_mat}, gp{gp_mat}, {mram_hidden_block_stride}")
+        lines.append(f"C_LOOP_END gp{gp_loop_inner}")
+        lines.append(f"M_MM_WO gp{gp_result}, gp0, 0")
+        lines.append(f"S_ADDI_INT gp{gp_result}, gp{gp_result}, {blen}")
+        lines.append(f"S_ADDI_INT gp{gp_mat_col_base}, gp{gp_mat_col_base}, {mat_col_stride}")
+        lines.append(f"C_LOOP_END gp{gp_loop_middle}")
+        # Add the finished strip into this row group of the result.
+        lines.extend(_load_large_int_list(gp_result, scratch_vram_addr))
+        lines.append(f"S_ADDI_INT gp{gp_mat}, gp{gp_out_row_base}, 0")
+        lines.append(f"C_LOOP_START gp{gp_loop_inner}, {blen}")
+        lines.append(f"V_ADD_VV gp{gp_mat}, gp{gp_mat}, gp{gp_result}, 0")
+        lines.append(f"S_ADDI_INT gp{gp_mat}, gp{gp_mat}, {mlen}")
+        lines.append(f"S_ADDI_INT gp{gp_result}, gp{gp_result}, {mlen}")
+        lines.append(f"C_LOOP_END gp{gp_loop_inner}")
+        lines.append(f"S_ADDI_INT gp{gp_act_row_base}, gp{gp_act_row_base}, {output_row_stride}")
+        lines.append(f"S_ADDI_INT gp{gp_out_row_base}, gp{gp_out_row_base}, {output_row_stride}")
+        lines.append(f"C_LOOP_END gp{gp_loop_outer}")
+
+    return "\n".join(lines) + "\n"
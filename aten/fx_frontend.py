@@ -0,0 +1,1152 @@
+"""torch.export graph to PLENA ISA compiler driven by the op registry.
+
+``compile_fx_module`` captures a module with ``torch.export``, pattern-matches
+the ATen graph into ``native_ops.yaml`` operators, schedules VRAM buffers from
+the registry's declared memory behaviour and emits the result through a
+``PlenaCompiler``.  The CPU golden dispatches the same lowered graph through
+the registry's CPU backend, so frontend and reference cannot drift apart.
+
+The pipeline is split into three passes that can be inspected separately:
+
+* ``lower_exported_program`` -- ATen nodes to ``GraphOp`` (linear, norms, FFN,
+  RoPE, per-head attention, residual add).  View chains between projections
+  and ``scaled_dot_product_attention`` are checked by replaying them on an
+  index tensor, so any spelling of the head split/merge is accepted.  Nodes
+  that only depend on parameters and buffers (position ids, RoPE tables,
+  masks) are folded to constants, so HF ``x * cos + rotate_half(x) * sin``
+  and decomposed ``x * rsqrt(mean(x**2) + eps)`` chains match as ``rope`` and
+  ``rms_norm``.
+* ``fuse_graph_ops`` -- folds ``linear -> silu -> mul -> linear`` chains into
+  the registry ``ffn`` operator.
+* ``schedule_graph`` -- last-use liveness, in-place reuse of dead operands,
+  HBM placement of FLASH_ATTN K/V operands and Belady spills under an
+  optional VRAM budget.
+
+A token-id input feeding ``aten.embedding`` is looked up on the host, like
+``compile_native_hf_decoder`` does, and the gathered rows are staged as the
+graph input.  Head packing and KV caches are not lowered here; models that
+need them still go through ``compile_native_hf_decoder``.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+import torch
+from compiler.aten import ops
+from compiler.aten.ops.registry import Backend, MemoryPattern, OpRegistry
+from compiler.aten.plena import PlenaCompiler
+from compiler.aten.plena.memory import VRAMPlan
+from compiler.aten.plena_frontend import (
+    REAL_DATA_RATIO,
+    _ceil_to_multiple,
+    _copy_into_vram_view,
+    _fix_large_immediates,
+    _free_named_tensors,
+    _load_and_add,
+    _load_and_mul,
+    _merge_constant_pool,
+    _pad_2d,
+    _repeat_feature_vector_storage,
+    _tensor_layout_metadata,
+)
+from compiler.aten.reference import (
+    ReferencePrecision,
+    _hbm_round_ref,
+    _make_rotate_half_matrix,
+    _round,
+)
+from torch.export.graph_signature import InputKind
+
+__all__ = [
+    "GraphOp",
+    "GraphValue",
+    "LoweredGraph",
+    "Schedule",
+    "ScheduleStep",
+    "compile_fx_module",
+    "fuse_graph_ops",
+    "lower_exported_program",
+    "schedule_graph",
+]
+
+aten = torch.ops.aten
+
+# Ops that only re-index their input; they are replayed on index tensors.
+_VIEW_TARGETS = {
+    aten.view.default,
+    aten.reshape.default,
+    aten._unsafe_view.default,
+    aten.transpose.int,
+    aten.permute.default,
+    aten.unsqueeze.default,
+    aten.squeeze.dim,
+    aten.squeeze.default,
+    aten.expand.default,
+    aten.clone.default,
+    aten.contiguous.default,
+    aten.alias.default,
+    aten.t.default,
+    aten.slice.Tensor,
+}
+
+# Elementwise graph ops that are not registry operators.  ``add`` runs in
+# place on whichever operand dies; ``silu``/``mul`` only exist until fusion.
+_VECTOR_OPS = {"add", "silu", "mul"}
+
+
+@dataclass(frozen=True)
+class GraphValue:
+    """One 2-D activation of the lowered graph (logical rows x cols)."""
+
+    name: str
+    rows: int
+    cols: int
+
+
+@dataclass
+class GraphOp:
+    """One registry-level operation produced by pattern matching.
+
+    ``params`` maps a role (``weight``, ``bias``, ``w_gate`` ...) to a
+    parameter name of the exported program, or ``None`` when absent.
+    """
+
+    name: str
+    op: str
+    inputs: tuple[str, ...]
+    output: str
+    params: dict[str, str | None] = field(default_factory=dict)
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class LoweredGraph:
+    """Registry ops in program order plus the tensors they reference."""
+
+    input_name: str
+    output_name: str
+    values: dict[str, GraphValue]
+    params: dict[str, torch.Tensor]
+    ops: list[GraphOp]
+    # Embedding table the input is gathered from on the host, if any.
+    embedding: str | None = None
+
+
+@dataclass(frozen=True)
+class ScheduleStep:
+    """One emission step.
+
+    ``kind`` is ``op``, ``copy`` (fresh buffer for an in-place op whose input
+    is still live), ``store`` (place a FLASH_ATTN operand in HBM), ``free``,
+    ``spill`` or ``reload``.  ``target`` is the value whose buffer an in-place
+    op overwrites.
+    """
+
+    kind: str
+    value: str
+    op: GraphOp | None = None
+    source: str | None = None
+    target: str | None = None
+
+
+@dataclass
+class Schedule:
+    """Emission steps plus the activation footprint they were planned for."""
+
+    steps: list[ScheduleStep]
+    peak_live_elems: int
+    spilled: list[str]
+
+
+@dataclass
+class _Ref:
+    """A (possibly re-indexed) view of a lowered value.
+
+    ``index`` holds, per element of the view, the flat offset into the value's
+    row-major (rows, cols) layout.
+    """
+
+    value: str
+    index: torch.Tensor
+
+
+@dataclass
+class _RmsStat:
+    """Partial ``rsqrt(mean(x**2, -1) + eps)`` of a decomposed RMSNorm.
+
+    ``stage`` is ``square``, ``mean_square``, ``mean_square_eps`` or ``inv_rms``.
+    """
+
+    stage: str
+    value: str
+    eps: float = 0.0
+
+
+@dataclass
+class _RopeTerm:
+    """Partial ``x * cos + rotate_half(x) * sin`` on the head split ``ref``.
+
+    ``stage`` is ``neg`` (negated half), ``rotate_half``, ``x_cos`` or
+    ``rot_sin``; ``table`` names the folded cos/sin constant.
+    """
+
+    stage: str
+    ref: _Ref
+    table: str | None = None
+
+
+def _identity_index(rows: int, cols: int) -> torch.Tensor:
+    return torch.arange(rows * cols).view(rows, cols)
+
+
+def _heads_index(rows: int, num_heads: int, head_dim: int) -> torch.Tensor:
+    return _identity_index(rows, num_heads * head_dim).view(rows, num_heads, head_dim).transpose(0, 1)
+
+
+def _node_name(arg) -> str:
+    return arg.name if isinstance(arg, torch.fx.Node) else repr(arg)
+
+
+def _squeeze_batch(index: torch.Tensor) -> torch.Tensor:
+    """Drop a leading batch dim of 1 (HF modules run on (1, seq, hidden))."""
+    return index.squeeze(0) if index.dim() == 3 and index.shape[0] == 1 else index
+
+
+def lower_exported_program(exported: torch.export.ExportedProgram) -> LoweredGraph:
+    """Pattern-match an exported ATen graph into registry-level ``GraphOp``s.
+
+    The program must take one activation -- (seq, hidden), (1, seq, hidden),
+    or token ids consumed by an ``aten.embedding`` -- and return one; every
+    other placeholder must be a parameter or buffer.
+    """
+    exported = exported.run_decompositions({})
+    state = dict(exported.state_dict)
+    state.update(exported.constants)
+    specs = {spec.arg.name: spec for spec in exported.graph_signature.input_specs}
+
+    params: dict[str, torch.Tensor] = {}
+    consts: dict[str, Any] = {}
+    values: dict[str, GraphValue] = {}
+    graph_ops: list[GraphOp] = []
+    env: dict[str, Any] = {}
+    input_name = None
+    output_name = None
+    token_ids = None
+    embedding = None
+
+    def new_value(name: str, rows: int, cols: int) -> _Ref:
+        values[name] = GraphValue(name, rows, cols)
+        return _Ref(name, _identity_index(rows, cols))
+
+    def head_value(name: str, rows: int, num_heads: int, head_dim: int, like: torch.Tensor) -> _Ref:
+        # Stored merged as (seq, heads*head_dim) but keeps the [1,] heads x
+        # seq x head_dim indexing of the operand it was computed from.
+        values[name] = GraphValue(name, rows, num_heads * head_dim)
+        index = _heads_index(rows, num_heads, head_dim)
+        return _Ref(name, index.unsqueeze(0) if like.dim() == 4 else index)
+
+    def lookup(arg):
+        if not isinstance(arg, torch.fx.Node):
+            return arg
+        return env[arg.name] if arg.name in env else consts.get(arg.name)
+
+    def matrix(arg) -> str:
+        ref = env.get(_node_name(arg))
+        if not isinstance(ref, _Ref):
+            raise NotImplementedError(f"{_node_name(arg)} is not a lowered activation")
+        value = values[ref.value]
+        if not torch.equal(_squeeze_batch(ref.index), _identity_index(value.rows, value.cols)):
+            raise NotImplementedError(f"{_node_name(arg)} is a re-indexed view of {ref.value}, not a matrix")
+        return ref.value
+
+    def head_split(ref, what: str) -> tuple[str, int, int, int]:
+        """Return (value, stored heads, head_dim, view heads) for a [1,] H x T x D split."""
+        if not isinstance(ref, _Ref):
+            raise NotImplementedError(f"{what} is not a lowered activation")
+        index = ref.index.squeeze(0) if ref.index.dim() == 4 and ref.index.shape[0] == 1 else ref.index
+        if index.dim() != 3:
+            raise NotImplementedError(f"attention operand {what} must be [1,] heads x seq x head_dim")
+        value = values[ref.value]
+        view_heads, rows, head_dim = index.shape
+        stored_heads = value.cols // head_dim
+        if rows != value.rows or stored_heads * head_dim != value.cols or view_heads % stored_heads:
+            raise NotImplementedError(f"{what} is not a head split of {ref.value}")
+        expected = _heads_index(rows, stored_heads, head_dim)
+        if view_heads != stored_heads:
+            # repeat_kv-style GQA broadcast of stored_heads KV heads.
+            expected = expected.repeat_interleave(view_heads // stored_heads, dim=0)
+        if not torch.equal(index, expected):
+            raise NotImplementedError(f"{what} is not a head split of {ref.value}")
+        return ref.value, stored_heads, head_dim, view_heads
+
+    def heads(arg) -> tuple[str, int, int]:
+        """Return (value, heads, head_dim) for a [1,] H x T x D head split of a value."""
+        value, stored_heads, head_dim, _ = head_split(env.get(_node_name(arg)), _node_name(arg))
+        return value, stored_heads, head_dim
+
+    def param(arg, role: str) -> str | None:
+        if arg is None:
+            return None
+        name = _node_name(arg)
+        if name not in params:
+            raise NotImplementedError(f"{role} {name} must be a module parameter or buffer")
+        return name
+
+    def fold(node) -> bool:
+        """Evaluate ``node`` if it only depends on parameters, buffers and folded nodes."""
+        if any(arg.name not in consts for arg in node.all_input_nodes):
+            return False
+        args, kwargs = torch.fx.node.map_arg((node.args, node.kwargs), lambda arg: consts[arg.name])
+        consts[node.name] = node.target(*args, **kwargs)
+        return True
+
+    def rope_table(arg, ref: _Ref) -> str | None:
+        """Register a folded cos/sin constant that broadcasts over the heads of ``ref``."""
+        table = consts.get(_node_name(arg))
+        rows, head_dim = ref.index.shape[-2:]
+        if not isinstance(table, torch.Tensor) or table.dim() < 2 or table.numel() != rows * head_dim:
+            return None
+        if tuple(table.shape[-2:]) != (rows, head_dim):
+            return None
+        params.setdefault(arg.name, table.detach().reshape(rows, head_dim).float())
+        return arg.name
+
+    def lower_rms(node, a, b) -> bool:
+        """Match the steps of HF's decomposed RMSNorm; False if ``node`` is not one."""
+        if node.target == aten.add.Tensor and isinstance(a, _RmsStat) and isinstance(b, (int, float)):
+            if a.stage != "mean_square":
+                return False
+            env[node.name] = _RmsStat("mean_square_eps", a.value, float(b))
+            return True
+        if node.target != aten.mul.Tensor:
+            return False
+        for (stat, x_arg), other in (((b, node.args[0]), a), ((a, node.args[1]), b)):
+            if isinstance(stat, _RmsStat) and stat.stage == "inv_rms":
+                x = matrix(x_arg)
+                if x != stat.value:
+                    raise NotImplementedError(f"{node.name}: RMS scale of {stat.value} applied to {x}")
+                env[node.name] = new_value(node.name, values[x].rows, values[x].cols)
+                graph_ops.append(
+                    GraphOp(node.name, "rms_norm", (x,), node.name, {"weight": None, "bias": None}, {"eps": stat.eps})
+                )
+                return True
+        # ``weight * norm(x)`` folds into the norm when nothing else reads norm(x).
+        for weight_arg, x_arg in ((node.args[0], node.args[1]), (node.args[1], node.args[0])):
+            if not isinstance(weight_arg, torch.fx.Node) or weight_arg.name not in params:
+                continue
+            norm = graph_ops[-1] if graph_ops else None
+            x = env.get(_node_name(x_arg))
+            if norm is None or norm.op != "rms_norm" or not isinstance(x, _Ref) or x.value != norm.output:
+                continue
+            readers = [user for user in x_arg.users if user.target != aten._assert_tensor_metadata.default]
+            if norm.params["weight"] is not None or readers != [node]:
+                continue
+            if params[weight_arg.name].shape != (values[norm.output].cols,):
+                raise NotImplementedError(f"{node.name}: norm weight {weight_arg.name} is not a feature vector")
+            norm.params["weight"] = weight_arg.name
+            env[node.name] = x
+            return True
+        return False
+
+    def lower_rope(node, a, b) -> bool:
+        """Match the steps of ``x * cos + rotate_half(x) * sin``; False if ``node`` is not one."""
+        if node.target == aten.mul.Tensor:
+            for term, table_arg in ((a, node.args[1]), (b, node.args[0])):
+                if isinstance(term, _Ref) and term.index.dim() >= 3:
+                    table = rope_table(table_arg, term)
+                    if table is not None:
+                        env[node.name] = _RopeTerm("x_cos", term, table)
+                        return True
+                if isinstance(term, _RopeTerm) and term.stage == "rotate_half":
+                    table = rope_table(table_arg, term.ref)
+                    if table is not None:
+                        env[node.name] = _RopeTerm("rot_sin", term.ref, table)
+                        return True
+            return False
+        if not (isinstance(a, _RopeTerm) and isinstance(b, _RopeTerm)):
+            return False
+        x_cos, rot_sin = (a, b) if a.stage == "x_cos" else (b, a)
+        if (x_cos.stage, rot_sin.stage) != ("x_cos", "rot_sin"):
+            raise NotImplementedError(f"{node.name}: {a.stage} + {b.stage} is not a RoPE")
+        if x_cos.ref.value != rot_sin.ref.value or not torch.equal(x_cos.ref.index, rot_sin.ref.index):
+            raise NotImplementedError(f"{node.name}: RoPE cos and sin terms rotate different tensors")
+        value, num_heads, head_dim, view_heads = head_split(x_cos.ref, node.name)
+        if view_heads != num_heads:
+            raise NotImplementedError(f"{node.name}: RoPE after a GQA broadcast is not supported")
+        rotate = f"rotate_half_{head_dim}"
+        params.setdefault(rotate, _make_rotate_half_matrix(head_dim))
+        env[node.name] = head_value(node.name, values[value].rows, num_heads, head_dim, x_cos.ref.index)
+        graph_ops.append(
+            GraphOp(
+                node.name,
+                "rope",
+                (value,),
+                node.name,
+                {"rotate": rotate, "cos": x_cos.table, "sin": rot_sin.table},
+                {"num_heads": num_heads, "head_dim": head_dim},
+            )
+        )
+        return True
+
+    for node in exported.graph.nodes:
+        if node.op == "placeholder":
+            spec = specs[node.name]
+            if spec.kind == InputKind.USER_INPUT:
+                val = node.meta["val"]
+                shape = tuple(val.shape)
+                if input_name is not None or token_ids is not None:
+                    raise NotImplementedError("compile_fx_module takes exactly one activation input")
+                if not val.is_floating_point():
+                    token_ids = node.name
+                elif len(shape) == 2 or (len(shape) == 3 and shape[0] == 1):
+                    input_name = node.name
+                    ref = new_value(node.name, *shape[-2:])
+                    env[node.name] = _Ref(node.name, ref.index.view(shape))
+                else:
+                    raise NotImplementedError("compile_fx_module takes a (seq, hidden) or (1, seq, hidden) input")
+            elif spec.kind in (InputKind.PARAMETER, InputKind.BUFFER, InputKind.CONSTANT_TENSOR):
+                params[node.name] = state[spec.target].detach().float()
+                consts[node.name] = state[spec.target].detach()
+            else:
+                raise NotImplementedError(f"unsupported placeholder kind {spec.kind} for {node.name}")
+            continue
+        if node.op == "output":
+            (result,) = node.args[0]
+            output_name = matrix(result)
+            continue
+        if node.op != "call_function":
+            raise NotImplementedError(f"unsupported FX node {node.op} {node.name}")
+
+        target = node.target
+        args = node.args
+        if target == aten._assert_tensor_metadata.default:
+            continue  # dtype/device guards on traced tensors
+        if fold(node):
+            continue
+        if target in _VIEW_TARGETS:
+            ref = env.get(_node_name(args[0]))
+            if not isinstance(ref, _Ref):
+                raise NotImplementedError(f"{node.name}: view of a non-activation {_node_name(args[0])}")
+            env[node.name] = _Ref(ref.value, target(ref.index, *args[1:], **node.kwargs))
+        elif target == aten.embedding.default:
+            if token_ids is None or _node_name(args[1]) != token_ids or embedding is not None:
+                raise NotImplementedError(f"{node.name}: only the token-id input can be embedded, once")
+            embedding = param(args[0], "embedding table")
+            shape = tuple(node.meta["val"].shape)
+            input_name = node.name
+            ref = new_value(node.name, math.prod(shape[:-1]), shape[-1])
+            env[node.name] = _Ref(node.name, ref.index.view(shape))
+        elif target == aten.linear.default:
+            x = matrix(args[0])
+            weight = param(args[1], "linear weight")
+            bias = param(args[2] if len(args) > 2 else None, "linear bias")
+            out_features, in_features = params[weight].shape
+            if in_features != values[x].cols:
+                raise ValueError(f"{node.name}: weight expects {in_features} features, {x} has {values[x].cols}")
+            env[node.name] = new_value(node.name, values[x].rows, out_features)
+            graph_ops.append(GraphOp(node.name, "linear", (x,), node.name, {"weight": weight, "bias": bias}))
+        elif target in (aten.rms_norm.default, aten.layer_norm.default):
+            x = matrix(args[0])
+            if list(args[1]) != [values[x].cols]:
+                raise NotImplementedError(f"{node.name}: only last-dim normalization is supported")
+            if target == aten.rms_norm.default:
+                op_name = "rms_norm"
+                norm_params = {"weight": param(args[2] if len(args) > 2 else None, "norm weight"), "bias": None}
+                eps = args[3] if len(args) > 3 and args[3] is not None else torch.finfo(torch.float32).eps
+            else:
+                op_name = "layer_norm"
+                norm_params = {
+                    "weight": param(args[2] if len(args) > 2 else None, "norm weight"),
+                    "bias": param(args[3] if len(args) > 3 else None, "norm bias"),
+                }
+                eps = args[4] if len(args) > 4 else 1e-5
+            env[node.name] = new_value(node.name, values[x].rows, values[x].cols)
+            graph_ops.append(GraphOp(node.name, op_name, (x,), node.name, norm_params, {"eps": float(eps)}))
+        elif target == aten.pow.Tensor_Scalar and args[1] == 2:
+            env[node.name] = _RmsStat("square", matrix(args[0]))
+        elif target == aten.mean.dim:
+            stat = lookup(args[0])
+            keepdim = args[2] if len(args) > 2 else node.kwargs.get("keepdim", False)
+            if not isinstance(stat, _RmsStat) or stat.stage != "square" or list(args[1]) != [-1] or not keepdim:
+                raise NotImplementedError(f"{node.name}: only the mean of an RMSNorm square is supported")
+            env[node.name] = _RmsStat("mean_square", stat.value)
+        elif target == aten.rsqrt.default:
+            stat = lookup(args[0])
+            if not isinstance(stat, _RmsStat) or stat.stage != "mean_square_eps":
+                raise NotImplementedError(f"{node.name}: only the rsqrt of an RMSNorm mean square is supported")
+            env[node.name] = _RmsStat("inv_rms", stat.value, stat.eps)
+        elif target == aten.neg.default:
+            ref = lookup(args[0])
+            if not isinstance(ref, _Ref):
+                raise NotImplementedError(f"{node.name}: negation is only lowered inside rotate_half")
+            env[node.name] = _RopeTerm("neg", ref)
+        elif target == aten.cat.default:
+            parts = [lookup(arg) for arg in args[0]]
+            dim = args[1] if len(args) > 1 else 0
+            if len(parts) != 2 or not isinstance(parts[0], _RopeTerm) or parts[0].stage != "neg":
+                raise NotImplementedError(f"{node.name}: only rotate_half concatenations are supported")
+            upper, lower = parts[0].ref, parts[1]
+            if (
+                not isinstance(lower, _Ref)
+                or lower.value != upper.value
+                or lower.index.shape != upper.index.shape
+                or dim not in (-1, lower.index.dim() - 1)
+            ):
+                raise NotImplementedError(f"{node.name}: only rotate_half concatenations are supported")
+            # rotate_half(x) = cat(-x[..., half:], x[..., :half]) of x = cat(lower, upper).
+            env[node.name] = _RopeTerm("rotate_half", _Ref(lower.value, torch.cat([lower.index, upper.index], -1)))
+        elif target in (aten.add.Tensor, aten.mul.Tensor):
+            if node.kwargs.get("alpha", 1) != 1:
+                raise NotImplementedError(f"{node.name}: add with alpha is not supported")
+            a, b = lookup(args[0]), lookup(args[1])
+            if lower_rms(node, a, b) or lower_rope(node, a, b):
+                continue
+            a, b = matrix(args[0]), matrix(args[1])
+            if (values[a].rows, values[a].cols) != (values[b].rows, values[b].cols):
+                raise NotImplementedError(f"{node.name}: broadcasting {a} and {b} is not supported")
+            op_name = "add" if target == aten.add.Tensor else "mul"
+            env[node.name] = new_value(node.name, values[a].rows, values[a].cols)
+            graph_ops.append(GraphOp(node.name, op_name, (a, b), node.name))
+        elif target == aten.silu.default:
+            x = matrix(args[0])
+            env[node.name] = new_value(node.name, values[x].rows, values[x].cols)
+            graph_ops.append(GraphOp(node.name, "silu", (x,), node.name))
+        elif target == aten.scaled_dot_product_attention.default:
+            kwargs = dict(zip(("attn_mask", "dropout_p", "is_causal"), args[3:]))
+            kwargs.update(node.kwargs)
+            if kwargs.get("dropout_p", 0.0) != 0.0:
+                raise NotImplementedError(f"{node.name}: attention dropout is not supported")
+            causal = bool(kwargs.get("is_causal", False))
+            if kwargs.get("attn_mask") is not None:
+                # HF builds its mask from positions only, so it folds to a constant.
+                mask = consts.get(_node_name(kwargs["attn_mask"]))
+                if not isinstance(mask, torch.Tensor) or mask.dtype != torch.bool:
+                    raise NotImplementedError(f"{node.name}: only constant boolean attention masks are supported")
+                mask = mask.reshape(-1, *mask.shape[-2:])
+                tril = torch.ones(mask.shape[-2:], dtype=torch.bool).tril()
+                if bool((mask == tril).all()) and not causal:
+                    causal = True
+                elif not bool(mask.all()):
+                    raise NotImplementedError(f"{node.name}: attention masks other than causal are not supported")
+            q, num_heads, head_dim = heads(args[0])
+            k, num_kv_heads, _ = heads(args[1])
+            v, v_heads, _ = heads(args[2])
+            if num_kv_heads != v_heads or num_heads % num_kv_heads:
+                raise NotImplementedError(f"{node.name}: K/V head counts {num_kv_heads}/{v_heads} do not group Q")
+            scale = kwargs.get("scale")
+            env[node.name] = head_value(node.name, values[q].rows, num_heads, head_dim, env[_node_name(args[0])].index)
+            graph_ops.append(
+                GraphOp(
+                    node.name,
+                    "flash_attention",
+                    (q, k, v),
+                    node.name,
+                    attrs={
+                        "num_heads": num_heads,
+                        "num_kv_heads": num_kv_heads,
+                        "head_dim": head_dim,
+                        "scale": float(scale) if scale is not None else 1.0 / math.sqrt(head_dim),
+                        "causal": causal,
+                    },
+                )
+            )
+        else:
+            raise NotImplementedError(f"no PLENA lowering for {target} ({node.name})")
+
+    if input_name is None or output_name is None:
+        raise NotImplementedError("exported program has no activation input or output")
+    return LoweredGraph(input_name, output_name, values, params, graph_ops, embedding)
+
+
+def fuse_graph_ops(graph: LoweredGraph) -> LoweredGraph:
+    """Fold ``down(silu(gate(x)) * up(x))`` chains into the registry ``ffn`` op.
+
+    PLENA's FFN applies SiLU to its ``w_up`` operand, so the model's SiLU'd
+    projection is bound to ``w_up`` and the other one to ``w_gate``.  Every
+    intermediate must have exactly one consumer and no projection may carry
+    a bias.
+    """
+    producers = {op.output: op for op in graph.ops}
+    uses: dict[str, int] = {}
+    for op in graph.ops:
+        for name in op.inputs:
+            uses[name] = uses.get(name, 0) + 1
+
+    def sole_producer(name: str, kind: str) -> GraphOp | None:
+        op = producers.get(name)
+        if op is None or op.op != kind or uses.get(name) != 1 or name == graph.output_name:
+            return None
+        return op
+
+    fused: dict[str, GraphOp] = {}
+    removed: set[str] = set()
+    for down in graph.ops:
+        if down.op != "linear" or down.params["bias"] is not None:
+            continue
+        mul = sole_producer(down.inputs[0], "mul")
+        if mul is None:
+            continue
+        for silu_in, other in (mul.inputs, mul.inputs[::-1]):
+            silu = sole_producer(silu_in, "silu")
+            act = sole_producer(silu.inputs[0], "linear") if silu is not None else None
+            gate = sole_producer(other, "linear")
+            if act is None or gate is None or act.inputs != gate.inputs:
+                continue
+            if act.params["bias"] is not None or gate.params["bias"] is not None:
+                continue
+            fused[down.name] = GraphOp(
+                down.name,
+                "ffn",
+                act.inputs,
+                down.output,
+                {"w_gate": gate.params["weight"], "w_up": act.params["weight"], "w_down": down.params["weight"]},
+            )
+            removed.update(op.name for op in (act, gate, silu, mul))
+            break
+
+    graph_ops = [fused.get(op.name, op) for op in graph.ops if op.name not in removed]
+    return LoweredGraph(graph.input_name, graph.output_name, graph.values, graph.params, graph_ops, graph.embedding)
+
+
+def _op_placement(op: GraphOp, registry: OpRegistry) -> tuple[bool, MemoryPattern]:
+    """(in_place, memory_pattern) of a lowered op, from the registry where declared."""
+    if op.op in _VECTOR_OPS:
+        if op.op != "add":
+            raise NotImplementedError(f"{op.name}: {op.op} has no PLENA lowering outside a fused FFN")
+        return True, MemoryPattern.BATCH_ONLY
+    schema = registry.get_op(op.op)
+    return schema.in_place, schema.plena_backend.memory_pattern
+
+
+def schedule_graph(
+    graph: LoweredGraph,
+    value_elems,
+    *,
+    registry: OpRegistry | None = None,
+    vram_budget: int | None = None,
+) -> Schedule:
+    """Order buffer steps around the lowered ops.
+
+    * Values are freed right after their last use.
+    * Registry ``in_place`` ops overwrite a dead operand; if every candidate
+      operand is still live the schedule copies it into a fresh buffer first.
+    * FLASH_ATTN operands after Q are streamed from HBM, so K/V are stored
+      (and freed if dead) before attention runs.
+    * With ``vram_budget`` (elements), the live value not needed by the
+      current op whose next use is furthest away is spilled to HBM and
+      reloaded right before that use.  Op-internal scratch is not counted.
+    """
+    registry = registry or OpRegistry.get()
+    num_ops = len(graph.ops)
+    use_positions: dict[str, list[int]] = {}
+    for i, op in enumerate(graph.ops):
+        for name in op.inputs:
+            use_positions.setdefault(name, []).append(i)
+    use_positions.setdefault(graph.output_name, []).append(num_ops)
+
+    def last_use(name: str) -> int:
+        return use_positions.get(name, [-1])[-1]
+
+    def next_use(name: str, after: int) -> int:
+        return next((i for i in use_positions.get(name, ()) if i > after), num_ops + 1)
+
+    steps: list[ScheduleStep] = []
+    # Buffers are named after the value that allocated them; in-place ops
+    # hand a buffer to their output, which becomes its owner.
+    live: dict[str, int] = {graph.input_name: value_elems(graph.input_name)}
+    buffer_of: dict[str, str] = {graph.input_name: graph.input_name}
+    owner: dict[str, str] = {graph.input_name: graph.input_name}
+    spilled: set[str] = set()
+    spill_log: list[str] = []
+    peak = sum(live.values())
+
+    for i, op in enumerate(graph.ops):
+        in_place, pattern = _op_placement(op, registry)
+        operands = list(dict.fromkeys(op.inputs))
+        for name in operands:
+            if name in spilled:
+                steps.append(ScheduleStep("reload", name))
+                spilled.discard(name)
+                live[buffer_of[name]] = value_elems(name)
+        if pattern == MemoryPattern.FLASH_ATTN:
+            for name in dict.fromkeys(op.inputs[1:]):
+                steps.append(ScheduleStep("store", name, op=op))
+                if last_use(name) == i and name not in op.inputs[:1]:
+                    steps.append(ScheduleStep("free", name))
+                    live.pop(buffer_of[name], None)
+                    operands.remove(name)
+
+        copy = None
+        if in_place:
+            candidates = op.inputs[:1] if op.op != "add" else op.inputs
+            target = next((name for name in candidates if last_use(name) == i), None)
+            if target is None:
+                copy = ScheduleStep("copy", op.output, source=op.inputs[0])
+                target = op.output
+                buffer_of[op.output] = op.output
+                live[op.output] = value_elems(op.output)
+            else:
+                buffer_of[op.output] = buffer_of[target]
+        else:
+            target = None
+            buffer_of[op.output] = op.output
+            live[op.output] = value_elems(op.output)
+        owner[buffer_of[op.output]] = op.output
+
+        if vram_budget is not None:
+            needed = {buffer_of[name] for name in operands} | {buffer_of[op.output]}
+            while sum(live.values()) > vram_budget:
+                victims = [owner[buf] for buf in live if buf not in needed]
+                if not victims:
+                    break
+                victim = max(victims, key=lambda name: next_use(name, i))
+                steps.append(ScheduleStep("spill", victim))
+                spilled.add(victim)
+                spill_log.append(victim)
+                del live[buffer_of[victim]]
+        peak = max(peak, sum(live.values()))
+
+        if copy is not None:
+            steps.append(copy)
+        steps.append(ScheduleStep("op", op.output, op=op, target=target))
+        for name in operands:
+            if last_use(name) == i and buffer_of[name] != buffer_of[op.output]:
+                steps.append(ScheduleStep("free", name))
+                live.pop(buffer_of[name], None)
+
+    return Schedule(steps, peak, spill_log)
+
+
+def _register_graph_inputs(prog, graph: LoweredGraph, *, rows: int, padded_rows: int, mlen: int):
+    """Declare every parameter in HBM in the layout its consumer loads it."""
+    tensors: dict[str, torch.Tensor] = {}
+    for op in graph.ops:
+        for role, name in op.params.items():
+            if name is None or name in tensors:
+                continue
+            tensor = graph.params[name]
+            if role in ("cos", "sin", "rotate"):
+                # RoPE tables are (seq, head_dim) rows; rotate_half is applied as x @ R.
+                tensors[name] = _pad_2d(
+                    tensor,
+                    padded_rows if role != "rotate" else _ceil_to_multiple(tensor.shape[0], mlen),
+                    _ceil_to_multiple(tensor.shape[1], mlen),
+                )
+            elif tensor.dim() == 2:
+                # Registry linear/ffn compute x @ weight, i.e. the transposed nn.Linear weight.
+                weight = tensor.t()
+                tensors[name] = _pad_2d(
+                    weight,
+                    _ceil_to_multiple(weight.shape[0], mlen),
+                    _ceil_to_multiple(weight.shape[1], mlen),
+                )
+            elif tensor.dim() == 1:
+                tensors[name] = _repeat_feature_vector_storage(
+                    tensor,
+                    batch_size=1,
+                    seq_len=rows,
+                    rows_per_batch=padded_rows,
+                    cols=_ceil_to_multiple(tensor.numel(), mlen),
+                )
+            else:
+                raise NotImplementedError(f"{op.name}: {role} {name} has shape {tuple(tensor.shape)}")
+    inputs = {name: prog.input(name, shape=tuple(tensor.shape)) for name, tensor in tensors.items()}
+    return tensors, inputs
+
+
+def _emit_graph_op(prog, step: ScheduleStep, graph: LoweredGraph, vars_, stored, inputs, *, padded_rows: int):
+    op = step.op
+    out = graph.values[op.output]
+    if op.op == "linear":
+        result = ops.linear(prog, vars_[op.inputs[0]], inputs[op.params["weight"]], name=op.output)
+        if op.params["bias"] is not None:
+            _load_and_add(prog, result, inputs[op.params["bias"]], f"{op.name}_bias")
+        vars_[op.output] = result
+    elif op.op in ("rms_norm", "layer_norm"):
+        result = vars_[step.target]
+        norm = ops.rms_norm if op.op == "rms_norm" else ops.layer_norm
+        norm(prog, result, eps_offset=3, reci_hid_offset=4)
+        if op.params["weight"] is not None:
+            _load_and_mul(prog, result, inputs[op.params["weight"]], f"{op.name}_gamma")
+        if op.params["bias"] is not None:
+            _load_and_add(prog, result, inputs[op.params["bias"]], f"{op.name}_beta")
+        vars_[op.output] = result
+    elif op.op == "ffn":
+        vars_[op.output] = ops.ffn(
+            prog,
+            vars_[step.target],
+            inputs[op.params["w_gate"]],
+            inputs[op.params["w_up"]],
+            inputs[op.params["w_down"]],
+        )
+    elif op.op == "rope":
+        head_dim = op.attrs["head_dim"]
+        result = vars_[step.target]
+        base = prog.get_vram_addr(result.name)
+        cos = prog.load_batch(inputs[op.params["cos"]], name=f"{op.name}_cos")
+        sin = prog.load_batch(inputs[op.params["sin"]], name=f"{op.name}_sin")
+        for h in range(op.attrs["num_heads"]):
+            x_h = prog.alloc_at(
+                f"{op.name}_h{h}",
+                padded_rows,
+                head_dim,
+                base + h * padded_rows * head_dim,
+                physical_shape=(padded_rows, head_dim),
+            )
+            prog.apply_rope(x_h, inputs[op.params["rotate"]], cos, sin, name=f"{op.name}_rot_h{h}")
+            _free_named_tensors(prog, (x_h.name,))
+        prog.free_tensor(cos)
+        prog.free_tensor(sin)
+        vars_[op.output] = result
+    elif op.op == "add":
+        a, b = op.inputs
+        other = a if step.target == b else b
+        prog.vram_add(vars_[step.target], vars_[other])
+        vars_[op.output] = vars_[step.target]
+    elif op.op == "flash_attention":
+        attrs = op.attrs
+        head_dim = attrs["head_dim"]
+        ratio = attrs["num_heads"] // attrs["num_kv_heads"]
+        q_addr = prog.get_vram_addr(vars_[op.inputs[0]].name)
+        o_full = prog.alloc(
+            op.output,
+            padded_rows,
+            out.cols,
+            strict=False,
+            physical_shape=(padded_rows, out.cols),
+        )
+        prog.vram_fill_zero(o_full)
+        o_addr = prog.get_vram_addr(o_full.name)
+        head_stride = padded_rows * head_dim
+        for h in range(attrs["num_heads"]):
+            q_h = prog.alloc_at(
+                f"{op.name}_q_h{h}",
+                padded_rows,
+                head_dim,
+                q_addr + h * head_stride,
+                physical_shape=(padded_rows, head_dim),
+            )
+            o_h = ops.flash_attention(
+                prog,
+                q_h,
+                stored[op.inputs[1]][h // ratio],
+                stored[op.inputs[2]][h // ratio],
+                attrs["scale"],
+                causal_mask=True if attrs["causal"] else None,
+                seq_len=out.rows,
+                kv_seq_len=out.rows,
+            )
+            _copy_into_vram_view(prog, o_h, f"{op.name}_o_h{h}", padded_rows, head_dim, o_addr + h * head_stride)
+            # Drop the per-head views too, so the operands stay spillable.
+            _free_named_tensors(prog, ("O", "S", "PV", q_h.name, f"{op.name}_o_h{h}"))
+        vars_[op.output] = o_full
+    else:
+        raise NotImplementedError(f"{op.name}: no PLENA emitter for {op.op}")
+
+
+def _store_heads(prog, var, value: GraphValue, head_dim: int, *, padded_rows: int):
+    """Store each head's column blocks of ``var`` as its own HBM tensor."""
+    base = prog.get_vram_addr(var.name)
+    stored = []
+    for h in range(value.cols // head_dim):
+        view = prog.alloc_at(
+            f"{value.name}_h{h}",
+            padded_rows,
+            head_dim,
+            base + h * padded_rows * head_dim,
+            physical_shape=(padded_rows, head_dim),
+        )
+        stored.append(prog.store(view, name=f"{value.name}_stored_h{h}"))
+        _free_named_tensors(prog, (view.name,))
+    return stored
+
+
+def _run_graph_reference(
+    graph: LoweredGraph,
+    schedule: Schedule,
+    x: torch.Tensor,
+    precision: ReferencePrecision,
+) -> torch.Tensor:
+    """Dispatch the scheduled graph through the registry's CPU backend.
+
+    Stores and spills round through HBM precision exactly where the schedule
+    places them.
+    """
+    registry = OpRegistry.get()
+
+    def cpu(name, *args, **kwargs):
+        return _round(registry.dispatch(name, *args, backend=Backend.CPU, **kwargs), precision)
+
+    def weight(name):
+        return precision.quantize(graph.params[name].t().contiguous())
+
+    def vector(name):
+        return precision.quantize(graph.params[name].unsqueeze(0)).squeeze(0)
+
+    def head(t, h, head_dim):
+        return t[:, h * head_dim:(h + 1) * head_dim]
+
+    env = {graph.input_name: _hbm_round_ref(x.float(), precision)}
+    stored: dict[str, torch.Tensor] = {}
+    for step in schedule.steps:
+        if step.kind == "store":
+            stored[step.value] = _hbm_round_ref(env[step.value], precision)
+            continue
+        if step.kind == "spill":
+            env[step.value] = _hbm_round_ref(env[step.value], precision)
+            continue
+        if step.kind != "op":
+            continue
+        op = step.op
+        if op.op == "linear":
+            y = cpu("linear", env[op.inputs[0]], weight(op.params["weight"]))
+            if op.params["bias"] is not None:
+                y = _round(y + vector(op.params["bias"]), precision)
+        elif op.op in ("rms_norm", "layer_norm"):
+            y = cpu(op.op, env[op.inputs[0]], eps=op.attrs["eps"])
+            if op.params["weight"] is not None:
+                y = _round(y * vector(op.params["weight"]), precision)
+            if op.params["bias"] is not None:
+                y = _round(y + vector(op.params["bias"]), precision)
+        elif op.op == "ffn":
+            y = cpu(
+                "ffn",
+                env[op.inputs[0]],
+                weight(op.params["w_gate"]),
+                weight(op.params["w_up"]),
+                weight(op.params["w_down"]),
+            )
+        elif op.op == "rope":
+            head_dim = op.attrs["head_dim"]
+            rotate = precision.quantize(graph.params[op.params["rotate"]])
+            cos, sin = (precision.quantize(graph.params[op.params[role]]) for role in ("cos", "sin"))
+            x = env[op.inputs[0]]
+            y = torch.cat(
+                [
+                    cpu("rope", head(x, h, head_dim), cpu("linear", head(x, h, head_dim), rotate), cos, sin)
+                    for h in range(op.attrs["num_heads"])
+                ],
+                dim=-1,
+            )
+        elif op.op == "add":
+            y = _round(env[op.inputs[0]] + env[op.inputs[1]], precision)
+        elif op.op == "flash_attention":
+            attrs = op.attrs
+            head_dim = attrs["head_dim"]
+            ratio = attrs["num_heads"] // attrs["num_kv_heads"]
+            q = env[op.inputs[0]]
+            k, v = stored[op.inputs[1]], stored[op.inputs[2]]
+            y = torch.cat(
+                [
+                    cpu(
+                        "flash_attention",
+                        head(q, h, head_dim),
+                        head(k, h // ratio, head_dim),
+                        head(v, h // ratio, head_dim),
+                        attrs["scale"],
+                        causal_mask=attrs["causal"],
+                    )
+                    for h in range(attrs["num_heads"])
+                ],
+                dim=-1,
+            )
+        else:
+            raise NotImplementedError(f"{op.name}: no CPU reference for {op.op}")
+        env[op.output] = y
+    return env[graph.output_name]
+
+
+def compile_fx_module(
+    module: torch.nn.Module,
+    x: torch.Tensor,
+    *,
+    mlen: int = 64,
+    blen: int = 4,
+    mram_tile_capacity: int = 4,
+    vram_budget: int | None = None,
+    golden_precision: str = "hardware",
+    vram_plan: VRAMPlan | None = None,
+) -> dict:
+    """Compile ``module(x)`` through ``torch.export`` and the op registry.
+
+    ``x`` is the (seq_len, hidden) activation, a (1, seq_len, hidden) batch,
+    or (1, seq_len) token ids when the module starts with an embedding (HF
+    ``*ForCausalLM`` with ``use_cache=False``).  ``vram_budget`` caps the
+    live activation elements the schedule keeps in VRAM; anything above it is
+    spilled to HBM through ``PlenaCompiler.spill`` (``info["spilled_values"]``,
+    ``info["vram_spill_bytes"]``).  The result dict has the same
+    ISA/golden/staging keys as ``compile_native_hf_decoder``; pass it to
+    ``compile_with_vram_plan`` to pack VRAM addresses offline.
+    """
+    if x.is_floating_point() and not (x.dim() == 2 or (x.dim() == 3 and x.shape[0] == 1)):
+        raise ValueError(f"compile_fx_module expects a (seq_len, hidden) input, got {tuple(x.shape)}")
+    if not x.is_floating_point() and x.squeeze(0).dim() != 1:
+        raise ValueError(f"compile_fx_module expects (1, seq_len) token ids, got {tuple(x.shape)}")
+    module = module.eval()
+    with torch.no_grad():
+        exported = torch.export.export(module, (x,))
+        (reference_out,) = torch.utils._pytree.tree_leaves(module(x))
+    graph = fuse_graph_ops(lower_exported_program(exported))
+    if graph.embedding is not None:
+        # Host-side lookup, as in compile_native_hf_decoder.
+        x = graph.params[graph.embedding][x.reshape(-1)]
+    x = x.reshape(-1, x.shape[-1])
+    seq_len = x.shape[0]
+    reference_out = reference_out.float().reshape(seq_len, -1)
+    padded_rows = _ceil_to_multiple(seq_len, mlen if seq_len < mlen else blen)
+
+    def padded_cols(name: str) -> int:
+        return _ceil_to_multiple(graph.values[name].cols, mlen)
+
+    norm_consts = {(op.attrs["eps"], graph.values[op.inputs[0]].cols) for op in graph.ops if "eps" in op.attrs}
+    scales = {op.attrs["scale"] for op in graph.ops if op.op == "flash_attention"}
+    if len(norm_consts) > 1 or len(scales) > 1:
+        raise NotImplementedError("all norms must share eps/width and all attention ops one scale (FPRAM slots 1, 3, 4)")
+    for op in graph.ops:
+        if op.op == "layer_norm" and graph.values[op.inputs[0]].cols % mlen:
+            raise NotImplementedError(f"{op.name}: layer_norm statistics would include padded columns")
+        if op.op in ("flash_attention", "rope") and op.attrs["head_dim"] % mlen:
+            raise NotImplementedError(
+                f"{op.name}: head_dim={op.attrs['head_dim']} is not a multiple of mlen={mlen}; "
+                "head packing is only available in compile_native_hf_decoder"
+            )
+
+    registry = OpRegistry.load()
+    registry.set_backend(Backend.PLENA)
+    schedule = schedule_graph(
+        graph,
+        lambda name: padded_rows * padded_cols(name),
+        registry=registry,
+        vram_budget=vram_budget,
+    )
+
+    golden_policy = ReferencePrecision.from_mode(golden_precision)
+    golden_out = _run_graph_reference(graph, schedule, x, golden_policy)
+
+    prog = PlenaCompiler(
+        mlen=mlen,
+        blen=blen,
+        real_data_ratio=REAL_DATA_RATIO,
+        mram_tile_capacity=mram_tile_capacity,
+        vram_plan=vram_plan,
+    )
+    prog.reserve_fixed_fpram()
+    hidden = graph.values[graph.input_name].cols
+    compile_x = _pad_2d(x.detach().float(), padded_rows, padded_cols(graph.input_name))
+    x_input = prog.input(graph.input_name, shape=tuple(compile_x.shape))
+    weight_tensors, weight_inputs = _register_graph_inputs(
+        prog, graph, rows=seq_len, padded_rows=padded_rows, mlen=mlen
+    )
+    for op in graph.ops:
+        if op.op == "flash_attention":
+            prog.reserve_attention_constants(kv_seq_len=seq_len, causal=op.attrs["causal"])
+
+    vars_ = {graph.input_name: prog.load_batch(x_input, name=graph.input_name)}
+    stored: dict[str, list] = {}
+    for step in schedule.steps:
+        if step.kind == "op":
+            prog.emit_comment(f"=== FX {step.op.op} {step.op.name} ===")
+            _emit_graph_op(prog, step, graph, vars_, stored, weight_inputs, padded_rows=padded_rows)
+        elif step.kind == "copy":
+            source = vars_[step.source]
+            copy = prog.alloc(
+                step.value,
+                source.shape[0],
+                source.shape[1],
+                strict=False,
+                physical_shape=source.physical_shape,
+            )
+            prog.vram_fill_zero(copy)
+            prog.vram_add(copy, source)
+            vars_[step.value] = copy
+        elif step.kind == "store":
+            stored[step.value] = _store_heads(
+                prog,
+                vars_[step.value],
+                graph.values[step.value],
+                step.op.attrs["head_dim"],
+                padded_rows=padded_rows,
+            )
+        elif step.kind == "free":
+            prog.free_tensor(vars_.pop(step.value))
+        elif step.kind == "spill":
+            prog.spill(vars_[step.value])
+        elif step.kind == "reload":
+            # Any lookup of a spilled tensor reloads it; do it where the schedule planned.
+            prog.get_vram_addr(vars_[step.value].name)
+        else:
+            raise ValueError(f"unknown schedule step {step.kind}")
+
+    current = vars_[graph.output_name]
+    isa_code = _fix_large_immediates(prog.compile())
+    lines = isa_code.splitlines()
+
+    input_tensors = {graph.input_name: compile_x, **weight_tensors}
+    data_order = list(input_tensors)
+    _merge_constant_pool(prog, input_tensors, data_order)
+    tensor_layouts = _tensor_layout_metadata(prog, input_tensors)
+
+    eps, norm_width = next(iter(norm_consts), (1e-6, hidden))
+    scale = next(iter(scales), 1.0)
+    # Same FPRAM layout as compile_native_hf_decoder.
+    fp_preload = [0.0, scale, -6.0e4, eps, 1.0 / norm_width, 1.0] + [0.0] * 4
+
+    out_value = graph.values[graph.output_name]
+    out_features = padded_cols(graph.output_name)
+    o_vram_addr = prog.get_vram_addr(current.name)
+    physical_rows = current.physical_shape[0]
+    comparison_params = {
+        "start_row_idx": o_vram_addr // mlen,
+        "num_rows": (out_features // mlen) * physical_rows if out_features > mlen else seq_len,
+        "num_batches": seq_len,
+        "elements_per_batch": out_features,
+        "row_dim": mlen,
+        "physical_rows": physical_rows,
+        "use_stride_mode": out_features > mlen,
+        "rows_per_batch": None,
+        "active_seq_per_batch": None,
+    }
+    info = {
+        "seq_len": seq_len,
+        "padded_seq_len": padded_rows,
+        "hidden_size": hidden,
+        "output_features": out_value.cols,
+        "mlen": mlen,
+        "blen": blen,
+        "mram_tile_capacity": mram_tile_capacity,
+        "golden_precision": golden_precision,
+        "graph_ops": [op.op for op in graph.ops],
+        "schedule_copies": sum(step.kind == "copy" for step in schedule.steps),
+        "schedule_peak_elems": schedule.peak_live_elems,
+        "vram_budget": vram_budget,
+        "spilled_values": schedule.spilled,
+        "vram_spill_bytes": prog.vram_spill_bytes,
+        "vram_reload_bytes": prog.vram_reload_bytes,
+        "isa_lines": len(lines),
+        "hbm_prefetch_bytes": prog.hbm_prefetch_bytes,
+        "mram_reused_bytes": prog.mram_reused_bytes,
+        "vram_peak_elems": prog.vram_allocator.peak,
+    }
+    padded_golden_output = _pad_2d(golden_out, padded_rows, out_features)
+    return {
+        "isa": isa_code,
+        "golden_output": golden_out,
+        "padded_golden_output": padded_golden_output,
+        "hf_ground_truth": reference_out,
+        "input_tensors": input_tensors,
+        "tensor_layouts": tensor_layouts,
+        "data_order": data_order,
+        "fp_preload": fp_preload,
+        "comparison_params": comparison_params,
+        "info": info,
+        "sim_golden_result": {
+            "original_output": padded_golden_output,
+            "tensor_layouts": tensor_layouts,
+            "data_order": data_order,
+            "compile_info": info,
+        },
+        "golden_precision": golden_precision,
+    }
@@ -33,7 +33,11 @@ class ModelConfig:
 
 @dataclass(frozen=True)
 class LayerWeights:
-    """One decoder layer in PLENA's (in, out) linear-weight convention."""
+    """One decoder layer in PLENA's (in, out) linear-weight convention.
+
+    ``w_up``/``w_gate`` follow the hardware FFN, which applies SiLU to
+    ``w_up``: the model's SiLU'd projection is ``w_up``, the other ``w_gate``.
+    """
 
     w_q: torch.Tensor
     w_o: torch.Tensor
@@ -407,8 +411,9 @@ def _extract_llama_layer_weights(layer: Any, config: ModelConfig) -> LayerWeight
         w_o=_linear_weight(layer.self_attn.o_proj, config.total_q_dim, hidden),
         w_k_heads=_split_heads(w_k_full, config.head_dim, config.num_kv_heads),
         w_v_heads=_split_heads(w_v_full, config.head_dim, config.num_kv_heads),
-        w_gate=_linear_weight(layer.mlp.gate_proj, hidden, config.inter_dim),
-        w_up=_linear_weight(layer.mlp.up_proj, hidden, config.inter_dim),
+        # down(silu(gate_proj(x)) * up_proj(x)); the hardware SiLU's w_up.
+        w_gate=_linear_weight(layer.mlp.up_proj, hidden, config.inter_dim),
+        w_up=_linear_weight(layer.mlp.gate_proj, hidden, config.inter_dim),
         w_down=_linear_weight(layer.mlp.down_proj, config.inter_dim, hidden),
         eps=getattr(norm, "variance_epsilon", getattr(norm, "eps", 1e-5)),
     )
@@ -418,8 +423,8 @@ def _extract_llada_layer_weights(layer: Any, config: ModelConfig) -> LayerWeight
     """Extract LLaDA-style layer weights.
 
     LLaDA uses ff_proj and up_proj both mapping to intermediate dimension,
-    with ff_out as the down projection. We treat ff_proj as gate and up_proj
-    as the traditional up projection for compatibility with PLENA's FFN ops.
+    with ff_out as the down projection. ff_proj is the SiLU'd projection, so
+    it is bound to the hardware's ``w_up`` and up_proj to ``w_gate``.
     """
     hidden = config.hidden_size
     total_kv_dim = config.num_kv_heads * config.head_dim
@@ -434,8 +439,8 @@ def _extract_llada_layer_weights(layer: Any, config: ModelConfig) -> LayerWeight
         w_o=_linear_weight(layer.attn_out, config.total_q_dim, hidden),
         w_k_heads=_split_heads(w_k_full, config.head_dim, config.num_kv_heads),
         w_v_heads=_split_heads(w_v_full, config.head_dim, config.num_kv_heads),
-        w_gate=_linear_weight(layer.ff_proj, hidden, config.inter_dim),
-        w_up=_linear_weight(layer.up_proj, hidden, config.inter_dim),
+        w_gate=_linear_weight(layer.up_proj, hidden, config.inter_dim),
+        w_up=_linear_weight(layer.ff_proj, hidden, config.inter_dim),
         w_down=_linear_weight(layer.ff_out, config.inter_dim, hidden),
         eps=(
             getattr(norm, "variance_epsilon", getattr(norm, "eps", 1e-5))
@@ -8,6 +8,8 @@ current PLENA MXFP8 weight model to expert weights only.
 
 from __future__ import annotations
 
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from dataclasses import dataclass
 
 import torch
@@ -20,6 +22,8 @@ class GptOssMoeResult:
     topk_indices: torch.Tensor
     topk_weights: torch.Tensor
     gate_up_preact: torch.Tensor
+    # Tokens routed to each expert; filled by the fixed-routing host smoke.
+    expert_token_counts: torch.Tensor | None = None
 
 
 @dataclass(frozen=True)
@@ -73,6 +77,76 @@ def quantize_to_plena_mxfp8(tensor: torch.Tensor) -> torch.Tensor:
     return bm_x.reshape(orig_shape)
 
 
+class ExpertWeightCache:
+    """LRU of per-expert quantized weights.
+
+    ``_expert_weight_source`` keys entries by layer, expert, precision and the
+    identity and version of the source stacks, so a reloaded or modified
+    checkpoint misses instead of returning stale weights.  Callers own the
+    cache; drop it (or ``clear`` it) to release the quantized copies.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        if max_entries <= 0:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[torch.Tensor, torch.Tensor]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: Hashable,
+        build: Callable[[], tuple[torch.Tensor, torch.Tensor]],
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = build()
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _expert_weight_source(
+    gate_up_weight: torch.Tensor,
+    down_weight: torch.Tensor,
+    *,
+    quantize: bool,
+    layer: Hashable | None = None,
+    weight_cache: ExpertWeightCache | None = None,
+) -> Callable[[int], tuple[torch.Tensor, torch.Tensor]]:
+    """Per-expert ``(gate_up, down)`` lookup, quantizing lazily and only active experts.
+
+    MXFP8 blocks run along the last dimension, so quantizing one expert's
+    slice is identical to slicing the quantized stack.  Experts are only
+    cached when both ``layer`` and ``weight_cache`` are given.
+    """
+
+    def build(expert_idx: int) -> tuple[torch.Tensor, torch.Tensor]:
+        gate_up, down = gate_up_weight[expert_idx], down_weight[expert_idx]
+        if quantize:
+            return quantize_to_plena_mxfp8(gate_up), quantize_to_plena_mxfp8(down)
+        return gate_up, down
+
+    if layer is None or weight_cache is None:
+        return build
+    precision = "plena_mxfp8" if quantize else "source"
+    # In-place edits bump ``_version``; a new tensor gets a new id.
+    source = tuple((id(t), t._version) for t in (gate_up_weight, down_weight))
+    return lambda expert_idx: weight_cache.get((layer, expert_idx, precision, source), lambda: build(expert_idx))
+
+
 def split_packed_gate_up(
     gate_up_weight: torch.Tensor,
     gate_up_bias: torch.Tensor | None = None,
@@ -207,6 +281,39 @@ def gpt_oss_swiglu(
     return _maybe_bf16(up_plus_one * glu, bf16_intermediates)
 
 
+def gpt_oss_swiglu_plena(
+    gate_up: torch.Tensor,
+    *,
+    limit: float = 7.0,
+    alpha: float = 1.702,
+    apply_clamp: bool = True,
+) -> torch.Tensor:
+    """GPT-OSS activation with PLENA's BF16 vector-op rounding.
+
+    Mirrors ``gpt_oss_clamp_gated_activation_v0`` op for op: sigmoid is built
+    from ``exp(-alpha * gate)``, ``+1`` and a reciprocal, every vector op
+    rounds to BF16, and the scalar constants go through the FP16 FPRAM preload.
+    """
+    gate = _bf16(gate_up[..., ::2].float())
+    up = _bf16(gate_up[..., 1::2].float())
+    if apply_clamp:
+        limit_pos = _fpram_scalar(limit)
+        gate = _bf16(torch.clamp(gate, max=limit_pos))
+        up = _bf16(torch.clamp(up, max=limit_pos))
+        up = _bf16(torch.clamp(up, min=_fpram_scalar(-limit)))
+    sigmoid = _bf16(gate * _fpram_scalar(-alpha))
+    sigmoid = _bf16(torch.clamp(sigmoid, -88.0, 88.0).exp())
+    sigmoid = _bf16(sigmoid + _fpram_scalar(1.0))
+    sigmoid = _bf16(sigmoid.reciprocal())
+    glu = _bf16(gate * sigmoid)
+    up_plus_one = _bf16(up + _fpram_scalar(1.0))
+    return _bf16(up_plus_one * glu)
+
+
+def _fpram_scalar(value: float) -> float:
+    return float(torch.tensor(value, dtype=torch.float16).to(torch.bfloat16).float())
+
+
 def clamp_stats(gate_up_preact: torch.Tensor, *, limit: float = 7.0) -> ClampStats:
     """Return whether GPT-OSS clamp would be a no-op for these preactivations."""
     gate = gate_up_preact[..., ::2].float()
@@ -281,10 +388,10 @@ def gpt_oss_moe_golden_a(
         x_ref,
         topk_indices,
         topk_weights,
-        gate_up_weight,
+        _expert_weight_source(gate_up_weight, down_weight, quantize=False),
         gate_up_bias,
-        down_weight,
         down_bias,
+        intermediate=down_weight.shape[1],
         swiglu_limit=swiglu_limit,
         swiglu_alpha=swiglu_alpha,
         bf16_intermediates=bf16_intermediates,
@@ -306,6 +413,9 @@ def gpt_oss_moe_golden_b_plena_mxfp8(
     swiglu_alpha: float = 1.702,
     bf16_intermediates: bool = True,
     apply_clamp: bool = True,
+    plena_activation: bool = False,
+    layer: Hashable | None = None,
+    weight_cache: ExpertWeightCache | None = None,
 ) -> GptOssMoeResult:
     """PLENA-aware Golden B with fixed Golden-A routing.
 
@@ -313,23 +423,29 @@ def gpt_oss_moe_golden_b_plena_mxfp8(
     expert compute plus weighted combine from the fragile discrete routing
     decision.  Expert matrix weights are quantized through PLENA's current HBM
     MXFP8 model; router precision is outside this function by construction.
+
+    Only routed experts are quantized.  With ``layer`` and ``weight_cache``
+    set, quantized experts are kept in the cache so repeated calls on the same
+    layer weights skip re-quantization.  ``plena_activation`` swaps
+    in ``gpt_oss_swiglu_plena`` for the on-chip clamp/SwiGLU rounding.
     """
     x_ref = _maybe_bf16(x, bf16_intermediates)
-    gate_up_q = quantize_to_plena_mxfp8(gate_up_weight)
-    down_q = quantize_to_plena_mxfp8(down_weight)
     weights_ref = _maybe_bf16(topk_weights, bf16_intermediates)
     output, gate_up_preact = _run_selected_experts(
         x_ref,
         topk_indices,
         weights_ref,
-        gate_up_q,
+        _expert_weight_source(
+            gate_up_weight, down_weight, quantize=True, layer=layer, weight_cache=weight_cache
+        ),
         gate_up_bias,
-        down_q,
         down_bias,
+        intermediate=down_weight.shape[1],
         swiglu_limit=swiglu_limit,
         swiglu_alpha=swiglu_alpha,
         bf16_intermediates=bf16_intermediates,
         apply_clamp=apply_clamp,
+        plena_activation=plena_activation,
     )
     router_logits = torch.empty(x.shape[0], 0, dtype=torch.float32, device=x.device)
     return GptOssMoeResult(output, router_logits, topk_indices, weights_ref, gate_up_preact)
@@ -349,6 +465,8 @@ def gpt_oss_moe_fixed_routing_host_smoke(
     swiglu_alpha: float = 1.702,
     bf16_intermediates: bool = True,
     apply_clamp: bool = True,
+    layer: Hashable | None = None,
+    weight_cache: ExpertWeightCache | None = None,
 ) -> GptOssMoeResult:
     """Host-side fixed-routing MoE smoke model.
 
@@ -356,12 +474,17 @@ def gpt_oss_moe_fixed_routing_host_smoke(
     the caller, tokens are grouped by expert on the host, each selected expert
     is evaluated, and weighted outputs are accumulated back to token order.  It
     exists to test wiring separately from the fragile top-k decision.
+    ``layer`` / ``weight_cache`` share quantized experts with Golden B.
     """
     x_ref = _maybe_bf16(x, bf16_intermediates)
     weights_ref = _maybe_bf16(topk_weights, bf16_intermediates)
-    if quantize_expert_weights_to_plena_mxfp8:
-        gate_up_weight = quantize_to_plena_mxfp8(gate_up_weight)
-        down_weight = quantize_to_plena_mxfp8(down_weight)
+    expert_weights = _expert_weight_source(
+        gate_up_weight,
+        down_weight,
+        quantize=quantize_expert_weights_to_plena_mxfp8,
+        layer=layer,
+        weight_cache=weight_cache,
+    )
 
     tokens, hidden = x.shape
     experts_per_token = topk_indices.shape[1]
@@ -387,16 +510,17 @@ def gpt_oss_moe_fixed_routing_host_smoke(
         token_idx, top_k_pos = torch.where(topk_indices == expert_idx)
         if token_idx.numel() == 0:
             continue
+        expert_gate_up_w, expert_down_w = expert_weights(expert_idx)
 
         if hf_cpu_equiv:
             current_state = x_ref[token_idx].to(torch.bfloat16)
             gate_up = (
-                current_state @ gate_up_weight[expert_idx].to(torch.bfloat16)
+                current_state @ expert_gate_up_w.to(torch.bfloat16)
                 + gate_up_bias[expert_idx].to(torch.bfloat16)
             )
         else:
             current_state = x_ref[token_idx]
-            gate_up = current_state.float() @ gate_up_weight[expert_idx].float() + gate_up_bias[expert_idx].float()
+            gate_up = current_state.float() @ expert_gate_up_w.float() + gate_up_bias[expert_idx].float()
         gate_up = _maybe_bf16(gate_up, bf16_intermediates)
         gate_up_preact[token_idx, top_k_pos] = gate_up.float()
 
@@ -408,11 +532,11 @@ def gpt_oss_moe_fixed_routing_host_smoke(
             apply_clamp=apply_clamp,
         )
         if hf_cpu_equiv:
-            expert_out = activated.to(torch.bfloat16) @ down_weight[expert_idx].to(torch.bfloat16)
+            expert_out = activated.to(torch.bfloat16) @ expert_down_w.to(torch.bfloat16)
             if down_bias is not None:
                 expert_out = expert_out + down_bias[expert_idx].to(torch.bfloat16)
         else:
-            expert_out = activated.float() @ down_weight[expert_idx].float()
+            expert_out = activated.float() @ expert_down_w.float()
             if down_bias is not None:
                 expert_out = expert_out + down_bias[expert_idx].float()
         expert_out = _maybe_bf16(expert_out, bf16_intermediates)
@@ -422,49 +546,87 @@ def gpt_oss_moe_fixed_routing_host_smoke(
 
     next_states = _maybe_bf16(next_states, bf16_intermediates)
     router_logits = torch.empty(tokens, 0, dtype=torch.float32, device=x.device)
-    return GptOssMoeResult(next_states, router_logits, topk_indices, weights_ref, gate_up_preact)
+    expert_token_counts = torch.bincount(topk_indices.flatten().long(), minlength=gate_up_weight.shape[0])
+    return GptOssMoeResult(
+        next_states, router_logits, topk_indices, weights_ref, gate_up_preact, expert_token_counts
+    )
+
+
+def select_hot_experts(expert_token_counts: torch.Tensor, *, max_experts: int, min_tokens: int = 1) -> list[int]:
+    """Pick the most frequently routed experts to pin in MRAM.
+
+    ``expert_token_counts`` is ``GptOssMoeResult.expert_token_counts`` (or the
+    sum over several host smoke runs).  Experts are ranked by token count with
+    low-index tie break, matching V_TOPK; experts below ``min_tokens`` are
+    never chosen.
+    """
+    if max_experts < 0:
+        raise ValueError(f"max_experts must be non-negative, got {max_experts}")
+    counts = [int(count) for count in expert_token_counts.flatten().tolist()]
+    ranked = sorted(range(len(counts)), key=lambda expert: (-counts[expert], expert))
+    return [expert for expert in ranked[:max_experts] if counts[expert] >= min_tokens]
 
 
 def _run_selected_experts(
     x: torch.Tensor,
     topk_indices: torch.Tensor,
     topk_weights: torch.Tensor,
-    gate_up_weight: torch.Tensor,
+    expert_weights: Callable[[int], tuple[torch.Tensor, torch.Tensor]],
     gate_up_bias: torch.Tensor,
-    down_weight: torch.Tensor,
     down_bias: torch.Tensor | None,
     *,
+    intermediate: int,
     swiglu_limit: float,
     swiglu_alpha: float,
     bf16_intermediates: bool,
     apply_clamp: bool,
+    plena_activation: bool = False,
 ) -> tuple[torch.Tensor, torch.Tensor]:
+    """Expert-grouped MoE: one gate_up and one down matmul per active expert.
+
+    Routed (token, slot) pairs are sorted by expert so only the active experts'
+    weights are touched, instead of gathering a [tokens, k, hidden, 2I] weight
+    copy.  Per-pair results land in [tokens, k, ...] buffers and are combined
+    over k in slot order, so rounding matches the ungrouped formulation.
+    """
     tokens, hidden = x.shape
     experts_per_token = topk_indices.shape[1]
-    intermediate = down_weight.shape[1]
-
-    selected_gate_up_w = gate_up_weight[topk_indices].float()
-    selected_gate_up_b = gate_up_bias[topk_indices].float()
-    gate_up = torch.einsum("th,tkeh->tke", x.float(), selected_gate_up_w.transpose(-1, -2))
-    gate_up = gate_up + selected_gate_up_b
-    gate_up = _maybe_bf16(gate_up, bf16_intermediates)
-
-    activated = gpt_oss_swiglu(
-        gate_up,
-        limit=swiglu_limit,
-        alpha=swiglu_alpha,
-        bf16_intermediates=bf16_intermediates,
-        apply_clamp=apply_clamp,
-    )
-    assert activated.shape == (tokens, experts_per_token, intermediate)
+    gate_up = torch.empty(tokens, experts_per_token, 2 * intermediate, dtype=torch.float32, device=x.device)
+    expert_out = torch.empty(tokens, experts_per_token, hidden, dtype=torch.float32, device=x.device)
+
+    flat_experts = topk_indices.flatten().long()
+    order = torch.argsort(flat_experts, stable=True)
+    active, counts = torch.unique_consecutive(flat_experts[order], return_counts=True)
+    x_f = x.float()
+    for expert_idx, pairs in zip(active.tolist(), torch.split(order, counts.tolist())):
+        token_idx = pairs // experts_per_token
+        top_k_pos = pairs % experts_per_token
+        gate_up_w, down_w = expert_weights(expert_idx)
+
+        expert_gate_up = x_f[token_idx] @ gate_up_w.float() + gate_up_bias[expert_idx].float()
+        expert_gate_up = _maybe_bf16(expert_gate_up, bf16_intermediates)
+        gate_up[token_idx, top_k_pos] = expert_gate_up.float()
+
+        if plena_activation:
+            activated = gpt_oss_swiglu_plena(
+                expert_gate_up, limit=swiglu_limit, alpha=swiglu_alpha, apply_clamp=apply_clamp
+            )
+        else:
+            activated = gpt_oss_swiglu(
+                expert_gate_up,
+                limit=swiglu_limit,
+                alpha=swiglu_alpha,
+                bf16_intermediates=bf16_intermediates,
+                apply_clamp=apply_clamp,
+            )
+        assert activated.shape == (token_idx.numel(), intermediate)
 
-    selected_down_w = down_weight[topk_indices].float()
-    expert_out = torch.einsum("tki,tkih->tkh", activated.float(), selected_down_w)
-    if down_bias is not None:
-        expert_out = expert_out + down_bias[topk_indices].float()
-    expert_out = _maybe_bf16(expert_out, bf16_intermediates)
+        out = activated.float() @ down_w.float()
+        if down_bias is not None:
+            out = out + down_bias[expert_idx].float()
+        expert_out[token_idx, top_k_pos] = _maybe_bf16(out, bf16_intermediates).float()
 
-    combined = (expert_out.float() * topk_weights.float().unsqueeze(-1)).sum(dim=1)
+    combined = (expert_out * topk_weights.float().unsqueeze(-1)).sum(dim=1)
     combined = _maybe_bf16(combined, bf16_intermediates)
     assert combined.shape == (tokens, hidden)
     return combined, gate_up
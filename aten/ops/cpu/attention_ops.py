@@ -9,11 +9,20 @@ def flash_attention_cpu(
     K: torch.Tensor,
     V: torch.Tensor,
     scale: float | None = None,
+    causal_mask=None,
     **_kwargs,
 ) -> torch.Tensor:
-    """CPU reference: Flash Attention = softmax(Q @ K.T * scale) @ V."""
+    """CPU reference: Flash Attention = softmax(Q @ K.T * scale) @ V.
+
+    A truthy ``causal_mask`` hides keys after each query, with queries aligned
+    to the last ``Q.shape[0]`` key positions.
+    """
     if scale is None:
         scale = 1.0 / math.sqrt(Q.shape[-1])
     S = torch.matmul(Q.float(), K.float().T) * scale
+    if causal_mask is not None and causal_mask is not False:
+        q_rows, k_rows = S.shape
+        future = torch.ones(q_rows, k_rows, dtype=torch.bool).triu(k_rows - q_rows + 1)
+        S = S.masked_fill(future, float("-inf"))
     P = torch.softmax(S, dim=-1)
     return torch.matmul(P, V.float())
@@ -14,6 +14,7 @@ def flash_attention_plena(
     batch_size=1,
     seq_len=None,
     kv_seq_len=None,
+    sliding_window=None,
 ):
     return prog.flash_attention(
         Q,
@@ -27,4 +28,5 @@ def flash_attention_plena(
         batch_size=batch_size,
         seq_len=seq_len,
         kv_seq_len=kv_seq_len,
+        sliding_window=sliding_window,
     )
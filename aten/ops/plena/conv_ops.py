@@ -11,6 +11,15 @@ Two im2col paths:
 
 After im2col the systolic matmul uses the compiler's standard linear path.
 
+Implicit GEMM (implicit_gemm=True) skips im2col:
+each (c, kr) term is one strided H_PREFETCH_V window matmul accumulated into
+the output (``PlenaCompiler.conv2d_implicit_gemm``).  It takes the weight in
+the per-term layout of ``conv2d_implicit_gemm_weight`` and an input with
+enough trailing rows for the last windows' over-read.  Unlike use_shift it
+has no env-var override: it changes the weight and input layouts, so only
+callers that stage them (``compile_native_hf_vision_encoder(conv_implicit_gemm=True)``)
+may request it.
+
 HBM layout convention (caller must arrange data accordingly):
   input_raw shape  = (C_in * H, W_padded)   — each row is one spatial row of one channel
   weight_2d shape  = (K_col, C_out)          — standard im2col weight layout
@@ -20,9 +29,21 @@ Alignment requirement:
   With W_padded=64 and ow=0 (OW=1): offset = (c*H + oh+kr) * 64 → always aligned.
 """
 
+import torch
+
 _PREFETCH_V_AMOUNT = 4  # H_PREFETCH_V always loads this many VRAM rows
 
 
+def conv2d_implicit_gemm_weight(weight_2d: torch.Tensor, *, C_in: int, K: int, mlen: int) -> torch.Tensor:
+    """Re-lay an im2col weight ``(C_in*K*K, C_out)`` as one zero-padded MLEN-row tile per (c, kr) term."""
+    if weight_2d.shape[0] < C_in * K * K:
+        raise ValueError(f"weight_2d has {weight_2d.shape[0]} rows, expected C_in*K*K={C_in * K * K}")
+    terms = weight_2d[: C_in * K * K].reshape(C_in * K, K, weight_2d.shape[1])
+    out = torch.zeros(C_in * K, mlen, weight_2d.shape[1], dtype=weight_2d.dtype, device=weight_2d.device)
+    out[:, :K] = terms
+    return out.reshape(C_in * K * mlen, weight_2d.shape[1]).contiguous()
+
+
 def conv2d_plena(
     prog,
     input_raw_var,
@@ -39,6 +60,7 @@ def conv2d_plena(
     use_shift: bool = False,
     stride: int = 1,
     return_im2col: bool = False,
+    implicit_gemm: bool = False,
 ):
     """
     PLENA backend: hardware im2col + systolic matmul.
@@ -68,6 +90,10 @@ def conv2d_plena(
         return_im2col:
             Debug/testing hook.  If true, return the generated im2col VRAM
             matrix before the systolic projection.
+        implicit_gemm:
+            Skip im2col and accumulate one shifted-window matmul per (c, kr).
+            ``weight_2d_var`` must then hold ``conv2d_implicit_gemm_weight``
+            and ``input_raw_var`` must cover ``prog.conv2d_implicit_gemm_extent``.
 
     Returns:
         VRAMMatrixVar for the output, shape (M, C_out).
@@ -80,6 +106,26 @@ def conv2d_plena(
     elif os.environ.get("CONV_USE_SHIFT") == "0":
         use_shift = False
 
+    if W_padded is None:
+        W_padded = ((W + 63) // 64) * 64  # next multiple of 64
+
+    if implicit_gemm:
+        if return_im2col:
+            raise ValueError("implicit_gemm never materialises im2col; return_im2col is unsupported")
+        if OH * OW != M:
+            raise ValueError(f"M={M} must equal OH*OW={OH * OW}")
+        return prog.conv2d_implicit_gemm(
+            input_raw_var,
+            weight_2d_var,
+            C_in=C_in,
+            H=H,
+            K=K,
+            OH=OH,
+            OW=OW,
+            W_padded=W_padded,
+            stride=stride,
+        )
+
     # Lazy imports to avoid circular dependencies at module load time
     if use_shift:
         from compiler.asm_templates.im2col_asm import im2col_asm, PREFETCH_V_AMOUNT
@@ -94,9 +140,6 @@ def conv2d_plena(
     # Pad K_col to next multiple of vlen so column-block-major tiles don't overflow VRAM
     K_col_padded = ((K_col + vlen - 1) // vlen) * vlen
 
-    if W_padded is None:
-        W_padded = ((W + 63) // 64) * 64  # next multiple of 64
-
     assert W_padded % 64 == 0, f"W_padded={W_padded} must be a multiple of 64"
 
     # ------------------------------------------------------------------
@@ -209,10 +252,16 @@ def conv2d_plena(
             stride=stride,
     )
     prog.emit(asm_code)
+    # The extraction scratch is dead once im2col_out is built; release it so a
+    # second conv (one per image) reuses the same VRAM instead of fragmenting it.
+    for tensor in (mask_mat if use_shift else basis_mat, scratch_mat, temp_mat):
+        prog.free_tensor(tensor)
 
     # ------------------------------------------------------------------
     # Systolic matmul: im2col_out @ weight_2d  -> (M, C_out)
     # ------------------------------------------------------------------
     if return_im2col:
         return output_mat
-    return prog.linear(output_mat, weight_2d_var)
+    conv_out = prog.linear(output_mat, weight_2d_var)
+    prog.free_tensor(output_mat)
+    return conv_out
@@ -6,7 +6,9 @@ import os
 from pathlib import Path
 
 from compiler.aten.plena.isa_compiler import IsaCompiler
+from compiler.aten.plena.memory import VRAMAllocator, VRAMPlan
 from compiler.aten.plena.program_attention import ProgramAttentionMixin
+from compiler.aten.plena.program_constants import ProgramConstantPoolMixin
 from compiler.aten.plena.program_fp_tile_ops import ProgramFPTileOpsMixin
 from compiler.aten.plena.program_routed_moe import ProgramRoutedMoeMixin
 from compiler.aten.plena.program_matrix_ops import ProgramMatrixOpsMixin
@@ -55,6 +57,7 @@ def _behavior_config_value(key: str, default: int) -> int:
 
 class PlenaCompiler(
     ProgramTensorMixin,
+    ProgramConstantPoolMixin,
     ProgramFPTileOpsMixin,
     ProgramMatrixOpsMixin,
     ProgramRoutedMoeMixin,
@@ -77,6 +80,9 @@ class PlenaCompiler(
         mram_tile_capacity: int = 4,
         hbm_v_prefetch_amount: int | None = None,
         hbm_v_writeback_amount: int | None = None,
+        constant_pool: bool = True,
+        vram_plan: VRAMPlan | None = None,
+        vram_capacity: int | None = None,
     ):
         """
         Args:
@@ -93,6 +99,17 @@ class PlenaCompiler(
             unroll_loops: If True, unroll sub-projection and attention helper loops
                           at ASM-gen time to eliminate C_LOOP_START/END overhead.
                           Overridden by the ATEN_OPS_UNROLL env var ("1"=True, "0"=False).
+            constant_pool: If True, attention score masks are loaded from the
+                          HBM constant pool (see program_constants) instead of
+                          being materialized with per-element S_ST_FP stores.
+                          Callers staging HBM must then include
+                          constant_pool_tensors() in their input image.
+            vram_plan: Optional VRAMPlan. An unpacked plan records VRAM live
+                          ranges during this build; a packed plan replays its
+                          offline-assigned addresses instead of allocating
+                          eagerly (see compile_with_vram_plan).
+            vram_capacity: VRAM size in elements (None = unbounded). Overflowing
+                          allocations evict tensors marked with spillable() to HBM.
         """
         _env_unroll = os.environ.get("ATEN_OPS_UNROLL", "")
         if _env_unroll == "1":
@@ -106,6 +123,10 @@ class PlenaCompiler(
             unroll_loops=unroll_loops,
             mram_tile_capacity=mram_tile_capacity,
         )
+        if vram_capacity is not None:
+            self.vram_allocator = VRAMAllocator(alignment=mlen * mlen, total_size=vram_capacity)
+        if vram_plan is not None:
+            self.vram_allocator.attach_plan(vram_plan)
         if hbm_v_prefetch_amount is None:
             hbm_v_prefetch_amount = _behavior_config_value("HBM_V_Prefetch_Amount", 4)
         if hbm_v_writeback_amount is None:
@@ -130,6 +151,11 @@ class PlenaCompiler(
         self._registered_hbm_sub_matrices: dict[str, bool] = {}
         self._registered_vram_sub_matrices: dict[str, bool] = {}
 
+        # HBM constant pool: content hash -> InputVar, name -> tensor
+        self.constant_pool_enabled = constant_pool
+        self._constant_pool: dict[str, InputVar] = {}
+        self._constant_tensors: dict[str, object] = {}
+
     # ========================================================================
     # Compilation
     # ========================================================================
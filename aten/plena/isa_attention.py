@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import math
 
-from compiler.asm_templates._imm import load_large_int
+from compiler.asm_templates._imm import add_large_int, load_large_int
 
 
 class IsaAttentionMixin:
@@ -278,6 +278,7 @@ class IsaAttentionMixin:
         pv_physical_rows: int | None = None,
         v_hbm_row_stride: int | None = None,
         v_hbm_element_bytes: int = 1,
+        v_hbm_offset_gp: int | None = None,
     ) -> str:
         """
         Compute PV = P @ V via M_MM.
@@ -290,6 +291,10 @@ class IsaAttentionMixin:
         (K=mlen done in one shot). For head_dim > mlen, V is split into head_dim/mlen
         column blocks; the outer loop iterates blocks, middle loop iterates blen-wide
         V columns within a block, inner loop iterates blen-wide P rows.
+
+        ``v_hbm_offset_gp`` names a GP register holding a run-time HBM byte
+        offset that is added to ``v_hbm_offset`` (rolled attention loops). With a
+        single V column block the register is used directly, saving a GP.
         """
         # PV is stored column-block-major with `pv_physical_rows` rows (= min(mlen,
         # seq_len) for the decoder), so each head_dim col-block spans
@@ -313,17 +318,18 @@ class IsaAttentionMixin:
                 v_hbm_element_bytes=v_hbm_element_bytes,
             )
 
-        gp_regs = self.register_allocator.allocate_gp(8)
+        num_v_col_blocks = max(1, math.ceil(head_dim / mlen))
+        reuse_offset_gp = v_hbm_offset_gp is not None and num_v_col_blocks == 1 and v_hbm_offset == 0
+        gp_regs = self.register_allocator.allocate_gp(7 if reuse_offset_gp else 8)
         gp_p = gp_regs[0]
         gp_v = gp_regs[1]
         gp_pv = gp_regs[2]
-        gp_hbm = gp_regs[3]
-        gp_stride = gp_regs[4]
-        gp_pv_col_base = gp_regs[5]
-        gp_v_loop = gp_regs[6]
-        gp_p_loop = gp_regs[7]
+        gp_stride = gp_regs[3]
+        gp_pv_col_base = gp_regs[4]
+        gp_v_loop = gp_regs[5]
+        gp_p_loop = gp_regs[6]
+        gp_hbm = v_hbm_offset_gp if reuse_offset_gp else gp_regs[7]
 
-        num_v_col_blocks = max(1, math.ceil(head_dim / mlen))
         tiles_per_mlen = mlen // blen
         p_row_groups = tiles_per_mlen if rows is None else max(1, min(tiles_per_mlen, (rows + blen - 1) // blen))
 
@@ -356,7 +362,10 @@ class IsaAttentionMixin:
             # column-block base offset = v_hbm_offset + v_col_block * mlen (elements).
             v_block_hbm_offset = (v_hbm_offset + v_col_block * mlen) * v_hbm_element_bytes
             lines.append(f"S_ADDI_INT gp{gp_v}, gp0, 0")
-            lines.extend(load_large_int(gp_hbm, v_block_hbm_offset))
+            if v_hbm_offset_gp is None:
+                lines.extend(load_large_int(gp_hbm, v_block_hbm_offset))
+            elif not reuse_offset_gp:
+                lines.extend(add_large_int(gp_hbm, v_hbm_offset_gp, v_block_hbm_offset))
             # funct1=0 => PREFETCH_M_H (High Precision, m_controller_precision_select=0),
             # matching how V is staged in HBM (same High-Precision MXINT format as the K/W
             # weights, which load via _H). funct1=1 (_L / Low Precision) mis-decodes the
@@ -470,8 +479,12 @@ class IsaAttentionMixin:
         o_address: int,
         row_offset: int = 0,
         rows: int | None = None,
+        o_base_gp: int | None = None,
     ) -> str:
-        """Scale each row of O by m_res: O[row] *= m_res[row]."""
+        """Scale each row of O by m_res: O[row] *= m_res[row].
+
+        ``o_base_gp`` holds a run-time O base; ``o_address`` is then an offset from it.
+        """
         if getattr(self, "unroll_attention", False):
             return self._scale_o_asm_unrolled(
                 mlen=mlen,
@@ -500,7 +513,7 @@ class IsaAttentionMixin:
         if num_col_blocks == 1:
             o_addr = o_address + row_offset * mlen
             lines.extend(load_large_int(gp_m_res, m_res_address))
-            lines.extend(load_large_int(gp_o, o_addr))
+            lines.extend(self._o_address_lines(gp_o, o_addr, o_base_gp))
             lines.append(f"C_LOOP_START gp{gp_row_loop}, {loop_rows}")
             lines.append(f"S_LD_FP f{fp_m_res}, gp{gp_m_res}, 0")
             lines.append(f"V_MUL_VF gp{gp_o}, gp{gp_o}, f{fp_m_res}, 0")
@@ -511,7 +524,7 @@ class IsaAttentionMixin:
             gp_col_loop = self.register_allocator.allocate_gp(1)[0]
             o_addr = o_address + row_offset * mlen
             lines.extend(load_large_int(gp_m_res, m_res_address))
-            lines.extend(load_large_int(gp_o_row_base, o_addr))
+            lines.extend(self._o_address_lines(gp_o_row_base, o_addr, o_base_gp))
             lines.append(f"C_LOOP_START gp{gp_row_loop}, {loop_rows}")
             lines.append(f"S_LD_FP f{fp_m_res}, gp{gp_m_res}, 0")
             lines.append(f"S_ADDI_INT gp{gp_o}, gp{gp_o_row_base}, 0")
@@ -527,6 +540,13 @@ class IsaAttentionMixin:
         self.register_allocator.free_gp(gp_regs)
         return "\n".join(lines) + "\n"
 
+    @staticmethod
+    def _o_address_lines(dest_gp: int, o_addr: int, o_base_gp: int | None) -> list[str]:
+        """Load a static O address, or offset a run-time base held in ``o_base_gp``."""
+        if o_base_gp is None:
+            return load_large_int(dest_gp, o_addr)
+        return add_large_int(dest_gp, o_base_gp, o_addr)
+
     def _scale_o_asm_unrolled(
         self,
         mlen: int,
@@ -606,12 +626,14 @@ class IsaAttentionMixin:
         o_address: int,
         row_offset: int = 0,
         rows: int | None = None,
+        o_base_gp: int | None = None,
     ) -> str:
         """
         Final scaling: O[row] /= l[row].
 
         V_MUL_VF processes mlen elements at a time; when head_dim > mlen,
         each row is split into head_dim // mlen mlen-wide blocks.
+        ``o_base_gp`` holds a run-time O base, as in ``_scale_o_asm``.
         """
         if getattr(self, "unroll_attention", False):
             return self._final_scaling_asm_unrolled(
@@ -642,7 +664,7 @@ class IsaAttentionMixin:
         if num_col_blocks == 1:
             o_addr = o_address + row_offset * mlen
             lines.extend(load_large_int(gp_l, l_address))
-            lines.extend(load_large_int(gp_o, o_addr))
+            lines.extend(self._o_address_lines(gp_o, o_addr, o_base_gp))
             lines.append(f"C_LOOP_START gp{gp_row_loop}, {loop_rows}")
             lines.append(f"S_LD_FP f{fp_l}, gp{gp_l}, 0")
             lines.append(f"S_RECI_FP f{fp_l}, f{fp_l}, 0")
@@ -654,7 +676,7 @@ class IsaAttentionMixin:
             gp_col_loop = self.register_allocator.allocate_gp(1)[0]
             o_addr = o_address + row_offset * mlen
             lines.extend(load_large_int(gp_l, l_address))
-            lines.extend(load_large_int(gp_o_row_base, o_addr))
+            lines.extend(self._o_address_lines(gp_o_row_base, o_addr, o_base_gp))
             lines.append(f"C_LOOP_START gp{gp_row_loop}, {loop_rows}")
             lines.append(f"S_LD_FP f{fp_l}, gp{gp_l}, 0")
             lines.append(f"S_RECI_FP f{fp_l}, f{fp_l}, 0")
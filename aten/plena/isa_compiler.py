@@ -8,7 +8,9 @@ from compiler.asm_templates import (
     preload_addr_reg_asm,
     reset_reg_asm,
     rms_norm_asm,
+    rms_norm_stats_asm,
     rope_asm,
+    rope_rotate_half_asm,
     store_act_asm,
 )
 from compiler.aten.plena.isa_attention import IsaAttentionMixin
@@ -116,6 +118,7 @@ class IsaCompiler(
             activation_offset_reg=addr_reg,
             stride_size=w,
         )
+        self.hbm_prefetch_bytes += size
 
         self.register_allocator.free_gp(gp_regs_for_addr)
         self.register_allocator.free_gp(gp_regs_for_preload)
@@ -168,6 +171,8 @@ class IsaCompiler(
         batch_size = tensor_info.physical_shape[0] if tensor_info.physical_shape != (0, 0) else tensor_info.shape[0]
         hidden_size = tensor_info.physical_shape[1] if tensor_info.physical_shape != (0, 0) else tensor_info.shape[1]
 
+        self.invalidate_mram_cache_range(hbm_addr, self.hbm_tensor_size(batch_size * hidden_size))
+
         isa_code = f"; Store {tensor_name} from VRAM to HBM\n"
         isa_code += f"; VRAM[{tensor_info.vram_addr}] -> HBM[{hbm_addr}], shape=({batch_size}, {hidden_size})\n"
 
@@ -311,6 +316,58 @@ class IsaCompiler(
             if temp_scratchpad_name is not None:
                 self.vram_allocator.free(temp_scratchpad_name, strict=False)
 
+    def rms_norm_stats(
+        self,
+        tensor_name: str,
+        stats_fpram_addr: int,
+        eps_offset: int = 1,
+        reci_hid_offset: int = 2,
+        vlen: int | None = None,
+    ) -> str:
+        """
+        Store the per-row RMS norm scale of a VRAM tensor to FPRAM; the tensor is not modified.
+
+        FPRAM[stats_fpram_addr + row] = 1 / sqrt(mean(x[row]^2) + eps) for every
+        physical row, with the same reduction order as ``normalize(mode="rms")``.
+        """
+        tensor_info = self[tensor_name]
+        if tensor_info.vram_addr is None:
+            raise ValueError(f"Tensor '{tensor_name}' has no VRAM address")
+
+        logical_batch_size, logical_hidden_dim = tensor_info.shape
+        physical_batch_size, physical_hidden_dim = tensor_info.physical_shape
+        batch_size = physical_batch_size or logical_batch_size
+        hidden_dim = physical_hidden_dim or logical_hidden_dim
+        if vlen is None:
+            vlen = self.mlen
+        if hidden_dim % vlen != 0:
+            raise ValueError(f"hidden_dim ({hidden_dim}) must be divisible by vlen ({vlen}) for normalization_asm")
+
+        gp_regs = self.register_allocator.allocate_gp(4)
+        scratch_name = f"__norm_scratch__{tensor_name}__{len(self.generated_code)}"
+        scratchpad_vram_addr = self.vram_allocator.allocate(vlen, name=scratch_name)
+        try:
+            isa_code = (
+                f"; RMS norm stats {tensor_name} -> FPRAM[{stats_fpram_addr}:{stats_fpram_addr + batch_size}], "
+                f"physical=({batch_size}, {hidden_dim})\n"
+            )
+            isa_code += rms_norm_stats_asm(
+                _eps_offset=eps_offset,
+                reci_hid_offset=reci_hid_offset,
+                alive_registers=gp_regs,
+                activation_base_address=tensor_info.vram_addr,
+                scratchpad_base_address=scratchpad_vram_addr,
+                stats_fpram_address=stats_fpram_addr,
+                vlen=vlen,
+                batch_size=batch_size,
+                hidden_dim=hidden_dim,
+                unroll=self._unroll,
+            )
+            return self._emit(isa_code)
+        finally:
+            self.register_allocator.free_gp(gp_regs)
+            self.vram_allocator.free(scratch_name, strict=False)
+
     def rope(
         self,
         x_name: str,
@@ -364,6 +421,54 @@ class IsaCompiler(
             self.register_allocator.free_gp(gp_regs)
             self.vram_allocator.free(scratch_name, strict=False)
 
+    def rope_rotate_half(
+        self,
+        x_name: str,
+        cos_name: str,
+        sin_name: str,
+    ) -> str:
+        """Apply RoPE in-place with rotate_half done by vector ops: x = x * cos + rotate_half(x) * sin
+
+        Needs head_dim to be a multiple of 2 * mlen so each half is whole VLEN
+        chunks; no rotate-half tensor, MRAM tile, or matrix op is involved.
+        """
+        x_info = self[x_name]
+        cos_info = self[cos_name]
+        sin_info = self[sin_name]
+
+        if x_info.vram_addr is None:
+            raise ValueError(f"Tensor '{x_name}' has no VRAM address")
+
+        seq_len, logical_head_dim = x_info.shape
+        vlen = self.mlen
+        physical_head_dim = x_info.physical_shape[1] if x_info.physical_shape != (0, 0) else logical_head_dim
+        head_dim = max(physical_head_dim, logical_head_dim)
+
+        if head_dim % (2 * vlen) != 0:
+            raise ValueError(f"head_dim ({head_dim}) must be divisible by 2 * vlen ({2 * vlen}) for vector rotate-half")
+
+        gp_regs = self.register_allocator.allocate_gp(8 if self._unroll else 9)
+
+        scratch_name = f"__rope_scratch__{x_name}__{len(self.generated_code)}"
+        scratch_addr = self.vram_allocator.allocate(2 * vlen, name=scratch_name)
+
+        try:
+            isa_code = rope_rotate_half_asm(
+                alive_registers=gp_regs,
+                x_base_address=x_info.vram_addr,
+                cos_base_address=cos_info.vram_addr,
+                sin_base_address=sin_info.vram_addr,
+                scratchpad_base_address=scratch_addr,
+                vlen=vlen,
+                seq_len=seq_len,
+                head_dim=head_dim,
+                unroll=self._unroll,
+            )
+            return self._emit(isa_code)
+        finally:
+            self.register_allocator.free_gp(gp_regs)
+            self.vram_allocator.free(scratch_name, strict=False)
+
     def get_code(self) -> str:
         """Get all accumulated generated ISA code"""
         return self.generated_code
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import re
+
 from compiler.aten.isa_builder import AsmInput, IsaBuilder, render_asm
 from compiler.aten.plena.registers import RegisterAllocator
 
+_LOOP_START = re.compile(r"^\s*C_LOOP_START\b", re.MULTILINE)
+_LOOP_END = re.compile(r"^\s*C_LOOP_END\b", re.MULTILINE)
+
 
 class IsaEmitMixin:
     # =========================================================================
@@ -43,6 +48,16 @@ class IsaEmitMixin:
     def _emit(self, isa_code: AsmInput) -> str:
         """Append ISA text to the output buffer and return it."""
         rendered = render_asm(isa_code)
+        if len(self.mram_cache) and not self._mram_cache_filling and "H_PREFETCH_M" in rendered:
+            # A prefetch outside the tile cache may overwrite any resident tile.
+            self.mram_cache.clear()
+        if not self._vram_spilling:
+            # Emitted code has consumed every address resolved so far.
+            self._vram_safe_point = self._vram_touch_clock
+        if "C_LOOP_" in rendered:
+            # Open hardware loops repeat whatever is emitted inside them, so
+            # VRAM spills (which must run once) are held back until they close.
+            self._hw_loop_depth += len(_LOOP_START.findall(rendered)) - len(_LOOP_END.findall(rendered))
         self._code_chunks.append(rendered)
         return rendered
 
@@ -54,6 +69,20 @@ class IsaEmitMixin:
         """Append one assembly comment line."""
         return self._emit(IsaBuilder().comment(text))
 
+    def code_mark(self) -> int:
+        """Return a position in the ISA buffer for a later ``take_code_since``."""
+        return len(self._code_chunks)
+
+    def take_code_since(self, mark: int) -> str:
+        """Remove and return the ISA emitted after ``mark``.
+
+        Lets a caller emit a region speculatively, inspect it, and re-emit it in
+        another form (e.g. wrapped in a hardware loop).
+        """
+        taken = "".join(self._code_chunks[mark:])
+        del self._code_chunks[mark:]
+        return taken
+
     # ------------------------------------------------------------------
     # FP Register management
     # ------------------------------------------------------------------
@@ -6,10 +6,23 @@ import math
 
 from compiler.asm_templates._imm import load_large_int
 from compiler.asm_templates import preload_addr_reg_asm
-from compiler.asm_templates.vram_sub_projection_asm import vram_sub_projection_asm_impl
+from compiler.asm_templates.vram_sub_projection_asm import (
+    vram_sub_projection_accumulate_asm_impl,
+    vram_sub_projection_asm_impl,
+)
 from compiler.aten.isa_builder import IsaBuilder, addr as areg, gp
 
 
+def _iter_k_chunks(num_k_tiles: int, max_k_tiles: int):
+    if max_k_tiles <= 0:
+        raise ValueError(f"max_k_tiles must be > 0, got {max_k_tiles}")
+    k_start = 0
+    while k_start < num_k_tiles:
+        k_end = min(k_start + max_k_tiles, num_k_tiles)
+        yield k_start, k_end - k_start
+        k_start = k_end
+
+
 class IsaMatrixMixin:
     def _emit_hbm_matrix_load(self, layout, gp_count: int, build_body) -> str:
         gp_regs = self.register_allocator.allocate_gp(gp_count)
@@ -75,6 +88,7 @@ class IsaMatrixMixin:
         sub_block = layout.get_sub_block(row_idx, col_idx)
         hbm_offset = sub_block.hbm_offset * hbm_element_bytes
         sub_block.mram_addr = mram_addr
+        self.hbm_prefetch_bytes += self.mlen * self.mlen * hbm_element_bytes
 
         asm.comment(comment if comment is not None else f"SubBlock [{row_idx}][{col_idx}]: HBM offset = {hbm_offset}")
         asm.instr("S_ADDI_INT", gp(gp_mram), gp(0), mram_addr)
@@ -252,9 +266,7 @@ class IsaMatrixMixin:
         return [1, 2, 3, 4, 5, 6, 7, 8, 9] if gp_regs is None else gp_regs
 
     def _projection_context(self, vram_mat_name: str, vram_row_idx: int, mram_mat_name: str):
-        if vram_mat_name not in self.vram_matrices:
-            raise KeyError(f"VRAM matrix '{vram_mat_name}' not registered")
-        vram_layout = self.vram_matrices[vram_mat_name]
+        vram_layout = self.get_vram_layout(vram_mat_name)
         return vram_layout, self.hbm_matrices[mram_mat_name], vram_layout.get_row_blocks(vram_row_idx)
 
     def _loaded_mram_start(self, blocks, missing_label) -> int:
@@ -297,20 +309,21 @@ class IsaMatrixMixin:
             row_loop_count=row_loop_count,
         )
 
-    def vram_sub_projection_asm(
+    def _projection_operands(
         self,
         vram_mat_name: str,
         vram_row_idx: int,
         mram_mat_name: str,
         mram_col_idx: int,
-        result_vram_addr: int,
-        gp_regs: list[int] | None = None,
         k_block_start: int = 0,
         k_block_count: int | None = None,
-        unroll: bool | None = None,
-    ) -> str:
-        """Emit VRAM[row][:] @ MRAM[:][col] projection."""
-        gp_regs = self._default_projection_gp_regs(gp_regs)
+        vram_k_block_start: int | None = None,
+    ) -> tuple[int, int, int, int, int]:
+        """Resolve (full_batch, K blocks, row groups, VRAM start, MRAM start) for a column projection.
+
+        ``vram_k_block_start`` reads the activation from a different K tile than
+        the weight (default: the same ``k_block_start``).
+        """
         vram_layout, mram_layout, vram_row_blocks = self._projection_context(vram_mat_name, vram_row_idx, mram_mat_name)
         mram_col_blocks = mram_layout.get_col_blocks(mram_col_idx)
         if k_block_count is not None:
@@ -323,14 +336,42 @@ class IsaMatrixMixin:
                 f"got {num_hidden_blocks}"
             )
 
+        vram_k = k_block_start if vram_k_block_start is None else vram_k_block_start
+        if vram_k_block_start is not None and vram_k + num_hidden_blocks > len(vram_row_blocks):
+            raise ValueError(
+                f"VRAM K tiles {vram_k}..{vram_k + num_hidden_blocks - 1} out of range for "
+                f"{vram_mat_name} with {len(vram_row_blocks)} column blocks"
+            )
         full_batch = (vram_layout.physical_shape or vram_layout.full_shape)[0]
-        valid_rows = vram_row_blocks[k_block_start].valid_shape[0] if vram_row_blocks[k_block_start].valid_shape else self.mlen
+        valid_rows = vram_row_blocks[vram_k].valid_shape[0] if vram_row_blocks[vram_k].valid_shape else self.mlen
         row_loop_count = max(1, math.ceil(valid_rows / self.blen))
-        vram_row_start_addr = vram_row_blocks[k_block_start].vram_addr
+        vram_row_start_addr = vram_row_blocks[vram_k].vram_addr
         mram_col_start_addr = self._loaded_mram_start(
             mram_col_blocks,
             lambda block: f"{mram_mat_name}[{block.row_idx}][{mram_col_idx}]",
         )
+        return full_batch, num_hidden_blocks, row_loop_count, vram_row_start_addr, mram_col_start_addr
+
+    def vram_sub_projection_asm(
+        self,
+        vram_mat_name: str,
+        vram_row_idx: int,
+        mram_mat_name: str,
+        mram_col_idx: int,
+        result_vram_addr: int,
+        gp_regs: list[int] | None = None,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        unroll: bool | None = None,
+        vram_k_block_start: int | None = None,
+    ) -> str:
+        """Emit VRAM[row][:] @ MRAM[:][col] projection."""
+        gp_regs = self._default_projection_gp_regs(gp_regs)
+        full_batch, num_hidden_blocks, row_loop_count, vram_row_start_addr, mram_col_start_addr = (
+            self._projection_operands(
+                vram_mat_name, vram_row_idx, mram_mat_name, mram_col_idx, k_block_start, k_block_count, vram_k_block_start
+            )
+        )
 
         header_lines = [
             f"; VRAM Sub Projection: {vram_mat_name}[{vram_row_idx}][:] @ {mram_mat_name}[:][{mram_col_idx}]",
@@ -359,6 +400,100 @@ class IsaMatrixMixin:
             row_loop_count=row_loop_count,
         )
 
+    def vram_sub_projection_accumulate_asm(
+        self,
+        vram_mat_name: str,
+        vram_row_idx: int,
+        mram_mat_name: str,
+        mram_col_idx: int,
+        result_vram_addr: int,
+        scratch_vram_addr: int,
+        gp_regs: list[int] | None = None,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        unroll: bool | None = None,
+        vram_k_block_start: int | None = None,
+    ) -> str:
+        """Emit result += VRAM[row][k chunk] @ MRAM[k chunk][col] through a (blen, mlen) scratch strip."""
+        gp_regs = self._default_projection_gp_regs(gp_regs)
+        full_batch, num_hidden_blocks, row_loop_count, vram_row_start_addr, mram_col_start_addr = (
+            self._projection_operands(
+                vram_mat_name, vram_row_idx, mram_mat_name, mram_col_idx, k_block_start, k_block_count, vram_k_block_start
+            )
+        )
+        k_end = k_block_start + num_hidden_blocks
+        header_lines = [
+            (
+                f"; VRAM Sub Projection Accumulate: {vram_mat_name}[{vram_row_idx}][k{k_block_start}:{k_end}] "
+                f"@ {mram_mat_name}[k{k_block_start}:{k_end}][{mram_col_idx}]"
+            ),
+            f"; Result += partial at VRAM[{result_vram_addr}] via strip VRAM[{scratch_vram_addr}]",
+        ]
+        return vram_sub_projection_accumulate_asm_impl(
+            mlen=self.mlen,
+            blen=self.blen,
+            unroll_loops=self.unroll_loops if unroll is None else unroll,
+            header_lines=header_lines,
+            vram_row_start_addr=vram_row_start_addr,
+            mram_start_addr=mram_col_start_addr,
+            result_vram_addr=result_vram_addr,
+            scratch_vram_addr=scratch_vram_addr,
+            full_batch=full_batch,
+            num_hidden_blocks=num_hidden_blocks,
+            mat_col_stride=self.blen * self.mlen,
+            gp_regs=gp_regs,
+            caller_name="vram_sub_projection_accumulate_asm",
+            row_loop_count=row_loop_count,
+        )
+
+    def vram_sub_projection_accumulate_to(
+        self,
+        vram_mat_name: str,
+        vram_row_idx: int,
+        mram_mat_name: str,
+        mram_col_idx: int,
+        target_matrix: str,
+        target_row_idx: int,
+        target_col_idx: int,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        vram_k_block_start: int | None = None,
+    ) -> str:
+        """
+        K-split accumulation in place:
+          target[target_row_idx][target_col_idx] += VRAM_A[vram_row_idx][k chunk] @ MRAM_W[k chunk][mram_col_idx].
+
+        The chunk is rounded on write-out and the sum rounded again, as with a
+        temp tile plus ``vram_block_add_to``, but only computed row groups are
+        added and the scratch is a single (blen, mlen) strip.
+        """
+        result_vram_addr, _target_base_addr, _target_rows = self._target_tile_addr(
+            target_matrix, target_row_idx, target_col_idx
+        )
+        scratch_name = f"__kacc_scratch__{target_matrix}__{len(self.generated_code)}"
+        scratch_addr = self.vram_allocator.allocate(self.blen * self.mlen, name=scratch_name)
+        gp_regs = self.register_allocator.allocate_gp(9)
+        try:
+            asm = self.vram_sub_projection_accumulate_asm(
+                vram_mat_name=vram_mat_name,
+                vram_row_idx=vram_row_idx,
+                mram_mat_name=mram_mat_name,
+                mram_col_idx=mram_col_idx,
+                result_vram_addr=result_vram_addr,
+                scratch_vram_addr=scratch_addr,
+                gp_regs=gp_regs,
+                k_block_start=k_block_start,
+                k_block_count=k_block_count,
+                vram_k_block_start=vram_k_block_start,
+            )
+        finally:
+            self.register_allocator.free_gp(gp_regs)
+            self.vram_allocator.free(scratch_name, strict=False)
+        return self._emit(
+            f"; VRAM Sub Projection Accumulate To: {vram_mat_name}[{vram_row_idx}][:] @ {mram_mat_name}[:][{mram_col_idx}] "
+            f"-> {target_matrix}[{target_row_idx}][{target_col_idx}]\n" + asm
+        )
+
     def vram_sub_projection_microtile_accumulate_asm(
         self,
         vram_mat_name: str,
@@ -830,6 +965,126 @@ class IsaMatrixMixin:
             ),
         )
 
+    def load_sub_matrix_col_cached(
+        self,
+        name: str,
+        col_idx: int,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        precision: int = 0,
+        set_scale: bool = True,
+        hbm_element_bytes: int = 1,
+        pin: bool = False,
+        hold: bool = False,
+    ) -> bool:
+        """
+        Make matrix[k_block_start:+k_block_count][col_idx] resident in MRAM,
+        reusing a copy left there by an earlier load when there is one.
+
+        Cached columns stay resident until evicted (LRU within
+        ``mram_tile_capacity``), dropped by ``reset_mram``, overwritten by a
+        prefetch outside the cache, or invalidated by a store to their HBM
+        range. Returns True on a hit, in which case no HBM traffic is emitted.
+
+        ``pin`` keeps the run out of LRU eviction until ``unpin_mram_tiles``;
+        ``hold`` protects a load issued ahead of its projection until first use.
+        """
+        layout = self.get_hbm_layout(name)
+        count = k_block_count if k_block_count is not None else layout.num_row_blocks
+        self._sync_mram_cache_capacity()
+        key = (name, layout.hbm_base_addr, col_idx, k_block_start, count, precision, hbm_element_bytes)
+        # Pins live at the top of MRAM, so an unpinned copy cannot be promoted in place.
+        if (not pin or key in self.mram_cache.pinned_keys()) and self._mram_cache_hit(
+            key, layout, col_idx, k_block_start, count, hbm_element_bytes, label=name
+        ):
+            return True
+
+        slot = self.mram_cache.insert(key, count, pin=pin, hold=hold)
+        self._mram_cache_filling = True
+        try:
+            self.load_sub_matrix_col(
+                name=name,
+                col_idx=col_idx,
+                mram_start_addr=slot * self.mlen * self.mlen,
+                k_block_start=k_block_start,
+                k_block_count=k_block_count,
+                precision=precision,
+                set_scale=set_scale,
+                hbm_element_bytes=hbm_element_bytes,
+            )
+        finally:
+            self._mram_cache_filling = False
+        return False
+
+    def _sync_mram_cache_capacity(self) -> None:
+        if self.mram_cache.tile_capacity != self.mram_tile_capacity:
+            self.mram_cache.clear()
+            self.mram_cache.tile_capacity = self.mram_tile_capacity
+
+    def _mram_cache_hit(
+        self,
+        key: tuple,
+        layout,
+        col_idx: int,
+        k_block_start: int,
+        count: int,
+        hbm_element_bytes: int,
+        label: str,
+    ) -> bool:
+        """Rebind ``layout``'s column to a resident cache entry for ``key``; False on a miss."""
+        slot = self.mram_cache.lookup(key)
+        if slot is None:
+            return False
+        block_size = self.mlen * self.mlen
+        # Another cached column may have rebound shared sub-blocks since.
+        for i in range(count):
+            layout.get_sub_block(k_block_start + i, col_idx).mram_addr = (slot + i) * block_size
+        self.mram_reused_bytes += count * block_size * hbm_element_bytes
+        self._emit(
+            IsaBuilder().comment(
+                f"MRAM hit: {label}[{k_block_start}:{k_block_start + count}][{col_idx}] at MRAM[{slot * block_size}]"
+            )
+        )
+        return True
+
+    def unpin_mram_tiles(self, name: str) -> None:
+        """Release the MRAM pins of matrix ``name``; its tiles become ordinary cache entries."""
+        self.mram_cache.unpin(lambda key: key[0] == name)
+
+    def mram_weight_k_chunks(self, name: str, num_k_tiles: int) -> list[tuple[int, int]]:
+        """(k_block_start, k_block_count) chunks a cached projection of ``name`` loads per column.
+
+        Chunks fill the unpinned MRAM tiles. When the leading K tiles of
+        ``name`` are pinned, the first chunk is exactly the pinned run so every
+        column hits it.
+        """
+        pinned = max(
+            (key[4] for key in self.mram_cache.pinned_keys() if key[0] == name and key[3] == 0),
+            default=0,
+        )
+        max_k_tiles = self.mram_tile_capacity - self.mram_cache.pinned_tiles
+        if max_k_tiles <= 0:
+            raise ValueError(f"no unpinned MRAM tiles left for {name!r}")
+        if pinned >= num_k_tiles:
+            return [(0, num_k_tiles)]
+        if pinned == 0:
+            return list(_iter_k_chunks(num_k_tiles, max_k_tiles))
+        rest = _iter_k_chunks(num_k_tiles - pinned, max_k_tiles)
+        return [(0, pinned)] + [(pinned + start, count) for start, count in rest]
+
+    def invalidate_mram_cache_range(self, hbm_addr: int, hbm_size: int) -> None:
+        """Drop cached tiles of any HBM matrix overlapping [hbm_addr, hbm_addr + hbm_size)."""
+
+        def overlaps(key) -> bool:
+            layout = self.hbm_matrices.get(key[0])
+            if layout is None:
+                return True
+            rows, cols = layout.physical_shape
+            end = layout.hbm_base_addr + (layout.hbm_size or rows * cols)
+            return layout.hbm_base_addr < hbm_addr + hbm_size and hbm_addr < end
+
+        self.mram_cache.evict(overlaps)
+
     def allocate_vram_matrix(
         self,
         name: str,
@@ -1115,6 +1370,7 @@ class IsaMatrixMixin:
         target_col_idx: int,
         k_block_start: int = 0,
         k_block_count: int | None = None,
+        vram_k_block_start: int | None = None,
     ) -> str:
         result_vram_addr, target_base_addr, target_rows = self._target_tile_addr(
             target_matrix, target_row_idx, target_col_idx
@@ -1142,6 +1398,7 @@ class IsaMatrixMixin:
                 gp_regs=gp_regs,
                 k_block_start=k_block_start,
                 k_block_count=k_block_count,
+                vram_k_block_start=vram_k_block_start,
             )
         isa_code += f"; Target VRAM addr: {result_vram_addr} (base={target_base_addr}, offset=col*{target_rows}*{self.mlen} + row*{self.mlen}*{self.mlen})\n"
         isa_code += asm
@@ -1160,6 +1417,7 @@ class IsaMatrixMixin:
         target_col_idx: int,
         k_block_start: int = 0,
         k_block_count: int | None = None,
+        vram_k_block_start: int | None = None,
     ) -> str:
         """
         Sub-block multiplication:
@@ -1177,6 +1435,7 @@ class IsaMatrixMixin:
             target_col_idx=target_col_idx,
             k_block_start=k_block_start,
             k_block_count=k_block_count,
+            vram_k_block_start=vram_k_block_start,
         )
 
     def vram_sub_projection_T_to(
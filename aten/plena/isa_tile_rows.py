@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import itertools
+
 from compiler.aten.isa_builder import IsaBuilder, fp, gp
 
 
@@ -457,5 +459,64 @@ class IsaTileRowMixin:
         finally:
             self._reg.free_gp(gp_regs)
 
+    def vram_row_copy_asm(
+        self,
+        dst_vram_addr: int,
+        src_vram_addr: int,
+        loops: list[tuple[int, int, int]],
+    ) -> str:
+        """
+        VRAM Row Copy: copy MLEN-wide rows along an affine loop nest.
+
+        ``loops`` lists ``(count, dst_stride, src_stride)`` outermost first, with
+        strides in VRAM words. For every index tuple ``(i0, i1, ...)``:
+            VRAM[dst + sum(i * dst_stride)] = VRAM[src + sum(i * src_stride)]
+
+        The copy is ``V_ADD_VF dst, src, f0``. Each level keeps its own dst/src
+        pointer pair seeded from the enclosing level, so strides only ever need
+        non-negative S_ADDI_INT immediates.
+        """
+        loops = [loop for loop in loops if loop[0] != 1]
+        if any(count < 1 or dst_stride < 0 or src_stride < 0 for count, dst_stride, src_stride in loops):
+            raise ValueError(f"vram_row_copy needs positive counts and non-negative strides, got {loops}")
+
+        asm = IsaBuilder().comment(
+            f"=== VRAM Row Copy: VRAM[{dst_vram_addr}] <- VRAM[{src_vram_addr}] loops {loops} ==="
+        )
+        if self._unroll:
+            gp_regs = self._reg.allocate_gp(2)
+            gp_dst, gp_src = gp_regs
+            try:
+                for index in itertools.product(*(range(count) for count, _, _ in loops)):
+                    dst_addr = dst_vram_addr + sum(i * d for i, (_, d, _) in zip(index, loops))
+                    src_addr = src_vram_addr + sum(i * s for i, (_, _, s) in zip(index, loops))
+                    asm.instr("S_ADDI_INT", gp(gp_dst), gp(0), dst_addr)
+                    asm.instr("S_ADDI_INT", gp(gp_src), gp(0), src_addr)
+                    asm.instr("V_ADD_VF", gp(gp_dst), gp(gp_src), fp(0), 0)
+                return self._emit(asm)
+            finally:
+                self._reg.free_gp(gp_regs)
+
+        gp_regs = self._reg.allocate_gp(max(2, 3 * len(loops)))
+        levels = [gp_regs[3 * i : 3 * i + 3] for i in range(len(loops))]
+        try:
+            outer_dst, outer_src = gp_regs[:2]
+            asm.instr("S_ADDI_INT", gp(outer_dst), gp(0), dst_vram_addr)
+            asm.instr("S_ADDI_INT", gp(outer_src), gp(0), src_vram_addr)
+            for level, ((count, _, _), (gp_ldst, gp_lsrc, gp_loop)) in enumerate(zip(loops, levels)):
+                if level:
+                    asm.instr("S_ADDI_INT", gp(gp_ldst), gp(outer_dst), 0)
+                    asm.instr("S_ADDI_INT", gp(gp_lsrc), gp(outer_src), 0)
+                asm.instr("C_LOOP_START", gp(gp_loop), count)
+                outer_dst, outer_src = gp_ldst, gp_lsrc
+            asm.instr("V_ADD_VF", gp(outer_dst), gp(outer_src), fp(0), 0)
+            for (_, dst_stride, src_stride), (gp_ldst, gp_lsrc, gp_loop) in reversed(list(zip(loops, levels))):
+                asm.instr("S_ADDI_INT", gp(gp_ldst), gp(gp_ldst), dst_stride)
+                asm.instr("S_ADDI_INT", gp(gp_lsrc), gp(gp_lsrc), src_stride)
+                asm.instr("C_LOOP_END", gp(gp_loop))
+            return self._emit(asm)
+        finally:
+            self._reg.free_gp(gp_regs)
+
 
 __all__ = ["IsaTileRowMixin"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
 import math
 
@@ -28,6 +29,7 @@ class VirtualMemoryManager:
         self.alignment = alignment
         self.mem_name = mem_name
         self.next_bump = 0  # Bump allocation pointer
+        self.peak = 0  # Highest bump pointer reached since reset
 
         # Two core stacks
         self.used_stack: list[MemoryBlock] = []
@@ -74,6 +76,7 @@ class VirtualMemoryManager:
         new_block = MemoryBlock(name=name, addr=aligned_addr, size=aligned_size)
         self.used_stack.append(new_block)
         self.next_bump = aligned_addr + aligned_size
+        self.peak = max(self.peak, self.next_bump)
         return aligned_addr
 
     def free(self, name: str, strict: bool = True) -> MemoryBlock | None:
@@ -83,6 +86,7 @@ class VirtualMemoryManager:
                 freed = self.used_stack.pop(i)
                 self.free_stack.append(freed)
                 self._coalesce_free_stack()
+                self._release_free_tail()
                 return freed
 
         if strict:
@@ -101,6 +105,7 @@ class VirtualMemoryManager:
         end = addr + aligned_size
         if self.next_bump < end:
             self.next_bump = end
+        self.peak = max(self.peak, self.next_bump)
 
     def _coalesce_free_stack(self):
         """Merge adjacent free blocks by address."""
@@ -122,9 +127,21 @@ class VirtualMemoryManager:
 
         self.free_stack = merged
 
+    def _release_free_tail(self):
+        """Hand a free block ending at the bump pointer back to bump allocation.
+
+        Otherwise a large request can overflow while the space it needs sits
+        split between that block and the unbumped tail.
+        """
+        for i, block in enumerate(self.free_stack):
+            if block.addr + block.size == self.next_bump:
+                self.next_bump = self.free_stack.pop(i).addr
+                return
+
     def reset(self):
         """Reset manager"""
         self.next_bump = 0
+        self.peak = 0
         self.used_stack.clear()
         self.free_stack.clear()
 
@@ -344,6 +361,131 @@ class FPRAMObjectLayout:
     kind: str = "FPRAMObject"
 
 
+# ==============================================================================
+# VRAM Liveness Planning
+# ==============================================================================
+
+
+@dataclass
+class VRAMLiveRange:
+    """One VRAM allocation observed while recording a program build."""
+
+    name: str
+    size: int  # Aligned size (number of elements)
+    start: int  # Allocator event index of the allocation
+    end: int | None = None  # Event index of the matching free (None = live to program end)
+    addr: int = 0  # Address handed out during recording, then the planned address
+    pinned: bool = False  # Prestaged region whose address is fixed by the caller
+
+
+class VRAMPlan:
+    """
+    Two-phase VRAM address plan.
+
+    The eager allocator decides addresses as the program builder runs, so
+    fragmentation depends on the order frontends happen to free buffers in.
+    A plan is attached to the VRAMAllocator of a first, recording build; it
+    logs every allocation with its live range. ``pack()`` then assigns
+    addresses offline (greedy by size, lowest fitting offset among the ranges
+    that overlap in time) and the plan replays them, in allocation order, on a
+    second build of the same program. Builds must be deterministic: the replay
+    checks each allocation against the recorded size.
+    """
+
+    def __init__(self):
+        self.ranges: list[VRAMLiveRange] = []
+        self.alignment = 1
+        self.packed = False
+        self.recorded_peak = 0
+        self.planned_peak = 0
+        self._clock = 0
+        self._live: dict[str, list[int]] = {}
+        self._cursor = 0
+
+    def record_allocate(self, name: str, size: int, addr: int, pinned: bool = False) -> None:
+        self._live.setdefault(name, []).append(len(self.ranges))
+        self.ranges.append(VRAMLiveRange(name=name, size=size, start=self._clock, addr=addr, pinned=pinned))
+        self._clock += 1
+
+    def record_free(self, name: str) -> None:
+        # VirtualMemoryManager.free releases the oldest block with this name.
+        indices = self._live.get(name)
+        if indices:
+            self.ranges[indices.pop(0)].end = self._clock
+            self._clock += 1
+
+    def pack(self) -> int:
+        """Assign offline addresses and switch the plan to replay; returns the peak."""
+        if self.packed:
+            raise ValueError("VRAMPlan is already packed")
+        self.recorded_peak = max((r.addr + r.size for r in self.ranges), default=0)
+        horizon = self._clock + 1
+
+        def overlaps(a: VRAMLiveRange, b: VRAMLiveRange) -> bool:
+            a_end = horizon if a.end is None else a.end
+            b_end = horizon if b.end is None else b.end
+            return a.start < b_end and b.start < a_end
+
+        def align(value: int) -> int:
+            return ((value + self.alignment - 1) // self.alignment) * self.alignment
+
+        placed = [r for r in self.ranges if r.pinned]
+        planned = {id(r): r.addr for r in placed}
+        for live in sorted((r for r in self.ranges if not r.pinned), key=lambda r: (-r.size, r.start)):
+            offset = 0
+            for other in sorted((o for o in placed if overlaps(live, o)), key=lambda o: planned[id(o)]):
+                other_addr = planned[id(other)]
+                if offset + live.size <= other_addr:
+                    break
+                offset = max(offset, align(other_addr + other.size))
+            planned[id(live)] = offset
+            placed.append(live)
+
+        self.planned_peak = max((planned[id(r)] + r.size for r in self.ranges), default=0)
+        # Keep the recorded layout when packing cannot beat it.
+        if self.planned_peak < self.recorded_peak:
+            for r in self.ranges:
+                r.addr = planned[id(r)]
+        else:
+            self.planned_peak = self.recorded_peak
+        self.packed = True
+        self._cursor = 0
+        return self.planned_peak
+
+    def next_addr(self, name: str, size: int) -> int:
+        """Return the planned address of the next allocation in replay order."""
+        if self._cursor >= len(self.ranges):
+            raise ValueError(f"VRAMPlan exhausted: allocation '{name}' was not recorded")
+        live = self.ranges[self._cursor]
+        # Scratch names embed the code length, which moves with the addresses,
+        # so only the allocation order and sizes have to match.
+        if live.size != size:
+            raise ValueError(
+                f"VRAMPlan diverged at allocation {self._cursor}: "
+                f"recorded '{live.name}' ({live.size}), replayed '{name}' ({size})"
+            )
+        self._cursor += 1
+        return live.addr
+
+
+# ==============================================================================
+# VRAM Spill Slots
+# ==============================================================================
+
+
+@dataclass
+class VRAMSpillSlot:
+    """Eviction state of a VRAM tensor registered with ``PlenaCompiler.spillable``."""
+
+    name: str  # VRAM object name
+    source: str | None = None  # HBM object holding an unmodified copy (rematerialise, no store)
+    hbm_name: str | None = None  # HBM object to reload from while spilled
+    hbm_addr: int = -1  # Spill arena range (dirty tensors only)
+    hbm_size: int = 0
+    spilled: bool = False
+    last_touch: int = 0  # Touch clock of the most recent lookup
+
+
 # ==============================================================================
 # Allocators
 # ==============================================================================
@@ -365,6 +507,12 @@ class MemoryAllocatorBase:
     def next_free(self, value: int):
         self._validate_next_free(value)
         self._vmm.next_bump = value
+        self._vmm.peak = max(self._vmm.peak, value)
+
+    @property
+    def peak(self) -> int:
+        """High-water mark of ``next_free``; freeing the top block lowers only the latter."""
+        return self._vmm.peak
 
     def _validate_next_free(self, value: int) -> None:
         del value
@@ -401,16 +549,197 @@ class MRAMAllocator(MemoryAllocatorBase):
         return self._vmm.allocate(name, size)
 
 
+class MRAMTileCache:
+    """
+    Residency table for weight tiles held in MRAM.
+
+    An entry is one contiguous run of tiles (typically one K chunk of a weight
+    column) keyed by whatever identifies its contents. Slots are MLEN x MLEN
+    tiles; a miss takes the first free run that fits, evicting least recently
+    used entries until one does.
+
+    Pinned keys own a fixed run at the top of MRAM and are never evicted to
+    make room; ordinary entries share the slots below them. A pin outlives its
+    entry: after ``clear()`` the key is placed back in its run on the next
+    insert. Held entries (prefetched ahead of use) are evicted only when
+    nothing else can go, and stop being held on their first lookup.
+    """
+
+    def __init__(self, tile_capacity: int):
+        if tile_capacity <= 0:
+            raise ValueError(f"tile_capacity must be > 0, got {tile_capacity}")
+        self.tile_capacity = tile_capacity
+        self._entries: OrderedDict[tuple, tuple[int, int]] = OrderedDict()  # key -> (first slot, tiles)
+        self._pins: dict[tuple, int] = {}  # key -> tiles, in run order from the top of MRAM
+        self._held: set[tuple] = set()
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def pinned_tiles(self) -> int:
+        """Tiles reserved by pinned keys, resident or not."""
+        return sum(self._pins.values())
+
+    @property
+    def unpinned_tiles(self) -> int:
+        """Tiles available to ordinary entries."""
+        return self.tile_capacity - self.pinned_tiles
+
+    def pinned_keys(self) -> list[tuple]:
+        return list(self._pins)
+
+    def lookup(self, key: tuple) -> int | None:
+        """First slot of a resident entry (marking it most recently used), else None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self._held.discard(key)
+        return entry[0]
+
+    def _pinned_slot(self, key: tuple) -> int:
+        top = self.tile_capacity
+        for pinned_key, tiles in self._pins.items():
+            top -= tiles
+            if pinned_key == key:
+                return top
+        raise KeyError(key)
+
+    def _free_run(self, num_tiles: int) -> int | None:
+        used = sorted(self._entries.values())
+        slot = 0
+        for first, tiles in used:
+            if first - slot >= num_tiles:
+                return slot
+            slot = max(slot, first + tiles)
+        return slot if self.unpinned_tiles - slot >= num_tiles else None
+
+    def _victim(self) -> tuple | None:
+        evictable = [key for key in self._entries if key not in self._pins]
+        for key in evictable:
+            if key not in self._held:
+                return key
+        # Holds are advisory: drop the oldest prefetch rather than fail.
+        return evictable[0] if evictable else None
+
+    def _drop(self, key: tuple) -> None:
+        del self._entries[key]
+        self._held.discard(key)
+
+    def insert(self, key: tuple, num_tiles: int, *, pin: bool = False, hold: bool = False) -> int:
+        """Place ``key`` in MRAM, evicting LRU entries as needed; returns its first slot.
+
+        ``pin`` reserves a run for ``key`` at the top of MRAM; ``hold`` keeps a
+        prefetched entry until it is looked up.
+        """
+        if num_tiles > self.tile_capacity:
+            raise ValueError(f"entry of {num_tiles} tiles exceeds MRAM capacity of {self.tile_capacity}")
+        if key in self._entries:
+            self._drop(key)
+        if pin and self._pins.get(key) != num_tiles:
+            if self.pinned_tiles - self._pins.get(key, 0) + num_tiles >= self.tile_capacity:
+                raise ValueError(
+                    f"pinning {num_tiles} tiles would leave no unpinned MRAM tile "
+                    f"({self.pinned_tiles} of {self.tile_capacity} already pinned)"
+                )
+            self.unpin(lambda pinned_key: pinned_key == key)
+            self._pins[key] = num_tiles
+        if key in self._pins:
+            slot = self._pinned_slot(key)
+            # Pins only grow downward, so anything in the run is an ordinary entry.
+            for other, (first, tiles) in list(self._entries.items()):
+                if first < slot + num_tiles and slot < first + tiles:
+                    self._drop(other)
+        else:
+            slot = self._free_run(num_tiles)
+            while slot is None:
+                victim = self._victim()
+                if victim is None:
+                    raise ValueError(
+                        f"entry of {num_tiles} tiles does not fit beside {self.pinned_tiles} pinned tiles "
+                        f"(capacity {self.tile_capacity})"
+                    )
+                self._drop(victim)
+                slot = self._free_run(num_tiles)
+        self._entries[key] = (slot, num_tiles)
+        if hold:
+            self._held.add(key)
+        return slot
+
+    def unpin(self, predicate) -> None:
+        """Release every pin whose key satisfies ``predicate``.
+
+        Released entries stay resident as ordinary entries. Pins below a
+        released run move up, so their resident copies are dropped.
+        """
+        old_slots = {key: self._pinned_slot(key) for key in self._pins}
+        for key in [key for key in self._pins if predicate(key)]:
+            del self._pins[key]
+        for key, slot in old_slots.items():
+            if key in self._pins and key in self._entries and self._pinned_slot(key) != slot:
+                self._drop(key)
+
+    def evict(self, predicate) -> None:
+        """Drop every entry whose key satisfies ``predicate``."""
+        for key in [key for key in self._entries if predicate(key)]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._held.clear()
+
+
 class VRAMAllocator(MemoryAllocatorBase):
     """VRAM address allocator with MLEN-aligned best-fit reuse + bump allocation."""
 
     def __init__(self, alignment: int = MLEN, total_size: int = 0):
         super().__init__(total_size=total_size, alignment=alignment, mem_name="VRAM")
+        self.plan: VRAMPlan | None = None
+
+    def attach_plan(self, plan: VRAMPlan) -> None:
+        """Record live ranges into ``plan``, or replay its addresses once packed."""
+        plan.alignment = self.alignment
+        self.plan = plan
 
     def allocate(self, size: int, name: str = "") -> int:
         if not name:
             raise ValueError("VRAMAllocator.allocate() requires name for subsequent free.")
-        return self._vmm.allocate(name, size)
+        if self.plan is not None and self.plan.packed:
+            aligned_size = self._vmm._align(size)
+            addr = self.plan.next_addr(name, aligned_size)
+            self._vmm.mark_used(addr, aligned_size, name=name)
+            return addr
+        addr = self._vmm.allocate(name, size)
+        if self.plan is not None:
+            self.plan.record_allocate(name, self._vmm._align(size), addr)
+        return addr
+
+    def can_allocate(self, size: int) -> bool:
+        """Whether ``allocate(size)`` would fit without overflowing ``total_size``."""
+        aligned_size = self._vmm._align(size)
+        if self.total_size <= 0 or any(block.size >= aligned_size for block in self._vmm.free_stack):
+            return True
+        return self._vmm._align(self._vmm.next_bump) + aligned_size <= self.total_size
+
+    def mark_used(self, addr: int, size: int, name: str) -> None:
+        """Register a prestaged region; plans keep it at ``addr``."""
+        if self.plan is not None:
+            aligned_size = self._vmm._align(size)
+            if self.plan.packed:
+                self.plan.next_addr(name, aligned_size)
+            else:
+                self.plan.record_allocate(name, aligned_size, addr, pinned=True)
+        self._vmm.mark_used(addr, size, name=name)
+
+    def free(self, name: str, strict: bool = True) -> MemoryBlock | None:
+        freed = self._vmm.free(name, strict=strict)
+        if freed is not None and self.plan is not None and not self.plan.packed:
+            self.plan.record_free(name)
+        return freed
 
 
 class FPRAMAllocator(MemoryAllocatorBase):
@@ -431,6 +760,11 @@ class FPRAMAllocator(MemoryAllocatorBase):
       slot 4 = 1/hidden_size (rms_norm/layer_norm)
       slot 5 = 1.0 (FFN SiLU sigmoid denominator; im2col fp_one_reg)
 
+    Frontends that preload these slots also address a fixed scratch region
+    above them (online-softmax m/l/scale rows, the GELU 1.702 constant).
+    ``reserve()`` keeps that prefix out of dynamic allocation, across
+    ``reset()`` as well.
+
     Hardware: 1024 f16 elements (configurable via total_size).
     """
 
@@ -440,11 +774,12 @@ class FPRAMAllocator(MemoryAllocatorBase):
             total_size: Total FP RAM size (default 1024, matching hardware fpsram)
         """
         super().__init__(total_size=total_size, alignment=1, mem_name="FPRAM")
+        self.reserved = 0
         self.allocations: dict[str, tuple[int, int]] = {}
 
     def _validate_next_free(self, value: int) -> None:
-        if value < 0 or value > self.total_size:
-            raise ValueError(f"next_free out of range: {value}, expected [0, {self.total_size}]")
+        if value < self.reserved or value > self.total_size:
+            raise ValueError(f"next_free out of range: {value}, expected [{self.reserved}, {self.total_size}]")
 
     def allocate(self, name: str, size: int) -> int:
         """Allocate FP RAM space (best-fit + bump)."""
@@ -457,6 +792,16 @@ class FPRAMAllocator(MemoryAllocatorBase):
         self.allocations[name] = (addr, size)
         return addr
 
+    def reserve(self, size: int) -> None:
+        """Keep FPRAM[0:size] out of dynamic allocation; must precede any allocate()."""
+        if self.allocations:
+            raise RuntimeError(f"FPRAM reserve({size}) after allocations: {sorted(self.allocations)}")
+        if size < 0 or size > self.total_size:
+            raise ValueError(f"FPRAM reserved slots out of range: {size}, expected [0, {self.total_size}]")
+        self.reserved = size
+        self._vmm.reset()
+        self.next_free = size
+
     def free(self, name: str, strict: bool = True) -> MemoryBlock | None:
         """Free a block and move it to free_stack (same as VirtualMemoryManager)."""
         freed = self._vmm.free(name, strict=strict)
@@ -467,4 +812,5 @@ class FPRAMAllocator(MemoryAllocatorBase):
     def reset(self):
         """Reset allocator"""
         self._vmm.reset()
+        self.next_free = self.reserved
         self.allocations.clear()
@@ -7,10 +7,12 @@ from compiler.aten.plena.memory import (
     FPRAMAllocator,
     FPRAMObjectLayout,
     MRAMAllocator,
+    MRAMTileCache,
     MatrixBlockLayout,
     MemoryObjectInfo,
     VRAMAllocator,
     VRAMMatrixBlockLayout,
+    VRAMSpillSlot,
     VRAMSubMatrixInfo,
 )
 
@@ -59,13 +61,55 @@ class MemoryStateMixin:
         self.vram_allocator = VRAMAllocator(alignment=mlen * mlen)
         self.mram_allocator = MRAMAllocator(mlen=mlen, tile_capacity=mram_tile_capacity)
         self.fpram_allocator = FPRAMAllocator()
+        # Bytes requested by HBM prefetches issued through load_batch and the
+        # load_sub_matrix* helpers (MX scales excluded). Attention kernels that
+        # stream K/V inside hardware loops emit their own prefetches and are
+        # not counted.
+        self.hbm_prefetch_bytes = 0
+        # Weight tiles left resident in MRAM between projections. Prefetches
+        # skipped on a hit are counted in mram_reused_bytes, so
+        # hbm_prefetch_bytes + mram_reused_bytes is the traffic without reuse.
+        self.mram_cache = MRAMTileCache(mram_tile_capacity)
+        self.mram_reused_bytes = 0
+        self._mram_cache_filling = False
+        # Spillable VRAM tensors. Lookups advance the touch clock; a spilled
+        # tensor is reloaded by the lookup that needs it. Tensors touched since
+        # the last emitted chunk (the safe point) may have their address held
+        # by the op being built and are never evicted.
+        self.vram_spill_slots: dict[str, VRAMSpillSlot] = {}
+        self._vram_touch_clock = 0
+        self._vram_safe_point = 0
+        self._vram_spilling = False
+        self._hw_loop_depth = 0
+        # HBM payload bytes (MX scales excluded) written by spills and read
+        # back by reloads.
+        self.vram_spill_bytes = 0
+        self.vram_reload_bytes = 0
 
     def __contains__(self, name: str) -> bool:
-        return name in self.hbm_matrices or name in self.vram_matrices or name in self.fpram_matrices
+        return (
+            name in self.hbm_matrices
+            or name in self.vram_matrices
+            or name in self.fpram_matrices
+            or name in self.vram_spill_slots
+        )
+
+    def _touch_vram(self, name: str) -> None:
+        slot = self.vram_spill_slots.get(name)
+        if slot is None:
+            return
+        if slot.spilled:
+            self._reload_spilled_vram(slot)
+        self._vram_touch_clock += 1
+        slot.last_touch = self._vram_touch_clock
+
+    def _reload_spilled_vram(self, slot: VRAMSpillSlot) -> None:
+        raise KeyError(f"VRAM object '{slot.name}' is spilled and this compiler cannot reload it")
 
     def __getitem__(self, name: str) -> MemoryObjectInfo:
         if name not in self:
             raise KeyError(f"Object '{name}' not found")
+        self._touch_vram(name)
         info = MemoryObjectInfo(name=name, kind="Unknown")
         hbm_layout = self.hbm_matrices.get(name)
         vram_layout = self.vram_matrices.get(name)
@@ -105,6 +149,7 @@ class MemoryStateMixin:
 
     def get_vram_layout(self, name: str) -> VRAMMatrixBlockLayout:
         """Read VRAM matrix layout by name."""
+        self._touch_vram(name)
         if name not in self.vram_matrices:
             raise KeyError(f"VRAM matrix '{name}' not found")
         return self.vram_matrices[name]
@@ -315,12 +360,14 @@ class MemoryStateMixin:
 
     def get_vram_sub_block(self, name: str, row_idx: int, col_idx: int) -> VRAMSubMatrixInfo:
         """Get VRAM sub-block information"""
+        self._touch_vram(name)
         if name not in self.vram_matrices:
             raise KeyError(f"VRAM matrix '{name}' not registered")
         return self.vram_matrices[name].get_sub_block(row_idx, col_idx)
 
     def clear_mram_bindings(self) -> None:
         """Clear cached MRAM addresses on all HBM sub-blocks."""
+        self.mram_cache.clear()
         for layout in self.hbm_matrices.values():
             for sub_block in layout.sub_blocks.values():
                 sub_block.mram_addr = None
@@ -334,6 +381,11 @@ class MemoryStateMixin:
         self.vram_allocator.reset()
         self.mram_allocator.reset()
         self.fpram_allocator.reset()
+        self.hbm_prefetch_bytes = 0
+        self.mram_reused_bytes = 0
+        self.vram_spill_slots.clear()
+        self.vram_spill_bytes = 0
+        self.vram_reload_bytes = 0
 
 
 __all__ = ["MemoryStateMixin"]
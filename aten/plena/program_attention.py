@@ -8,6 +8,21 @@ from compiler.asm_templates._imm import load_large_int
 from compiler.aten.plena.vars import InputVar, VRAMMatrixVar
 
 
+def ragged_kv_block_offsets(kv_cache_lens, mlen: int) -> list[int]:
+    """First MLEN row block of each sequence in a ragged-packed KV cache.
+
+    Sequence ``b`` owns ``ceil(kv_cache_lens[b] / mlen)`` whole row blocks and
+    the slabs are packed back to back, so only each sequence's tail tile is
+    padded.
+    """
+    offsets = []
+    block = 0
+    for kv_len in kv_cache_lens:
+        offsets.append(block)
+        block += math.ceil(kv_len / mlen)
+    return offsets
+
+
 class ProgramAttentionMixin:
     # ========================================================================
     # Flash Attention Operations
@@ -29,6 +44,8 @@ class ProgramAttentionMixin:
         """Materialize an MLEN x MLEN score mask with -inf in padded columns."""
         if valid_cols < 0 or valid_cols > self.mlen:
             raise ValueError(f"valid_cols must be in [0, {self.mlen}], got {valid_cols}")
+        if self.constant_pool_enabled:
+            return self.load_batch(self.valid_col_mask_constant(valid_cols), name=name)
 
         mask = self.alloc(name, self.mlen, self.mlen)
         mask_addr = self.get_vram_addr(mask.name)
@@ -58,29 +75,36 @@ class ProgramAttentionMixin:
         self.emit("\n".join(lines) + "\n")
         return mask
 
-    def _build_causal_score_mask(self, name: str) -> VRAMMatrixVar:
+    def _build_causal_score_mask(self, name: str, diagonal: int = 0) -> VRAMMatrixVar:
         """Materialize an MLEN x MLEN causal score mask.
 
-        The mask is 0 on and below the diagonal and -inf above it. This is the
-        same single-tile triangular mask that the MHA path uses when callers pass
-        an explicit VRAM mask. Multi-sequence-tile causal geometry remains owned
-        by the existing MHA tile-skipping logic; packed GQA still rejects
-        seq_len > MLEN.
+        The mask is 0 where ``col <= row + diagonal`` and -inf elsewhere.
+        ``diagonal=0`` is the plain triangle for a tile whose first query and
+        first key share a position; a tile whose queries start ``d`` positions
+        after its keys (cached prefix, chunked prefill) needs ``diagonal=d``.
+        See ``_causal_tile`` for how the shift of a tile is derived.
+
+        With the constant pool enabled the mask is prefetched from HBM;
+        otherwise it is built row by row with S_ST_FP + S_MAP_V_FP.
         """
+        if not -self.mlen < diagonal < self.mlen:
+            raise ValueError(f"diagonal must be in ({-self.mlen}, {self.mlen}), got {diagonal}")
+        if self.constant_pool_enabled:
+            return self.load_batch(self.causal_mask_constant(diagonal), name=name)
         mask = self.alloc(name, self.mlen, self.mlen)
         mask_addr = self.get_vram_addr(mask.name)
         fp_scratch_base = self._ONLINE_SOFTMAX_FPSRAM_BASE
         gp_mask, gp_fp = self.register_allocator.allocate_gp(2)
 
         lines = [
-            f"; === Build causal score mask: MLEN={self.mlen} ===",
+            f"; === Build causal score mask: MLEN={self.mlen}, diagonal={diagonal} ===",
             f"S_ADDI_INT gp{gp_fp}, gp0, {fp_scratch_base}",
             "S_LD_FP f7, gp0, 2",
         ]
         lines.extend(load_large_int(gp_mask, mask_addr))
         for row in range(self.mlen):
             for col in range(self.mlen):
-                value_reg = "f0" if col <= row else "f7"
+                value_reg = "f0" if col <= row + diagonal else "f7"
                 lines.append(f"S_ST_FP {value_reg}, gp{gp_fp}, {col}")
             lines.extend(
                 [
@@ -93,30 +117,102 @@ class ProgramAttentionMixin:
         self.emit("\n".join(lines) + "\n")
         return mask
 
-    def _build_sliding_causal_score_mask(self, name: str, sliding_window: int) -> VRAMMatrixVar:
-        """Materialize a single-tile GPT-OSS sliding causal score mask.
+    @staticmethod
+    def _causal_tile(
+        query_first: int,
+        block_rows: int,
+        key_first: int,
+        block_cols: int,
+        sliding_window: int | None = None,
+    ) -> tuple[bool, int | None]:
+        """Classify one (query block, key block) score tile under causal masking.
+
+        Query rows are global positions ``query_first + [0, block_rows)`` and key
+        columns ``key_first + [0, block_cols)``. Returns ``(False, None)`` when
+        no query can see any key in the tile (skip it), ``(True, None)`` when
+        every key is visible to every query (no mask), and ``(True, shift)`` for
+        a boundary tile, where ``shift = query_first - key_first`` is the
+        ``diagonal`` of the mask it needs.
+
+        Without a window only tiles straddling the diagonal are boundary tiles,
+        so ``-MLEN < shift < MLEN`` and, for a fixed query offset, only
+        ``q_offset % MLEN`` and that minus MLEN occur. With ``sliding_window``
+        query ``i`` sees keys ``(i - window, i]``: tiles wholly before the
+        window of the first query row are skipped too, and tiles cut by the
+        trailing window edge are boundary tiles with ``shift`` up to
+        ``window + MLEN``.
+        """
+        query_last = query_first + block_rows - 1
+        key_last = key_first + block_cols - 1
+        if key_first > query_last:
+            return False, None
+        if sliding_window is not None and key_last <= query_first - sliding_window:
+            return False, None
+        cuts_diagonal = key_last > query_first
+        cuts_window = sliding_window is not None and key_first <= query_last - sliding_window
+        if not (cuts_diagonal or cuts_window):
+            return True, None
+        return True, query_first - key_first
+
+    def _causal_mask_for_shift(
+        self,
+        shift: int,
+        causal_mask: VRAMMatrixVar,
+        cache: dict[int, VRAMMatrixVar],
+        prefix: str,
+        sliding_window: int | None = None,
+    ) -> VRAMMatrixVar:
+        """Return the VRAM mask for a boundary tile with diagonal ``shift``.
+
+        ``causal_mask`` (the caller's zero-diagonal mask) serves shift 0 of a
+        plain causal tile; every other mask -- shifted diagonals and all
+        sliding-window masks -- is built once per call into ``cache``, which
+        the caller frees.
+        """
+        if shift == 0 and sliding_window is None:
+            return causal_mask
+        if shift not in cache:
+            tag = f"m{-shift}" if shift < 0 else f"p{shift}"
+            if sliding_window is None:
+                cache[shift] = self._build_causal_score_mask(f"{prefix}_causal_mask_{tag}", diagonal=shift)
+            else:
+                cache[shift] = self._build_sliding_causal_score_mask(
+                    f"{prefix}_sliding_mask_{sliding_window}_{tag}", sliding_window, diagonal=shift
+                )
+        return cache[shift]
 
-        Visible columns satisfy ``col <= row`` and ``col > row - sliding_window``.
-        This is only the short-sequence/single-tile mask. Multi-tile sliding
-        remains part of the existing sequence-tile debt.
+    def _build_sliding_causal_score_mask(self, name: str, sliding_window: int, diagonal: int = 0) -> VRAMMatrixVar:
+        """Materialize an MLEN x MLEN GPT-OSS sliding causal score mask.
+
+        Visible columns satisfy ``col <= row + diagonal`` and
+        ``col > row + diagonal - sliding_window``; ``diagonal`` is the tile
+        shift from ``_causal_tile``. Unlike the plain causal mask the shift
+        is not bounded by MLEN: a tile cut only by the trailing window edge
+        sits up to ``sliding_window + MLEN`` positions behind its queries.
         """
         if sliding_window <= 0:
             raise ValueError(f"sliding_window must be positive, got {sliding_window}")
+        if self.constant_pool_enabled:
+            return self.load_batch(self.sliding_causal_mask_constant(sliding_window, diagonal), name=name)
         mask = self.alloc(name, self.mlen, self.mlen)
         mask_addr = self.get_vram_addr(mask.name)
         fp_scratch_base = self._ONLINE_SOFTMAX_FPSRAM_BASE
         gp_mask, gp_fp = self.register_allocator.allocate_gp(2)
 
         lines = [
-            f"; === Build sliding causal score mask: MLEN={self.mlen}, window={sliding_window} ===",
+            (
+                f"; === Build sliding causal score mask: MLEN={self.mlen}, window={sliding_window}, "
+                f"diagonal={diagonal} ==="
+            ),
             f"S_ADDI_INT gp{gp_fp}, gp0, {fp_scratch_base}",
             "S_LD_FP f7, gp0, 2",
         ]
         lines.extend(load_large_int(gp_mask, mask_addr))
         for row in range(self.mlen):
-            min_visible_col = row - sliding_window + 1
+            max_visible_col = row + diagonal
+            min_visible_col = max_visible_col - sliding_window + 1
             for col in range(self.mlen):
-                visible = col <= row and col >= min_visible_col
+                visible = min_visible_col <= col <= max_visible_col
                 value_reg = "f0" if visible else "f7"
                 lines.append(f"S_ST_FP {value_reg}, gp{gp_fp}, {col}")
             lines.extend(
@@ -143,8 +239,13 @@ class ProgramAttentionMixin:
         batch_size: int = 1,
         seq_len: int | None = None,
         kv_seq_len: int | None = None,
+        sliding_window: int | None = None,
     ):
-        """Emit flash attention, dispatching to MHA or fused GQA codegen by shape."""
+        """Emit flash attention, dispatching to MHA or fused GQA codegen by shape.
+
+        ``sliding_window`` restricts query ``i`` to keys ``(i - window, i]``
+        (GPT-OSS local layers) and implies causal masking.
+        """
         if hq == 1 and hkv == 1:
             return self._flash_attention_mha(
                 Q,
@@ -155,6 +256,7 @@ class ProgramAttentionMixin:
                 batch_size=batch_size,
                 seq_len=seq_len,
                 kv_seq_len=kv_seq_len,
+                sliding_window=sliding_window,
             )
 
         if h_qkv is None:
@@ -171,6 +273,7 @@ class ProgramAttentionMixin:
             batch_size=batch_size,
             seq_len=seq_len,
             kv_seq_len=kv_seq_len,
+            sliding_window=sliding_window,
         )
 
     def _flash_attention_mha(
@@ -184,8 +287,16 @@ class ProgramAttentionMixin:
         batch_size: int = 1,
         seq_len: int | None = None,
         kv_seq_len: int | None = None,
+        sliding_window: int | None = None,
     ):
-        """Single-head online-softmax flash attention using compiler primitives."""
+        """Single-head online-softmax flash attention using compiler primitives.
+
+        With ``sliding_window`` only the key blocks overlapping some query's
+        window are visited, so cost grows with ``seq_len * window`` rather than
+        ``seq_len * kv_seq_len``. Unless ``unroll_loops`` is set, MLEN-aligned
+        shapes are emitted as hardware loops over batch, query and key blocks
+        (see ``_flash_attention_mha_rolled``).
+        """
         total_q_rows, head_dim = Q.shape
         mlen = self.mlen
 
@@ -233,13 +344,20 @@ class ProgramAttentionMixin:
 
         if scale is None:
             scale = 1.0 / math.sqrt(head_dim)
-        if causal_mask is True:
+        if sliding_window is not None:
+            if sliding_window <= 0:
+                raise ValueError(f"sliding_window must be positive, got {sliding_window}")
+            # Every boundary tile gets its own sliding mask; the zero-diagonal
+            # causal mask is never applied.
+            causal_mask = None
+        elif causal_mask is True:
             causal_mask = self._build_causal_score_mask("_mha_causal_mask")
 
         num_q_blocks = math.ceil(seq_len / mlen)
         num_k_blocks = math.ceil(kv_seq_len / mlen)
         k_row_blocks_per_batch = max(1, math.ceil(k_rows_per_batch / mlen))
         valid_col_masks: dict[int, VRAMMatrixVar] = {}
+        shifted_causal_masks: dict[int, VRAMMatrixVar] = {}
         for k_idx in range(num_k_blocks):
             block_cols = min(mlen, kv_seq_len - k_idx * mlen)
             if self._needs_explicit_valid_col_mask(block_cols):
@@ -277,6 +395,31 @@ class ProgramAttentionMixin:
         # seq_len) this is 0.
         q_offset = kv_seq_len - seq_len
 
+        if self._mha_can_roll(
+            Q,
+            K,
+            V,
+            causal_mask,
+            batch_size=batch_size,
+            seq_len=seq_len,
+            kv_seq_len=kv_seq_len,
+            sliding_window=sliding_window,
+        ):
+            self._flash_attention_mha_rolled(
+                Q,
+                K,
+                V,
+                O,
+                S_block,
+                PV,
+                scale,
+                causal_mask,
+                batch_size=batch_size,
+                seq_len=seq_len,
+                kv_seq_len=kv_seq_len,
+            )
+            return O
+
         for batch_idx in range(batch_size):
             if batch_size == 1 and total_q_rows == seq_len:
                 Q_batch = Q
@@ -310,31 +453,24 @@ class ProgramAttentionMixin:
 
                 for k_idx in range(num_k_blocks):
                     block_cols = min(mlen, kv_seq_len - k_idx * mlen)
-                    needs_triangular_mask = False
-                    if causal_mask is not None:
-                        # Causal geometry across tiles. Query rows of block q_idx are
-                        # global positions q_offset + q_idx*mlen + [0, block_rows);
-                        # key cols of block k_idx are k_idx*mlen + [0, block_cols). A
-                        # key block entirely in the strict future of every query row
-                        # contributes nothing (exp(-inf)=0) and is skipped; one
-                        # entirely in the past is fully visible (no mask); only a
-                        # straddling block needs the triangular mask. The static
-                        # (mlen, mlen) mask encodes a zero-diagonal triangle, which is
-                        # exactly right when the straddle sits on the q_idx == k_idx
-                        # diagonal (q_offset == 0, i.e. prefill). seq_len <= mlen is
-                        # the single-block special case of this and is unchanged.
-                        key_first = k_idx * mlen
-                        query_first = q_offset + q_idx * mlen
-                        query_last = query_first + block_rows - 1
-                        if key_first > query_last:
-                            continue  # whole key block is in the strict future
-                        needs_triangular_mask = key_first + block_cols - 1 > query_first
-                        if needs_triangular_mask and query_first != key_first:
-                            raise NotImplementedError(
-                                "Causal mask across tiles with kv_seq_len != seq_len "
-                                "(non-zero query offset) is unsupported: the static "
-                                "(mlen, mlen) mask only encodes the zero diagonal "
-                                f"(q_offset={q_offset}, q_idx={q_idx}, k_idx={k_idx})."
+                    tile_causal_mask = None
+                    if causal_mask is not None or sliding_window is not None:
+                        # Causal geometry across tiles: a key block entirely in the
+                        # strict future of every query row (or, with a sliding
+                        # window, entirely behind every row's window) contributes
+                        # nothing (exp(-inf)=0) and is skipped; one fully visible to
+                        # every row needs no mask; only boundary blocks are masked,
+                        # with the diagonal shifted by their query/key offset. The
+                        # caller's mask covers the zero causal shift (prefill,
+                        # q_idx == k_idx); every other mask is built on first use.
+                        visible, shift = self._causal_tile(
+                            q_offset + q_idx * mlen, block_rows, k_idx * mlen, block_cols, sliding_window
+                        )
+                        if not visible:
+                            continue
+                        if shift is not None:
+                            tile_causal_mask = self._causal_mask_for_shift(
+                                shift, causal_mask, shifted_causal_masks, "_mha", sliding_window
                             )
                     physical_k_idx = batch_k_block_base + k_idx
                     self.vram_sub_projection_T_to(
@@ -349,8 +485,8 @@ class ProgramAttentionMixin:
                     valid_col_mask = valid_col_masks.get(block_cols)
                     if valid_col_mask is not None:
                         self.vram_add(S_block, valid_col_mask, num_rows=block_rows)
-                    if needs_triangular_mask:
-                        self.vram_add(S_block, causal_mask)
+                    if tile_causal_mask is not None:
+                        self.vram_add(S_block, tile_causal_mask)
                     softmax_valid_cols = None if valid_col_mask is not None else block_cols
                     self.online_softmax_block(S_block, scale, rows=block_rows, valid_cols=softmax_valid_cols)
                     self.compute_pv(S_block, V, physical_k_idx, PV, head_dim, rows=block_rows)
@@ -361,9 +497,416 @@ class ProgramAttentionMixin:
 
         for mask in valid_col_masks.values():
             self.free_tensor(mask)
+        for mask in shifted_causal_masks.values():
+            self.free_tensor(mask)
 
         return O
 
+    def _mha_can_roll(
+        self,
+        Q,
+        K,
+        V,
+        causal_mask,
+        *,
+        batch_size: int,
+        seq_len: int,
+        kv_seq_len: int,
+        sliding_window: int | None,
+    ) -> bool:
+        """True when ``_flash_attention_mha_rolled`` can emit this MHA call.
+
+        The rolled body addresses every tile from loop-carried registers, so
+        tiles must be whole MLEN blocks of a single column block, consecutive
+        batches must sit at a fixed stride, and the only mask may be the
+        zero-diagonal causal one (``q_offset`` a multiple of MLEN).
+        """
+        mlen = self.mlen
+        if getattr(self, "unroll_attention", False) or sliding_window is not None:
+            return False
+        if causal_mask is not None and not isinstance(causal_mask, VRAMMatrixVar):
+            return False
+        if seq_len % mlen != 0 or kv_seq_len % mlen != 0:
+            return False
+        if Q.physical_shape[1] > mlen or K.physical_shape != V.physical_shape or K.physical_shape[1] > mlen:
+            return False
+        if batch_size > 1 and Q.physical_shape[0] != batch_size * seq_len:
+            return False
+        return batch_size * (seq_len // mlen) * (kv_seq_len // mlen) > 1
+
+    def _flash_attention_mha_rolled(
+        self,
+        Q,
+        K,
+        V,
+        O: VRAMMatrixVar,
+        S_block: VRAMMatrixVar,
+        PV: VRAMMatrixVar,
+        scale: float,
+        causal_mask: VRAMMatrixVar | None,
+        *,
+        batch_size: int,
+        seq_len: int,
+        kv_seq_len: int,
+    ) -> None:
+        """Emit MHA flash attention as nested hardware loops.
+
+        One tile body (QK^T, online softmax, PV, O update) is emitted per
+        loop level instead of once per (batch, query block, key block), so the
+        program size no longer grows with batch or sequence length. Carried
+        registers hold the Q block VRAM address and the K/V tile HBM offset;
+        the K/V address registers keep the tensor base, so MX scale lookups
+        stay relative to it.
+
+        Under causal masking query block ``q`` sees key blocks ``0..d`` with
+        ``d = q_offset / MLEN + q``. The ``d`` unmasked tiles run in a loop
+        whose counter is reloaded each iteration with ``end - offset`` (zero
+        once the offset reaches the diagonal tile), and the diagonal tile is
+        peeled after it with the causal mask. A query block with no
+        interior tiles (``d == 0``) is peeled ahead of the query loop, since
+        a hardware loop always runs its body once.
+        """
+        mlen = self.mlen
+        head_dim = Q.shape[1]
+        num_q_blocks = seq_len // mlen
+        num_k_blocks = kv_seq_len // mlen
+        causal = causal_mask is not None
+        first_diagonal = (kv_seq_len - seq_len) // mlen
+
+        self._ensure_hbm_sub_matrix_registered(K)
+        self._ensure_hbm_sub_matrix_registered(V)
+        k_layout = self.get_hbm_layout(K.name)
+        k_rows, k_cols = k_layout.physical_shape or k_layout.full_shape
+        k_tile_stride = mlen * k_cols
+        k_batch_stride = (k_rows // batch_size) * k_cols
+        q_base = self.get_vram_addr(Q.name)
+        o_delta = self.get_vram_addr(O.name) - q_base
+        s_address = self.get_vram_addr(S_block.name)
+        pv_address = self.get_vram_addr(PV.name)
+        m_res_address = self._ONLINE_SOFTMAX_FPSRAM_BASE + mlen
+        l_address = self._ONLINE_SOFTMAX_FPSRAM_BASE + 2 * mlen
+
+        def o_address_lines(gp_dst: int) -> list[str]:
+            # O rows mirror Q rows (both pack batches by seq_len), so the O block
+            # sits a fixed distance from the loop-carried Q block address.
+            if o_delta >= 0:
+                return add_large_int(gp_dst, gp_q, o_delta)
+            return [*load_large_int(gp_dst, -o_delta), f"S_SUB_INT gp{gp_dst}, gp{gp_q}, gp{gp_dst}"]
+
+        def emit_with_o(build) -> None:
+            gp_o = self.register_allocator.allocate_gp(1)[0]
+            self.emit("\n".join(o_address_lines(gp_o)) + "\n")
+            build(gp_o)
+            self.register_allocator.free_gp([gp_o])
+
+        def emit_tile(masked: bool) -> None:
+            self._emit_mha_qkt_dynamic(
+                q_base_gp=gp_q,
+                k_hbm_addr_reg=k_addr_reg,
+                k_offset_gp=gp_koff,
+                s_address=s_address,
+                k_layout=k_layout,
+            )
+            if masked:
+                self.vram_add(S_block, causal_mask)
+            self.online_softmax_block(S_block, scale, rows=mlen, valid_cols=mlen)
+            self.emit(
+                self._pv_multiply_asm(
+                    mlen=mlen,
+                    blen=self.blen,
+                    head_dim=head_dim,
+                    p_address=s_address,
+                    v_hbm_offset_reg=v_addr_reg,
+                    v_hbm_offset=0,
+                    pv_address=pv_address,
+                    pv_physical_rows=PV.physical_shape[0],
+                    v_hbm_row_stride=k_cols,
+                    v_hbm_offset_gp=gp_koff,
+                )
+            )
+            emit_with_o(
+                lambda gp_o: self.emit(
+                    self._scale_o_asm(
+                        mlen=mlen,
+                        head_dim=head_dim,
+                        seq_len=O.physical_shape[0],
+                        m_res_address=m_res_address,
+                        o_address=0,
+                        rows=mlen,
+                        o_base_gp=gp_o,
+                    )
+                )
+            )
+            emit_with_o(lambda gp_o: self._accumulate_rows_from_gp(dst_gp=gp_o, src_address=pv_address, rows=mlen))
+
+        def emit_q_block(interior: bool) -> None:
+            self.emit(self._reset_fpsram_asm(self._ONLINE_SOFTMAX_FPSRAM_BASE, mlen, 2))
+            self.emit(self._reset_fpsram_asm(l_address, mlen, 0))
+            emit_with_o(lambda gp_o: self._reset_vram_from_gp(base_gp=gp_o, rows=mlen))
+            lines = [f"S_ADDI_INT gp{gp_koff}, gp{gp_kbase}, 0"]
+            if not causal:
+                if num_k_blocks > 1:
+                    lines.append(f"C_LOOP_START gp{gp_k_loop}, {num_k_blocks}")
+                self.emit("\n".join(lines) + "\n")
+                emit_tile(masked=False)
+                if num_k_blocks > 1:
+                    tail = [
+                        *add_large_int(gp_koff, gp_koff, k_tile_stride),
+                        f"C_LOOP_END gp{gp_k_loop}",
+                    ]
+                    self.emit("\n".join(tail) + "\n")
+            else:
+                if interior:
+                    lines.append(f"C_LOOP_START gp{gp_k_loop}, {first_diagonal + num_q_blocks - 1}")
+                    self.emit("\n".join(lines) + "\n")
+                    emit_tile(masked=False)
+                    tail = [
+                        *add_large_int(gp_koff, gp_koff, k_tile_stride),
+                        # Counter = HBM distance to the diagonal tile: zero exits.
+                        f"S_SUB_INT gp{gp_k_loop}, gp{gp_kend}, gp{gp_koff}",
+                        f"C_LOOP_END gp{gp_k_loop}",
+                    ]
+                    self.emit("\n".join(tail) + "\n")
+                else:
+                    self.emit("\n".join(lines) + "\n")
+                emit_tile(masked=True)
+            emit_with_o(
+                lambda gp_o: self.emit(
+                    self._final_scaling_asm(
+                        mlen=mlen,
+                        head_dim=head_dim,
+                        seq_len=O.physical_shape[0],
+                        l_address=l_address,
+                        o_address=0,
+                        rows=mlen,
+                        o_base_gp=gp_o,
+                    )
+                )
+            )
+            advance = add_large_int(gp_q, gp_q, mlen * mlen)
+            if causal:
+                advance.extend(add_large_int(gp_kend, gp_kend, k_tile_stride))
+            self.emit("\n".join(advance) + "\n")
+
+        gp_q, gp_kbase, gp_koff, gp_k_loop, gp_q_loop, gp_b_loop = self.register_allocator.allocate_gp(6)
+        gp_kend = self.register_allocator.allocate_gp(1)[0] if causal else None
+        k_addr_reg, v_addr_reg = self.register_allocator.allocate_addr(2)
+        try:
+            peel_first = causal and first_diagonal == 0
+            looped_q_blocks = num_q_blocks - 1 if peel_first else num_q_blocks
+            setup_lines = [
+                (
+                    f"; === MHA flash attention, rolled: batch={batch_size}, q_blocks={num_q_blocks}, "
+                    f"k_blocks={num_k_blocks}, causal={causal} ==="
+                ),
+                *load_large_int(gp_q, q_base),
+                f"S_ADDI_INT gp{gp_kbase}, gp0, 0",
+            ]
+            setup_lines.extend(load_large_int(gp_koff, K.hbm_addr))
+            setup_lines.append(f"C_SET_ADDR_REG a{k_addr_reg}, gp0, gp{gp_koff}")
+            setup_lines.extend(load_large_int(gp_koff, V.hbm_addr))
+            setup_lines.append(f"C_SET_ADDR_REG a{v_addr_reg}, gp0, gp{gp_koff}")
+            if batch_size > 1:
+                setup_lines.append(f"C_LOOP_START gp{gp_b_loop}, {batch_size}")
+            if causal:
+                setup_lines.extend(add_large_int(gp_kend, gp_kbase, first_diagonal * k_tile_stride))
+            self.emit("\n".join(setup_lines) + "\n")
+
+            if peel_first:
+                emit_q_block(interior=False)
+            if looped_q_blocks > 1:
+                self.emit(f"C_LOOP_START gp{gp_q_loop}, {looped_q_blocks}\n")
+            if looped_q_blocks > 0:
+                emit_q_block(interior=causal)
+            if looped_q_blocks > 1:
+                self.emit(f"C_LOOP_END gp{gp_q_loop}\n")
+
+            if batch_size > 1:
+                gp_tmp = self.register_allocator.allocate_gp(1)[0]
+                batch_lines = [
+                    *add_large_int(gp_kbase, gp_kbase, k_batch_stride, temp_reg=gp_tmp),
+                    f"C_LOOP_END gp{gp_b_loop}",
+                ]
+                self.register_allocator.free_gp([gp_tmp])
+                self.emit("\n".join(batch_lines) + "\n")
+        finally:
+            self.register_allocator.free_addr([k_addr_reg, v_addr_reg])
+            self.register_allocator.free_gp([gp_q, gp_kbase, gp_koff, gp_k_loop, gp_q_loop, gp_b_loop])
+            if gp_kend is not None:
+                self.register_allocator.free_gp([gp_kend])
+
+    def flash_attention_ragged_decode(
+        self,
+        Q,
+        K_cache,
+        V_cache,
+        K_new,
+        V_new,
+        scale=None,
+        *,
+        kv_cache_lens,
+    ):
+        """Decode attention for a ragged batch: one new token per sequence.
+
+        Row ``b`` of ``Q``, ``K_new`` and ``V_new`` belongs to sequence ``b``,
+        whose cached keys are the first ``kv_cache_lens[b]`` rows of its slab in
+        ``K_cache``/``V_cache`` (see ``ragged_kv_block_offsets``). Each sequence
+        walks only its own cache blocks, so cost follows ``sum(kv_cache_lens)``
+        rather than ``batch * max(kv_cache_lens)``.
+
+        The query row is staged into row 0 of an MLEN-row tile and every
+        softmax and O update runs on that one row. Two mask tiles serve all
+        sequences: row ``b`` of the window-1 sliding mask keeps only column
+        ``b`` of the shared new-key tile, and row ``v - 1`` of the causal mask
+        keeps the ``v`` valid columns of a partial cache tile. Whole cache tiles
+        run in a hardware loop unless ``unroll_loops`` is set.
+        """
+        mlen = self.mlen
+        num_seqs = len(kv_cache_lens)
+        head_dim = Q.shape[1]
+        if num_seqs == 0 or num_seqs > mlen:
+            raise ValueError(f"ragged decode needs 1..{mlen} sequences, got {num_seqs}")
+        if any(kv_len < 0 for kv_len in kv_cache_lens):
+            raise ValueError(f"kv_cache_lens must be non-negative, got {list(kv_cache_lens)}")
+        for name, tensor in (("Q", Q), ("K_new", K_new), ("V_new", V_new)):
+            if tensor.shape[0] < num_seqs:
+                raise ValueError(f"{name} rows {tensor.shape[0]} cannot cover {num_seqs} sequences")
+        block_offsets = ragged_kv_block_offsets(kv_cache_lens, mlen)
+        cache_rows = (block_offsets[-1] + math.ceil(kv_cache_lens[-1] / mlen)) * mlen
+        for name, tensor in (("K_cache", K_cache), ("V_cache", V_cache)):
+            if tensor.physical_shape[0] < cache_rows:
+                raise ValueError(f"{name} physical rows {tensor.physical_shape[0]} cannot cover {cache_rows}")
+        if scale is None:
+            scale = 1.0 / math.sqrt(head_dim)
+
+        tail_mask = None
+        if any(kv_len % mlen for kv_len in kv_cache_lens):
+            tail_mask = self._build_causal_score_mask("_ragged_tail_mask")
+        new_key_mask = self._build_sliding_causal_score_mask("_ragged_new_key_mask", 1)
+
+        S_block = self.alloc("S", mlen, mlen)
+        PV = self.alloc("PV", 1, head_dim, strict=False)
+        Q_row = self.alloc("Q_row", mlen, head_dim, strict=False, physical_shape=(mlen, Q.physical_shape[1]))
+        O = self.alloc(
+            "O",
+            num_seqs,
+            head_dim,
+            strict=False,
+            physical_shape=(mlen, max(mlen, Q.physical_shape[1])),
+        )
+        o_base = self.get_vram_addr(O.name)
+        s_address = self.get_vram_addr(S_block.name)
+        pv_address = self.get_vram_addr(PV.name)
+        self.vram_fill_zero(Q_row)
+
+        rolled = (
+            not getattr(self, "unroll_attention", False)
+            and K_cache.physical_shape[1] <= mlen
+            and K_cache.physical_shape == V_cache.physical_shape
+            and any(kv_len // mlen > 1 for kv_len in kv_cache_lens)
+        )
+        loop_gps: list[int] = []
+        loop_addr_regs: list[int] = []
+        if rolled:
+            self._ensure_hbm_sub_matrix_registered(K_cache)
+            self._ensure_hbm_sub_matrix_registered(V_cache)
+            k_layout = self.get_hbm_layout(K_cache.name)
+            k_cols = (k_layout.physical_shape or k_layout.full_shape)[1]
+            loop_gps = self.register_allocator.allocate_gp(3)
+            loop_addr_regs = self.register_allocator.allocate_addr(2)
+            gp_q, gp_koff, gp_k_loop = loop_gps
+            k_addr_reg, v_addr_reg = loop_addr_regs
+            setup_lines = [
+                "; === Ragged decode: whole cache tiles address K/V from a loop-carried HBM offset ===",
+                *load_large_int(gp_q, self.get_vram_addr(Q_row.name)),
+                *load_large_int(gp_koff, K_cache.hbm_addr),
+                f"C_SET_ADDR_REG a{k_addr_reg}, gp0, gp{gp_koff}",
+                *load_large_int(gp_koff, V_cache.hbm_addr),
+                f"C_SET_ADDR_REG a{v_addr_reg}, gp0, gp{gp_koff}",
+            ]
+            self.emit("\n".join(setup_lines) + "\n")
+
+        def update_o(O_b, mask, mask_row, emit_pv) -> None:
+            if mask is not None:
+                self.vram_add(S_block, mask, src_row_offset=mask_row, num_rows=1)
+            self.online_softmax_block(S_block, scale, rows=1, valid_cols=None if mask is not None else mlen)
+            emit_pv()
+            self.scale_o_row(O_b, 0, rows=1)
+            self.vram_add(O_b, PV, num_rows=1)
+
+        def static_tile(O_b, k_input, v_input, k_idx, mask=None, mask_row=0) -> None:
+            self.vram_sub_projection_T_to(Q_row, 0, k_input, k_idx, S_block, target_row_idx=0, target_col_idx=0)
+            update_o(O_b, mask, mask_row, lambda: self.compute_pv(S_block, v_input, k_idx, PV, head_dim, rows=1))
+
+        def emit_rolled_pv() -> None:
+            self.emit(
+                self._pv_multiply_asm(
+                    mlen=mlen,
+                    blen=self.blen,
+                    head_dim=head_dim,
+                    p_address=s_address,
+                    v_hbm_offset_reg=v_addr_reg,
+                    v_hbm_offset=0,
+                    pv_address=pv_address,
+                    rows=1,
+                    pv_physical_rows=PV.physical_shape[0],
+                    v_hbm_row_stride=k_cols,
+                    v_hbm_offset_gp=gp_koff,
+                )
+            )
+
+        try:
+            for seq_idx, kv_len in enumerate(kv_cache_lens):
+                self.emit_comment(f"ragged decode: sequence {seq_idx}, kv_cache_len={kv_len}")
+                self.vram_fill_zero(Q_row, rows=[0])
+                self.vram_add(Q_row, Q, src_row_offset=seq_idx, num_rows=1)
+                O_b = self.alloc_at(
+                    f"_ragged_O_b{seq_idx}",
+                    1,
+                    head_dim,
+                    o_base + seq_idx * mlen,
+                    physical_shape=O.physical_shape,
+                )
+                self.init_online_softmax(0, O_b, rows=1)
+                # The new-key tile comes first so a sequence with an empty
+                # cache still sees one finite score.
+                static_tile(O_b, K_new, V_new, 0, new_key_mask, seq_idx)
+
+                num_full, tail_cols = divmod(kv_len, mlen)
+                first_block = block_offsets[seq_idx]
+                if rolled and num_full > 1:
+                    head = [
+                        *load_large_int(gp_koff, first_block * mlen * k_cols),
+                        f"C_LOOP_START gp{gp_k_loop}, {num_full}",
+                    ]
+                    self.emit("\n".join(head) + "\n")
+                    self._emit_mha_qkt_dynamic(
+                        q_base_gp=gp_q,
+                        k_hbm_addr_reg=k_addr_reg,
+                        k_offset_gp=gp_koff,
+                        s_address=s_address,
+                        k_layout=k_layout,
+                    )
+                    update_o(O_b, None, 0, emit_rolled_pv)
+                    tail = [*add_large_int(gp_koff, gp_koff, mlen * k_cols), f"C_LOOP_END gp{gp_k_loop}"]
+                    self.emit("\n".join(tail) + "\n")
+                else:
+                    for block in range(num_full):
+                        static_tile(O_b, K_cache, V_cache, first_block + block)
+                if tail_cols:
+                    static_tile(O_b, K_cache, V_cache, first_block + num_full, tail_mask, tail_cols - 1)
+                self.final_scale_o(0, O_b, rows=1)
+        finally:
+            if loop_gps:
+                self.register_allocator.free_gp(loop_gps)
+                self.register_allocator.free_addr(loop_addr_regs)
+
+        self.free_tensor(Q_row)
+        self.free_tensor(new_key_mask)
+        if tail_mask is not None:
+            self.free_tensor(tail_mask)
+        return O
+
     def _flash_attention_gqa_fused(
         self,
         Q,
@@ -378,6 +921,7 @@ class ProgramAttentionMixin:
         batch_size: int = 1,
         seq_len: int | None = None,
         kv_seq_len: int | None = None,
+        sliding_window: int | None = None,
     ):
         """GQA flash attention using compiler-owned packed-head primitives."""
         if hq % hkv != 0:
@@ -432,7 +976,10 @@ class ProgramAttentionMixin:
 
         if scale is None:
             scale = 1.0 / math.sqrt(h_qkv)
-        if causal_mask is True:
+        if sliding_window is not None:
+            # One sequence tile: the zero-diagonal sliding mask is the whole story.
+            causal_mask = self._build_sliding_causal_score_mask("_gqa_sliding_mask", sliding_window)
+        elif causal_mask is True:
             causal_mask = self._build_causal_score_mask("_gqa_causal_mask")
 
         if s_q > mlen or s_kv > mlen:
@@ -602,10 +1149,22 @@ class ProgramAttentionMixin:
         s_base_address: int,
         k_layout,
         k_head_offset: int = 0,
+        q_offset: int = 0,
+        k_hbm_offset: int = 0,
     ) -> None:
-        """Emit packed QK^T using loop-carried Q and K base registers."""
+        """Emit packed QK^T using loop-carried Q and K base registers.
+
+        ``q_offset`` (VRAM elements past ``q_base_gp``) and ``k_hbm_offset``
+        (HBM elements past the K address register) select the query and key
+        tiles of a multi-tile sequence.
+        """
         gp_mram, gp_hbm, gp_s = self.register_allocator.allocate_gp(3)
         rows, cols = k_layout.physical_shape or k_layout.full_shape
+        q_gp = q_base_gp
+        q_lines = []
+        if q_offset:
+            q_gp = gp_s
+            q_lines = add_large_int(gp_s, q_base_gp, q_offset)
         lines = [
             "; === Packed GQA QK^T using compiler M_BTMM (KV-looped) ===",
             *load_large_int(gp_hbm, rows * cols),
@@ -613,15 +1172,78 @@ class ProgramAttentionMixin:
             *load_large_int(gp_hbm, cols),
             f"C_SET_STRIDE_REG gp{gp_hbm}",
             f"S_ADDI_INT gp{gp_mram}, gp0, 0",
-            f"S_ADDI_INT gp{gp_hbm}, gp0, 0",
+            *load_large_int(gp_hbm, k_hbm_offset),
             f"H_PREFETCH_M gp{gp_mram}, gp{gp_hbm}, a{k_hbm_addr_reg}, 1, 0",
-            f"M_BTMM {k_head_offset}, gp0, gp{q_base_gp}",
+            *q_lines,
+            f"M_BTMM {k_head_offset}, gp0, gp{q_gp}",
             *load_large_int(gp_s, s_base_address),
             f"M_BMM_WO gp{gp_s}, 0",
         ]
         self.register_allocator.free_gp([gp_mram, gp_hbm, gp_s])
         self.emit("\n".join(lines) + "\n")
 
+    def _emit_mha_qkt_dynamic(
+        self,
+        *,
+        q_base_gp: int,
+        k_hbm_addr_reg: int,
+        k_offset_gp: int,
+        s_address: int,
+        k_layout,
+    ) -> None:
+        """Emit S = Q_block @ K_tile^T with the Q VRAM address and K HBM offset in GPs.
+
+        Rolled counterpart of ``vram_sub_projection_T_to`` for a single MLEN
+        column block: K lands at MRAM 0 and M_TMM walks BLEN-wide output
+        columns (outer) and BLEN-row groups (inner).
+        """
+        mlen = self.mlen
+        blen = self.blen
+        tiles_per_mlen = mlen // blen
+        rows, cols = k_layout.physical_shape or k_layout.full_shape
+        gp_mat, gp_res_col, gp_act, gp_res, gp_col_loop, gp_row_loop = self.register_allocator.allocate_gp(6)
+        lines = [
+            "; === MHA QK^T using compiler M_TMM (loop-carried Q/K) ===",
+            *load_large_int(gp_act, rows * cols),
+            f"C_SET_SCALE_REG gp{gp_act}",
+            *load_large_int(gp_act, cols),
+            f"C_SET_STRIDE_REG gp{gp_act}",
+            f"S_ADDI_INT gp{gp_mat}, gp0, 0",
+            f"H_PREFETCH_M gp{gp_mat}, gp{k_offset_gp}, a{k_hbm_addr_reg}, 1, 0",
+            *load_large_int(gp_res_col, s_address),
+            f"C_LOOP_START gp{gp_col_loop}, {tiles_per_mlen}",
+            f"S_ADDI_INT gp{gp_act}, gp{q_base_gp}, 0",
+            f"S_ADDI_INT gp{gp_res}, gp{gp_res_col}, 0",
+            f"C_LOOP_START gp{gp_row_loop}, {tiles_per_mlen}",
+            f"M_TMM 0, gp{gp_act}, gp{gp_mat}",
+            f"M_MM_WO gp{gp_res}, gp0, 0",
+            f"S_ADDI_INT gp{gp_act}, gp{gp_act}, {blen * mlen}",
+            f"S_ADDI_INT gp{gp_res}, gp{gp_res}, {blen * mlen}",
+            f"C_LOOP_END gp{gp_row_loop}",
+            # M_TMM reads K transposed: one output column group per BLEN MRAM rows.
+            f"S_ADDI_INT gp{gp_mat}, gp{gp_mat}, {blen * mlen}",
+            f"S_ADDI_INT gp{gp_res_col}, gp{gp_res_col}, {blen}",
+            f"C_LOOP_END gp{gp_col_loop}",
+        ]
+        self.register_allocator.free_gp([gp_mat, gp_res_col, gp_act, gp_res, gp_col_loop, gp_row_loop])
+        self.emit("\n".join(lines) + "\n")
+
+    def _accumulate_rows_from_gp(self, *, dst_gp: int, src_address: int, rows: int) -> None:
+        """Add ``rows`` MLEN-wide rows at ``src_address`` into a VRAM range based at ``dst_gp``."""
+        gp_dst, gp_src, gp_loop = self.register_allocator.allocate_gp(3)
+        lines = [
+            "; Accumulate into loop-carried VRAM rows",
+            f"S_ADDI_INT gp{gp_dst}, gp{dst_gp}, 0",
+            *load_large_int(gp_src, src_address),
+            f"C_LOOP_START gp{gp_loop}, {rows}",
+            f"V_ADD_VV gp{gp_dst}, gp{gp_dst}, gp{gp_src}, 0",
+            f"S_ADDI_INT gp{gp_dst}, gp{gp_dst}, {self.mlen}",
+            f"S_ADDI_INT gp{gp_src}, gp{gp_src}, {self.mlen}",
+            f"C_LOOP_END gp{gp_loop}",
+        ]
+        self.register_allocator.free_gp([gp_dst, gp_src, gp_loop])
+        self.emit("\n".join(lines) + "\n")
+
     def _reset_vram_from_gp(
         self,
         *,
@@ -696,6 +1318,7 @@ class ProgramAttentionMixin:
         head_slot_dim: int,
         rows: int,
         scratch_address: int,
+        output_offset: int = 0,
     ) -> None:
         """Pack one O scratch head into a loop-carried packed-output group."""
         shift = head_slot * head_slot_dim
@@ -704,7 +1327,7 @@ class ProgramAttentionMixin:
         lines = [
             f"; === Pack O head lane {head_slot} into KV-looped packed output ===",
             *load_large_int(gp_src, src_addr),
-            f"S_ADDI_INT gp{gp_dst}, gp{output_base_gp}, 0",
+            *add_large_int(gp_dst, output_base_gp, output_offset),
             *load_large_int(gp_scratch, scratch_address),
             *load_large_int(gp_shift, shift),
             f"C_LOOP_START gp{gp_loop}, {rows}",
@@ -895,6 +1518,8 @@ class ProgramAttentionMixin:
         broadcast_amount: int,
         scale=None,
         causal_mask: bool | VRAMMatrixVar | None = True,
+        kv_seq_len: int | None = None,
+        sliding_window: int | None = None,
     ) -> None:
         """Emit packed GQA attention with one hardware loop over KV groups.
 
@@ -902,6 +1527,14 @@ class ProgramAttentionMixin:
         still happen before this call, but the repeated QK/softmax/PV/O body is
         emitted once and parameterized by loop-carried Q/O VRAM and K/V HBM
         pointers.
+
+        Sequences longer than MLEN are tiled inside the loop body: every query
+        block runs online softmax over the key blocks it can see, with the same
+        causal tile skipping and shifted-diagonal masks as the MHA path.
+        ``kv_seq_len`` (default ``seq_len``) may exceed ``seq_len`` for a cached
+        prefix; queries are then the last ``seq_len`` key positions.
+        ``sliding_window`` additionally drops key blocks behind every query's
+        window, so the unrolled body holds O(seq_len * window) tiles.
         """
         if not kv_pairs:
             raise ValueError("kv_pairs must not be empty")
@@ -909,8 +1542,12 @@ class ProgramAttentionMixin:
         mlen = self.mlen
         num_kv_heads = len(kv_pairs)
         q_physical_rows, q_physical_cols = Q_full.physical_shape
-        if seq_len > mlen:
-            raise NotImplementedError("KV-group looped packed attention currently supports one sequence tile.")
+        if kv_seq_len is None:
+            kv_seq_len = seq_len
+        if kv_seq_len < seq_len:
+            raise ValueError(f"kv_seq_len={kv_seq_len} must be >= seq_len={seq_len}")
+        if q_physical_rows < seq_len:
+            raise ValueError(f"Q_full physical rows {q_physical_rows} cannot cover seq_len={seq_len}")
         if q_physical_cols < num_kv_heads * mlen:
             raise ValueError(
                 f"Q_full physical cols {q_physical_cols} cannot hold {num_kv_heads} MLEN-wide groups"
@@ -926,7 +1563,11 @@ class ProgramAttentionMixin:
             raise ValueError(f"Packed attention requires HLEN={head_slot_dim}, got {self.hlen}")
         if scale is None:
             scale = 1.0 / math.sqrt(head_slot_dim)
-        if causal_mask is True:
+        if sliding_window is not None:
+            if sliding_window <= 0:
+                raise ValueError(f"sliding_window must be positive, got {sliding_window}")
+            causal_mask = None
+        elif causal_mask is True:
             causal_mask = self._build_causal_score_mask("_packed_loop_causal_mask")
 
         for K, V in kv_pairs:
@@ -936,6 +1577,8 @@ class ProgramAttentionMixin:
                 raise ValueError("all looped K heads must share physical_shape")
             if V.physical_shape != kv_pairs[0][1].physical_shape:
                 raise ValueError("all looped V heads must share physical_shape")
+        if kv_pairs[0][0].physical_shape[0] < kv_seq_len or kv_pairs[0][1].physical_shape[0] < kv_seq_len:
+            raise ValueError(f"looped K/V physical rows cannot cover kv_seq_len={kv_seq_len}")
 
         if num_kv_heads > 1:
             k_stride = kv_pairs[1][0].hbm_addr - kv_pairs[0][0].hbm_addr
@@ -954,6 +1597,28 @@ class ProgramAttentionMixin:
         rows = min(mlen, seq_len)
         softmax_scale = scale / 0.25
         k_layout = self.get_hbm_layout(kv_pairs[0][0].name)
+        v_layout = self.get_hbm_layout(kv_pairs[0][1].name)
+        v_row_stride = (v_layout.physical_shape or v_layout.full_shape)[1]
+        num_q_blocks = math.ceil(seq_len / mlen)
+        num_k_blocks = math.ceil(kv_seq_len / mlen)
+        q_offset = kv_seq_len - seq_len
+
+        # (q_idx, [(k_idx, block_cols, mask shift or None), ...]) per query block.
+        tile_plan = []
+        for q_idx in range(num_q_blocks):
+            block_rows = min(mlen, seq_len - q_idx * mlen)
+            k_tiles = []
+            for k_idx in range(num_k_blocks):
+                block_cols = min(mlen, kv_seq_len - k_idx * mlen)
+                shift = None
+                if isinstance(causal_mask, VRAMMatrixVar) or sliding_window is not None:
+                    visible, shift = self._causal_tile(
+                        q_offset + q_idx * mlen, block_rows, k_idx * mlen, block_cols, sliding_window
+                    )
+                    if not visible:
+                        continue
+                k_tiles.append((k_idx, block_cols, shift))
+            tile_plan.append((q_idx, block_rows, k_tiles))
 
         s_views = [
             self.alloc_at(
@@ -968,11 +1633,18 @@ class ProgramAttentionMixin:
         pv = self.alloc("_packed_loop_PV", rows, head_slot_dim, strict=False, physical_shape=(mlen, mlen))
         pack_scratch = self.alloc("_packed_loop_pack_scratch", 1, mlen, strict=False, physical_shape=(1, mlen))
         pack_scratch_addr = self.get_vram_addr(pack_scratch.name)
-        valid_col_mask = (
-            self._build_valid_col_mask(f"_packed_loop_valid_col_mask_{seq_len}", seq_len)
-            if self._needs_explicit_valid_col_mask(seq_len)
-            else None
-        )
+        valid_col_masks: dict[int, VRAMMatrixVar] = {}
+        shifted_causal_masks: dict[int, VRAMMatrixVar] = {}
+        for _q_idx, _block_rows, k_tiles in tile_plan:
+            for _k_idx, block_cols, shift in k_tiles:
+                if block_cols not in valid_col_masks and self._needs_explicit_valid_col_mask(block_cols):
+                    valid_col_masks[block_cols] = self._build_valid_col_mask(
+                        f"_packed_loop_valid_col_mask_{block_cols}", block_cols
+                    )
+                if shift is not None:
+                    self._causal_mask_for_shift(
+                        shift, causal_mask, shifted_causal_masks, "_packed_loop", sliding_window
+                    )
 
         gp_q, gp_o, gp_k, gp_v, gp_tmp, gp_kv_loop = self.register_allocator.allocate_gp(6)
         k_addr_reg, v_addr_reg = self.register_allocator.allocate_addr(2)
@@ -989,59 +1661,70 @@ class ProgramAttentionMixin:
             ]
             self.emit("\n".join(setup_lines) + "\n")
 
-            self._reset_vram_from_gp(base_gp=gp_o, rows=rows)
-            self._emit_packed_qkt_to_s_dynamic(
-                q_base_gp=gp_q,
-                k_hbm_addr_reg=k_addr_reg,
-                s_base_address=scratch_base_address,
-                k_layout=k_layout,
-            )
-
-            for head, s_head in enumerate(s_views):
-                o_head = self.alloc(
-                    f"_packed_loop_O_head{head}",
-                    rows,
-                    head_slot_dim,
-                    strict=False,
-                    physical_shape=(mlen, mlen),
-                )
-                self.init_online_softmax(0, o_head, rows=rows)
-                if valid_col_mask is not None:
-                    self.vram_add(s_head, valid_col_mask, num_rows=rows)
-                if isinstance(causal_mask, VRAMMatrixVar):
-                    self.vram_add(s_head, causal_mask, num_rows=rows)
-                elif causal_mask is True:
-                    self.emit("; NOTE: packed attention received causal_mask=True without a VRAM mask; no mask applied.\n")
-                softmax_valid_cols = (
-                    None
-                    if valid_col_mask is not None or isinstance(causal_mask, VRAMMatrixVar)
-                    else seq_len
-                )
-                self.online_softmax_block(s_head, softmax_scale, rows=rows, valid_cols=softmax_valid_cols)
-                self.emit(
-                    self._pv_multiply_asm(
-                        mlen=mlen,
-                        blen=self.blen,
-                        head_dim=head_slot_dim,
-                        p_address=self.get_vram_addr(s_head.name),
-                        v_hbm_offset_reg=v_addr_reg,
-                        v_hbm_offset=0,
-                        pv_address=self.get_vram_addr(pv.name),
-                        rows=rows,
+            self._reset_vram_from_gp(base_gp=gp_o, rows=seq_len)
+            # M_BTMM fills every head's S tile at once, but the online-softmax
+            # state holds one head, so heads walk key blocks one at a time and the
+            # shared QK^T is only re-emitted when S holds a different tile.
+            s_tile = None
+            for q_idx, block_rows, k_tiles in tile_plan:
+                for head, s_head in enumerate(s_views):
+                    o_head = self.alloc(
+                        f"_packed_loop_O_head{head}",
+                        block_rows,
+                        head_slot_dim,
+                        strict=False,
+                        physical_shape=(mlen, mlen),
                     )
-                )
-                self.scale_o_row(o_head, 0, rows=rows)
-                self.vram_add(o_head, pv, num_rows=rows)
-                self.final_scale_o(0, o_head, rows=rows)
-                self._pack_o_head_to_output_dynamic(
-                    o_head=o_head,
-                    output_base_gp=gp_o,
-                    head_slot=head,
-                    head_slot_dim=head_slot_dim,
-                    rows=rows,
-                    scratch_address=pack_scratch_addr,
-                )
-                self.free_tensor(o_head)
+                    self.init_online_softmax(0, o_head, rows=block_rows)
+                    for k_idx, block_cols, shift in k_tiles:
+                        if s_tile != (q_idx, k_idx):
+                            self._emit_packed_qkt_to_s_dynamic(
+                                q_base_gp=gp_q,
+                                k_hbm_addr_reg=k_addr_reg,
+                                s_base_address=scratch_base_address,
+                                k_layout=k_layout,
+                                q_offset=q_idx * mlen * mlen,
+                                k_hbm_offset=k_idx * mlen * (k_layout.physical_shape or k_layout.full_shape)[1],
+                            )
+                            s_tile = (q_idx, k_idx)
+                        valid_col_mask = valid_col_masks.get(block_cols)
+                        if valid_col_mask is not None:
+                            self.vram_add(s_head, valid_col_mask, num_rows=block_rows)
+                        if shift is not None:
+                            tile_causal_mask = self._causal_mask_for_shift(
+                                shift, causal_mask, shifted_causal_masks, "_packed_loop", sliding_window
+                            )
+                            self.vram_add(s_head, tile_causal_mask, num_rows=block_rows)
+                        softmax_valid_cols = (
+                            None if valid_col_mask is not None or shift is not None else block_cols
+                        )
+                        self.online_softmax_block(s_head, softmax_scale, rows=block_rows, valid_cols=softmax_valid_cols)
+                        self.emit(
+                            self._pv_multiply_asm(
+                                mlen=mlen,
+                                blen=self.blen,
+                                head_dim=head_slot_dim,
+                                p_address=self.get_vram_addr(s_head.name),
+                                v_hbm_offset_reg=v_addr_reg,
+                                v_hbm_offset=k_idx * mlen * v_row_stride,
+                                pv_address=self.get_vram_addr(pv.name),
+                                rows=block_rows,
+                                v_hbm_row_stride=v_row_stride,
+                            )
+                        )
+                        self.scale_o_row(o_head, 0, rows=block_rows)
+                        self.vram_add(o_head, pv, num_rows=block_rows)
+                    self.final_scale_o(0, o_head, rows=block_rows)
+                    self._pack_o_head_to_output_dynamic(
+                        o_head=o_head,
+                        output_base_gp=gp_o,
+                        output_offset=q_idx * mlen * mlen,
+                        head_slot=head,
+                        head_slot_dim=head_slot_dim,
+                        rows=block_rows,
+                        scratch_address=pack_scratch_addr,
+                    )
+                    self.free_tensor(o_head)
 
             update_lines = []
             update_lines.extend(add_large_int(gp_q, gp_q, q_group_stride, temp_reg=gp_tmp))
@@ -1054,8 +1737,10 @@ class ProgramAttentionMixin:
             self.register_allocator.free_addr([k_addr_reg, v_addr_reg])
             self.register_allocator.free_gp([gp_q, gp_o, gp_k, gp_v, gp_tmp, gp_kv_loop])
             self.free_tensor(pv)
-            if valid_col_mask is not None:
-                self.free_tensor(valid_col_mask)
+            for mask in valid_col_masks.values():
+                self.free_tensor(mask)
+            for mask in shifted_causal_masks.values():
+                self.free_tensor(mask)
             self.free_tensor(pack_scratch)
 
     def flash_attention_packed_group(
@@ -1079,11 +1764,14 @@ class ProgramAttentionMixin:
         k_set_scale: bool = True,
         k_hbm_element_bytes: int = 1,
         v_hbm_element_bytes: int = 1,
+        sliding_window: int | None = None,
     ) -> None:
         """Emit one KV group's packed-head flash-attention body.
 
         Q_group and the output use an MLEN-wide row where active Q heads occupy
         HLEN-sized lanes. K/V are one KV head stored as MLEN-padded HBM rows.
+        ``sliding_window`` replaces the causal mask with the single-tile sliding
+        mask; multi-tile sequences go through ``flash_attention_packed_groups_looped``.
         """
         seq_len, q_width = Q_group.shape
         mlen = self.mlen
@@ -1100,7 +1788,13 @@ class ProgramAttentionMixin:
             )
         if scale is None:
             scale = 1.0 / math.sqrt(head_slot_dim)
-        if causal_mask is True:
+        sliding_mask = None
+        if sliding_window is not None:
+            sliding_mask = self._build_sliding_causal_score_mask(
+                f"_packed_group_sliding_mask_{sliding_window}", sliding_window
+            )
+            causal_mask = sliding_mask
+        elif causal_mask is True:
             causal_mask = self._build_causal_score_mask("_packed_group_causal_mask")
 
         self._emit_packed_attention_group_internal(
@@ -1124,6 +1818,8 @@ class ProgramAttentionMixin:
             k_hbm_element_bytes=k_hbm_element_bytes,
             v_hbm_element_bytes=v_hbm_element_bytes,
         )
+        if sliding_mask is not None:
+            self.free_tensor(sliding_mask)
 
     def init_online_softmax(self, q_idx: int, o_matrix: VRAMMatrixVar, rows: int | None = None):
         """Initialize Online Softmax state: m=-inf, l=0, O_row=0"""
@@ -0,0 +1,168 @@
+"""HBM constant pool for the PLENA program builder.
+
+Compile-time constant tensors (score masks, RoPE cos/sin tables, rotate-half
+matrices, FP constant vectors) are declared once as HBM inputs and loaded
+into VRAM with ``load_batch`` -- a few ``H_PREFETCH_V`` per tile instead of
+one ``S_ST_FP`` per element.
+
+Entries are deduplicated by content: registering the same tensor twice
+(under any name) returns the first ``InputVar``. The pool is part of the
+HBM input image, so callers staging memory must include
+``constant_pool_tensors()`` alongside their ``input_tensors``.
+
+Addresses are assigned at registration time from the same bump allocator as
+``input()``. The sequential HBM stager does not model gaps, so constants
+should be registered before the first ``store()`` reserves HBM scratch
+(``reserve_attention_constants`` exists for exactly that).
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import torch
+from compiler.aten.plena.vars import InputVar
+
+# Value written to masked score lanes. Matches FP_SRAM[2] in the frontends'
+# fp_preload: large-negative but finite, so exp() underflows to 0 while
+# (mask * 0) on tile-padding rows stays 0 instead of NaN.
+SCORE_MASK_FILL = -6.0e4
+
+
+class ProgramConstantPoolMixin:
+    # ========================================================================
+    # Constant Registration
+    # ========================================================================
+
+    def constant(
+        self,
+        name: str,
+        tensor: torch.Tensor,
+        shape: tuple[int, int] | None = None,
+        physical_shape: tuple[int, int] | None = None,
+    ) -> InputVar:
+        """
+        Register a compile-time constant in the HBM constant pool.
+
+        Args:
+            name: tensor name (used only if the content is new)
+            tensor: 2-D constant data
+            shape: logical (height, width); defaults to ``tensor.shape``
+            physical_shape: HBM storage shape, as for ``input()``
+
+        Returns:
+            InputVar of the pooled entry (possibly registered under another name)
+        """
+        if tensor.dim() != 2:
+            raise ValueError(f"constant {name!r} must be 2-D, got shape {tuple(tensor.shape)}")
+        if shape is None:
+            shape = (int(tensor.shape[0]), int(tensor.shape[1]))
+        data = tensor.detach().to(torch.float32).contiguous().cpu()
+        digest = hashlib.sha1()
+        digest.update(repr((tuple(shape), physical_shape, tuple(data.shape))).encode())
+        digest.update(data.numpy().tobytes())
+        key = digest.hexdigest()
+
+        existing = self._constant_pool.get(key)
+        if existing is not None:
+            return existing
+        if name in self._inputs:
+            raise ValueError(f"constant {name!r} collides with an existing input of different content")
+
+        var = self.input(name, shape=shape, physical_shape=physical_shape)
+        self._constant_pool[key] = var
+        self._constant_tensors[var.name] = tensor.detach()
+        return var
+
+    def constant_pool_tensors(self) -> dict[str, torch.Tensor]:
+        """Pooled constants by name, in HBM address order."""
+        return dict(sorted(self._constant_tensors.items(), key=lambda item: self._inputs[item[0]].hbm_addr))
+
+    # ========================================================================
+    # Attention Masks
+    # ========================================================================
+
+    def valid_col_mask_constant(self, valid_cols: int) -> InputVar:
+        """MLEN x MLEN score mask: 0 in the first ``valid_cols`` columns, masked after."""
+        if valid_cols < 0 or valid_cols > self.mlen:
+            raise ValueError(f"valid_cols must be in [0, {self.mlen}], got {valid_cols}")
+        mask = torch.zeros(self.mlen, self.mlen)
+        mask[:, valid_cols:] = SCORE_MASK_FILL
+        return self.constant(f"_const_valid_col_mask_{valid_cols}", mask)
+
+    def causal_mask_constant(self, diagonal: int = 0) -> InputVar:
+        """MLEN x MLEN causal score mask: 0 where ``col <= row + diagonal``, masked elsewhere."""
+        mask = torch.zeros(self.mlen, self.mlen)
+        mask.masked_fill_(torch.ones(self.mlen, self.mlen).triu(diagonal=diagonal + 1).bool(), SCORE_MASK_FILL)
+        if diagonal == 0:
+            return self.constant("_const_causal_mask", mask)
+        tag = f"m{-diagonal}" if diagonal < 0 else f"p{diagonal}"
+        return self.constant(f"_const_causal_mask_{tag}", mask)
+
+    def sliding_causal_mask_constant(self, sliding_window: int, diagonal: int = 0) -> InputVar:
+        """MLEN x MLEN sliding causal mask: visible iff ``row + diagonal - window < col <= row + diagonal``."""
+        if sliding_window <= 0:
+            raise ValueError(f"sliding_window must be positive, got {sliding_window}")
+        rows = torch.arange(self.mlen).unsqueeze(1) + diagonal
+        cols = torch.arange(self.mlen).unsqueeze(0)
+        visible = (cols <= rows) & (cols > rows - sliding_window)
+        mask = torch.zeros(self.mlen, self.mlen).masked_fill_(~visible, SCORE_MASK_FILL)
+        if diagonal == 0:
+            return self.constant(f"_const_sliding_causal_mask_{sliding_window}", mask)
+        tag = f"m{-diagonal}" if diagonal < 0 else f"p{diagonal}"
+        return self.constant(f"_const_sliding_causal_mask_{sliding_window}_{tag}", mask)
+
+    def reserve_attention_constants(
+        self,
+        kv_seq_len: int,
+        causal: bool = False,
+        sliding_window: int | None = None,
+        q_offset: int = 0,
+    ) -> None:
+        """Pre-register the masks attention will request for ``kv_seq_len``.
+
+        ``q_offset`` is the cached-prefix length ahead of the queries. With
+        ``causal`` (implied by ``sliding_window``) the tile grid is walked with
+        the same classification attention uses, registering the mask of every
+        boundary tile. Call after declaring inputs and before any ``store()``
+        so the pool lands in the contiguous HBM input image.
+        """
+        if not self.constant_pool_enabled:
+            return
+        mlen = self.mlen
+        tail_cols = kv_seq_len % mlen
+        if tail_cols and self._needs_explicit_valid_col_mask(tail_cols):
+            self.valid_col_mask_constant(tail_cols)
+        if not causal and sliding_window is None:
+            return
+        if sliding_window is None:
+            self.causal_mask_constant()
+        seq_len = kv_seq_len - q_offset
+        for q_first in range(0, seq_len, mlen):
+            block_rows = min(mlen, seq_len - q_first)
+            for key_first in range(0, kv_seq_len, mlen):
+                block_cols = min(mlen, kv_seq_len - key_first)
+                _visible, shift = self._causal_tile(
+                    q_offset + q_first, block_rows, key_first, block_cols, sliding_window
+                )
+                if shift is None:
+                    continue
+                if sliding_window is None:
+                    self.causal_mask_constant(shift)
+                else:
+                    self.sliding_causal_mask_constant(sliding_window, shift)
+
+    def reserve_ragged_decode_constants(self, kv_cache_lens) -> None:
+        """Pre-register the masks ``flash_attention_ragged_decode`` requests.
+
+        Same placement rule as ``reserve_attention_constants``: call before any
+        ``store()``.
+        """
+        if not self.constant_pool_enabled:
+            return
+        if any(kv_len % self.mlen for kv_len in kv_cache_lens):
+            self.causal_mask_constant()
+        self.sliding_causal_mask_constant(1)
+
+
+__all__ = ["SCORE_MASK_FILL", "ProgramConstantPoolMixin"]
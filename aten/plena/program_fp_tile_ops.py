@@ -44,6 +44,16 @@ class ProgramFPTileOpsMixin:
             display_name=name,
         )
 
+    def reserve_fixed_fpram(self) -> int:
+        """Keep fp_var() off the preloaded slots and the online-softmax/GELU scratch.
+
+        Frontends that stage an ``fp_preload`` image call this before any
+        fp_var(); returns the first dynamically allocatable FPRAM address.
+        """
+        reserved = self._ONLINE_SOFTMAX_FPSRAM_BASE + 3 * self.mlen + 1
+        self.fpram_allocator.reserve(reserved)
+        return reserved
+
     # ========================================================================
     # Shared argument normalization
     # ========================================================================
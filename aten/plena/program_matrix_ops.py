@@ -4,17 +4,11 @@ from __future__ import annotations
 
 import math
 
-from compiler.aten.plena.vars import InputVar, TensorVar, VRAMMatrixVar
-
-
-def _iter_k_chunks(num_k_tiles: int, max_k_tiles: int):
-    if max_k_tiles <= 0:
-        raise ValueError(f"max_k_tiles must be > 0, got {max_k_tiles}")
-    k_start = 0
-    while k_start < num_k_tiles:
-        k_end = min(k_start + max_k_tiles, num_k_tiles)
-        yield k_start, k_end - k_start
-        k_start = k_end
+import torch
+from compiler.aten.isa_builder import IsaBuilder, gp
+from compiler.aten.isa_builder import addr as areg
+from compiler.aten.plena.isa_matrix import _iter_k_chunks
+from compiler.aten.plena.vars import FPVar, InputVar, TensorVar, VRAMMatrixVar
 
 
 def _matrix_precision_code(matrix_precision: str | int) -> int:
@@ -90,13 +84,21 @@ class ProgramMatrixOpsMixin:
         matrix_precision: str | int = "weights",
         set_scale: bool = True,
         hbm_element_bytes: int = 1,
+        vram_k_block_start: int | None = None,
     ):
         """
         target[target_row_idx][target_col_idx] = vram_matrix[vram_row_idx][:] @ mram_input[:][mram_col_idx]
         Supports K-split: k_block_start/k_block_count select a subset of K tiles.
+        ``vram_k_block_start`` reads the activation from another K tile than
+        the weight (implicit-GEMM conv reuses one window tile for every term).
+
+        With ``auto_reset_mram`` the weight column goes through the MRAM tile
+        cache, so consecutive calls on the same column (every row block of a
+        projection, or a later projection by the same weight) prefetch it once.
         """
-        vram_matrix, mram_input, target = self._prepare_projection(vram_matrix, mram_input, target, auto_reset_mram)
-        super().load_sub_matrix_col(
+        vram_matrix, mram_input, target = self._prepare_projection(vram_matrix, mram_input, target, False)
+        load = super().load_sub_matrix_col_cached if auto_reset_mram else super().load_sub_matrix_col
+        load(
             name=mram_input.name,
             col_idx=mram_col_idx,
             k_block_start=k_block_start,
@@ -115,6 +117,52 @@ class ProgramMatrixOpsMixin:
             target_col_idx=target_col_idx,
             k_block_start=k_block_start,
             k_block_count=k_block_count,
+            vram_k_block_start=vram_k_block_start,
+        )
+
+    def vram_sub_projection_accumulate_to(
+        self,
+        vram_matrix: VRAMMatrixVar,
+        vram_row_idx: int,
+        mram_input: InputVar,
+        mram_col_idx: int,
+        target: VRAMMatrixVar,
+        target_row_idx: int,
+        target_col_idx: int,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        matrix_precision: str | int = "weights",
+        set_scale: bool = True,
+        hbm_element_bytes: int = 1,
+        vram_k_block_start: int | None = None,
+    ):
+        """
+        target[target_row_idx][target_col_idx] += vram_matrix[vram_row_idx][k chunk] @ mram_input[k chunk][mram_col_idx]
+
+        K-split partial sum added in place, one BLEN row group at a time; no
+        temp tile and no separate ``vram_block_add_to`` pass.
+        """
+        vram_matrix, mram_input, target = self._prepare_projection(vram_matrix, mram_input, target, False)
+        super().load_sub_matrix_col_cached(
+            name=mram_input.name,
+            col_idx=mram_col_idx,
+            k_block_start=k_block_start,
+            k_block_count=k_block_count,
+            precision=_matrix_precision_code(matrix_precision),
+            set_scale=set_scale,
+            hbm_element_bytes=hbm_element_bytes,
+        )
+        super().vram_sub_projection_accumulate_to(
+            vram_mat_name=vram_matrix.name,
+            vram_row_idx=vram_row_idx,
+            mram_mat_name=mram_input.name,
+            mram_col_idx=mram_col_idx,
+            target_matrix=target.name,
+            target_row_idx=target_row_idx,
+            target_col_idx=target_col_idx,
+            k_block_start=k_block_start,
+            k_block_count=k_block_count,
+            vram_k_block_start=vram_k_block_start,
         )
 
     def vram_sub_projection_T_to(
@@ -181,7 +229,7 @@ class ProgramMatrixOpsMixin:
         if max_k_tiles <= 0:
             raise ValueError(f"max_k_tiles must be > 0, got {max_k_tiles}")
 
-        vram_layout = self.vram_matrices[vram_matrix.name]
+        vram_layout = self.get_vram_layout(vram_matrix.name)
         vram_row_blocks = vram_layout.get_row_blocks(vram_row_idx)
         physical_k = max(vram_matrix.physical_shape[1], mram_input.physical_shape[0])
         num_k_tiles = math.ceil(physical_k / self.mlen)
@@ -253,7 +301,7 @@ class ProgramMatrixOpsMixin:
                 f"max_k_tiles_per_packed_tile must be > 0, got {max_k_tiles_per_packed_tile}"
             )
 
-        vram_layout = self.vram_matrices[vram_matrix.name]
+        vram_layout = self.get_vram_layout(vram_matrix.name)
         vram_row_blocks = vram_layout.get_row_blocks(vram_row_idx)
         num_k_tiles = len(vram_row_blocks)
         tiles_per_mlen = self.mlen // self.blen
@@ -318,8 +366,14 @@ class ProgramMatrixOpsMixin:
         matrix_precision: str | int = "weights",
         set_scale: bool = True,
         hbm_element_bytes: int = 1,
+        row_scale: FPVar | None = None,
     ):
-        """Emit tiled PLENA linear projection, including K-split accumulation."""
+        """Emit tiled PLENA linear projection, including K-split accumulation.
+
+        ``row_scale`` (from ``rms_norm_stats``) multiplies each finished output
+        row by its FPRAM entry, applying an RMS norm of ``input_var`` without
+        rewriting it.
+        """
         mlen = self.mlen
 
         rows, k_total = input_var.shape
@@ -338,7 +392,7 @@ class ProgramMatrixOpsMixin:
         num_row_blocks = math.ceil(physical_rows / mlen)
         num_col_blocks = math.ceil(physical_out_features / mlen)
         num_k_tiles = math.ceil(physical_k / mlen)
-        max_k_tiles = self.mram_tile_capacity
+        chunks = self.mram_weight_k_chunks(weight_var.name, num_k_tiles)
 
         # When rows is not a multiple of mlen the hardware still operates on
         # full tiles; only the first `rows` rows contain valid output.
@@ -350,55 +404,68 @@ class ProgramMatrixOpsMixin:
             physical_shape=(physical_rows, physical_out_features),
         )
 
-        def emit_projection(row_idx, col_idx, target, target_row_idx, target_col_idx, **k_split):
-            self.vram_sub_projection_to(
-                input_var,
-                row_idx,
-                weight_var,
-                col_idx,
-                target,
-                target_row_idx,
-                target_col_idx,
-                matrix_precision=matrix_precision,
-                set_scale=set_scale,
-                hbm_element_bytes=hbm_element_bytes,
-                **k_split,
-            )
+        precision_kwargs = {
+            "matrix_precision": matrix_precision,
+            "set_scale": set_scale,
+            "hbm_element_bytes": hbm_element_bytes,
+        }
 
-        if num_k_tiles <= max_k_tiles:
+        if len(chunks) == 1:
             for col_idx in range(num_col_blocks):
                 for row_idx in range(num_row_blocks):
-                    emit_projection(row_idx, col_idx, output, row_idx, col_idx)
+                    self.vram_sub_projection_to(
+                        input_var, row_idx, weight_var, col_idx, output, row_idx, col_idx, **precision_kwargs
+                    )
+            self._scale_output_rows(output, input_var, num_row_blocks, num_col_blocks, row_scale)
             return output
 
-        # Temp buffer for one partial-sum tile. Allocating the full output shape
-        # here can overlap with the real output for wide projections.
-        temp = self.alloc(f"{name}_temp", mlen, mlen)
-        for k_chunk_idx, (k_block_start, k_block_count) in enumerate(_iter_k_chunks(num_k_tiles, max_k_tiles)):
-            k_split = {
-                "k_block_start": k_block_start,
-                "k_block_count": k_block_count,
-            }
+        # The first K chunk writes the output tile; later chunks are added in
+        # place through a BLEN-row strip. Each chunk is rounded to BF16 on
+        # write-out and the running sum after every add (``_ksplit_matmul``).
+        for k_chunk_idx, (k_block_start, k_block_count) in enumerate(chunks):
+            emit = self.vram_sub_projection_to if k_chunk_idx == 0 else self.vram_sub_projection_accumulate_to
             for col_idx in range(num_col_blocks):
                 for row_idx in range(num_row_blocks):
-                    if k_chunk_idx == 0:
-                        emit_projection(row_idx, col_idx, output, row_idx, col_idx, **k_split)
-                    else:
-                        emit_projection(row_idx, col_idx, temp, 0, 0, **k_split)
-                        self.vram_block_add_to(
-                            output,
-                            row_idx,
-                            col_idx,
-                            temp,
-                            0,
-                            0,
-                            output,
-                            row_idx,
-                            col_idx,
-                        )
-        self.free_tensor(temp)
+                    emit(
+                        input_var,
+                        row_idx,
+                        weight_var,
+                        col_idx,
+                        output,
+                        row_idx,
+                        col_idx,
+                        k_block_start=k_block_start,
+                        k_block_count=k_block_count,
+                        **precision_kwargs,
+                    )
+        self._scale_output_rows(output, input_var, num_row_blocks, num_col_blocks, row_scale)
         return output
 
+    def _scale_output_rows(
+        self,
+        target: VRAMMatrixVar,
+        input_var: VRAMMatrixVar,
+        num_row_blocks: int,
+        num_col_blocks: int,
+        row_scale: FPVar | None,
+    ) -> None:
+        """target[row, :] *= row_scale[row] over the rows a projection of ``input_var`` computed."""
+        if row_scale is None:
+            return
+        rows = min(row_scale.size, math.ceil(input_var.shape[0] / self.blen) * self.blen)
+        for col_idx in range(num_col_blocks):
+            for row_idx in range(num_row_blocks):
+                first = row_idx * self.mlen
+                count = min(self.mlen, rows - first)
+                if count <= 0:
+                    break
+                super().tile_row_mul_fp(
+                    target.name,
+                    [(row, row_scale.address + first + row) for row in range(count)],
+                    tile_row_idx=row_idx,
+                    tile_col_idx=col_idx,
+                )
+
     def linear_projection_bf16_stream_k_accum(
         self,
         input_var: VRAMMatrixVar,
@@ -589,6 +656,188 @@ class ProgramMatrixOpsMixin:
         """Default linear op compatibility surface."""
         return self.linear_projection(input_var, weight_var, physical_shape=physical_shape)
 
+    # ========================================================================
+    # MRAM Weight Residency
+    # ========================================================================
+
+    def _weight_k_tiles(self, weight_var: InputVar) -> int:
+        return math.ceil(weight_var.physical_shape[0] / self.mlen)
+
+    def pin_weight_tiles(self, weight_var: InputVar, k_block_count: int | None = None) -> int:
+        """Load and pin the first ``k_block_count`` K tiles of every column of ``weight_var``.
+
+        Pinned tiles survive LRU eviction, so later projections by this weight
+        (another layer call, the next decode step) skip their prefetch. Other
+        cached projections split K over the remaining tiles. Returns the number
+        of pinned tiles.
+        """
+        weight_var = self._require_var(weight_var, InputVar, "weight_var")
+        self._ensure_hbm_sub_matrix_registered(weight_var)
+        num_k_tiles = self._weight_k_tiles(weight_var)
+        count = num_k_tiles if k_block_count is None else min(k_block_count, num_k_tiles)
+        if count <= 0:
+            raise ValueError(f"k_block_count must be positive, got {k_block_count}")
+        k_split = {} if count == num_k_tiles else {"k_block_start": 0, "k_block_count": count}
+        num_col_blocks = math.ceil(weight_var.physical_shape[1] / self.mlen)
+        for col_idx in range(num_col_blocks):
+            super().load_sub_matrix_col_cached(name=weight_var.name, col_idx=col_idx, pin=True, **k_split)
+        return count * num_col_blocks
+
+    def unpin_weight_tiles(self, weight_var: InputVar) -> None:
+        """Release the pins taken by ``pin_weight_tiles``."""
+        super().unpin_mram_tiles(self._require_var(weight_var, InputVar, "weight_var").name)
+
+    def prefetch_weight_tiles(self, weight_vars: list[InputVar], max_tiles: int) -> int:
+        """Issue the first-K-chunk loads of ``weight_vars`` ahead of their projections.
+
+        Columns are loaded in projection order until ``max_tiles`` would be
+        exceeded. The tiles are held in the MRAM cache until the projection
+        consumes them, so work emitted in between (and sized to leave
+        ``max_tiles`` free) overlaps the HBM transfer. Returns the number of
+        tiles issued.
+        """
+        issued = 0
+        for weight_var in weight_vars:
+            weight_var = self._require_var(weight_var, InputVar, "weight_var")
+            self._ensure_hbm_sub_matrix_registered(weight_var)
+            chunks = self.mram_weight_k_chunks(weight_var.name, self._weight_k_tiles(weight_var))
+            k_block_start, k_block_count = chunks[0]
+            k_split = {"k_block_start": k_block_start, "k_block_count": k_block_count} if len(chunks) > 1 else {}
+            for col_idx in range(math.ceil(weight_var.physical_shape[1] / self.mlen)):
+                if issued + k_block_count > max_tiles:
+                    return issued
+                super().load_sub_matrix_col_cached(name=weight_var.name, col_idx=col_idx, hold=True, **k_split)
+                issued += k_block_count
+        return issued
+
+    # ========================================================================
+    # Implicit-GEMM Convolution
+    # ========================================================================
+
+    def conv2d_implicit_gemm_extent(
+        self, C_in: int, H: int, K: int, OH: int, OW: int, W_padded: int, stride: int = 1
+    ) -> int:
+        """HBM elements ``conv2d_implicit_gemm`` reads from the raw input, including window over-read."""
+        amount = self.hbm_v_prefetch_amount
+        groups = math.ceil(OW / amount)
+        last_row = (C_in - 1) * H + (OH - 1) * stride + K - 1
+        return last_row * W_padded + (groups * amount - 1) * stride + self.mlen
+
+    def conv2d_implicit_gemm(
+        self,
+        input_raw: InputVar,
+        weight_terms: InputVar,
+        *,
+        C_in: int,
+        H: int,
+        K: int,
+        OH: int,
+        OW: int,
+        W_padded: int,
+        stride: int = 1,
+        name: str = "conv_out",
+    ) -> VRAMMatrixVar:
+        """Conv2d as a sum of shifted-window matmuls, without an im2col matrix.
+
+        Output row ``m = oh * OW + ow`` is ``sum over (c, kr)`` of the K-pixel
+        run ``input[c, oh*stride + kr, ow*stride :][:K]`` times that term's
+        K weight rows. For each term, strided ``H_PREFETCH_V`` (STRIDE_REG =
+        ``stride``) lands the runs of all output positions in lanes ``0..K-1``
+        of a single (M, MLEN) window. The window is projected against one
+        weight K tile and accumulated K-split style into the output, so VRAM
+        holds only the output and one window.
+
+        Lanes ``K..MLEN-1`` of a window row carry the neighbouring pixels.
+        ``weight_terms`` zeroes them out: it is ``(C_in * K * MLEN, C_out)``,
+        with K tile ``c * K + kr`` holding the term's K rows of the im2col
+        weight followed by zero rows (``conv2d_implicit_gemm_weight``).
+        The last windows read past the final pixel, so ``input_raw`` must
+        hold at least ``conv2d_implicit_gemm_extent(...)`` elements. This
+        keeps MXFP scale bytes out of the zero-weighted lanes.
+        """
+        input_raw = self._require_var(input_raw, InputVar, "input_raw")
+        weight_terms = self._require_var(weight_terms, InputVar, "weight_terms")
+        mlen = self.mlen
+        amount = self.hbm_v_prefetch_amount
+        if not 0 < K <= mlen:
+            raise ValueError(f"implicit-GEMM conv needs 0 < K <= MLEN={mlen}, got K={K}")
+        num_terms = C_in * K
+        if weight_terms.physical_shape[0] != num_terms * mlen:
+            raise ValueError(
+                f"weight_terms must have C_in*K*MLEN={num_terms * mlen} rows (one zero-padded K tile per "
+                f"(c, kr) term), got {weight_terms.physical_shape[0]}"
+            )
+        in_rows, in_cols = input_raw.physical_shape
+        extent = self.conv2d_implicit_gemm_extent(C_in, H, K, OH, OW, W_padded, stride)
+        if in_rows * in_cols < extent:
+            raise ValueError(
+                f"input_raw holds {in_rows * in_cols} elements but implicit-GEMM windows read {extent}; "
+                f"pad it to at least {math.ceil(extent / in_cols)} rows"
+            )
+
+        M = OH * OW
+        groups = math.ceil(OW / amount)
+        # The last prefetch of each output row spills into the next row's
+        # slots (rewritten afterwards); only the final one needs extra rows.
+        window_rows = math.ceil(max(M, (OH - 1) * OW + groups * amount) / mlen) * mlen
+        window = self.alloc(f"{name}_window", M, mlen, strict=False, physical_shape=(window_rows, mlen))
+        _, out_features = weight_terms.shape
+        output = self.alloc(
+            name,
+            M,
+            out_features,
+            strict=False,
+            physical_shape=(window_rows, weight_terms.physical_shape[1]),
+        )
+        window_base = self.get_vram_tile_addr(window.name)
+        num_row_blocks = window_rows // mlen
+        num_col_blocks = math.ceil(weight_terms.physical_shape[1] / mlen)
+
+        gp_dst, gp_off, gp_loop, gp_tmp = self._reg.allocate_gp(4)
+        addr_reg = self._reg.allocate_addr(1)[0]
+        try:
+            for term in range(num_terms):
+                c, kr = divmod(term, K)
+                asm = IsaBuilder().comment(f"Implicit-GEMM conv window: term {term} (c={c}, kr={kr})")
+                if term == 0:
+                    asm.instr("S_ADDI_INT", gp(gp_tmp), gp(0), input_raw.hbm_addr)
+                    asm.instr("C_SET_ADDR_REG", areg(addr_reg), gp(0), gp(gp_tmp))
+                # Weight loads reprogram SCALE_REG and STRIDE_REG, so set both per window.
+                asm.instr("S_ADDI_INT", gp(gp_tmp), gp(0), in_rows * in_cols)
+                asm.instr("C_SET_SCALE_REG", gp(gp_tmp))
+                asm.instr("S_ADDI_INT", gp(gp_tmp), gp(0), stride)
+                asm.instr("C_SET_STRIDE_REG", gp(gp_tmp))
+                for oh in range(OH):
+                    asm.instr("S_ADDI_INT", gp(gp_dst), gp(0), window_base + oh * OW * mlen)
+                    asm.instr("S_ADDI_INT", gp(gp_off), gp(0), (c * H + oh * stride + kr) * W_padded)
+                    asm.instr("C_LOOP_START", gp(gp_loop), groups)
+                    asm.instr("H_PREFETCH_V", gp(gp_dst), gp(gp_off), areg(addr_reg), 1, 0)
+                    asm.instr("S_ADDI_INT", gp(gp_dst), gp(gp_dst), amount * mlen)
+                    asm.instr("S_ADDI_INT", gp(gp_off), gp(gp_off), amount * stride)
+                    asm.instr("C_LOOP_END", gp(gp_loop))
+                self._emit(asm)
+
+                emit = self.vram_sub_projection_to if term == 0 else self.vram_sub_projection_accumulate_to
+                for col_idx in range(num_col_blocks):
+                    for row_idx in range(num_row_blocks):
+                        emit(
+                            window,
+                            row_idx,
+                            weight_terms,
+                            col_idx,
+                            output,
+                            row_idx,
+                            col_idx,
+                            k_block_start=term,
+                            k_block_count=1,
+                            vram_k_block_start=0,
+                        )
+        finally:
+            self._reg.free_gp([gp_dst, gp_off, gp_loop, gp_tmp])
+            self._reg.free_addr([addr_reg])
+        self.free_tensor(window)
+        return output
+
     # ========================================================================
     # RoPE (1D Positional Encoding)
     # ========================================================================
@@ -613,6 +862,301 @@ class ProgramMatrixOpsMixin:
         )
         return x_var
 
+    def _is_rotate_half_constant(self, rotate_var: InputVar) -> bool:
+        """True if ``rotate_var`` is a pooled constant holding the plain rotate_half matrix."""
+        tensor = self._constant_tensors.get(rotate_var.name)
+        if tensor is None or tensor.dim() != 2 or tensor.shape[0] != tensor.shape[1]:
+            return False
+        width = int(tensor.shape[0])
+        half = width // 2
+        if width % 2 != 0:
+            return False
+        expected = torch.zeros(width, width)
+        expected[torch.arange(half), torch.arange(half) + half] = 1.0
+        expected[torch.arange(half) + half, torch.arange(half)] = -1.0
+        return torch.equal(tensor.detach().to(torch.float32).cpu(), expected)
+
+    def _rope_vector_rotate_supported(self, width: int, rotate_var: InputVar) -> bool:
+        return (
+            width % (2 * self.mlen) == 0
+            and tuple(rotate_var.shape) == (width, width)
+            and self._is_rotate_half_constant(rotate_var)
+        )
+
+    def apply_rope(
+        self,
+        x_var: VRAMMatrixVar,
+        rotate_var: InputVar,
+        cos_var: VRAMMatrixVar,
+        sin_var: VRAMMatrixVar,
+        name: str | None = None,
+        vector_rotate: bool | None = None,
+    ) -> VRAMMatrixVar:
+        """Apply RoPE in-place, choosing how rotate_half(x) is formed.
+
+        When ``rotate_var`` is the plain rotate_half matrix of x's full width
+        and each half is whole MLEN chunks, the halves are swapped by
+        addressing and the sign folded into the vector ops: no MRAM load and
+        no matrix op. Otherwise x @ rotate_var is projected into a scratch and
+        ``rope`` runs on it. ``vector_rotate=False`` forces the matmul path;
+        ``True`` raises if the vector path does not apply.
+
+        Returns x_var (modified in-place).
+        """
+        supported = self._rope_vector_rotate_supported(x_var.physical_shape[1], rotate_var)
+        if vector_rotate is None:
+            vector_rotate = supported
+        elif vector_rotate and not supported:
+            raise ValueError(
+                f"vector rotate_half needs {rotate_var.name!r} to be the rotate_half matrix of width "
+                f"{x_var.physical_shape[1]}, a multiple of 2 * mlen ({2 * self.mlen})"
+            )
+
+        if vector_rotate:
+            super().rope_rotate_half(x_name=x_var.name, cos_name=cos_var.name, sin_name=sin_var.name)
+            return x_var
+
+        x_rot = self.linear_projection(x_var, rotate_var, name=name or f"{x_var.display_name}_rot")
+        self.rope(x_var, x_rot, cos_var, sin_var)
+        self.free_tensor(x_rot)
+        return x_var
+
+    # ========================================================================
+    # Fused QKV Projection + RoPE
+    # ========================================================================
+
+    def _project_weight_columns(
+        self,
+        input_var: VRAMMatrixVar,
+        weight_var: InputVar,
+        target: VRAMMatrixVar,
+        num_row_blocks: int,
+        row_scale: FPVar | None = None,
+    ) -> None:
+        """target = input_var @ weight_var into an existing target (e.g. a head view).
+
+        Each weight column goes through the MRAM tile cache and every row block
+        streams past it before the next column. Per-tile arithmetic (including
+        K-split partial sums and ``row_scale``) matches ``linear_projection``.
+        """
+        mlen = self.mlen
+        input_var, weight_var, target = self._prepare_projection(input_var, weight_var, target, False)
+        physical_k = max(input_var.physical_shape[1], weight_var.physical_shape[0])
+        num_k_tiles = math.ceil(physical_k / mlen)
+        num_col_blocks = math.ceil(weight_var.physical_shape[1] / mlen)
+        chunks = self.mram_weight_k_chunks(weight_var.name, num_k_tiles)
+
+        for col_idx in range(num_col_blocks):
+            for k_chunk_idx, (k_block_start, k_block_count) in enumerate(chunks):
+                # A single chunk covers the whole column; leave K unbounded so
+                # the emitted code matches linear_projection tile for tile.
+                k_split = (
+                    {"k_block_start": k_block_start, "k_block_count": k_block_count}
+                    if len(chunks) > 1
+                    else {}
+                )
+                super().load_sub_matrix_col_cached(name=weight_var.name, col_idx=col_idx, **k_split)
+                project = super().vram_sub_projection_to if k_chunk_idx == 0 else super().vram_sub_projection_accumulate_to
+                for row_idx in range(num_row_blocks):
+                    project(
+                        vram_mat_name=input_var.name,
+                        vram_row_idx=row_idx,
+                        mram_mat_name=weight_var.name,
+                        mram_col_idx=col_idx,
+                        target_matrix=target.name,
+                        target_row_idx=row_idx,
+                        target_col_idx=col_idx,
+                        **k_split,
+                    )
+        self._scale_output_rows(target, input_var, num_row_blocks, num_col_blocks, row_scale)
+
+    def fused_qkv_rope_projection(
+        self,
+        input_var: VRAMMatrixVar,
+        q_weight: InputVar,
+        k_weights: list[InputVar],
+        v_weights: list[InputVar],
+        rotate_var: InputVar,
+        cos_var: VRAMMatrixVar,
+        sin_var: VRAMMatrixVar,
+        *,
+        num_heads: int,
+        head_dim: int,
+        q_name: str = "Q",
+        kv_store_names: list[tuple[str, str]] | None = None,
+        physical_rows: int | None = None,
+        row_scale: FPVar | None = None,
+    ) -> tuple[VRAMMatrixVar, list[tuple[InputVar, InputVar]]]:
+        """Project Q, K and V in one pass over ``[Wq | Wk_0 .. | Wv_0 ..]`` with RoPE applied on the fly.
+
+        Each weight column tile is fetched once and every row block of
+        ``input_var`` streams through it. A Q or K head is rotated as soon as
+        its columns are written, through one rotate-half scratch shared by all
+        heads, or by vector ops alone when ``rotate_var`` is the plain
+        rotate_half matrix (see ``apply_rope``). K and V heads share one
+        staging head and go to HBM right away, so only Q stays resident. Numerics match ``linear_projection`` followed
+        by ``rope`` per head. ``row_scale`` is applied to each projection
+        before it is rotated, as in ``linear_projection``.
+
+        Returns:
+            ``(Q, [(K_stored, V_stored), ...])``. Q holds the rotated heads at a
+            ``physical_rows * head_dim`` stride, like the unfused Q projection.
+        """
+        if len(k_weights) != len(v_weights):
+            raise ValueError(f"got {len(k_weights)} K weights but {len(v_weights)} V weights")
+        if head_dim % self.mlen != 0:
+            raise ValueError(f"head_dim ({head_dim}) must be divisible by mlen ({self.mlen})")
+        if kv_store_names is None:
+            kv_store_names = [(f"K_stored_h{kv_h}", f"V_stored_h{kv_h}") for kv_h in range(len(k_weights))]
+        if len(kv_store_names) != len(k_weights):
+            raise ValueError(f"need {len(k_weights)} kv_store_names, got {len(kv_store_names)}")
+
+        rows = input_var.shape[0]
+        if physical_rows is None:
+            physical_rows = max(input_var.physical_shape[0], math.ceil(rows / self.blen) * self.blen)
+        num_row_blocks = math.ceil(physical_rows / self.mlen)
+        q_cols = q_weight.physical_shape[1]
+        if num_heads * head_dim > q_cols:
+            raise ValueError(f"{num_heads} heads of {head_dim} exceed Q width {q_cols}")
+        kv_cols = max(w.physical_shape[1] for w in (*k_weights, *v_weights))
+        head_stride = physical_rows * head_dim
+
+        Q = self.alloc(q_name, rows, q_weight.shape[1], strict=False, physical_shape=(physical_rows, q_cols))
+        kv_head = self.alloc(f"{q_name}_kv", rows, kv_cols, strict=False, physical_shape=(physical_rows, kv_cols))
+        if self._rope_vector_rotate_supported(head_dim, rotate_var):
+            x_rot = None
+        else:
+            x_rot = self.alloc(
+                f"{q_name}_rot",
+                rows,
+                head_dim,
+                strict=False,
+                physical_shape=(physical_rows, head_dim),
+            )
+
+        def rotate(head_view):
+            if x_rot is None:
+                self.rope_rotate_half(x_name=head_view.name, cos_name=cos_var.name, sin_name=sin_var.name)
+                return
+            self._project_weight_columns(head_view, rotate_var, x_rot, num_row_blocks)
+            self.rope(head_view, x_rot, cos_var, sin_var)
+
+        self._project_weight_columns(input_var, q_weight, Q, num_row_blocks, row_scale)
+        q_addr = self.get_vram_addr(Q.name)
+        for h in range(num_heads):
+            rotate(
+                self.alloc_at(
+                    f"{q_name}_h{h}",
+                    rows,
+                    head_dim,
+                    q_addr + h * head_stride,
+                    physical_shape=(physical_rows, head_dim),
+                )
+            )
+
+        kv_addr = self.get_vram_addr(kv_head.name)
+        kv_stored = []
+        for kv_h, (k_weight, v_weight) in enumerate(zip(k_weights, v_weights)):
+            k_name, v_name = kv_store_names[kv_h]
+            K_h = self.alloc_at(
+                f"{q_name}_K_h{kv_h}",
+                rows,
+                k_weight.shape[1],
+                kv_addr,
+                physical_shape=(physical_rows, k_weight.physical_shape[1]),
+            )
+            self._project_weight_columns(input_var, k_weight, K_h, num_row_blocks, row_scale)
+            rotate(K_h)
+            K_stored = self.store(K_h, name=k_name)
+            # The store has drained K, so V reuses the same staging head.
+            V_h = self.alloc_at(
+                f"{q_name}_V_h{kv_h}",
+                rows,
+                v_weight.shape[1],
+                kv_addr,
+                physical_shape=(physical_rows, v_weight.physical_shape[1]),
+            )
+            self._project_weight_columns(input_var, v_weight, V_h, num_row_blocks, row_scale)
+            kv_stored.append((K_stored, self.store(V_h, name=v_name)))
+
+        if x_rot is not None:
+            self.free_tensor(x_rot)
+        self.free_tensor(kv_head)
+        return Q, kv_stored
+
+    # ========================================================================
+    # VRAM Row Permutation
+    # ========================================================================
+
+    def vram_pixel_shuffle(
+        self,
+        src: VRAMMatrixVar,
+        dst: VRAMMatrixVar,
+        *,
+        seq_len: int,
+        scale_factor: int,
+        batch_size: int = 1,
+    ) -> VRAMMatrixVar:
+        """Space-to-depth a square ``[seq_len, C]`` patch grid into ``dst``.
+
+        Row ``oy * out_grid + ox`` of ``dst`` holds its ``scale_factor**2`` source
+        patches side by side: segment ``dy * scale_factor + dx`` is source row
+        ``(oy * scale_factor + dy) * grid + ox * scale_factor + dx``. Every segment
+        is one affine row copy looped over (col_block, oy, ox), so the emitted
+        code scales with ``scale_factor**2`` rather than with ``seq_len``.
+
+        With ``batch_size > 1`` both tensors hold one equal row slab per image and
+        each image is shuffled into its own slab by an extra outer loop level.
+        """
+        grid = math.isqrt(seq_len)
+        if grid * grid != seq_len:
+            raise ValueError(f"pixel_shuffle requires square seq_len, got {seq_len}")
+        if grid % scale_factor != 0:
+            raise ValueError(f"pixel_shuffle scale_factor={scale_factor} must divide patch grid {grid}x{grid}")
+        cols = src.physical_shape[1]
+        if cols % self.mlen != 0:
+            raise ValueError(f"pixel_shuffle source cols={cols} must be a multiple of MLEN={self.mlen}")
+        if batch_size <= 0:
+            raise ValueError(f"pixel_shuffle batch_size must be positive, got {batch_size}")
+        if src.physical_shape[0] % batch_size or dst.physical_shape[0] % batch_size:
+            raise ValueError(
+                f"pixel_shuffle physical rows src={src.physical_shape[0]} dst={dst.physical_shape[0]} "
+                f"are not divisible by batch_size={batch_size}"
+            )
+        src_slab = src.physical_shape[0] // batch_size
+        dst_slab = dst.physical_shape[0] // batch_size
+        if src_slab < seq_len:
+            raise ValueError(f"pixel_shuffle source slab of {src_slab} rows cannot cover seq_len={seq_len}")
+        out_grid = grid // scale_factor
+        out_rows, out_cols = out_grid * out_grid, cols * scale_factor**2
+        if dst.shape[0] < (batch_size - 1) * dst_slab + out_rows or dst.physical_shape[1] < out_cols:
+            raise ValueError(
+                f"pixel_shuffle target {dst.name} needs {out_rows} rows per image and >= {out_cols} cols, "
+                f"got shape={dst.shape} physical_shape={dst.physical_shape}"
+            )
+
+        row = self.mlen
+        src_block = src.physical_shape[0] * self.mlen
+        dst_block = dst.physical_shape[0] * self.mlen
+        col_blocks = cols // self.mlen
+        src_base = self.get_vram_addr(src.name)
+        dst_base = self.get_vram_addr(dst.name)
+        loops = [
+            (batch_size, dst_slab * row, src_slab * row),
+            (col_blocks, dst_block, src_block),
+            (out_grid, out_grid * row, scale_factor * grid * row),
+            (out_grid, row, scale_factor * row),
+        ]
+        for dy in range(scale_factor):
+            for dx in range(scale_factor):
+                segment = dy * scale_factor + dx
+                super().vram_row_copy_asm(
+                    dst_base + segment * col_blocks * dst_block,
+                    src_base + (dy * grid + dx) * row,
+                    loops,
+                )
+        return dst
+
     # ========================================================================
     # VRAM Matrix Addition
     # ========================================================================
@@ -4,14 +4,19 @@ from __future__ import annotations
 
 import math
 from collections.abc import Sequence
+from dataclasses import dataclass
 
-from compiler.aten.isa_builder import IsaBuilder, addr as areg, fp, gp
+from compiler.aten.isa_builder import IsaBuilder, fp, gp
+from compiler.aten.isa_builder import addr as areg
 from compiler.aten.plena.vars import FPVar, InputVar, VRAMMatrixVar
 
 GptOssFPConstants = tuple[FPVar, FPVar, FPVar, FPVar, FPVar]
 ExpertWeights = tuple[InputVar, InputVar, InputVar]
 ExpertBiases = tuple[VRAMMatrixVar | None, VRAMMatrixVar | None, VRAMMatrixVar | None]
 
+# First element of MRAM tile-cache keys for runtime-expert weight columns.
+_DYNAMIC_EXPERT_KEY = "__dynamic_expert__"
+
 
 class ProgramRoutedMoeMixin:
     """Routed-MoE v0 emit helpers used by GPT-OSS and Qwen bring-up.
@@ -409,6 +414,11 @@ class ProgramRoutedMoeMixin:
             self._emit(asm)
         finally:
             self._reg.free_gp([gp_weights, gp_logits, gp_indices])
+        # Dynamic expert tiles are keyed by the IntSRAM slot holding the expert id.
+        self.mram_cache.evict(
+            lambda key: key[0] == _DYNAMIC_EXPERT_KEY
+            and indices_int_base <= key[2] + key[3] < indices_int_base + top_k
+        )
 
     def _emit_expert_id_to_weight_base_v0(
         self,
@@ -582,6 +592,114 @@ class ProgramRoutedMoeMixin:
             )
             self._reg.free_addr([addr_reg])
 
+    def _expert_prefetch_budget(self, w_down: InputVar) -> int:
+        """MRAM tiles the next expert's loads may hold while ``w_down`` projects."""
+        down_chunks = self.mram_weight_k_chunks(w_down.name, self._weight_k_tiles(w_down))
+        return self.mram_tile_capacity - self.mram_cache.pinned_tiles - max(count for _, count in down_chunks)
+
+    def _gpt_oss_dynamic_load_sub_matrix_col_cached_v0(
+        self,
+        *,
+        weight_template: InputVar,
+        col_idx: int,
+        expert_indices_int_base: int,
+        pair_idx: int,
+        table_base: int,
+        per_expert_stride: int,
+        expert_base_table_int_base: int | None = None,
+        k_block_start: int = 0,
+        k_block_count: int | None = None,
+        hold: bool = False,
+        name: str = "gpt_oss_dynamic_weight_load",
+    ) -> bool:
+        """Runtime-expert column load through the MRAM tile cache; True on a hit.
+
+        Entries are keyed by the IntSRAM slot the expert id is read from, so
+        they stay valid until the next V_TOPK rewrites that slot.
+        """
+        self._ensure_hbm_sub_matrix_registered(weight_template)
+        layout = self.get_hbm_layout(weight_template.name)
+        count = k_block_count if k_block_count is not None else layout.num_row_blocks
+        self._sync_mram_cache_capacity()
+        key = (
+            _DYNAMIC_EXPERT_KEY,
+            weight_template.name,
+            expert_indices_int_base,
+            pair_idx,
+            table_base,
+            per_expert_stride,
+            expert_base_table_int_base,
+            col_idx,
+            k_block_start,
+            count,
+        )
+        if self._mram_cache_hit(
+            key, layout, col_idx, k_block_start, count, 1, label=f"{weight_template.name}@pair{pair_idx}"
+        ):
+            return True
+
+        slot = self.mram_cache.insert(key, count, hold=hold)
+        self._mram_cache_filling = True
+        try:
+            self._gpt_oss_dynamic_load_sub_matrix_col_v0(
+                weight_template=weight_template,
+                col_idx=col_idx,
+                expert_indices_int_base=expert_indices_int_base,
+                pair_idx=pair_idx,
+                table_base=table_base,
+                per_expert_stride=per_expert_stride,
+                expert_base_table_int_base=expert_base_table_int_base,
+                mram_start_addr=slot * self.mlen * self.mlen,
+                k_block_start=k_block_start,
+                k_block_count=k_block_count,
+                name=name,
+            )
+        finally:
+            self._mram_cache_filling = False
+        return False
+
+    def gpt_oss_dynamic_prefetch_expert_weights_v0(
+        self,
+        weight_templates: Sequence[InputVar],
+        *,
+        table_bases: Sequence[int],
+        per_expert_strides: Sequence[int],
+        expert_indices_int_base: int,
+        pair_idx: int,
+        max_tiles: int,
+        expert_base_table_int_base: int | None = None,
+        name: str = "gpt_oss_dynamic_prefetch",
+    ) -> int:
+        """Issue first-K-chunk loads of a routed pair's weights ahead of its projections.
+
+        The runtime-expert counterpart of ``prefetch_weight_tiles``: columns
+        are loaded in projection order, held in the MRAM cache, until
+        ``max_tiles`` would be exceeded. Returns the number of tiles issued.
+        """
+        issued = 0
+        for weight_template, table_base, stride in zip(weight_templates, table_bases, per_expert_strides, strict=True):
+            self._ensure_hbm_sub_matrix_registered(weight_template)
+            chunks = self.mram_weight_k_chunks(weight_template.name, self._weight_k_tiles(weight_template))
+            k_block_start, k_block_count = chunks[0]
+            k_split = {"k_block_start": k_block_start, "k_block_count": k_block_count} if len(chunks) > 1 else {}
+            for col_idx in range(math.ceil(weight_template.physical_shape[1] / self.mlen)):
+                if issued + k_block_count > max_tiles:
+                    return issued
+                self._gpt_oss_dynamic_load_sub_matrix_col_cached_v0(
+                    weight_template=weight_template,
+                    col_idx=col_idx,
+                    expert_indices_int_base=expert_indices_int_base,
+                    pair_idx=pair_idx,
+                    table_base=table_base,
+                    per_expert_stride=stride,
+                    expert_base_table_int_base=expert_base_table_int_base,
+                    hold=True,
+                    name=name,
+                    **k_split,
+                )
+                issued += k_block_count
+        return issued
+
     def gpt_oss_dynamic_vram_sub_projection_to_v0(
         self,
         vram_matrix: VRAMMatrixVar,
@@ -602,15 +720,22 @@ class ProgramRoutedMoeMixin:
         k_block_count: int | None = None,
         name: str = "gpt_oss_dynamic_projection",
     ) -> None:
-        """Projection tile where the HBM weight base comes from V_TOPK expert id."""
+        """Projection tile where the HBM weight base comes from V_TOPK expert id.
+
+        With ``auto_reset_mram`` the column goes through the MRAM tile cache,
+        so row blocks of one pair (and weights prefetched for it) load once.
+        """
         vram_matrix = self._require_var(vram_matrix, VRAMMatrixVar, "vram_matrix")
         weight_template = self._require_var(weight_template, InputVar, "weight_template")
         target = self._require_var(target, VRAMMatrixVar, "target")
         self._ensure_vram_sub_matrix_registered(vram_matrix)
         self._ensure_hbm_sub_matrix_registered(weight_template)
-        if auto_reset_mram:
-            super().reset_mram()
-        self._gpt_oss_dynamic_load_sub_matrix_col_v0(
+        load = (
+            self._gpt_oss_dynamic_load_sub_matrix_col_cached_v0
+            if auto_reset_mram
+            else self._gpt_oss_dynamic_load_sub_matrix_col_v0
+        )
+        load(
             weight_template=weight_template,
             col_idx=weight_col_idx,
             expert_indices_int_base=expert_indices_int_base,
@@ -669,7 +794,7 @@ class ProgramRoutedMoeMixin:
         num_row_blocks = math.ceil(physical_rows / mlen)
         num_col_blocks = math.ceil(physical_out_features / mlen)
         num_k_tiles = math.ceil(physical_k / mlen)
-        max_k_tiles = self.mram_tile_capacity
+        chunks = self.mram_weight_k_chunks(weight_template.name, num_k_tiles)
 
         output = self.alloc(
             name,
@@ -697,15 +822,14 @@ class ProgramRoutedMoeMixin:
                 **k_split,
             )
 
-        if num_k_tiles <= max_k_tiles:
+        if len(chunks) == 1:
             for col_idx in range(num_col_blocks):
                 for row_idx in range(num_row_blocks):
                     emit_projection(row_idx, col_idx, output, row_idx, col_idx)
             return output
 
         temp = self.alloc(f"{name}_temp", mlen, mlen)
-        for k_chunk_idx, k_block_start in enumerate(range(0, num_k_tiles, max_k_tiles)):
-            k_block_count = min(max_k_tiles, num_k_tiles - k_block_start)
+        for k_chunk_idx, (k_block_start, k_block_count) in enumerate(chunks):
             k_split = {"k_block_start": k_block_start, "k_block_count": k_block_count}
             for col_idx in range(num_col_blocks):
                 for row_idx in range(num_row_blocks):
@@ -726,9 +850,14 @@ class ProgramRoutedMoeMixin:
         pair_idx: int,
         rows: int,
         width: int,
+        row_offset: int = 0,
         name: str = "gpt_oss_dynamic_bias",
     ) -> None:
-        """Add BF16 bias selected by true expert id from a VRAM bias table."""
+        """Add BF16 bias selected by true expert id from a VRAM bias table.
+
+        Bias rows ``0..rows`` of the expert's slot land on ``dst`` rows
+        ``row_offset..row_offset + rows``.
+        """
         if width % self.mlen != 0:
             raise ValueError(f"{name}: width={width} must be divisible by MLEN={self.mlen}")
         if rows > self.blen:
@@ -749,7 +878,7 @@ class ProgramRoutedMoeMixin:
             for col_block in range(num_col_blocks):
                 src_col_base = self._vram_matrix_row_addr(bias_table, 0, col_block)
                 for row_idx in range(rows):
-                    dst_addr = self._vram_matrix_row_addr(dst, row_idx, col_block)
+                    dst_addr = self._vram_matrix_row_addr(dst, row_offset + row_idx, col_block)
                     asm.instr("S_ADDI_INT", gp(gp_src_base), gp(0), src_col_base + row_idx * self.mlen)
                     asm.instr("S_ADD_INT", gp(gp_src), gp(gp_src_base), gp(gp_expert_offset))
                     asm.instr("S_ADDI_INT", gp(gp_dst), gp(0), dst_addr)
@@ -870,9 +999,15 @@ class ProgramRoutedMoeMixin:
         zero_row: FPVar | None = None,
         route_fp_scratch: FPVar | None = None,
         activation_policy: str = "gpt_oss_clamp_gated",
+        prefetch_next_pair: int | None = None,
         name: str = "gpt_oss_dynamic_expert_pair",
     ) -> VRAMMatrixVar:
-        """Run one routed pair using true expert id from device V_TOPK output."""
+        """Run one routed pair using true expert id from device V_TOPK output.
+
+        ``prefetch_next_pair`` issues that pair's gate/up weight loads after
+        this pair's gate/up projections, so they stream in while the
+        activation and down projection run.
+        """
         w_gate, w_up, w_down = weights
         gate_bias_table, up_bias_table, down_bias_table = bias_tables or (None, None, None)
         gate_base, up_base, down_base = weight_table_bases
@@ -919,6 +1054,16 @@ class ProgramRoutedMoeMixin:
                 width=intermediate,
                 name=f"{name}_up_bias",
             )
+        if prefetch_next_pair is not None:
+            self.gpt_oss_dynamic_prefetch_expert_weights_v0(
+                (w_gate, w_up),
+                table_bases=(gate_base, up_base),
+                per_expert_strides=(gate_stride, up_stride),
+                expert_indices_int_base=expert_indices_int_base,
+                pair_idx=prefetch_next_pair,
+                max_tiles=self._expert_prefetch_budget(w_down),
+                name=f"{name}_prefetch",
+            )
         hidden = self.moe_expert_activation_v0(
             gate,
             up,
@@ -1060,6 +1205,7 @@ class ProgramRoutedMoeMixin:
         token_indices: Sequence[int],
         hidden: int,
         zero_row: FPVar | None = None,
+        slot_rows: int | None = None,
         name: str = "gpt_oss_gathered_x_vram",
     ) -> VRAMMatrixVar:
         """Copy routed token rows from BF16 VRAM into BLEN-row pair slots.
@@ -1068,10 +1214,15 @@ class ProgramRoutedMoeMixin:
         :meth:`gpt_oss_gather_token_rows_from_hbm_v0`.  A real block feeds MoE
         from the VRAM-resident post-attention RMSNorm output, so this helper
         must not emit HBM prefetches, ``C_SET_SCALE_REG``, or activation
-        quantization.  Each routed pair still owns one BLEN-row slot to match
-        the existing dynamic expert-pair path; row 0 of each slot is active and
-        padding rows are written with true zeros.
+        quantization.  By default each routed pair owns one BLEN-row slot to
+        match the existing dynamic expert-pair path; row 0 of each slot is
+        active and padding rows are written with true zeros.  ``slot_rows=1``
+        packs the tokens into contiguous rows instead, which is what the
+        expert-grouped dispatch feeds to a single projection.
         """
+        slot_rows = self.blen if slot_rows is None else slot_rows
+        if slot_rows <= 0:
+            raise ValueError(f"VRAM gather slot_rows must be positive, got {slot_rows}")
         self._ensure_vram_sub_matrix_registered(x)
         if hidden % self.mlen != 0:
             raise ValueError(f"VRAM gather hidden={hidden} must be divisible by MLEN={self.mlen}")
@@ -1085,7 +1236,7 @@ class ProgramRoutedMoeMixin:
             raise ValueError(f"VRAM gather token_indices {token_list} exceed x physical rows={x.physical_shape[0]}")
 
         pair_count = len(token_list)
-        logical_rows = pair_count * self.blen
+        logical_rows = pair_count * slot_rows
         physical_rows = max(self.blen, math.ceil(logical_rows / self.blen) * self.blen)
         gathered = self.alloc(
             name,
@@ -1107,10 +1258,10 @@ class ProgramRoutedMoeMixin:
         gp_dst, gp_src = self._reg.allocate_gp(2)
         try:
             asm = IsaBuilder().comment(
-                f"GPT-OSS gather token rows from VRAM: pairs={pair_count}, hidden={hidden}, slot_rows={self.blen}"
+                f"GPT-OSS gather token rows from VRAM: pairs={pair_count}, hidden={hidden}, slot_rows={slot_rows}"
             )
             for pair_idx, token_idx in enumerate(token_list):
-                active_row = pair_idx * self.blen
+                active_row = pair_idx * slot_rows
                 asm.comment(f"VRAM gather pair slot {pair_idx}: token row {token_idx}")
                 for col_block in range(num_col_blocks):
                     dst_addr = self._vram_matrix_row_addr(gathered, active_row, col_block)
@@ -1313,9 +1464,16 @@ class ProgramRoutedMoeMixin:
         rows: int,
         intermediate: int,
         constants: GptOssFPConstants,
+        activation_policy: str = "gpt_oss_clamp_gated",
+        prefetch_next: Sequence[InputVar] = (),
         name: str,
     ) -> VRAMMatrixVar:
-        """Emit one GPT-OSS expert and return its output."""
+        """Emit one GPT-OSS expert and return its output.
+
+        ``prefetch_next`` (the next expert's gate/up weights) is loaded into
+        MRAM after this expert's gate/up projections, overlapping the
+        activation and down projection.
+        """
         w_gate, w_up, w_down = weights
         gate_bias, up_bias, down_bias = biases or (None, None, None)
         # The K-split projection path accumulates partial sums with a 64x64
@@ -1339,12 +1497,15 @@ class ProgramRoutedMoeMixin:
             self.vram_add(gate, gate_bias, num_rows=rows)
         if up_bias is not None:
             self.vram_add(up, up_bias, num_rows=rows)
-        hidden = self.gpt_oss_clamp_gated_activation_v0(
+        if prefetch_next:
+            self.prefetch_weight_tiles(list(prefetch_next), self._expert_prefetch_budget(w_down))
+        hidden = self.moe_expert_activation_v0(
             gate,
             up,
             rows=rows,
             intermediate=intermediate,
             constants=constants,
+            activation_policy=activation_policy,
             name=name,
         )
         out = self.linear_projection(
@@ -1402,6 +1563,512 @@ class ProgramRoutedMoeMixin:
         assert acc is not None
         return acc
 
+    def _emit_routing_plan_check_v0(
+        self,
+        expert_ids: Sequence[Sequence[int]],
+        *,
+        expert_indices_int_base: int,
+        route_check_int_addr: int,
+        name: str,
+    ) -> None:
+        """Store the squared distance between the routed ids and the compile-time plan to IntSRAM.
+
+        There is no conditional branch to trap on, so the result is left for
+        the host: zero at ``route_check_int_addr`` means every routed id in
+        ``expert_indices_int_base[token * top_k + pair]`` matched the plan.
+        """
+        top_k = len(expert_ids[0])
+        gp_table, gp_expert, gp_planned, gp_diff, gp_acc = self._reg.allocate_gp(5)
+        try:
+            asm = IsaBuilder().comment(
+                f"{name}: routing plan check ids_int={expert_indices_int_base} -> int[{route_check_int_addr}]"
+            )
+            asm.instr("S_ADDI_INT", gp(gp_table), gp(0), expert_indices_int_base)
+            asm.instr("S_ADDI_INT", gp(gp_acc), gp(0), 0)
+            for token, ids in enumerate(expert_ids):
+                for pair, expert in enumerate(ids):
+                    asm.instr("S_LD_INT", gp(gp_expert), gp(gp_table), token * top_k + pair)
+                    asm.instr("S_ADDI_INT", gp(gp_planned), gp(0), int(expert))
+                    asm.instr("S_SUB_INT", gp(gp_diff), gp(gp_expert), gp(gp_planned))
+                    asm.instr("S_MUL_INT", gp(gp_diff), gp(gp_diff), gp(gp_diff))
+                    asm.instr("S_ADD_INT", gp(gp_acc), gp(gp_acc), gp(gp_diff))
+            asm.instr("S_ADDI_INT", gp(gp_table), gp(0), route_check_int_addr)
+            asm.instr("S_ST_INT", gp(gp_acc), gp(gp_table), 0)
+            self._emit(asm)
+        finally:
+            self._reg.free_gp([gp_table, gp_expert, gp_planned, gp_diff, gp_acc])
+
+    def gpt_oss_moe_fixed_routing_grouped_v0(
+        self,
+        x: VRAMMatrixVar,
+        experts: Sequence[ExpertWeights],
+        *,
+        expert_ids: Sequence[Sequence[int]],
+        weights_fp_base: int,
+        expert_biases: Sequence[ExpertBiases | None] | None = None,
+        rows: int,
+        hidden: int,
+        intermediate: int,
+        constants: GptOssFPConstants,
+        zero_row: FPVar | None = None,
+        route_fp_scratch: FPVar | None = None,
+        activation_policy: str = "gpt_oss_clamp_gated",
+        pinned_experts: Sequence[int] = (),
+        pinned_k_tiles: int = 1,
+        expert_indices_int_base: int | None = None,
+        route_check_int_addr: int | None = None,
+        name: str = "gpt_oss_moe_fixed_routing_grouped",
+    ) -> VRAMMatrixVar:
+        """Emit expert-grouped MoE for a routing known at compile time.
+
+        This is the fixed-routing variant of
+        :meth:`gpt_oss_moe_grouped_dispatch_v0`, for replaying a recorded
+        routing (calibration, golden comparisons) with per-expert weights as
+        separate HBM inputs.  ``expert_ids[token]`` lists the top-k experts of
+        each token in V_TOPK pair order, and the matching softmax weight is
+        read from FPRAM at ``weights_fp_base + token * top_k + pair``.  Pairs
+        are grouped by expert when compiling: each active expert gathers its
+        tokens into contiguous rows, runs once over exactly those rows, scales
+        by the route weights and scatter-adds back.
+
+        Nothing checks that the device routes the same way unless you pass
+        ``expert_indices_int_base`` (the V_TOPK ids, laid out like the weights)
+        and ``route_check_int_addr``: the dispatch then first stores ``sum((routed_id - planned_id) ** 2)`` over
+        every pair to IntSRAM at ``route_check_int_addr``, so a non-zero word
+        after the run means the routed ids diverged from ``expert_ids``.
+
+        While one expert runs its activation and down projection, the next
+        active expert's gate/up tiles are already being prefetched.
+        ``pinned_experts`` (e.g. from ``select_hot_experts``) keep the first
+        ``pinned_k_tiles`` of their gate/up columns pinned in MRAM, so repeated
+        dispatches over the same weights skip those loads.
+        """
+        if expert_biases is not None and len(expert_biases) != len(experts):
+            raise ValueError(f"expert_biases={len(expert_biases)} does not match experts={len(experts)}")
+        if len(expert_ids) != rows:
+            raise ValueError(f"{name}: expert_ids covers {len(expert_ids)} tokens, expected rows={rows}")
+        if hidden % self.mlen != 0:
+            raise ValueError(f"{name}: hidden={hidden} must be divisible by MLEN={self.mlen}")
+        top_k = len(expert_ids[0]) if expert_ids else 0
+        if top_k == 0 or any(len(ids) != top_k for ids in expert_ids):
+            raise ValueError(f"{name}: every token needs the same non-zero number of routed experts")
+        if (expert_indices_int_base is None) != (route_check_int_addr is None):
+            raise ValueError(f"{name}: expert_indices_int_base and route_check_int_addr go together")
+        groups = _group_routed_pairs_by_expert(expert_ids, num_experts=len(experts))
+        if expert_indices_int_base is not None:
+            self._emit_routing_plan_check_v0(
+                expert_ids,
+                expert_indices_int_base=expert_indices_int_base,
+                route_check_int_addr=route_check_int_addr,
+                name=name,
+            )
+        for expert_idx in pinned_experts:
+            if expert_idx < 0 or expert_idx >= len(experts):
+                raise ValueError(f"{name}: pinned expert {expert_idx} outside {len(experts)} experts")
+            w_gate, w_up, _w_down = experts[expert_idx]
+            self.pin_weight_tiles(w_gate, pinned_k_tiles)
+            self.pin_weight_tiles(w_up, pinned_k_tiles)
+        active_experts = list(groups)
+
+        physical_rows = max(self.blen, math.ceil(rows / self.blen) * self.blen)
+        acc = self.alloc(name, rows=rows, cols=hidden, strict=False, physical_shape=(physical_rows, hidden))
+        self.gpt_oss_true_zero_vram_rows_v0(
+            acc,
+            rows=list(range(physical_rows)),
+            hidden=hidden,
+            zero_row=zero_row,
+            name=f"{name}_zero",
+        )
+        for position, (expert_idx, pairs) in enumerate(groups.items()):
+            next_expert = active_experts[position + 1] if position + 1 < len(active_experts) else None
+            tokens = [token for token, _pair in pairs]
+            group_rows = len(pairs)
+            expert_name = f"{name}_expert{expert_idx}"
+            self._emit(IsaBuilder().comment(f"Routed-MoE grouped dispatch expert={expert_idx}: tokens={tokens}"))
+            gathered = self.gpt_oss_gather_token_rows_from_vram_v0(
+                x,
+                token_indices=tokens,
+                hidden=hidden,
+                zero_row=zero_row,
+                slot_rows=1,
+                name=f"{expert_name}_x",
+            )
+            expert_out = self.gpt_oss_expert_v0(
+                gathered,
+                experts[expert_idx],
+                biases=None if expert_biases is None else expert_biases[expert_idx],
+                rows=group_rows,
+                intermediate=intermediate,
+                constants=constants,
+                activation_policy=activation_policy,
+                prefetch_next=() if next_expert is None else experts[next_expert][:2],
+                name=expert_name,
+            )
+            route = self.gpt_oss_materialize_route_weights_for_active_rows_v0(
+                weights_fp_base=weights_fp_base,
+                pair_indices=[token * top_k + pair for token, pair in pairs],
+                active_rows=list(range(group_rows)),
+                rows=group_rows,
+                hidden=hidden,
+                zero_row=zero_row,
+                fp_scratch=route_fp_scratch,
+                name=f"{expert_name}_route",
+            )
+            self.vram_mul(expert_out, route, num_rows=group_rows)
+            self.gpt_oss_scatter_add_active_rows_v0(
+                acc,
+                expert_out,
+                token_indices=tokens,
+                active_rows=list(range(group_rows)),
+                hidden=hidden,
+                name=f"{expert_name}_scatter",
+            )
+            self.free_tensor(expert_out)
+            self.free_tensor(route)
+            self.free_tensor(gathered)
+        return acc
+
+    def _emit_grouped_routing_plan_v0(
+        self,
+        layout: _GroupedRoutingLayout,
+        *,
+        expert_indices_int_base: int,
+        num_experts: int,
+        top_k: int,
+        rows: int,
+        name: str,
+    ) -> None:
+        """Bucket the routed ``(token, pair)`` slots by expert in IntSRAM.
+
+        Device counterpart of ``_group_routed_pairs_by_expert``: a histogram
+        of the routed ids, an exclusive prefix sum into ``offsets``, the
+        ascending list of experts with a non-zero count, and a token-major
+        placement of each slot into its expert's run.  There is no branch, so
+        "count > 0" is the ``nonzero[count]`` lookup.
+        """
+        gp_loop, gp_a, gp_b, gp_c, gp_d, gp_e = self._reg.allocate_gp(6)
+        try:
+            asm = IsaBuilder().comment(
+                f"{name}: device routing plan ids_int={expert_indices_int_base} -> "
+                f"int[{layout.base}:{layout.base + layout.size})"
+            )
+            asm.comment("counts[e] = 0; nonzero[0] = 0, nonzero[1..rows] = 1")
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(0), layout.counts)
+            asm.instr("C_LOOP_START", gp(gp_loop), num_experts)
+            asm.instr("S_ST_INT", gp(0), gp(gp_a), 0)
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(gp_a), 1)
+            asm.instr("C_LOOP_END", gp(gp_loop))
+            asm.instr("S_ST_INT", gp(0), gp(0), layout.nonzero)
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(0), layout.nonzero + 1)
+            asm.instr("S_ADDI_INT", gp(gp_b), gp(0), 1)
+            asm.instr("C_LOOP_START", gp(gp_loop), rows)
+            asm.instr("S_ST_INT", gp(gp_b), gp(gp_a), 0)
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(gp_a), 1)
+            asm.instr("C_LOOP_END", gp(gp_loop))
+
+            asm.comment("histogram: counts[ids[slot]] += 1")
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(0), expert_indices_int_base)
+            asm.instr("C_LOOP_START", gp(gp_loop), rows * top_k)
+            asm.instr("S_LD_INT", gp(gp_b), gp(gp_a), 0)
+            asm.instr("S_LD_INT", gp(gp_c), gp(gp_b), layout.counts)
+            asm.instr("S_ADDI_INT", gp(gp_c), gp(gp_c), 1)
+            asm.instr("S_ST_INT", gp(gp_c), gp(gp_b), layout.counts)
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(gp_a), 1)
+            asm.instr("C_LOOP_END", gp(gp_loop))
+
+            asm.comment("offsets[e] = cursor[e] = sum(counts[:e]); active[n] = e; n += nonzero[counts[e]]")
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(0), 0)
+            asm.instr("S_ADDI_INT", gp(gp_b), gp(0), 0)
+            asm.instr("S_ADDI_INT", gp(gp_c), gp(0), 0)
+            asm.instr("C_LOOP_START", gp(gp_loop), num_experts)
+            asm.instr("S_ST_INT", gp(gp_b), gp(gp_a), layout.offsets)
+            asm.instr("S_ST_INT", gp(gp_b), gp(gp_a), layout.cursor)
+            asm.instr("S_LD_INT", gp(gp_d), gp(gp_a), layout.counts)
+            asm.instr("S_ADD_INT", gp(gp_b), gp(gp_b), gp(gp_d))
+            asm.instr("S_ST_INT", gp(gp_a), gp(gp_c), layout.active)
+            asm.instr("S_LD_INT", gp(gp_d), gp(gp_d), layout.nonzero)
+            asm.instr("S_ADD_INT", gp(gp_c), gp(gp_c), gp(gp_d))
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(gp_a), 1)
+            asm.instr("C_LOOP_END", gp(gp_loop))
+            asm.instr("S_ST_INT", gp(gp_c), gp(0), layout.num_active)
+
+            asm.comment("placement: tokens[cursor[e]] = token, slots[cursor[e]] = slot, cursor[e] += 1")
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(0), 0)
+            asm.instr("S_ADDI_INT", gp(gp_b), gp(0), 0)
+            asm.instr("C_LOOP_START", gp(gp_loop), rows)
+            for pair in range(top_k):
+                asm.instr("S_LD_INT", gp(gp_c), gp(gp_b), expert_indices_int_base + pair)
+                asm.instr("S_LD_INT", gp(gp_d), gp(gp_c), layout.cursor)
+                asm.instr("S_ADDI_INT", gp(gp_e), gp(gp_d), 1)
+                asm.instr("S_ST_INT", gp(gp_e), gp(gp_c), layout.cursor)
+                asm.instr("S_ST_INT", gp(gp_a), gp(gp_d), layout.tokens)
+                asm.instr("S_ADDI_INT", gp(gp_e), gp(gp_b), pair)
+                asm.instr("S_ST_INT", gp(gp_e), gp(gp_d), layout.slots)
+            asm.instr("S_ADDI_INT", gp(gp_a), gp(gp_a), 1)
+            asm.instr("S_ADDI_INT", gp(gp_b), gp(gp_b), top_k)
+            asm.instr("C_LOOP_END", gp(gp_loop))
+            asm.instr("S_ST_INT", gp(0), gp(0), layout.visit)
+            self._emit(asm)
+        finally:
+            self._reg.free_gp([gp_loop, gp_a, gp_b, gp_c, gp_d, gp_e])
+
+    def _emit_grouped_rows_loop_v0(
+        self,
+        layout: _GroupedRoutingLayout,
+        *,
+        rows: int,
+        comment: str,
+        emit_row,
+    ) -> None:
+        """Run ``emit_row`` once per token of the current expert visit.
+
+        The hardware loop is sized for ``rows`` and reloads its counter with
+        the sorted slots left after this one, so it runs ``count`` times.
+        ``emit_row(asm, gp_ptr, gp_row)`` gets the sorted-slot index and the
+        row index within the gathered tile, both as GP registers.
+        """
+        gp_loop, gp_ptr, gp_end, gp_row = self._reg.allocate_gp(4)
+        try:
+            asm = IsaBuilder().comment(comment)
+            asm.instr("S_LD_INT", gp(gp_ptr), gp(0), layout.offset)
+            asm.instr("S_LD_INT", gp(gp_end), gp(0), layout.count)
+            asm.instr("S_ADD_INT", gp(gp_end), gp(gp_end), gp(gp_ptr))
+            asm.instr("S_ADDI_INT", gp(gp_row), gp(0), 0)
+            asm.instr("C_LOOP_START", gp(gp_loop), rows)
+            emit_row(asm, gp_ptr, gp_row)
+            asm.instr("S_ADDI_INT", gp(gp_ptr), gp(gp_ptr), 1)
+            asm.instr("S_ADDI_INT", gp(gp_row), gp(gp_row), self.mlen)
+            asm.instr("S_SUB_INT", gp(gp_loop), gp(gp_end), gp(gp_ptr))
+            asm.instr("C_LOOP_END", gp(gp_loop))
+            self._emit(asm)
+        finally:
+            self._reg.free_gp([gp_loop, gp_ptr, gp_end, gp_row])
+
+    def gpt_oss_moe_grouped_dispatch_v0(
+        self,
+        x: VRAMMatrixVar,
+        weights: ExpertWeights,
+        *,
+        weight_table_bases: tuple[int, int, int],
+        weight_table_strides: tuple[int, int, int],
+        expert_indices_int_base: int,
+        weights_fp_base: int,
+        routing_int_base: int,
+        num_experts: int,
+        top_k: int,
+        bias_tables: ExpertBiases | None = None,
+        rows: int,
+        hidden: int,
+        intermediate: int,
+        constants: GptOssFPConstants,
+        zero_row: FPVar | None = None,
+        activation_policy: str = "gpt_oss_clamp_gated",
+        name: str = "gpt_oss_moe_grouped",
+    ) -> VRAMMatrixVar:
+        """Emit expert-grouped routed MoE driven by the V_TOPK results.
+
+        ``expert_indices_int_base + token * top_k + pair`` holds each token's
+        routed expert id and ``weights_fp_base + token * top_k + pair`` its
+        softmax weight (one V_TOPK per token with both bases advanced by
+        ``top_k``).  ``weights`` are the expert templates and the table
+        bases/strides address the stacked expert weights in HBM, as for
+        :meth:`gpt_oss_dynamic_expert_pair_v0`.
+
+        Nothing about the routing is known when compiling.  A device prologue
+        buckets the routed slots by expert in IntSRAM at ``routing_int_base``
+        (``_GroupedRoutingLayout.size`` words), then one hardware loop visits
+        each active expert: it gathers that expert's tokens into contiguous
+        rows, runs gate/up/down with the expert's weights selected at runtime,
+        and scatter-adds the route-weighted rows into the output.  The visit
+        loop runs the runtime number of active experts and the gather/scatter
+        loops the expert's runtime token count, by reloading the loop counter
+        before C_LOOP_END, so expert weights stream once per active expert.
+
+        The projections always cover ``rows`` rows; rows past the visited
+        expert's token count hold stale gathers and are never scattered.
+        """
+        if hidden % self.mlen != 0:
+            raise ValueError(f"{name}: hidden={hidden} must be divisible by MLEN={self.mlen}")
+        if rows <= 0 or top_k <= 0 or top_k > num_experts:
+            raise ValueError(f"{name}: need rows > 0 and 0 < top_k <= num_experts, got {rows}, {top_k}, {num_experts}")
+        if rows > x.physical_shape[0]:
+            raise ValueError(f"{name}: rows={rows} exceed x physical rows={x.physical_shape[0]}")
+        w_gate, w_up, w_down = weights
+        gate_bias_table, up_bias_table, down_bias_table = bias_tables or (None, None, None)
+        gate_base, up_base, down_base = weight_table_bases
+        gate_stride, up_stride, down_stride = weight_table_strides
+        layout = _GroupedRoutingLayout.at(routing_int_base, num_experts=num_experts, top_k=top_k, rows=rows)
+        num_col_blocks = hidden // self.mlen
+        physical_rows = max(self.blen, math.ceil(rows / self.blen) * self.blen)
+        projection_rows = max(self.mlen, physical_rows)
+
+        self._emit_grouped_routing_plan_v0(
+            layout,
+            expert_indices_int_base=expert_indices_int_base,
+            num_experts=num_experts,
+            top_k=top_k,
+            rows=rows,
+            name=name,
+        )
+        acc = self.alloc(name, rows=rows, cols=hidden, strict=False, physical_shape=(physical_rows, hidden))
+        gathered = self.alloc(
+            f"{name}_x", rows=rows, cols=hidden, strict=False, physical_shape=(physical_rows, hidden)
+        )
+        for matrix in (acc, gathered):
+            self.gpt_oss_true_zero_vram_rows_v0(
+                matrix,
+                rows=list(range(physical_rows)),
+                hidden=hidden,
+                zero_row=zero_row,
+                name=f"{matrix.name}_zero",
+            )
+
+        # Tiles cached under the current-expert word belong to an earlier visit.
+        def evict_visit_tiles() -> None:
+            self.mram_cache.evict(lambda key: key[0] == _DYNAMIC_EXPERT_KEY and key[2] + key[3] == layout.expert)
+
+        evict_visit_tiles()
+        gp_visit = self._reg.allocate_gp(1)[0]
+        try:
+            gp_tmp, gp_expert = self._reg.allocate_gp(2)
+            asm = IsaBuilder().comment(
+                f"{name}: visit each active expert (at most {min(num_experts, rows * top_k)}, runtime count)"
+            )
+            asm.instr("C_LOOP_START", gp(gp_visit), min(num_experts, rows * top_k))
+            asm.instr("S_LD_INT", gp(gp_tmp), gp(0), layout.visit)
+            asm.instr("S_LD_INT", gp(gp_expert), gp(gp_tmp), layout.active)
+            asm.instr("S_ST_INT", gp(gp_expert), gp(0), layout.expert)
+            asm.instr("S_LD_INT", gp(gp_tmp), gp(gp_expert), layout.counts)
+            asm.instr("S_ST_INT", gp(gp_tmp), gp(0), layout.count)
+            asm.instr("S_LD_INT", gp(gp_tmp), gp(gp_expert), layout.offsets)
+            asm.instr("S_ST_INT", gp(gp_tmp), gp(0), layout.offset)
+            self._emit(asm)
+            self._reg.free_gp([gp_tmp, gp_expert])
+
+            gp_token, gp_mlen, gp_src, gp_dst = self._reg.allocate_gp(4)
+
+            def gather_row(asm: IsaBuilder, gp_ptr: int, gp_row: int) -> None:
+                asm.instr("S_LD_INT", gp(gp_token), gp(gp_ptr), layout.tokens)
+                asm.instr("S_MUL_INT", gp(gp_token), gp(gp_token), gp(gp_mlen))
+                for col_block in range(num_col_blocks):
+                    asm.instr("S_ADDI_INT", gp(gp_src), gp(gp_token), self._vram_matrix_row_addr(x, 0, col_block))
+                    asm.instr(
+                        "S_ADDI_INT", gp(gp_dst), gp(gp_row), self._vram_matrix_row_addr(gathered, 0, col_block)
+                    )
+                    asm.instr("V_ADD_VF", gp(gp_dst), gp(gp_src), fp(0), 0)
+
+            self._emit(IsaBuilder().instr("S_ADDI_INT", gp(gp_mlen), gp(0), self.mlen))
+            self._emit_grouped_rows_loop_v0(
+                layout, rows=rows, comment=f"{name}: gather the visited expert's tokens", emit_row=gather_row
+            )
+            self._reg.free_gp([gp_token, gp_mlen, gp_src, gp_dst])
+
+            expert_kwargs = {"expert_indices_int_base": layout.expert, "pair_idx": 0}
+            gate = self.gpt_oss_dynamic_linear_projection_v0(
+                gathered,
+                w_gate,
+                table_base=gate_base,
+                per_expert_stride=gate_stride,
+                name=f"{name}_gate",
+                physical_shape=(projection_rows, w_gate.physical_shape[1]),
+                **expert_kwargs,
+            )
+            up = self.gpt_oss_dynamic_linear_projection_v0(
+                gathered,
+                w_up,
+                table_base=up_base,
+                per_expert_stride=up_stride,
+                name=f"{name}_up",
+                physical_shape=(projection_rows, w_up.physical_shape[1]),
+                **expert_kwargs,
+            )
+            self._add_grouped_expert_bias_v0(gate, gate_bias_table, layout, rows=rows, width=intermediate, name=name)
+            self._add_grouped_expert_bias_v0(up, up_bias_table, layout, rows=rows, width=intermediate, name=name)
+            hidden_act = self.moe_expert_activation_v0(
+                gate,
+                up,
+                rows=rows,
+                intermediate=intermediate,
+                constants=constants,
+                activation_policy=activation_policy,
+                name=name,
+            )
+            out = self.gpt_oss_dynamic_linear_projection_v0(
+                hidden_act,
+                w_down,
+                table_base=down_base,
+                per_expert_stride=down_stride,
+                name=f"{name}_out",
+                physical_shape=(projection_rows, w_down.physical_shape[1]),
+                **expert_kwargs,
+            )
+            self._add_grouped_expert_bias_v0(out, down_bias_table, layout, rows=rows, width=hidden, name=name)
+
+            gp_token, gp_mlen, gp_slot, gp_src, gp_dst = self._reg.allocate_gp(5)
+            fp_weight = self._reg.allocate_fp(1)[0]
+
+            def scatter_row(asm: IsaBuilder, gp_ptr: int, gp_row: int) -> None:
+                asm.instr("S_LD_INT", gp(gp_token), gp(gp_ptr), layout.tokens)
+                asm.instr("S_MUL_INT", gp(gp_token), gp(gp_token), gp(gp_mlen))
+                asm.instr("S_LD_INT", gp(gp_slot), gp(gp_ptr), layout.slots)
+                asm.instr("S_LD_FP", fp(fp_weight), gp(gp_slot), weights_fp_base)
+                for col_block in range(num_col_blocks):
+                    asm.instr("S_ADDI_INT", gp(gp_src), gp(gp_row), self._vram_matrix_row_addr(out, 0, col_block))
+                    asm.instr("S_ADDI_INT", gp(gp_dst), gp(gp_token), self._vram_matrix_row_addr(acc, 0, col_block))
+                    asm.instr("V_MUL_VF", gp(gp_src), gp(gp_src), fp(fp_weight), 0)
+                    asm.instr("V_ADD_VV", gp(gp_dst), gp(gp_dst), gp(gp_src), 0)
+
+            self._emit(IsaBuilder().instr("S_ADDI_INT", gp(gp_mlen), gp(0), self.mlen))
+            self._emit_grouped_rows_loop_v0(
+                layout, rows=rows, comment=f"{name}: route-weighted scatter-add", emit_row=scatter_row
+            )
+            self._reg.free_gp([gp_token, gp_mlen, gp_slot, gp_src, gp_dst])
+            self._reg.free_fp([fp_weight])
+            self.free_tensor(out)
+            self.free_tensor(up)
+            self.free_tensor(gate)
+
+            gp_tmp = self._reg.allocate_gp(1)[0]
+            asm = IsaBuilder().comment(f"{name}: hw counter = active experts left after this visit")
+            asm.instr("S_LD_INT", gp(gp_tmp), gp(0), layout.visit)
+            asm.instr("S_ADDI_INT", gp(gp_tmp), gp(gp_tmp), 1)
+            asm.instr("S_ST_INT", gp(gp_tmp), gp(0), layout.visit)
+            asm.instr("S_LD_INT", gp(gp_visit), gp(0), layout.num_active)
+            asm.instr("S_SUB_INT", gp(gp_visit), gp(gp_visit), gp(gp_tmp))
+            asm.instr("C_LOOP_END", gp(gp_visit))
+            self._emit(asm)
+            self._reg.free_gp([gp_tmp])
+        finally:
+            self._reg.free_gp([gp_visit])
+        evict_visit_tiles()
+        self.free_tensor(gathered)
+        return acc
+
+    def _add_grouped_expert_bias_v0(
+        self,
+        dst: VRAMMatrixVar,
+        bias_table: VRAMMatrixVar | None,
+        layout: _GroupedRoutingLayout,
+        *,
+        rows: int,
+        width: int,
+        name: str,
+    ) -> None:
+        """Add the visited expert's bias to ``rows`` rows, one BLEN slot at a time."""
+        if bias_table is None:
+            return
+        for row_offset in range(0, rows, self.blen):
+            self.gpt_oss_add_dynamic_expert_bias_v0(
+                dst,
+                bias_table,
+                expert_indices_int_base=layout.expert,
+                pair_idx=0,
+                rows=min(self.blen, rows - row_offset),
+                width=width,
+                row_offset=row_offset,
+                name=f"{name}_{dst.name}_bias",
+            )
+
     def moe_expert_activation_v0(
         self,
         gate: VRAMMatrixVar,
@@ -1439,4 +2106,58 @@ class ProgramRoutedMoeMixin:
         )
 
 
+def _group_routed_pairs_by_expert(
+    expert_ids: Sequence[Sequence[int]],
+    *,
+    num_experts: int,
+) -> dict[int, list[tuple[int, int]]]:
+    """Bucket ``(token, pair)`` routes by expert, in expert then token order.
+
+    Only experts that receive at least one token appear in the result.
+    """
+    groups: dict[int, list[tuple[int, int]]] = {}
+    for token, ids in enumerate(expert_ids):
+        for pair, expert in enumerate(ids):
+            expert = int(expert)
+            if expert < 0 or expert >= num_experts:
+                raise ValueError(f"token {token} pair {pair} routes to expert {expert}, have {num_experts}")
+            groups.setdefault(expert, []).append((token, pair))
+    return dict(sorted(groups.items()))
+
+
+
+@dataclass(frozen=True)
+class _GroupedRoutingLayout:
+    """IntSRAM words of the device routing plan built by the grouped dispatch.
+
+    Array fields are base addresses: ``counts``/``cursor``/``offsets``/
+    ``active`` hold one word per expert, ``tokens``/``slots`` one per routed
+    slot in expert-then-token order, and ``nonzero`` is the ``rows + 1`` word
+    "count > 0" lookup.  The rest are single words for the current visit.
+    """
+
+    base: int
+    counts: int
+    cursor: int
+    offsets: int
+    active: int
+    tokens: int
+    slots: int
+    nonzero: int
+    num_active: int
+    visit: int
+    expert: int
+    count: int
+    offset: int
+    size: int
+
+    @classmethod
+    def at(cls, base: int, *, num_experts: int, top_k: int, rows: int) -> _GroupedRoutingLayout:
+        slots = rows * top_k
+        words = [num_experts] * 4 + [slots] * 2 + [rows + 1] + [1] * 5
+        starts = [base]
+        for count in words:
+            starts.append(starts[-1] + count)
+        return cls(base, *starts[:-1], size=starts[-1] - base)
+
 __all__ = ["ProgramRoutedMoeMixin"]
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from compiler.asm_templates import ffn_asm, preload_addr_reg_asm, reset_reg_asm
+from compiler.aten.plena.memory import VRAMSpillSlot
 from compiler.aten.plena.vars import FPVar, InputVar, TensorVar, VRAMMatrixVar
 
 
@@ -101,7 +102,7 @@ class ProgramTensorMixin:
             vram_addr = input_var.prestaged_vram_addr
             # Tell the VRAM allocator that this region is occupied so subsequent
             # allocations don't collide with it.
-            self.vram_allocator._vmm.mark_used(vram_addr, h * w, name=internal_name)
+            self.vram_allocator.mark_used(vram_addr, h * w, name=internal_name)
             super().add_vram_object(
                 name=internal_name,
                 shape=input_var.shape,
@@ -114,11 +115,13 @@ class ProgramTensorMixin:
             )
         else:
             # Normal path: emit HBM → VRAM prefetch ISA.
-            super().load_batch(
-                hbm_object_name=input_var.name,
-                vram_object_name=internal_name,
-                vlen=self.mlen,
-                preload_len=self.hbm_v_prefetch_amount,
+            self._allocate_with_spills(
+                lambda: super(ProgramTensorMixin, self).load_batch(
+                    hbm_object_name=input_var.name,
+                    vram_object_name=internal_name,
+                    vlen=self.mlen,
+                    preload_len=self.hbm_v_prefetch_amount,
+                )
             )
 
         var = VRAMMatrixVar(
@@ -221,12 +224,14 @@ class ProgramTensorMixin:
             physical_rows = ((rows + self.blen - 1) // self.blen) * self.blen
             physical_cols = ((cols + self.mlen - 1) // self.mlen) * self.mlen
             physical_shape = (max(self.blen, physical_rows), max(self.mlen, physical_cols))
-        super().allocate_vram_matrix(
-            name=internal_name,
-            rows=rows,
-            cols=cols,
-            strict=strict,
-            physical_shape=physical_shape,
+        self._allocate_with_spills(
+            lambda: super(ProgramTensorMixin, self).allocate_vram_matrix(
+                name=internal_name,
+                rows=rows,
+                cols=cols,
+                strict=strict,
+                physical_shape=physical_shape,
+            )
         )
 
         var = VRAMMatrixVar(
@@ -294,10 +299,169 @@ class ProgramTensorMixin:
         if not isinstance(tensor_var, VRAMMatrixVar):
             raise TypeError(f"Can only free VRAMMatrixVar, got {type(tensor_var)}")
 
+        slot = self.vram_spill_slots.pop(tensor_var.name, None)
+        if slot is not None and slot.spilled:
+            self._release_spill_arena(slot)
         super().free_vram_object(tensor_var.name, strict=False)
         # Keep sub-matrix registration state consistent after free.
         self._registered_vram_sub_matrices[tensor_var.name] = False
 
+    # ========================================================================
+    # VRAM Spilling
+    # ========================================================================
+
+    def spillable(self, tensor_var: VRAMMatrixVar, source: InputVar | None = None) -> VRAMMatrixVar:
+        """
+        Allow the allocator to evict ``tensor_var`` to HBM when VRAM runs out.
+
+        When ``alloc``/``load_batch`` (or a reload) overflows the VRAM
+        capacity, spillable tensors not touched since the last emitted code
+        are evicted: those with a ``source`` (an unmodified copy of that HBM
+        input, e.g. RoPE tables) are dropped and re-prefetched, the rest are
+        written to an HBM spill arena with H_STORE_V. Neither happens inside an
+        open hardware loop, whose body would replay the eviction. The least recently touched tensor goes first, standing
+        in for the furthest next use. The next lookup of the name reloads it
+        with H_PREFETCH_V, possibly at a new address, so callers must not hold
+        its raw VRAM address across allocations.
+
+        Returns:
+            ``tensor_var``, for chaining
+        """
+        if not isinstance(tensor_var, VRAMMatrixVar):
+            raise TypeError(f"Can only spill VRAMMatrixVar, got {type(tensor_var)}")
+        if tensor_var.name not in self.vram_matrices:
+            raise KeyError(f"VRAM object '{tensor_var.name}' not found")
+        self.vram_spill_slots[tensor_var.name] = VRAMSpillSlot(
+            name=tensor_var.name,
+            source=source.name if source is not None else None,
+            last_touch=self._vram_touch_clock,
+        )
+        return tensor_var
+
+    def spill(self, tensor_var: VRAMMatrixVar) -> None:
+        """
+        Evict ``tensor_var`` to HBM now instead of waiting for an overflow.
+
+        For frontends that plan their own spills. The tensor becomes
+        :meth:`spillable` if it is not already and, as with an overflow
+        spill, its next lookup reloads it.
+        """
+        if not isinstance(tensor_var, VRAMMatrixVar):
+            raise TypeError(f"Can only spill VRAMMatrixVar, got {type(tensor_var)}")
+        slot = self.vram_spill_slots.get(tensor_var.name)
+        if slot is None:
+            self.spillable(tensor_var)
+            slot = self.vram_spill_slots[tensor_var.name]
+        if slot.spilled:
+            return
+        if self._hw_loop_depth:
+            raise RuntimeError(f"cannot spill '{tensor_var.name}' inside an open hardware loop")
+        if self._vram_aliased(tensor_var.name):
+            raise RuntimeError(f"cannot spill '{tensor_var.name}' while VRAM views alias it")
+        spilling, self._vram_spilling = self._vram_spilling, True
+        try:
+            self._evict_vram(slot)
+        finally:
+            self._vram_spilling = spilling
+
+    def _allocate_with_spills(self, allocate, keep: str | None = None):
+        while True:
+            try:
+                result = allocate()
+                break
+            except MemoryError:
+                if not self._spill_vram_victim(keep):
+                    raise
+        # Kernel scratch (norm/RoPE/k-split strips, at most one tile) allocates
+        # mid-emission where nothing can be spilled, so keep a tile free.
+        tile = self.mlen * self.mlen
+        while not self.vram_allocator.can_allocate(tile) and self._spill_vram_victim(keep):
+            pass
+        return result
+
+    def _vram_aliased(self, name: str) -> bool:
+        layout = self.vram_matrices[name]
+        rows, cols = layout.physical_shape
+        start, end = layout.vram_base_addr, layout.vram_base_addr + rows * cols
+        for other_name, other in self.vram_matrices.items():
+            other_rows, other_cols = other.physical_shape
+            other_start = other.vram_base_addr
+            if other_name != name and other_start < end and start < other_start + other_rows * other_cols:
+                return True
+        return False
+
+    def _spill_vram_victim(self, keep: str | None = None) -> bool:
+        candidates = [
+            slot
+            for slot in self.vram_spill_slots.values()
+            if not slot.spilled
+            and slot.name != keep
+            and slot.last_touch <= self._vram_safe_point
+            and self._hw_loop_depth == 0
+            and not self._vram_aliased(slot.name)
+        ]
+        if not candidates:
+            return False
+        # Clean copies cost no store, so they go before dirty activations.
+        victim = min(candidates, key=lambda slot: (slot.source is None, slot.last_touch))
+        spilling, self._vram_spilling = self._vram_spilling, True
+        try:
+            self._evict_vram(victim)
+        finally:
+            self._vram_spilling = spilling
+        return True
+
+    def _evict_vram(self, victim: VRAMSpillSlot) -> None:
+        rows, cols = self.vram_matrices[victim.name].physical_shape
+        if victim.source is None:
+            victim.hbm_name = f"{victim.name}__spill"
+            victim.hbm_size = self.hbm_tensor_size(rows * cols)
+            victim.hbm_addr = self._allocate_hbm(victim.hbm_size)
+            self.emit_comment(f"Spill {victim.name} to HBM[{victim.hbm_addr}]")
+            super().store_to_hbm(
+                tensor_name=victim.name,
+                hbm_addr=victim.hbm_addr,
+                hbm_object_name=victim.hbm_name,
+                vlen=self.mlen,
+                store_amount=self.hbm_v_writeback_amount,
+            )
+            self.vram_spill_bytes += rows * cols * self.hbm_element_width // 8
+        else:
+            victim.hbm_name = victim.source
+            self.emit_comment(f"Drop {victim.name}; rematerialised from {victim.source}")
+        super().free_vram_object(victim.name)
+        self._registered_vram_sub_matrices[victim.name] = False
+        victim.spilled = True
+
+    def _reload_spilled_vram(self, slot: VRAMSpillSlot) -> None:
+        # Unregister while reloading so the symbol-table lookups inside
+        # load_batch do not recurse into this reload.
+        del self.vram_spill_slots[slot.name]
+        spilling, self._vram_spilling = self._vram_spilling, True
+        try:
+            self._allocate_with_spills(
+                lambda: super(ProgramTensorMixin, self).load_batch(
+                    hbm_object_name=slot.hbm_name,
+                    vram_object_name=slot.name,
+                    vlen=self.mlen,
+                    preload_len=self.hbm_v_prefetch_amount,
+                ),
+                keep=slot.name,
+            )
+        finally:
+            self._vram_spilling = spilling
+            self.vram_spill_slots[slot.name] = slot
+        rows, cols = self.vram_matrices[slot.name].physical_shape
+        self.vram_reload_bytes += rows * cols * self.hbm_element_width // 8
+        self._release_spill_arena(slot)
+        slot.spilled = False
+
+    def _release_spill_arena(self, slot: VRAMSpillSlot) -> None:
+        if slot.source is None and slot.hbm_name is not None:
+            super().free_hbm_object(slot.hbm_name, strict=False)
+            self._recycle_hbm(slot.hbm_addr, slot.hbm_size)
+        slot.hbm_name = None
+
     def free_input(self, input_var: InputVar):
         """
         Free an InputVar bookkeeping and recycle its HBM range for future auto-allocation.
@@ -380,6 +544,37 @@ class ProgramTensorMixin:
             scratchpad_vram_addr=scratchpad_vram_addr,
         )
 
+    def rms_norm_stats(
+        self,
+        tensor_var: TensorVar,
+        eps_offset: int = 1,
+        reci_hid_offset: int = 2,
+        vlen: int | None = None,
+        name: str | None = None,
+    ) -> FPVar:
+        """
+        RMS norm reduction only: per-row scale in FPRAM, tensor left unnormalized.
+
+        Pass the result as ``row_scale`` to a projection to apply the norm to
+        its output rows (``norm(x) @ W == diag(scale) (x @ W)``) instead of
+        rewriting ``tensor_var`` in place.
+
+        Returns:
+            FPVar with one entry per physical row of ``tensor_var``
+        """
+        if not isinstance(tensor_var, VRAMMatrixVar):
+            raise TypeError(f"rms_norm_stats requires VRAMMatrixVar, got {type(tensor_var)}")
+
+        stats = self.fp_var(name or f"{tensor_var.display_name}_rms_scale", size=tensor_var.physical_shape[0])
+        super().rms_norm_stats(
+            tensor_name=tensor_var.name,
+            stats_fpram_addr=stats.address,
+            eps_offset=eps_offset,
+            reci_hid_offset=reci_hid_offset,
+            vlen=vlen,
+        )
+        return stats
+
     def layer_norm(
         self,
         tensor_var: TensorVar,
@@ -5,7 +5,7 @@ from __future__ import annotations
 import math
 import os
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Any
 
 import torch
@@ -32,8 +32,12 @@ import compiler.aten.ops as ops
 from compiler.asm_templates.gelu_asm import gelu_asm
 from asm_templates._imm import add_large_int as _add_large_int_lines
 from asm_templates._imm import load_large_int as _load_large_int_lines
+from compiler.aten.ops.plena.conv_ops import conv2d_implicit_gemm_weight
 from compiler.aten.ops.registry import Backend, OpRegistry
 from compiler.aten.plena import PlenaCompiler
+from compiler.aten.plena.memory import VRAMPlan
+from compiler.aten.plena.program_attention import ragged_kv_block_offsets
+from compiler.aten.plena.program_constants import SCORE_MASK_FILL
 from compiler.aten.reference import (
     ReferencePrecision,
     ScheduledReferenceConfig,
@@ -54,6 +58,7 @@ __all__ = [
     "compile_hf_model",
     "compile_native_hf_decoder",
     "compile_native_hf_vision_encoder",
+    "compile_with_vram_plan",
     "quantize_to_mxfp",
 ]
 
@@ -405,6 +410,55 @@ def _compact_active_sequence_rows(
     return torch.cat(rows, dim=0).contiguous()
 
 
+def _make_ragged_kv_cache(
+    weights: list[LayerWeights],
+    kv_cache_lens: list[int],
+    rope_inputs: tuple[torch.Tensor, torch.Tensor, torch.Tensor],
+    *,
+    hidden: int,
+    head_dim: int,
+) -> list[list[tuple[list[torch.Tensor], list[torch.Tensor]]]]:
+    """Synthesize per-layer, per-KV-head caches of rotated K and plain V rows.
+
+    Cached position ``p`` of a sequence projects a random RMS-normalized
+    hidden state through the padded K/V head weights and rotates K to ``p``,
+    so cache magnitudes match what the model itself would have written.
+    """
+    rope_matrix, cos_table, sin_table = rope_inputs
+    cache = []
+    for layer in weights:
+        padded_hidden = layer.w_k_heads[0].shape[0]
+        states = []
+        for kv_len in kv_cache_lens:
+            x = torch.randn(kv_len, hidden)
+            x = x * torch.rsqrt(x.pow(2).mean(dim=-1, keepdim=True) + layer.eps)
+            states.append(_pad_2d(x, kv_len, padded_hidden))
+        layer_cache = []
+        for w_k, w_v in zip(layer.w_k_heads, layer.w_v_heads):
+            keys = []
+            values = []
+            for x, kv_len in zip(states, kv_cache_lens):
+                k = x @ w_k.float()
+                k_rot = k[:, :head_dim]
+                k[:, :head_dim] = k_rot * cos_table[:kv_len] + (k_rot @ rope_matrix) * sin_table[:kv_len]
+                keys.append(k)
+                values.append(x @ w_v.float())
+            layer_cache.append((keys, values))
+        cache.append(layer_cache)
+    return cache
+
+
+def _pack_ragged_kv_cache(rows_per_sequence: list[torch.Tensor], mlen: int) -> torch.Tensor:
+    """Pack per-sequence cache rows into the slab layout of ``ragged_kv_block_offsets``."""
+    lengths = [rows.shape[0] for rows in rows_per_sequence]
+    offsets = ragged_kv_block_offsets(lengths, mlen)
+    total_rows = max(mlen, offsets[-1] * mlen + _ceil_to_multiple(lengths[-1], mlen))
+    out = torch.zeros((total_rows, rows_per_sequence[0].shape[1]), dtype=rows_per_sequence[0].dtype)
+    for block, rows in zip(offsets, rows_per_sequence):
+        out[block * mlen : block * mlen + rows.shape[0]] = rows
+    return out.contiguous()
+
+
 def _pad_q_weight_grouped(weight: torch.Tensor, num_heads: int, head_dim: int, padded_hidden: int, padded_head_dim: int):
     """Pad Q weights while keeping each head in its own padded head block."""
     hidden, _ = weight.shape
@@ -680,11 +734,18 @@ def _pad_rope_inputs_for_head_slots(
     return r.contiguous(), cos.contiguous(), sin.contiguous()
 
 
-def _save_residual_and_norm(prog, source, scratch):
-    """Emit the common decoder pre-norm residual prologue."""
+def _save_residual_and_norm(prog, source, scratch, fuse_norm: bool = False):
+    """Emit the common decoder pre-norm residual prologue.
+
+    With ``fuse_norm`` the source is left unnormalized and the per-row RMS
+    scale is returned for the projections that consume it.
+    """
     prog.vram_fill_zero(scratch)
     prog.vram_add(scratch, source)
+    if fuse_norm:
+        return prog.rms_norm_stats(source, eps_offset=3, reci_hid_offset=4)
     ops.rms_norm(prog, source, eps_offset=3, reci_hid_offset=4)
+    return None
 
 
 def _add_residual(prog, target, scratch):
@@ -692,17 +753,23 @@ def _add_residual(prog, target, scratch):
     return target
 
 
-def _linear_projection(prog, input_var, weight_var, name: str, physical_shape: tuple[int, int] | None = None):
-    if physical_shape is not None:
-        return prog.linear_projection(input_var, weight_var, name=name, physical_shape=physical_shape)
+def _linear_projection(
+    prog,
+    input_var,
+    weight_var,
+    name: str,
+    physical_shape: tuple[int, int] | None = None,
+    row_scale=None,
+):
+    if physical_shape is not None or row_scale is not None:
+        return prog.linear_projection(
+            input_var, weight_var, name=name, physical_shape=physical_shape, row_scale=row_scale
+        )
     return ops.linear(prog, input_var, weight_var, name=name)
 
 
 def _apply_rope_projection(prog, x_var, rope_matrix, cos_var, sin_var, name):
-    x_rot = _linear_projection(prog, x_var, rope_matrix, name)
-    ops.rope(prog, x_var, x_rot, cos_var, sin_var)
-    prog.free_tensor(x_rot)
-    return x_var
+    return prog.apply_rope(x_var, rope_matrix, cos_var, sin_var, name=name)
 
 
 def _copy_into_vram_view(prog, source, name, rows, cols, vram_addr, physical_shape=None):
@@ -726,6 +793,20 @@ def _free_named_tensors(prog, names):
             prog._tensors.pop(name, None)
 
 
+def _free_with_views(prog, *tensors):
+    """Free ``tensors`` and every ``alloc_at`` view that lies inside them."""
+    for tensor in tensors:
+        rows, cols = tensor.physical_shape
+        start = prog.get_vram_addr(tensor.name)
+        views = [
+            name
+            for name, layout in prog.vram_matrices.items()
+            if name != tensor.name and start <= layout.vram_base_addr < start + rows * cols
+        ]
+        _free_named_tensors(prog, views)
+        prog.free_tensor(tensor)
+
+
 def _emit_kv_stores(
     prog,
     current,
@@ -737,6 +818,7 @@ def _emit_kv_stores(
     checkpoint_recorder: StageCheckpointRecorder | None = None,
     active_seq_len: int | None = None,
     active_head_dim: int | None = None,
+    row_scale=None,
 ):
     rope_matrix, cos_var, sin_var = rope_inputs
     kv_stored = []
@@ -751,6 +833,7 @@ def _emit_kv_stores(
             layer_inputs.w_k_heads[kv_h],
             f"K_{layer_idx}_h{kv_h}",
             physical_shape=kv_physical_shape,
+            row_scale=row_scale,
         )
         v_physical_shape = None
         if physical_rows is not None:
@@ -761,6 +844,7 @@ def _emit_kv_stores(
             layer_inputs.w_v_heads[kv_h],
             f"V_{layer_idx}_h{kv_h}",
             physical_shape=v_physical_shape,
+            row_scale=row_scale,
         )
         checkpoint_cols = active_head_dim or K_h.shape[1]
         if checkpoint_recorder is not None:
@@ -829,6 +913,7 @@ def _emit_packed_attention_block(
     batch_size: int = 1,
     rows_per_batch: int | None = None,
     active_seq_len_per_batch: int | None = None,
+    sliding_window: int | None = None,
 ):
     active_seq_len = active_seq_len or seq_len
     active_hidden = active_hidden or current.shape[1]
@@ -949,6 +1034,7 @@ def _emit_packed_attention_block(
             broadcast_amount=head_packing.broadcast_amount,
             scale=scale,
             causal_mask=causal_mask,
+            sliding_window=sliding_window,
         )
     elif batch_size == 1:
         for kv_h, Q_group in enumerate(q_groups):
@@ -964,6 +1050,7 @@ def _emit_packed_attention_block(
                 broadcast_amount=head_packing.broadcast_amount,
                 scale=scale,
                 causal_mask=causal_mask,
+                sliding_window=sliding_window,
                 valid_cols=active_seq_len_per_batch,
             )
     else:
@@ -1002,6 +1089,7 @@ def _emit_packed_attention_block(
                     broadcast_amount=head_packing.broadcast_amount,
                     scale=scale,
                     causal_mask=causal_mask,
+                    sliding_window=sliding_window,
                     k_idx=batch_idx * row_block_stride,
                     valid_cols=active_seq_len_per_batch,
                 )
@@ -1025,6 +1113,7 @@ def _emit_packed_attention_block(
             active_shape=(active_seq_len, active_hidden),
             semantic="attention output projection before residual add",
         )
+    _free_with_views(prog, Q, O_full)
     out = _add_residual(prog, O_proj, scratch)
     if checkpoint_recorder is not None:
         checkpoint_recorder.record(
@@ -1059,6 +1148,11 @@ def _emit_attention_block(
     batch_size: int = 1,
     rows_per_batch: int | None = None,
     active_seq_len_per_batch: int | None = None,
+    kv_cache_inputs=None,
+    kv_cache_lens: list[int] | None = None,
+    fuse_qkv_rope: bool = False,
+    fuse_rms_norm: bool = False,
+    sliding_window: int | None = None,
 ):
     active_seq_len = active_seq_len or seq_len
     active_hidden = active_hidden or current.shape[1]
@@ -1075,7 +1169,8 @@ def _emit_attention_block(
             semantic="decoder layer input before attention RMS norm",
         )
 
-    _save_residual_and_norm(prog, current, scratch)
+    # With fuse_rms_norm, current stays unnormalized and Q/K/V scale their rows.
+    rms_scale = _save_residual_and_norm(prog, current, scratch, fuse_norm=fuse_rms_norm)
     if checkpoint_recorder is not None:
         checkpoint_recorder.record(
             prog,
@@ -1086,13 +1181,35 @@ def _emit_attention_block(
             semantic="attention RMS-normalized input",
         )
 
-    Q = _linear_projection(
-        prog,
-        current,
-        layer_inputs.w_q,
-        f"Q_{layer_idx}",
-        physical_shape=(total_physical_rows, total_q_dim) if batch_size > 1 else None,
-    )
+    rope_matrix, cos_var, sin_var = rope_inputs
+    if fuse_qkv_rope:
+        # One pass over [Wq | Wk | Wv]: Q comes back rotated, K/V already in HBM.
+        Q, kv_stored = prog.fused_qkv_rope_projection(
+            current,
+            layer_inputs.w_q,
+            layer_inputs.w_k_heads,
+            layer_inputs.w_v_heads,
+            rope_matrix,
+            cos_var,
+            sin_var,
+            num_heads=num_heads,
+            head_dim=head_dim,
+            q_name=f"Q_{layer_idx}",
+            kv_store_names=[
+                (f"K_stored_{layer_idx}_h{kv_h}", f"V_stored_{layer_idx}_h{kv_h}") for kv_h in range(num_kv_heads)
+            ],
+            physical_rows=total_physical_rows if batch_size > 1 else None,
+            row_scale=rms_scale,
+        )
+    else:
+        Q = _linear_projection(
+            prog,
+            current,
+            layer_inputs.w_q,
+            f"Q_{layer_idx}",
+            physical_shape=(total_physical_rows, total_q_dim) if batch_size > 1 else None,
+            row_scale=rms_scale,
+        )
     q_full_addr = prog.get_vram_addr(Q.name)
     if checkpoint_recorder is not None:
         checkpoint_recorder.record(
@@ -1121,20 +1238,25 @@ def _emit_attention_block(
     physical_rows = O_full.physical_shape[0]
     head_stride = physical_rows * head_dim
 
-    kv_stored = _emit_kv_stores(
-        prog,
-        current,
-        layer_inputs,
-        rope_inputs,
-        layer_idx,
-        num_kv_heads,
-        physical_rows=total_physical_rows if batch_size > 1 else None,
-        checkpoint_recorder=checkpoint_recorder,
-        active_seq_len=active_seq_len,
-        active_head_dim=head_dim,
-    )
+    if not fuse_qkv_rope:
+        kv_stored = _emit_kv_stores(
+            prog,
+            current,
+            layer_inputs,
+            rope_inputs,
+            layer_idx,
+            num_kv_heads,
+            physical_rows=total_physical_rows if batch_size > 1 else None,
+            checkpoint_recorder=checkpoint_recorder,
+            active_seq_len=active_seq_len,
+            active_head_dim=head_dim,
+            row_scale=rms_scale,
+        )
+    if rms_scale is not None:
+        prog.free_fp_var(rms_scale)
+    # The residual is in scratch and Q/K/V are formed, so the layer input is dead.
+    prog.free_tensor(current)
 
-    rope_matrix, cos_var, sin_var = rope_inputs
     q_h_phys = (total_physical_rows, head_dim) if batch_size > 1 else None
     for h in range(num_heads):
         kv_h = h // ratio
@@ -1148,28 +1270,44 @@ def _emit_attention_block(
             q_h_addr,
             physical_shape=q_h_phys,
         )
-        _apply_rope_projection(
-            prog,
-            Q_h,
-            rope_matrix,
-            cos_var,
-            sin_var,
-            f"Q_rot_{layer_idx}_h{h}",
-        )
+        if not fuse_qkv_rope:
+            _apply_rope_projection(
+                prog,
+                Q_h,
+                rope_matrix,
+                cos_var,
+                sin_var,
+                f"Q_rot_{layer_idx}_h{h}",
+            )
 
-        # Delegate the per-batch loop to the kernel (proven for head_dim <= mlen;
-        # the kernel's own guard blocks head_dim > mlen until the kernel fix lands).
-        O_h = ops.flash_attention(
-            prog,
-            Q_h,
-            K_stored,
-            V_stored,
-            scale,
-            causal_mask=causal_mask,
-            batch_size=batch_size,
-            seq_len=active_seq_len_per_batch,
-            kv_seq_len=active_seq_len_per_batch,
-        )
+        if kv_cache_lens is not None:
+            # Ragged decode: row b is sequence b's new token; K/V_stored hold
+            # the new keys of all sequences and K/V_cache their packed caches.
+            K_cache, V_cache = kv_cache_inputs[kv_h]
+            O_h = prog.flash_attention_ragged_decode(
+                Q_h,
+                K_cache,
+                V_cache,
+                K_stored,
+                V_stored,
+                scale,
+                kv_cache_lens=kv_cache_lens,
+            )
+        else:
+            # Delegate the per-batch loop to the kernel (proven for head_dim <= mlen;
+            # the kernel's own guard blocks head_dim > mlen until the kernel fix lands).
+            O_h = ops.flash_attention(
+                prog,
+                Q_h,
+                K_stored,
+                V_stored,
+                scale,
+                causal_mask=causal_mask,
+                batch_size=batch_size,
+                seq_len=active_seq_len_per_batch,
+                kv_seq_len=active_seq_len_per_batch,
+                sliding_window=sliding_window,
+            )
 
         if batch_size == 1:
             o_h_dest_addr = o_full_addr + h * head_stride
@@ -1228,6 +1366,7 @@ def _emit_attention_block(
             active_shape=(active_seq_len, active_hidden),
             semantic="attention output projection before residual add",
         )
+    _free_with_views(prog, Q, O_full)
     out = _add_residual(prog, O_proj, scratch)
     if checkpoint_recorder is not None:
         checkpoint_recorder.record(
@@ -1363,6 +1502,8 @@ def _emit_vision_attention_block(
     padded_total_q_dim: int,
     scale: float,
     stop_after: str | None = None,
+    kv_store_addrs: dict[tuple[str, int], int] | None = None,
+    batch_size: int = 1,
 ):
     prog.vram_fill_zero(scratch)
     prog.vram_add(scratch, current)
@@ -1418,8 +1559,16 @@ def _emit_vision_attention_block(
         )
         _load_and_add(prog, V_h, layer_inputs.b_v_heads[h], f"V_B_v_{layer_idx}_h{h}_load")
 
-        K_stored = prog.store(K_h, name=f"V_K_stored_{layer_idx}_h{h}")
-        V_stored = prog.store(V_h, name=f"V_V_stored_{layer_idx}_h{h}")
+        if kv_store_addrs is None:
+            K_stored = prog.store(K_h, name=f"V_K_stored_{layer_idx}_h{h}")
+            V_stored = prog.store(V_h, name=f"V_V_stored_{layer_idx}_h{h}")
+        else:
+            # Rolled layers share one K/V staging area so every layer body
+            # addresses the same HBM.
+            K_stored = prog.store(K_h, name=f"V_K_stored_{layer_idx}_h{h}", hbm_addr=kv_store_addrs.get(("K", h)))
+            V_stored = prog.store(V_h, name=f"V_V_stored_{layer_idx}_h{h}", hbm_addr=kv_store_addrs.get(("V", h)))
+            kv_store_addrs[("K", h)] = K_stored.hbm_addr
+            kv_store_addrs[("V", h)] = V_stored.hbm_addr
         O_h = ops.flash_attention(
             prog,
             Q_h,
@@ -1427,20 +1576,43 @@ def _emit_vision_attention_block(
             V_stored,
             scale,
             causal_mask=None,
-            batch_size=1,
+            batch_size=batch_size,
             seq_len=seq_len,
             kv_seq_len=seq_len,
         )
 
-        _copy_into_vram_view(
-            prog,
-            O_h,
-            f"V_O_dest_{layer_idx}_h{h}",
-            seq_len,
-            padded_head_dim,
-            o_full_addr + h * o_head_stride,
-            physical_shape=(O_full.physical_shape[0], padded_head_dim),
-        )
+        if batch_size == 1:
+            _copy_into_vram_view(
+                prog,
+                O_h,
+                f"V_O_dest_{layer_idx}_h{h}",
+                seq_len,
+                padded_head_dim,
+                o_full_addr + h * o_head_stride,
+                physical_shape=(O_full.physical_shape[0], padded_head_dim),
+            )
+        else:
+            # Attention stays per image (the kernel loops over the image slabs),
+            # but packs its output at seq_len stride; move each image back to its
+            # rows_per_batch slab of the already zero-filled O_full.
+            o_h_addr = prog.get_vram_addr(O_h.name)
+            o_full_batch_stride = O_full.physical_shape[0] // batch_size * prog.mlen
+            for b in range(batch_size):
+                O_hb = prog.alloc_at(
+                    f"V_O_src_{layer_idx}_h{h}_b{b}",
+                    seq_len,
+                    padded_head_dim,
+                    o_h_addr + b * seq_len * prog.mlen,
+                    physical_shape=O_h.physical_shape,
+                )
+                O_dst = prog.alloc_at(
+                    f"V_O_dest_{layer_idx}_h{h}_b{b}",
+                    seq_len,
+                    padded_head_dim,
+                    o_full_addr + h * o_head_stride + b * o_full_batch_stride,
+                    physical_shape=(O_full.physical_shape[0], padded_head_dim),
+                )
+                prog.vram_add(O_dst, O_hb)
         _free_named_tensors(prog, ("O", "S", "PV"))
         for tensor in (Q_h, K_h, V_h):
             prog.free_tensor(tensor)
@@ -1504,32 +1676,237 @@ def _emit_vision_mlp_block(
     return out, f"layer{layer_idx}_mlp_residual"
 
 
-def _add_vram_row_chunk(
+_ABSOLUTE_ADDI_RE = re.compile(r"^S_ADDI_INT gp(\d+), gp0, (\d+)$")
+_LUI_RE = re.compile(r"^S_LUI_INT gp(\d+), (\d+)$")
+
+
+def _fold_large_int_loads(lines: list[str]) -> list[str]:
+    """Rewrite ``load_large_int`` pairs as one absolute ``S_ADDI_INT`` from gp0.
+
+    Emitters already legalise HBM addresses past the 18-bit immediate, so the
+    same load can be one or two lines depending on the layer. Folding them back
+    lets bodies be compared line by line; ``_fix_large_immediates`` re-expands
+    whatever is still too large.
+    """
+    folded = []
+    i = 0
+    while i < len(lines):
+        match = _LUI_RE.match(lines[i].split(";")[0].strip())
+        if match is None:
+            folded.append(lines[i])
+            i += 1
+            continue
+        reg, value = match.group(1), int(match.group(2)) << 12
+        i += 1
+        if i < len(lines):
+            low = re.match(rf"^S_ADDI_INT gp{reg}, gp{reg}, (\d+)$", lines[i].split(";")[0].strip())
+            if low is not None:
+                value += int(low.group(1))
+                i += 1
+        folded.append(f"S_ADDI_INT gp{reg}, gp0, {value}")
+    return folded
+
+
+def _vision_layer_weight_stride(layer_inputs: list[VisionLayerInputVars]) -> int | None:
+    """Return the HBM stride between consecutive layers' inputs, or None if not uniform."""
+    layouts = []
+    for li in layer_inputs:
+        input_vars = []
+        for field in fields(li):
+            value = getattr(li, field.name)
+            input_vars.extend(value if isinstance(value, list) else [value])
+        base = min(var.hbm_addr for var in input_vars)
+        layouts.append(
+            (base, [(var.hbm_addr - base, var.hbm_size, var.physical_shape) for var in input_vars])
+        )
+    stride = layouts[1][0] - layouts[0][0]
+    if stride <= 0:
+        return None
+    for i, (base, layout) in enumerate(layouts):
+        if base != layouts[0][0] + i * stride or layout != layouts[0][1]:
+            return None
+    return stride
+
+
+def _roll_vision_layer_body(
+    body0: str,
+    body1: str,
+    *,
+    stride: int,
+    gp_offset: int,
+    gp_loop: int,
+    n_layers: int,
+    first_layer: int = 0,
+) -> str | None:
+    """Fold two consecutive layer bodies into one body under a hardware loop.
+
+    The bodies may only differ in absolute ``S_ADDI_INT gpX, gp0, addr`` loads
+    (large ones folded by ``_fold_large_int_loads``) whose addresses move by
+    exactly ``stride``; those become loads relative to
+    ``gp_offset``, which the loop advances by ``stride`` per layer. The loop
+    runs ``n_layers`` times starting at layer ``first_layer``. Returns None
+    when the bodies differ in any other way.
+    """
+    lines0 = _fold_large_int_loads(body0.splitlines())
+    lines1 = _fold_large_int_loads(body1.splitlines())
+    if len(lines0) != len(lines1):
+        return None
+    if re.search(rf"\bgp({gp_offset}|{gp_loop})\b", body0):
+        return None
+
+    rolled = [
+        f"; === VISION LAYERS {first_layer}..{first_layer + n_layers - 1} ROLLED: weight stride {stride} ===",
+        f"S_ADDI_INT gp{gp_offset}, gp0, 0",
+        f"C_LOOP_START gp{gp_loop}, {n_layers}",
+    ]
+    for line0, line1 in zip(lines0, lines1):
+        code0 = line0.split(";")[0].strip()
+        code1 = line1.split(";")[0].strip()
+        if code0 == code1:
+            rolled.append(line0)
+            continue
+        match0 = _ABSOLUTE_ADDI_RE.match(code0)
+        match1 = _ABSOLUTE_ADDI_RE.match(code1)
+        if (
+            match0 is None
+            or match1 is None
+            or match0.group(1) != match1.group(1)
+            or int(match1.group(2)) - int(match0.group(2)) != stride
+        ):
+            return None
+        rolled.append(f"S_ADDI_INT gp{match0.group(1)}, gp{gp_offset}, {match0.group(2)}")
+    rolled.extend(
+        [
+            f"S_ADDI_INT gp{gp_offset}, gp{gp_offset}, {stride}",
+            f"C_LOOP_END gp{gp_loop}",
+        ]
+    )
+    return "\n".join(rolled) + "\n"
+
+
+def _emit_vision_layer_body(
     prog,
+    current,
+    layer_inputs: VisionLayerInputVars,
+    scratch,
     *,
-    source,
-    target,
-    source_addr: int,
-    target_addr: int,
-    name: str,
+    layer_idx: int,
+    kv_store_addrs: dict[tuple[str, int], int],
+    **attention_kwargs,
 ):
-    src_view = prog.alloc_at(
-        f"{name}_src",
-        1,
-        prog.mlen,
-        source_addr,
-        physical_shape=(source.physical_shape[0], prog.mlen),
+    """Emit one encoder layer that writes its output back into ``current``.
+
+    Unlike the staged path, every temporary is freed and MRAM is reset up front,
+    so each layer starts from the same VRAM/MRAM state and emits the same ISA
+    apart from its weight HBM addresses.
+    """
+    prog.reset_mram()
+    attn_out, _ = _emit_vision_attention_block(
+        prog,
+        current,
+        layer_inputs,
+        scratch,
+        layer_idx=layer_idx,
+        kv_store_addrs=kv_store_addrs,
+        **attention_kwargs,
     )
-    dst_view = prog.alloc_at(
-        f"{name}_dst",
-        1,
-        prog.mlen,
-        target_addr,
-        physical_shape=(target.physical_shape[0], prog.mlen),
+    mlp_out, _ = _emit_vision_mlp_block(prog, attn_out, layer_inputs, scratch, layer_idx=layer_idx)
+    rows, cols = current.physical_shape
+    prog.vram_row_copy_asm(
+        prog.get_vram_addr(current.name),
+        prog.get_vram_addr(mlp_out.name),
+        [(rows * cols // prog.mlen, prog.mlen, prog.mlen)],
     )
-    prog.vram_add(dst_view, src_view, num_rows=1)
-    prog.free_tensor(src_view)
-    prog.free_tensor(dst_view)
+    _free_named_tensors(prog, (f"V_O_full_{layer_idx}",))
+    prog.free_tensor(mlp_out)
+    prog.free_tensor(attn_out)
+
+
+def _emit_vision_layers_rolled(
+    prog,
+    current,
+    layer_inputs: list[VisionLayerInputVars],
+    scratch,
+    **attention_kwargs,
+) -> bool:
+    """Emit every vision layer into ``current``, as one looped body when possible.
+
+    Layers 0 and 1 are emitted speculatively and folded by
+    ``_roll_vision_layer_body``. Layer 0 can start from a different VRAM free
+    list than the layers after it (best-fit reuse of whatever the patch stage
+    left behind); if it does not fold, it stays unrolled and layers 1 and 2 are
+    folded instead. If the weights are not laid out at a uniform HBM stride or
+    no pair of bodies folds, the speculative bodies are kept as they are and the
+    remaining layers are emitted unrolled. Returns whether the layers were rolled.
+    """
+    n_layers = len(layer_inputs)
+    stride = _vision_layer_weight_stride(layer_inputs)
+    kv_store_addrs: dict[tuple[str, int], int] = {}
+    # Reserved for the whole region so the fallback bodies allocate the same
+    # registers as the speculative ones.
+    gp_offset, gp_loop = prog.register_allocator.allocate_gp(2)
+
+    def emit_body(i):
+        _emit_vision_layer_body(
+            prog,
+            current,
+            layer_inputs[i],
+            scratch,
+            layer_idx=i,
+            kv_store_addrs=kv_store_addrs,
+            **attention_kwargs,
+        )
+
+    try:
+        bodies = []
+        vram_marks = []
+        traffic = [(prog.hbm_prefetch_bytes, prog.mram_reused_bytes)]
+        for first in range(min(2, n_layers - 1)):
+            while len(bodies) < first + 2:
+                mark = prog.code_mark()
+                emit_body(len(bodies))
+                bodies.append(prog.take_code_since(mark))
+                # The VRAM high-water mark has to stay put for the bodies to match.
+                vram_marks.append(prog.vram_allocator.peak)
+                traffic.append((prog.hbm_prefetch_bytes, prog.mram_reused_bytes))
+            if stride is None or vram_marks[first] != vram_marks[first + 1]:
+                continue
+            rolled = _roll_vision_layer_body(
+                bodies[first],
+                bodies[first + 1],
+                stride=stride,
+                gp_offset=gp_offset,
+                gp_loop=gp_loop,
+                n_layers=n_layers - first,
+                first_layer=first,
+            )
+            if rolled is None:
+                continue
+            for i in range(first):
+                prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} START ===")
+                prog.emit(bodies[i])
+                prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} COMPLETE ===")
+            prog.emit(rolled)
+            # Traffic counters are static; scale the two folded layers to all rolled ones.
+            rolled_layers = n_layers - first
+            prog.hbm_prefetch_bytes = (
+                traffic[first][0] + rolled_layers * (traffic[first + 2][0] - traffic[first][0]) // 2
+            )
+            prog.mram_reused_bytes = (
+                traffic[first][1] + rolled_layers * (traffic[first + 2][1] - traffic[first][1]) // 2
+            )
+            return True
+
+        for i in range(n_layers):
+            prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} START ===")
+            if i < len(bodies):
+                prog.emit(bodies[i])
+            else:
+                emit_body(i)
+            prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} COMPLETE ===")
+    finally:
+        prog.register_allocator.free_gp([gp_offset, gp_loop])
+    return False
 
 
 def _emit_vision_pixel_shuffle(
@@ -1542,6 +1919,7 @@ def _emit_vision_pixel_shuffle(
     scale_factor: int,
     connector_rows: int,
     connector_storage_dim: int,
+    batch_size: int = 1,
 ):
     del hidden
     grid = int(math.isqrt(seq_len))
@@ -1554,52 +1932,24 @@ def _emit_vision_pixel_shuffle(
     if padded_hidden % prog.mlen != 0:
         raise ValueError(f"padded_hidden={padded_hidden} must be a multiple of MLEN={prog.mlen}")
 
-    out_grid = grid // scale_factor
     connector_seq_len = seq_len // (scale_factor ** 2)
+    total_rows = batch_size * connector_rows
     shuffled = prog.alloc(
         "V_CONNECTOR_SHUFFLED",
-        connector_seq_len,
+        connector_seq_len if batch_size == 1 else total_rows,
         connector_storage_dim,
         strict=False,
-        physical_shape=(connector_rows, connector_storage_dim),
-    )
-    prog.vram_fill_zero(shuffled)
-
-    source_base = prog.get_vram_addr(current.name)
-    target_base = prog.get_vram_addr(shuffled.name)
-    hidden_blocks = padded_hidden // prog.mlen
-
-    for out_y in range(out_grid):
-        for out_x in range(out_grid):
-            target_row = out_y * out_grid + out_x
-            for dy in range(scale_factor):
-                for dx in range(scale_factor):
-                    source_row = (out_y * scale_factor + dy) * grid + (out_x * scale_factor + dx)
-                    segment_idx = dy * scale_factor + dx
-                    for col_block in range(hidden_blocks):
-                        source_addr = (
-                            source_base
-                            + col_block * current.physical_shape[0] * prog.mlen
-                            + source_row * prog.mlen
-                        )
-                        target_col_block = segment_idx * hidden_blocks + col_block
-                        target_addr = (
-                            target_base
-                            + target_col_block * shuffled.physical_shape[0] * prog.mlen
-                            + target_row * prog.mlen
-                        )
-                        _add_vram_row_chunk(
-                            prog,
-                            source=current,
-                            target=shuffled,
-                            source_addr=source_addr,
-                            target_addr=target_addr,
-                            name=(
-                                f"V_connector_shuffle_o{target_row}_"
-                                f"s{segment_idx}_c{col_block}"
-                            ),
-                        )
-
+        physical_shape=(total_rows, connector_storage_dim),
+    )
+    if connector_storage_dim != padded_hidden * scale_factor ** 2:
+        prog.vram_fill_zero(shuffled)
+    prog.vram_pixel_shuffle(
+        current,
+        shuffled,
+        seq_len=seq_len,
+        scale_factor=scale_factor,
+        batch_size=batch_size,
+    )
     return shuffled
 
 
@@ -1615,6 +1965,7 @@ def _emit_vision_connector(
     connector_rows: int,
     connector_storage_dim: int,
     padded_output_dim: int,
+    batch_size: int = 1,
 ):
     shuffled = _emit_vision_pixel_shuffle(
         prog,
@@ -1625,13 +1976,14 @@ def _emit_vision_connector(
         scale_factor=scale_factor,
         connector_rows=connector_rows,
         connector_storage_dim=connector_storage_dim,
+        batch_size=batch_size,
     )
     projected = _linear_projection(
         prog,
         shuffled,
         connector_inputs.weight,
         "V_CONNECTOR_OUT",
-        physical_shape=(connector_rows, padded_output_dim),
+        physical_shape=(batch_size * connector_rows, padded_output_dim),
     )
     if connector_inputs.bias is not None:
         _load_and_add(prog, projected, connector_inputs.bias, "V_CONNECTOR_B_load")
@@ -2014,7 +2366,27 @@ def _run_vision_reference_trace(
     gelu_mode: str,
     padded_head_dim: int | None = None,
 ) -> dict[str, torch.Tensor]:
-    """Return hardware-shaped vision reference values at compiler stop points."""
+    """Return hardware-shaped vision reference values at compiler stop points.
+
+    A batch of images is traced one image at a time and each stage is returned
+    as the images' rows stacked back to back.
+    """
+    if pixel_values.shape[0] > 1:
+        traces = [
+            _run_vision_reference_trace(
+                pixel_values[b:b + 1],
+                position_embeddings,
+                patch_weights,
+                all_weights,
+                post_norm,
+                config,
+                precision=precision,
+                gelu_mode=gelu_mode,
+                padded_head_dim=padded_head_dim,
+            )
+            for b in range(pixel_values.shape[0])
+        ]
+        return {stage: torch.cat([t[stage] for t in traces], dim=0) for stage in traces[0]}
     trace: dict[str, torch.Tensor] = {}
     patch_w = precision.quantize(patch_weights.weight_2d)
     patch_bias_pos = precision.quantize(position_embeddings + patch_weights.bias.detach().float().view(1, -1))
@@ -2149,6 +2521,41 @@ def _weight_physical_shapes_for_layer(
     return physical_shapes
 
 
+def _merge_constant_pool(prog, input_tensors: dict[str, torch.Tensor], data_order: list[str]) -> None:
+    """Add pooled HBM constants to the input image in HBM address order.
+
+    The sim stager writes ``data_order`` back to back, so each constant is
+    inserted before the first input that lives above it in HBM. A constant
+    registered after ``store()`` (or a spill) reserved HBM scratch sits above
+    that scratch, where the stager cannot place it.
+    """
+    constants = prog.constant_pool_tensors()
+    scratch_floor = min(
+        (
+            layout.hbm_base_addr
+            for name, layout in prog.hbm_matrices.items()
+            if name not in input_tensors and name not in constants
+        ),
+        default=None,
+    )
+    for name, tensor in constants.items():
+        if name in input_tensors:
+            continue
+        hbm_addr = prog._inputs[name].hbm_addr
+        assert scratch_floor is None or hbm_addr < scratch_floor, (
+            f"constant {name!r} at HBM {hbm_addr} was registered after HBM scratch at {scratch_floor}; "
+            "reserve it before the first store() (see reserve_attention_constants)"
+        )
+        pos = len(data_order)
+        for i, other in enumerate(data_order):
+            other_input = prog._inputs.get(other)
+            if other_input is not None and other_input.hbm_addr > hbm_addr:
+                pos = i
+                break
+        input_tensors[name] = tensor
+        data_order.insert(pos, name)
+
+
 def _tensor_layout_metadata(prog, input_tensors: dict[str, torch.Tensor]) -> dict[str, dict[str, list[int] | int]]:
     layouts = {}
     for name, tensor in input_tensors.items():
@@ -2191,18 +2598,41 @@ def compile_native_hf_vision_encoder(
     reference_backend: str = "scheduled",
     include_connector: bool = True,
     stop_after: str | None = None,
+    roll_layers: bool | None = None,
     verbose: bool = False,
+    vram_plan: VRAMPlan | None = None,
+    conv_implicit_gemm: bool = False,
     **_unused,
 ) -> dict:
-    """Compile a HuggingFace SigLIP/ViT vision encoder to PLENA ISA metadata."""
+    """Compile a HuggingFace SigLIP/ViT vision encoder to PLENA ISA metadata.
+
+    ``roll_layers`` (default on, ``PLENA_ROLL_VISION_LAYERS=0`` disables it)
+    emits the encoder layers as one body inside a hardware loop that advances
+    the weight HBM base by the per-layer stride, so the ISA size no longer
+    grows with depth. It applies when the output stage is past the encoder
+    layers; layers whose weights do not share one layout fall back to the
+    unrolled body. ``info["vision_layers_rolled"]`` reports which path ran.
+
+    ``batch_size > 1`` encodes that many images together: each image's patch
+    rows sit in their own MLEN-aligned row slab of one shared sequence, so the
+    projections and the MLP stream every weight tile once for all images.
+    Attention and the connector pixel shuffle stay per image.
+
+    ``conv_implicit_gemm`` lowers the patch embedding with
+    ``conv2d_plena(implicit_gemm=True)``: ``V_PATCH_W`` is staged in the
+    per-term layout of ``conv2d_implicit_gemm_weight`` and each ``V_PIXELS``
+    image gets trailing zero rows for the window over-read.
+    """
     del reference_backend
+    if roll_layers is None:
+        roll_layers = os.environ.get("PLENA_ROLL_VISION_LAYERS", "1") != "0"
 
     def _verbose(message: str = ""):
         if verbose:
             print(message)
 
-    if batch_size != 1:
-        raise NotImplementedError("native vision compile currently supports batch_size=1")
+    if batch_size <= 0:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
     if seq_len <= 0:
         raise ValueError(f"seq_len must be positive, got {seq_len}")
 
@@ -2236,8 +2666,14 @@ def compile_native_hf_vision_encoder(
     head_dim = model_cfg.head_dim
     num_heads = model_cfg.num_heads
     padded_seq_len = _ceil_to_multiple(seq_len, blen)
-    rows_per_batch = max(mlen, padded_seq_len)
-    compile_seq_rows = rows_per_batch
+    # Flash attention walks the images in whole MLEN row blocks, so stacked
+    # images each get an MLEN-aligned slab.
+    rows_per_batch = (
+        max(mlen, padded_seq_len)
+        if batch_size == 1
+        else _ceil_to_multiple(max(mlen, padded_seq_len), mlen)
+    )
+    compile_seq_rows = batch_size * rows_per_batch
     padded_hidden = _ceil_to_multiple(hidden, mlen)
     padded_inter = _ceil_to_multiple(inter, mlen)
     padded_head_dim = _ceil_to_multiple(head_dim, mlen)
@@ -2258,7 +2694,11 @@ def compile_native_hf_vision_encoder(
             )
         connector_seq_len = seq_len // (connector_scale ** 2)
         connector_padded_seq_len = _ceil_to_multiple(connector_seq_len, blen)
-        connector_rows = max(mlen, connector_padded_seq_len)
+        connector_rows = (
+            max(mlen, connector_padded_seq_len)
+            if batch_size == 1
+            else _ceil_to_multiple(max(mlen, connector_padded_seq_len), mlen)
+        )
         connector_storage_dim = padded_hidden * (connector_scale ** 2)
         connector_output_dim = connector_weights.output_dim
         padded_connector_output_dim = _ceil_to_multiple(connector_output_dim, mlen)
@@ -2337,7 +2777,11 @@ def compile_native_hf_vision_encoder(
 
     torch.manual_seed(seed)
     pixel_values = torch.randn(batch_size, model_cfg.num_channels, image_h, image_w)
-    raw_pixels = _pixel_values_to_raw_storage(pixel_values, w_padded=w_padded)
+    raw_pixels = [
+        _pixel_values_to_raw_storage(pixel_values[b:b + 1], w_padded=w_padded)
+        for b in range(batch_size)
+    ]
+    pixel_input_names = ["V_PIXELS"] + [f"V_PIXELS_{b}" for b in range(1, batch_size)]
     position_ids = _vision_position_ids(
         vision_model,
         batch_size=batch_size,
@@ -2390,6 +2834,10 @@ def compile_native_hf_vision_encoder(
             f"Unsupported vision stop_after={stop_after!r}; valid stages are: "
             f"{', '.join(sorted(valid_stages))}"
         )
+    if batch_size > 1 and output_stage == "patch_im2col":
+        raise NotImplementedError("vision stop_after='patch_im2col' supports batch_size=1 only")
+    if conv_implicit_gemm and output_stage == "patch_im2col":
+        raise NotImplementedError("vision stop_after='patch_im2col' has no im2col matrix with conv_implicit_gemm")
 
     encoder_golden_out = encoder_trace["post_ln"]
     encoder_hf_ground_truth = encoder_hf_trace["post_ln"]
@@ -2415,28 +2863,28 @@ def compile_native_hf_vision_encoder(
             output_padded_hidden = padded_hidden
     elif output_stage == "connector_shuffle":
         golden_out = _vision_pixel_shuffle_ref(
-            encoder_golden_out,
+            encoder_golden_out.reshape(batch_size, seq_len, -1),
             connector_weights.scale_factor,
-        )
+        ).flatten(0, 1)
         hf_ground_truth = _vision_pixel_shuffle_ref(
-            encoder_hf_ground_truth,
+            encoder_hf_ground_truth.reshape(batch_size, seq_len, -1),
             connector_weights.scale_factor,
-        )
+        ).flatten(0, 1)
         output_seq_len = connector_seq_len
         output_rows = connector_rows
         output_hidden = connector_weights.input_dim
         output_padded_hidden = connector_storage_dim
     elif output_stage == "connector":
         golden_out = _run_vision_connector_reference(
-            encoder_golden_out,
+            encoder_golden_out.reshape(batch_size, seq_len, -1),
             connector_weights,
             precision=golden_policy,
-        )
+        ).flatten(0, 1)
         hf_ground_truth = _run_vision_connector_reference(
-            encoder_hf_ground_truth,
+            encoder_hf_ground_truth.reshape(batch_size, seq_len, -1),
             connector_weights,
             precision=ReferencePrecision.from_mode("hf_fp32"),
-        )
+        ).flatten(0, 1)
         output_seq_len = connector_seq_len
         output_rows = connector_rows
         output_hidden = connector_output_dim
@@ -2444,7 +2892,7 @@ def compile_native_hf_vision_encoder(
     else:
         raise AssertionError(f"Unhandled vision output stage {output_stage!r}")
     padded_golden_output = _pad_batched_sequence_storage(
-        golden_out,
+        golden_out.reshape(batch_size, output_seq_len, -1),
         batch_size=batch_size,
         seq_len=output_seq_len,
         rows_per_batch=output_rows,
@@ -2462,14 +2910,33 @@ def compile_native_hf_vision_encoder(
         blen=blen,
         real_data_ratio=REAL_DATA_RATIO,
         mram_tile_capacity=mram_tile_capacity,
+        vram_plan=vram_plan,
     )
+    prog.reserve_fixed_fpram()
+
+    patch_w_storage = patch_weights.weight_2d
+    patch_w_rows, patch_w_physical_rows = k_col, padded_k_col
+    if conv_implicit_gemm:
+        patch = model_cfg.patch_size
+        patch_w_storage = conv2d_implicit_gemm_weight(
+            patch_weights.weight_2d, C_in=model_cfg.num_channels, K=patch, mlen=mlen
+        )
+        patch_w_rows = patch_w_physical_rows = patch_w_storage.shape[0]
+        extent = prog.conv2d_implicit_gemm_extent(
+            model_cfg.num_channels, image_h, patch, patches_h, patches_w, w_padded, patch
+        )
+        extent_rows = math.ceil(extent / w_padded)
+        raw_pixels = [F.pad(raw, (0, 0, 0, max(0, extent_rows - raw.shape[0]))) for raw in raw_pixels]
 
     sequence_physical_shape = (compile_seq_rows, padded_hidden)
-    input_raw_var = prog.input("V_PIXELS", shape=tuple(raw_pixels.shape))
+    input_raw_vars = [
+        prog.input(name, shape=tuple(raw.shape))
+        for name, raw in zip(pixel_input_names, raw_pixels)
+    ]
     patch_w_var = prog.input(
         "V_PATCH_W",
-        shape=(k_col, hidden),
-        physical_shape=(padded_k_col, padded_hidden),
+        shape=(patch_w_rows, hidden),
+        physical_shape=(patch_w_physical_rows, padded_hidden),
     )
     patch_bias_pos_var = prog.input(
         "V_PATCH_BIAS_POS",
@@ -2500,28 +2967,33 @@ def compile_native_hf_vision_encoder(
             connector_weights,
             storage_input_dim=connector_storage_dim,
             padded_output_dim=padded_connector_output_dim,
-            connector_rows=connector_rows,
+            connector_rows=batch_size * connector_rows,
             has_bias=compile_connector_bias is not None,
         )
+    # Padded-column masks must sit in the input image, ahead of K/V store scratch.
+    prog.reserve_attention_constants(kv_seq_len=seq_len)
+
+    def emit_patch_conv(input_raw_var):
+        return ops.conv2d(
+            prog,
+            input_raw_var,
+            patch_w_var,
+            C_in=model_cfg.num_channels,
+            H=image_h,
+            W=image_w,
+            K=model_cfg.patch_size,
+            OH=patches_h,
+            OW=patches_w,
+            M=seq_len,
+            W_padded=w_padded,
+            fp_one_reg=5,
+            stride=model_cfg.patch_size,
+            return_im2col=output_stage == "patch_im2col",
+            implicit_gemm=conv_implicit_gemm,
+        )
 
-    conv_out = ops.conv2d(
-        prog,
-        input_raw_var,
-        patch_w_var,
-        C_in=model_cfg.num_channels,
-        H=image_h,
-        W=image_w,
-        K=model_cfg.patch_size,
-        OH=patches_h,
-        OW=patches_w,
-        M=seq_len,
-        W_padded=w_padded,
-        fp_one_reg=5,
-        stride=model_cfg.patch_size,
-        return_im2col=output_stage == "patch_im2col",
-    )
     if output_stage == "patch_im2col":
-        current = conv_out
+        current = emit_patch_conv(input_raw_vars[0])
         emitted_stage = "patch_im2col"
     else:
         current = prog.alloc(
@@ -2532,14 +3004,19 @@ def compile_native_hf_vision_encoder(
             physical_shape=sequence_physical_shape,
         )
         prog.vram_fill_zero(current)
-        prog.vram_add(current, conv_out, num_rows=seq_len)
-        prog.free_tensor(conv_out)
+        # The patch conv reads one image at a time; its output lands in that
+        # image's row slab.
+        for b, input_raw_var in enumerate(input_raw_vars):
+            conv_out = emit_patch_conv(input_raw_var)
+            prog.vram_add(current, conv_out, dst_row_offset=b * rows_per_batch, num_rows=seq_len)
+            prog.free_tensor(conv_out)
         emitted_stage = "patch"
 
     if output_stage not in {"patch_im2col", "patch"}:
         _load_and_add(prog, current, patch_bias_pos_var, "V_PATCH_BIAS_POS_load")
         emitted_stage = "patch_bias"
 
+    layers_rolled = False
     if output_stage not in {"patch_im2col", "patch", "patch_bias"}:
         scratch = prog.alloc(
             "vision_residual_scratch",
@@ -2549,36 +3026,53 @@ def compile_native_hf_vision_encoder(
             physical_shape=sequence_physical_shape,
         )
 
-        for i, li in enumerate(layer_inputs):
-            prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} START ===")
-            current, emitted_stage = _emit_vision_attention_block(
+        if roll_layers and n_layers > 1 and not output_stage.startswith("layer"):
+            layers_rolled = _emit_vision_layers_rolled(
                 prog,
                 current,
-                li,
+                layer_inputs,
                 scratch,
-                layer_idx=i,
                 seq_len=seq_len,
                 num_heads=num_heads,
                 head_dim=head_dim,
                 padded_head_dim=padded_head_dim,
                 padded_total_q_dim=padded_total_q_dim,
                 scale=scale,
-                stop_after=output_stage,
+                batch_size=batch_size,
             )
-            if output_stage == emitted_stage:
-                break
+            emitted_stage = f"layer{n_layers - 1}_mlp_residual"
+        else:
+            for i, li in enumerate(layer_inputs):
+                prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} START ===")
+                current, emitted_stage = _emit_vision_attention_block(
+                    prog,
+                    current,
+                    li,
+                    scratch,
+                    layer_idx=i,
+                    seq_len=seq_len,
+                    num_heads=num_heads,
+                    head_dim=head_dim,
+                    padded_head_dim=padded_head_dim,
+                    padded_total_q_dim=padded_total_q_dim,
+                    scale=scale,
+                    stop_after=output_stage,
+                    batch_size=batch_size,
+                )
+                if output_stage == emitted_stage:
+                    break
 
-            current, emitted_stage = _emit_vision_mlp_block(
-                prog,
-                current,
-                li,
-                scratch,
-                layer_idx=i,
-                stop_after=output_stage,
-            )
-            prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} COMPLETE ===")
-            if output_stage == emitted_stage:
-                break
+                current, emitted_stage = _emit_vision_mlp_block(
+                    prog,
+                    current,
+                    li,
+                    scratch,
+                    layer_idx=i,
+                    stop_after=output_stage,
+                )
+                prog.emit_comment(f"=== VISION LAYER {i}/{n_layers} COMPLETE ===")
+                if output_stage == emitted_stage:
+                    break
 
         if output_stage == "post_ln" or output_stage in {"connector_shuffle", "connector"}:
             _apply_vision_layer_norm(
@@ -2600,6 +3094,7 @@ def compile_native_hf_vision_encoder(
                 scale_factor=connector_weights.scale_factor,
                 connector_rows=connector_rows,
                 connector_storage_dim=connector_storage_dim,
+                batch_size=batch_size,
             )
             emitted_stage = "connector_shuffle"
         elif output_stage == "connector":
@@ -2616,6 +3111,7 @@ def compile_native_hf_vision_encoder(
                 connector_rows=connector_rows,
                 connector_storage_dim=connector_storage_dim,
                 padded_output_dim=padded_connector_output_dim,
+                batch_size=batch_size,
             )
             emitted_stage = "connector"
 
@@ -2627,12 +3123,10 @@ def compile_native_hf_vision_encoder(
     lines = isa_code.splitlines()
     print(f"\nGenerated {len(lines)} lines of vision ISA code")
 
-    input_tensors = {
-        "V_PIXELS": raw_pixels.float(),
-        "V_PATCH_W": patch_weights.weight_2d,
-        "V_PATCH_BIAS_POS": compile_patch_bias_pos,
-    }
-    data_order = ["V_PIXELS", "V_PATCH_W", "V_PATCH_BIAS_POS"]
+    input_tensors = {name: raw.float() for name, raw in zip(pixel_input_names, raw_pixels)}
+    input_tensors["V_PATCH_W"] = patch_w_storage
+    input_tensors["V_PATCH_BIAS_POS"] = compile_patch_bias_pos
+    data_order = [*pixel_input_names, "V_PATCH_W", "V_PATCH_BIAS_POS"]
     for i, w in enumerate(compile_weights):
         for h in range(num_heads):
             start = h * padded_head_dim
@@ -2748,6 +3242,7 @@ def compile_native_hf_vision_encoder(
             )
             data_order.append("V_CONNECTOR_B")
 
+    _merge_constant_pool(prog, input_tensors, data_order)
     tensor_layouts = _tensor_layout_metadata(prog, input_tensors)
     gelu_1702_fp_address = prog._ONLINE_SOFTMAX_FPSRAM_BASE + 3 * mlen
     # slot 2 must be a large NEGATIVE FINITE, not -inf (see compile_native_hf_decoder):
@@ -2762,7 +3257,9 @@ def compile_native_hf_vision_encoder(
     fp_preload[gelu_1702_fp_address] = 1.702
 
     o_vram_addr = prog.get_vram_addr(current.name)
-    comparison_rows = output_seq_len
+    # Stacked images sit in output_rows slabs; as in the batched decoder,
+    # num_batches counts only their active rows.
+    comparison_rows = output_seq_len if batch_size == 1 else current.physical_shape[0]
     # Output is column-block-major: each batch's `output_padded_hidden` span
     # ceil(output_padded_hidden/mlen) column blocks, and consecutive col-blocks of a batch
     # are `physical_rows` rows apart (NOT comparison_rows). With tile-align padding
@@ -2774,11 +3271,13 @@ def compile_native_hf_vision_encoder(
     comparison_params = {
         "start_row_idx": o_vram_addr // mlen,
         "num_rows": _num_col_blocks * _physical_rows if output_padded_hidden > mlen else comparison_rows,
-        "num_batches": comparison_rows,
+        "num_batches": batch_size * output_seq_len,
         "elements_per_batch": output_padded_hidden,
         "row_dim": mlen,
         "physical_rows": _physical_rows,
         "use_stride_mode": output_padded_hidden > mlen,
+        "rows_per_batch": output_rows if batch_size > 1 else None,
+        "active_seq_per_batch": output_seq_len if batch_size > 1 else None,
     }
 
     info = {
@@ -2796,6 +3295,7 @@ def compile_native_hf_vision_encoder(
         "output_hidden_size": output_hidden,
         "padded_output_hidden_size": output_padded_hidden,
         "compile_seq_rows": compile_seq_rows,
+        "rows_per_batch": rows_per_batch,
         "output_rows": output_rows,
         "image_h": image_h,
         "image_w": image_w,
@@ -2812,6 +3312,8 @@ def compile_native_hf_vision_encoder(
         "vision_stop_after": requested_stop,
         "golden_precision": golden_precision,
         "isa_lines": len(lines),
+        "vision_layers_rolled": layers_rolled,
+        "conv_implicit_gemm": conv_implicit_gemm,
     }
     if connector_weights is not None:
         info.update(
@@ -2880,8 +3382,40 @@ def compile_native_hf_decoder(
     component: str = "decoder",
     vision_stop_after: str | None = None,
     decoder_input_embeds: torch.Tensor | None = None,
+    kv_cache_lens: list[int] | None = None,
+    fuse_qkv_rope: bool = False,
+    fuse_rms_norm: bool = False,
+    vram_plan: VRAMPlan | None = None,
+    vram_capacity: int | None = None,
+    sliding_window: int | None = None,
 ) -> dict:
-    """Compile a HuggingFace decoder model at native dimensions to PLENA ISA metadata."""
+    """Compile a HuggingFace decoder model at native dimensions to PLENA ISA metadata.
+
+    ``kv_cache_lens`` selects ragged-batch decode: one new token per sequence,
+    all packed into a single MLEN row block (``seq_len`` becomes the number of
+    sequences), attending to per-sequence KV caches of the given lengths.
+
+    ``fuse_qkv_rope`` emits the unpacked attention projections through
+    ``fused_qkv_rope_projection`` (and the scheduled golden through its fused
+    mirror). ``info`` reports ``hbm_prefetch_bytes`` and ``vram_peak_elems``
+    either way, so the two builds can be compared directly.
+
+    ``fuse_rms_norm`` replaces the in-place attention pre-norm with a per-row
+    RMS scale in FPRAM that the Q/K/V projections apply to their output rows;
+    the scheduled golden follows the same rounding order.
+
+    ``info["layer_hbm_prefetch"]`` lists each layer's HBM prefetch bytes
+    alongside what it would read without the MRAM tile cache.
+
+    ``vram_capacity`` (elements) bounds VRAM. The RoPE tables and causal mask
+    are rematerialised from HBM and the residual scratch is spilled to HBM
+    when an allocation would overflow it; each ``layer_hbm_prefetch`` entry
+    then also reports ``vram_spill_bytes`` and ``vram_reload_bytes``.
+
+    ``sliding_window`` limits every layer's attention to keys ``(i - window, i]``
+    (GPT-OSS / Mistral local attention); key blocks behind the window are not
+    visited. The goldens and the fp32 ground truth use the same window.
+    """
     component = component.lower()
     if component in {"vision", "vision_model", "vision_encoder"}:
         return compile_native_hf_vision_encoder(
@@ -2902,6 +3436,7 @@ def compile_native_hf_decoder(
             stop_after=vision_stop_after,
             stage_checkpoints=stage_checkpoints,
             verbose=verbose,
+            vram_plan=vram_plan,
         )
     if component not in {"decoder", "text", "text_decoder"}:
         raise ValueError("component must be 'decoder' or 'vision'")
@@ -2912,6 +3447,27 @@ def compile_native_hf_decoder(
 
     if batch_size <= 0:
         raise ValueError(f"batch_size must be positive, got {batch_size}")
+    if kv_cache_lens is not None:
+        kv_cache_lens = [int(kv_len) for kv_len in kv_cache_lens]
+        if batch_size != 1:
+            raise ValueError("kv_cache_lens packs sequences as rows; use batch_size=1")
+        if not 0 < len(kv_cache_lens) <= mlen:
+            raise ValueError(f"ragged decode needs 1..{mlen} sequences, got {len(kv_cache_lens)}")
+        if min(kv_cache_lens) < 0:
+            raise ValueError(f"kv_cache_lens must be non-negative, got {kv_cache_lens}")
+        if attention_head_packing:
+            raise NotImplementedError("ragged decode does not support attention_head_packing")
+        if reference_backend.lower() == "legacy":
+            raise NotImplementedError("legacy reference_backend does not support ragged decode")
+        attention_head_packing = False
+        seq_len = len(kv_cache_lens)
+    if sliding_window is not None:
+        if sliding_window <= 0:
+            raise ValueError(f"sliding_window must be positive, got {sliding_window}")
+        if kv_cache_lens is not None:
+            raise NotImplementedError("ragged decode does not support sliding_window")
+        if reference_backend.lower() == "legacy":
+            raise NotImplementedError("legacy reference_backend does not support sliding_window")
 
     model_cfg = extract_model_config(model)
     if hidden_size is not None and hidden_size != model_cfg.hidden_size:
@@ -2987,6 +3543,16 @@ def compile_native_hf_decoder(
     else:
         head_packing = None
     padded_total_q_dim = head_packing.total_q_dim if head_packing is not None else num_heads * padded_head_dim
+    if fuse_qkv_rope:
+        if head_packing is not None:
+            raise NotImplementedError("fuse_qkv_rope does not support attention_head_packing")
+        if stage_checkpoints:
+            raise NotImplementedError("fuse_qkv_rope has no pre-RoPE Q/K tensors to checkpoint")
+    if fuse_rms_norm:
+        if head_packing is not None:
+            raise NotImplementedError("fuse_rms_norm does not support attention_head_packing")
+        if stage_checkpoints:
+            raise NotImplementedError("fuse_rms_norm has no normalized attention input to checkpoint")
     padding_enabled = (
         padded_seq_len != seq_len
         or rows_per_batch != seq_len
@@ -3018,6 +3584,8 @@ def compile_native_hf_decoder(
         f"  compile: batch_size={batch_size}, seq_len={seq_len}, mlen={mlen}, blen={blen}, "
         f"mram_tile_capacity={mram_tile_capacity}, total_q_dim={total_q_dim}"
     )
+    if kv_cache_lens is not None:
+        print(f"  ragged decode: {len(kv_cache_lens)} sequences, kv_cache_lens={kv_cache_lens}")
     if padding_enabled:
         print(
             "  tile padding: "
@@ -3143,7 +3711,21 @@ def compile_native_hf_decoder(
             )
     print(f"attn_scale: {scale:.6f}")
 
-    R_matrix, cos_table, sin_table = make_rope_inputs(seq_len, model_cfg)
+    kv_cache = None
+    if kv_cache_lens is None:
+        R_matrix, cos_table, sin_table = make_rope_inputs(seq_len, model_cfg)
+    else:
+        # Row b is the new token of sequence b, at position kv_cache_lens[b].
+        R_matrix, all_cos, all_sin = make_rope_inputs(max(kv_cache_lens) + 1, model_cfg)
+        cos_table = all_cos[kv_cache_lens]
+        sin_table = all_sin[kv_cache_lens]
+        kv_cache = _make_ragged_kv_cache(
+            compile_weights,
+            kv_cache_lens,
+            (R_matrix, all_cos, all_sin),
+            hidden=hidden,
+            head_dim=head_dim,
+        )
     if head_packing is not None:
         compile_R_matrix, per_sequence_cos_table, per_sequence_sin_table = _pad_rope_inputs_for_head_slots(
             R_matrix,
@@ -3201,6 +3783,10 @@ def compile_native_hf_decoder(
             head_slot_dim=head_packing.head_slot_dim if head_packing is not None else padded_head_dim,
             broadcast_amount=head_packing.broadcast_amount if head_packing is not None else None,
             total_q_dim=padded_total_q_dim,
+            kv_cache_lens=tuple(kv_cache_lens) if kv_cache_lens is not None else None,
+            fused_qkv_rope=fuse_qkv_rope,
+            fused_rms_norm=fuse_rms_norm,
+            sliding_window=sliding_window,
         )
         padded_golden_output = run_native_decoder_scheduled_reference(
             compile_token_embeds,
@@ -3212,6 +3798,7 @@ def compile_native_hf_decoder(
             compile_sin_table,
             precision=golden_policy,
             trace=lambda i, x: _verbose(f"  After layer {i}: X_gold[0,:4] = {x[0, :4].tolist()}"),
+            kv_cache=kv_cache,
         )
         golden_out = _compact_active_sequence_rows(
             padded_golden_output,
@@ -3244,7 +3831,7 @@ def compile_native_hf_decoder(
 
     print(f"\nComputing HF reference (float32, {n_layers} layer{'s' if n_layers != 1 else ''}, no quantization)")
     with torch.no_grad():
-        if batch_size == 1:
+        if batch_size == 1 and kv_cache_lens is None and sliding_window is None:
             hf_ground_truth = run_decoder_reference(
                 token_embeds,
                 pos_weight,
@@ -3269,6 +3856,7 @@ def compile_native_hf_decoder(
                 compile_sin_table,
                 precision=ReferencePrecision.from_mode("hf_fp32"),
                 trace=lambda i, x: _verbose(f"  After layer {i}: X_hf[0,:4] = {x[0, :4].tolist()}"),
+                kv_cache=kv_cache,
             )
             hf_ground_truth = _compact_active_sequence_rows(
                 padded_hf_output,
@@ -3291,7 +3879,10 @@ def compile_native_hf_decoder(
         blen=blen,
         real_data_ratio=REAL_DATA_RATIO,
         mram_tile_capacity=mram_tile_capacity,
+        vram_plan=vram_plan,
+        vram_capacity=vram_capacity,
     )
+    prog.reserve_fixed_fpram()
     if hlen is not None:
         prog.hlen = hlen
     if broadcast_amount is not None:
@@ -3304,21 +3895,33 @@ def compile_native_hf_decoder(
     x_input = prog.input("X", shape=(compile_seq_rows, padded_hidden), physical_shape=sequence_physical_shape)
     pos_input = prog.input("POS", shape=(compile_seq_rows, padded_hidden), physical_shape=sequence_physical_shape)
 
-    r_input = prog.input("R_rope", shape=(rope_width, rope_width))
-    cos_input = prog.input("COS", shape=(compile_seq_rows, rope_width), physical_shape=rope_table_physical_shape)
-    sin_input = prog.input("SIN", shape=(compile_seq_rows, rope_width), physical_shape=rope_table_physical_shape)
-    COS = prog.load_batch(cos_input, name="COS")
-    SIN = prog.load_batch(sin_input, name="SIN")
+    r_input = prog.constant("R_rope", compile_R_matrix, shape=(rope_width, rope_width))
+    cos_input = prog.constant(
+        "COS", compile_cos_table, shape=(compile_seq_rows, rope_width), physical_shape=rope_table_physical_shape
+    )
+    sin_input = prog.constant(
+        "SIN", compile_sin_table, shape=(compile_seq_rows, rope_width), physical_shape=rope_table_physical_shape
+    )
+    COS = prog.spillable(prog.load_batch(cos_input, name="COS"), source=cos_input)
+    SIN = prog.spillable(prog.load_batch(sin_input, name="SIN"), source=sin_input)
 
-    # Causal mask: (mlen, mlen) with 0 on/below diagonal, -inf above.
+    # Causal mask: (mlen, mlen) with 0 on/below diagonal, SCORE_MASK_FILL
+    # above (finite, like the pooled attention masks and FP_SRAM[2]).
     # Bidirectional models (e.g. LLaDA) use an all-zero mask.
     causal_mask_data = torch.zeros(mlen, mlen)
     if model_cfg.model_type != "llada":
         causal_mask_data.masked_fill_(
-            torch.triu(torch.ones(mlen, mlen), diagonal=1).bool(), float('-inf')
+            torch.triu(torch.ones(mlen, mlen), diagonal=1).bool(), SCORE_MASK_FILL
         )
-    causal_mask_input = prog.input("causal_mask", shape=(mlen, mlen))
-    CAUSAL_MASK = prog.load_batch(causal_mask_input, name="CAUSAL_MASK")
+    causal_mask_input = prog.constant("causal_mask", causal_mask_data)
+    CAUSAL_MASK = prog.spillable(
+        prog.load_batch(causal_mask_input, name="CAUSAL_MASK"), source=causal_mask_input
+    )
+    # Padded-column masks must sit in the input image, ahead of K/V store scratch.
+    if kv_cache_lens is None:
+        prog.reserve_attention_constants(kv_seq_len=seq_len, sliding_window=sliding_window)
+    else:
+        prog.reserve_ragged_decode_constants(kv_cache_lens)
 
     # Per-layer weight inputs (order determines HBM layout)
     layer_inputs = []
@@ -3336,11 +3939,26 @@ def compile_native_hf_decoder(
                 ),
             )
         )
+    # Packed KV caches follow the weights, still ahead of K/V store scratch.
+    kv_cache_tensors = {}
+    kv_cache_inputs = []
+    if kv_cache is not None:
+        for i, layer_cache in enumerate(kv_cache):
+            layer_cache_inputs = []
+            for kv_h, (keys, values) in enumerate(layer_cache):
+                head_inputs = []
+                for prefix, rows in (("K", keys), ("V", values)):
+                    name = f"{prefix}_cache_{i}_h{kv_h}"
+                    kv_cache_tensors[name] = _pack_ragged_kv_cache(rows, mlen)
+                    head_inputs.append(prog.input(name, shape=tuple(kv_cache_tensors[name].shape)))
+                layer_cache_inputs.append(tuple(head_inputs))
+            kv_cache_inputs.append(layer_cache_inputs)
 
     # Load activations to VRAM
     X_batch = prog.load_batch(x_input, name="X")
     POS_batch = prog.load_batch(pos_input, name="POS")
     ops.embedding_add(prog, X_batch, POS_batch)  # X += POS in-place
+    prog.free_tensor(POS_batch)
     checkpoints.record(
         prog,
         layer_idx=None,
@@ -3358,15 +3976,19 @@ def compile_native_hf_decoder(
         strict=False,
         physical_shape=sequence_physical_shape,
     )
+    prog.spillable(scratch)
 
     # Chain layers
     current = X_batch
+    layer_hbm_prefetch = []
 
     for i in range(n_layers):
         li = layer_inputs[i]
 
         # Layer progress marker (visible in non-quiet emulator output)
         prog.emit_comment(f"=== LAYER {i}/{n_layers} START ===")
+        layer_bytes_start = (prog.hbm_prefetch_bytes, prog.mram_reused_bytes)
+        layer_spill_start = (prog.vram_spill_bytes, prog.vram_reload_bytes)
 
         if head_packing is not None:
             current_after_attn = _emit_packed_attention_block(
@@ -3389,6 +4011,7 @@ def compile_native_hf_decoder(
                 batch_size=batch_size,
                 rows_per_batch=rows_per_batch,
                 active_seq_len_per_batch=seq_len,
+                sliding_window=sliding_window,
             )
         else:
             current_after_attn = _emit_attention_block(
@@ -3412,6 +4035,11 @@ def compile_native_hf_decoder(
                 batch_size=batch_size,
                 rows_per_batch=rows_per_batch,
                 active_seq_len_per_batch=seq_len,
+                kv_cache_inputs=kv_cache_inputs[i] if kv_cache_inputs else None,
+                kv_cache_lens=kv_cache_lens,
+                fuse_qkv_rope=fuse_qkv_rope,
+                fuse_rms_norm=fuse_rms_norm,
+                sliding_window=sliding_window,
             )
 
         current = _emit_ffn_block(
@@ -3425,6 +4053,18 @@ def compile_native_hf_decoder(
             active_hidden=hidden,
         )
         prog.emit_comment(f"=== LAYER {i}/{n_layers} COMPLETE ===")
+        layer_prefetch = prog.hbm_prefetch_bytes - layer_bytes_start[0]
+        layer_hbm_prefetch.append(
+            {
+                "layer": i,
+                "hbm_prefetch_bytes": layer_prefetch,
+                "hbm_prefetch_bytes_without_mram_reuse": (
+                    layer_prefetch + prog.mram_reused_bytes - layer_bytes_start[1]
+                ),
+                "vram_spill_bytes": prog.vram_spill_bytes - layer_spill_start[0],
+                "vram_reload_bytes": prog.vram_reload_bytes - layer_spill_start[1],
+            }
+        )
 
     # Final norm
     ops.rms_norm(prog, current, eps_offset=3, reci_hid_offset=4)
@@ -3446,17 +4086,15 @@ def compile_native_hf_decoder(
     input_tensors = {
         "X": compile_token_embeds,
         "POS": compile_pos_weight,
-        "R_rope": compile_R_matrix,
-        "COS": compile_cos_table,
-        "SIN": compile_sin_table,
     }
-    data_order = ["X", "POS", "R_rope", "COS", "SIN"]
-    input_tensors["causal_mask"] = causal_mask_data
-    data_order.append("causal_mask")
+    data_order = ["X", "POS"]
     for i in range(n_layers):
         for name, tensor in compile_weights[i].tensor_entries(i):
             input_tensors[name] = tensor
             data_order.append(name)
+    input_tensors.update(kv_cache_tensors)
+    data_order.extend(kv_cache_tensors)
+    _merge_constant_pool(prog, input_tensors, data_order)
     tensor_layouts = _tensor_layout_metadata(prog, input_tensors)
 
     # FPRAM layout (same as single-layer decoder):
@@ -3538,8 +4176,19 @@ def compile_native_hf_decoder(
         "reference_backend": reference_backend,
         "golden_precision": golden_precision,
         "decoder_input_source": decoder_input_source,
+        "kv_cache_lens": kv_cache_lens,
+        "fuse_qkv_rope": fuse_qkv_rope,
+        "fuse_rms_norm": fuse_rms_norm,
+        "sliding_window": sliding_window,
         "padding_enabled": padding_enabled,
         "isa_lines": len(lines),
+        "hbm_prefetch_bytes": prog.hbm_prefetch_bytes,
+        "mram_reused_bytes": prog.mram_reused_bytes,
+        "layer_hbm_prefetch": layer_hbm_prefetch,
+        "vram_peak_elems": prog.vram_allocator.peak,
+        "vram_capacity": vram_capacity,
+        "vram_spill_bytes": prog.vram_spill_bytes,
+        "vram_reload_bytes": prog.vram_reload_bytes,
     }
     stage_checkpoint_metadata = checkpoints.metadata()
     stage_checkpoint_metadata["compile_info"] = {
@@ -3573,6 +4222,14 @@ def compile_native_hf_decoder(
 
     print(f"\nCompilation complete: {info['isa_lines']} ISA lines, "
           f"{n_layers} layers, output at VRAM row {o_vram_addr // mlen}")
+    print(f"  HBM prefetch: {info['hbm_prefetch_bytes']} bytes, VRAM peak: {info['vram_peak_elems']} elements "
+          f"(fuse_qkv_rope={fuse_qkv_rope})")
+    for entry in layer_hbm_prefetch:
+        print(f"  Layer {entry['layer']} HBM prefetch: {entry['hbm_prefetch_bytes_without_mram_reuse']} -> "
+              f"{entry['hbm_prefetch_bytes']} bytes with MRAM tile reuse")
+        if entry["vram_spill_bytes"] or entry["vram_reload_bytes"]:
+            print(f"  Layer {entry['layer']} VRAM spill: {entry['vram_spill_bytes']} bytes stored, "
+                  f"{entry['vram_reload_bytes']} bytes reloaded")
     hbm_addrs = {}
     hbm_sizes = {}
     for name, inp in prog._inputs.items():
@@ -3604,5 +4261,30 @@ def compile_native_hf_decoder(
         "golden_precision": golden_precision,
         "reference_backend": reference_backend,
     }
+
+
+def compile_with_vram_plan(compile_fn, *args, **kwargs) -> dict:
+    """Run a frontend twice so VRAM addresses come from whole-program liveness.
+
+    The first build records every VRAM allocation and free through a
+    ``VRAMPlan``; the plan then packs the recorded live ranges offline and the
+    second build replays those addresses, so peak VRAM no longer depends on the
+    order the frontend frees its scratch buffers in. ``compile_fn`` is any
+    frontend accepting ``vram_plan`` (``compile_native_hf_decoder``,
+    ``compile_native_hf_vision_encoder``, ``compile_fx_module``).
+    ``info["vram_plan"]`` reports the eager and planned peaks.
+    """
+    plan = VRAMPlan()
+    compile_fn(*args, vram_plan=plan, **kwargs)
+    plan.pack()
+    result = compile_fn(*args, vram_plan=plan, **kwargs)
+    result["info"]["vram_plan"] = {
+        "allocations": len(plan.ranges),
+        "eager_peak_elems": plan.recorded_peak,
+        "planned_peak_elems": plan.planned_peak,
+    }
+    return result
+
+
 # Backwards-compatible alias for older callers.
 compile_hf_model = compile_native_hf_decoder
@@ -80,6 +80,10 @@ class ScheduledReferenceConfig:
     total_q_dim: int | None = None
     batch_size: int = 1
     rows_per_batch: int | None = None
+    sliding_window: int | None = None
+    kv_cache_lens: tuple[int, ...] | None = None
+    fused_qkv_rope: bool = False
+    fused_rms_norm: bool = False
 
     @property
     def head_ratio(self) -> int:
@@ -204,6 +208,7 @@ def run_native_decoder_scheduled_reference(
     *,
     precision: ReferencePrecision,
     trace: Callable[[int, torch.Tensor], None] | None = None,
+    kv_cache: list[list[tuple[list[torch.Tensor], list[torch.Tensor]]]] | None = None,
 ) -> torch.Tensor:
     """Run the native decoder on the same padded tensors the compiler emits.
 
@@ -212,7 +217,21 @@ def run_native_decoder_scheduled_reference(
     boundaries that affect the final output: HBM MXFP load/store, BF16
     vector/matrix writeback, active-hidden RMS denominators, K-split GEMMs,
     packed GQA layout, and padded RoPE lanes.
+
+    With ``config.kv_cache_lens`` set (ragged decode) row ``b`` is the new
+    token of sequence ``b`` and ``kv_cache[layer][kv_head]`` holds per-sequence
+    ``(keys, values)`` lists of its cached, already rotated K/V rows.
     """
+    if config.fused_qkv_rope and config.attention_head_packing:
+        raise NotImplementedError("fused QKV + RoPE does not support attention head packing")
+    if config.fused_rms_norm and config.attention_head_packing:
+        raise NotImplementedError("fused RMS norm does not support attention head packing")
+    if config.kv_cache_lens is not None:
+        if config.attention_head_packing:
+            raise NotImplementedError("ragged decode does not support attention head packing")
+        if kv_cache is None or len(kv_cache) != len(weights):
+            raise ValueError("ragged decode needs one kv_cache entry per layer")
+
     x = _vram_load_ref(token_embeds.clone(), precision)
     pos = _vram_load_ref(pos_weight, precision)
     x = _round(x + pos, precision)
@@ -232,6 +251,7 @@ def run_native_decoder_scheduled_reference(
             cos_ref,
             sin_ref,
             precision,
+            kv_cache=kv_cache[layer_idx] if kv_cache is not None else None,
         )
         x = _scheduled_ffn_block_ref(x, layer, config, precision)
 
@@ -287,10 +307,23 @@ def _scheduled_attention_block_ref(
     cos_table: torch.Tensor,
     sin_table: torch.Tensor,
     precision: ReferencePrecision,
+    kv_cache: list[tuple[list[torch.Tensor], list[torch.Tensor]]] | None = None,
 ) -> torch.Tensor:
     residual = x.clone()
-    x_normed = _rms_norm_scheduled_ref(x, config.hidden_size, layer.eps, config.mlen, precision)
-    q_full = _linear_scheduled_ref(x_normed, layer.w_q, config, precision)
+    if config.fused_rms_norm:
+        # Projections read the raw rows and scale their outputs (rms_norm_stats + row_scale).
+        x_normed = x
+        row_scale = _rms_scale_scheduled_ref(x, config.hidden_size, layer.eps, config.mlen, precision)
+    else:
+        x_normed = _rms_norm_scheduled_ref(x, config.hidden_size, layer.eps, config.mlen, precision)
+        row_scale = None
+    if config.fused_qkv_rope:
+        q_full, kv_heads = _fused_qkv_rope_scheduled_ref(
+            x_normed, layer, config, rope_matrix, cos_table, sin_table, precision, row_scale=row_scale
+        )
+    else:
+        q_full = _linear_scheduled_ref(x_normed, layer.w_q, config, precision, row_scale=row_scale)
+        kv_heads = None
 
     if config.attention_head_packing:
         attn_out = _packed_attention_scheduled_ref(
@@ -313,12 +346,55 @@ def _scheduled_attention_block_ref(
             cos_table,
             sin_table,
             precision,
+            kv_cache=kv_cache,
+            kv_heads=kv_heads,
+            row_scale=row_scale,
         )
 
     o_proj = _linear_scheduled_ref(attn_out, layer.w_o, config, precision)
     return _residual_add_ref(o_proj, residual, precision)
 
 
+def _fused_qkv_rope_scheduled_ref(
+    x_normed: torch.Tensor,
+    layer: LayerWeights,
+    config: ScheduledReferenceConfig,
+    rope_matrix: torch.Tensor,
+    cos_table: torch.Tensor,
+    sin_table: torch.Tensor,
+    precision: ReferencePrecision,
+    row_scale: torch.Tensor | None = None,
+) -> tuple[torch.Tensor, tuple[list[torch.Tensor], list[torch.Tensor]]]:
+    """Mirror ``fused_qkv_rope_projection``: one GEMM over ``[Wq | Wk_0.. | Wv_0..]``, then RoPE per Q/K head.
+
+    MX blocks run along columns and every segment is padded to whole heads, so
+    slicing the wide product rounds exactly like the per-weight projections.
+    """
+    head_width = config.padded_head_dim
+    w_q = layer.w_q
+    w_kv = [_pad_cols_ref(w, head_width) for w in (*layer.w_k_heads, *layer.w_v_heads)]
+    qkv = _linear_scheduled_ref(x_normed, torch.cat([w_q, *w_kv], dim=1), config, precision, row_scale=row_scale)
+
+    q_full = qkv[:, : w_q.shape[1]].clone()
+    for h in range(config.num_heads):
+        start = h * head_width
+        q_full[:, start : start + head_width] = _rope_scheduled_ref(
+            q_full[:, start : start + head_width], rope_matrix, cos_table, sin_table, config, precision
+        )
+
+    k_heads = []
+    v_heads = []
+    kv_base = w_q.shape[1]
+    v_base = kv_base + config.num_kv_heads * head_width
+    for kv_h in range(config.num_kv_heads):
+        k_h = qkv[:, kv_base + kv_h * head_width : kv_base + (kv_h + 1) * head_width]
+        v_h = qkv[:, v_base + kv_h * head_width : v_base + (kv_h + 1) * head_width]
+        k_h = _rope_scheduled_ref(k_h, rope_matrix, cos_table, sin_table, config, precision)
+        k_heads.append(_hbm_round_ref(k_h, precision))
+        v_heads.append(_hbm_round_ref(v_h, precision))
+    return q_full, (k_heads, v_heads)
+
+
 def _packed_attention_scheduled_ref(
     q_full: torch.Tensor,
     x_normed: torch.Tensor,
@@ -392,6 +468,7 @@ def _packed_attention_scheduled_ref(
                     precision,
                     causal=True,
                     matmul_scale=0.25,
+                    sliding_window=config.sliding_window,
                 )
                 out[row_start:row_end, group_start + lane_start:group_start + lane_end] = o_h
 
@@ -407,7 +484,11 @@ def _mha_attention_scheduled_ref(
     cos_table: torch.Tensor,
     sin_table: torch.Tensor,
     precision: ReferencePrecision,
+    kv_cache: list[tuple[list[torch.Tensor], list[torch.Tensor]]] | None = None,
+    kv_heads: tuple[list[torch.Tensor], list[torch.Tensor]] | None = None,
+    row_scale: torch.Tensor | None = None,
 ) -> torch.Tensor:
+    """Per-head attention; ``kv_heads`` (from the fused QKV path) means Q is already rotated."""
     rows = q_full.shape[0]
     head_width = config.padded_head_dim
     scale = 1.0 / math.sqrt(config.head_dim)
@@ -422,18 +503,36 @@ def _mha_attention_scheduled_ref(
             f"{config.batch_size * rows_per_batch}"
         )
 
-    k_heads = []
-    v_heads = []
-    for kv_h in range(config.num_kv_heads):
-        k_h = _linear_scheduled_ref(x_normed, layer.w_k_heads[kv_h], config, precision)
-        v_h = _linear_scheduled_ref(x_normed, layer.w_v_heads[kv_h], config, precision)
-        k_h = _pad_cols_ref(k_h, head_width)
-        v_h = _pad_cols_ref(v_h, head_width)
-        k_h = _rope_scheduled_ref(k_h, rope_matrix, cos_table, sin_table, config, precision)
-        k_heads.append(_hbm_round_ref(k_h, precision))
-        v_heads.append(_hbm_round_ref(v_h, precision))
+    q_rotated = kv_heads is not None
+    if q_rotated:
+        k_heads, v_heads = kv_heads
+    else:
+        k_heads = []
+        v_heads = []
+        for kv_h in range(config.num_kv_heads):
+            k_h = _linear_scheduled_ref(x_normed, layer.w_k_heads[kv_h], config, precision, row_scale=row_scale)
+            v_h = _linear_scheduled_ref(x_normed, layer.w_v_heads[kv_h], config, precision, row_scale=row_scale)
+            k_h = _pad_cols_ref(k_h, head_width)
+            v_h = _pad_cols_ref(v_h, head_width)
+            k_h = _rope_scheduled_ref(k_h, rope_matrix, cos_table, sin_table, config, precision)
+            k_heads.append(_hbm_round_ref(k_h, precision))
+            v_heads.append(_hbm_round_ref(v_h, precision))
 
     out = torch.zeros((rows, config.attention_width), dtype=q_full.dtype, device=q_full.device)
+    if config.kv_cache_lens is not None:
+        return _ragged_decode_attention_scheduled_ref(
+            q_full,
+            k_heads,
+            v_heads,
+            kv_cache,
+            out,
+            config,
+            rope_matrix,
+            cos_table,
+            sin_table,
+            precision,
+            q_rotated=q_rotated,
+        )
     for batch_idx in range(config.batch_size):
         row_start = batch_idx * rows_per_batch
         row_end = row_start + config.seq_len
@@ -442,14 +541,15 @@ def _mha_attention_scheduled_ref(
             start = h * head_width
             end = start + head_width
             q_h = q_full[row_start:row_end, start:end]
-            q_h = _rope_scheduled_ref(
-                q_h,
-                rope_matrix,
-                cos_table[row_start:row_end],
-                sin_table[row_start:row_end],
-                config,
-                precision,
-            )
+            if not q_rotated:
+                q_h = _rope_scheduled_ref(
+                    q_h,
+                    rope_matrix,
+                    cos_table[row_start:row_end],
+                    sin_table[row_start:row_end],
+                    config,
+                    precision,
+                )
             out[row_start:row_end, start:end] = _flash_attn_scheduled_ref(
                 q_h,
                 k_heads[kv_h][row_start:row_end],
@@ -457,7 +557,54 @@ def _mha_attention_scheduled_ref(
                 scale,
                 precision,
                 causal=True,
+                sliding_window=config.sliding_window,
+            )
+
+    return _round(out, precision)
+
+
+def _ragged_decode_attention_scheduled_ref(
+    q_full: torch.Tensor,
+    k_heads: list[torch.Tensor],
+    v_heads: list[torch.Tensor],
+    kv_cache: list[tuple[list[torch.Tensor], list[torch.Tensor]]],
+    out: torch.Tensor,
+    config: ScheduledReferenceConfig,
+    rope_matrix: torch.Tensor,
+    cos_table: torch.Tensor,
+    sin_table: torch.Tensor,
+    precision: ReferencePrecision,
+    q_rotated: bool = False,
+) -> torch.Tensor:
+    """Row ``b`` attends to its own HBM-resident cache followed by its new key."""
+    num_seqs = len(config.kv_cache_lens)
+    head_width = config.padded_head_dim
+    scale = 1.0 / math.sqrt(config.head_dim)
+    for h in range(config.num_heads):
+        kv_h = h // config.head_ratio
+        cached_keys, cached_values = kv_cache[kv_h]
+        start = h * head_width
+        end = start + head_width
+        q_h = q_full[:num_seqs, start:end]
+        if not q_rotated:
+            q_h = _rope_scheduled_ref(
+                q_h,
+                rope_matrix,
+                cos_table[:num_seqs],
+                sin_table[:num_seqs],
+                config,
+                precision,
+            )
+        for seq_idx, kv_len in enumerate(config.kv_cache_lens):
+            keys = torch.cat(
+                [_hbm_round_ref(cached_keys[seq_idx][:kv_len], precision), k_heads[kv_h][seq_idx : seq_idx + 1]]
             )
+            values = torch.cat(
+                [_hbm_round_ref(cached_values[seq_idx][:kv_len], precision), v_heads[kv_h][seq_idx : seq_idx + 1]]
+            )
+            out[seq_idx, start:end] = _flash_attn_scheduled_ref(
+                q_h[seq_idx : seq_idx + 1], keys, values, scale, precision, causal=False
+            )[0]
 
     return _round(out, precision)
 
@@ -521,19 +668,19 @@ def _rms_norm_ref(x: torch.Tensor, eps: float, precision: ReferencePrecision) ->
     return _round(precision.from_inter(x_inter) * rms, precision)
 
 
-def _rms_norm_scheduled_ref(
+def _rms_scale_scheduled_ref(
     x: torch.Tensor,
     active_hidden: int,
     eps: float,
     mlen: int,
     precision: ReferencePrecision,
 ) -> torch.Tensor:
+    """Per-row ``1 / rms`` as a ``[rows, 1]`` column, in the hardware's scalar rounding order."""
     if not precision.bf16_intermediates:
-        rms = torch.rsqrt(x.pow(2).sum(-1, keepdim=True) / float(active_hidden) + eps)
-        return x * rms
+        return torch.rsqrt(x.pow(2).sum(-1, keepdim=True) / float(active_hidden) + eps)
 
     x_inter = _round(x, precision)
-    out = torch.empty_like(x_inter.float())
+    scale = torch.empty((x_inter.shape[0], 1), dtype=torch.float32, device=x_inter.device)
     eps_scalar = _scalar_preload_ref(eps, precision)
     reci_hidden = _scalar_preload_ref(1.0 / active_hidden, precision)
 
@@ -545,11 +692,22 @@ def _rms_norm_scheduled_ref(
             acc = _scalar_round(acc + float(sq.sum().item()), precision)
         mean_sq = _scalar_round(acc * reci_hidden, precision)
         denom = _scalar_round(math.sqrt(_scalar_round(mean_sq + eps_scalar, precision)), precision)
-        inv = _scalar_round(1.0 / denom, precision)
-        for col in range(0, x_inter.shape[1], mlen):
-            out[row, col:col + mlen] = _round(x_inter[row, col:col + mlen].float() * inv, precision)
+        scale[row, 0] = _scalar_round(1.0 / denom, precision)
 
-    return out
+    return scale
+
+
+def _rms_norm_scheduled_ref(
+    x: torch.Tensor,
+    active_hidden: int,
+    eps: float,
+    mlen: int,
+    precision: ReferencePrecision,
+) -> torch.Tensor:
+    scale = _rms_scale_scheduled_ref(x, active_hidden, eps, mlen, precision)
+    if not precision.bf16_intermediates:
+        return x * scale
+    return _round(_round(x, precision).float() * scale, precision)
 
 
 def _linear_ref(
@@ -576,8 +734,9 @@ def _linear_scheduled_ref(
     weight: torch.Tensor,
     config: ScheduledReferenceConfig,
     precision: ReferencePrecision,
+    row_scale: torch.Tensor | None = None,
 ) -> torch.Tensor:
-    return _round(
+    out = _round(
         _linear_ref(
             x,
             precision.quantize(weight),
@@ -587,6 +746,10 @@ def _linear_scheduled_ref(
         ),
         precision,
     )
+    if row_scale is None:
+        return out
+    # Output rows are scaled after the projection has been written back.
+    return _round(out * row_scale, precision)
 
 
 def _rope_ref(
@@ -635,13 +798,25 @@ def _residual_add_ref(
     return _round(x + residual, precision)
 
 
-def _flash_attn_ref(Q, K, V, scale, causal=False):
-    """CPU reference: scaled dot-product attention matching hardware BF16 precision."""
+def _causal_mask_ref(scores: torch.Tensor, sliding_window: int | None = None) -> torch.Tensor:
+    """True where query row ``i`` may not see key ``j``: ``j > i`` or ``j <= i - window``."""
+    rows = torch.arange(scores.shape[-2], device=scores.device).unsqueeze(1)
+    cols = torch.arange(scores.shape[-1], device=scores.device).unsqueeze(0)
+    mask = cols > rows
+    if sliding_window is not None:
+        mask |= cols <= rows - sliding_window
+    return mask
+
+
+def _flash_attn_ref(Q, K, V, scale, causal=False, sliding_window=None):
+    """CPU reference: scaled dot-product attention matching hardware BF16 precision.
+
+    ``sliding_window`` (implies ``causal``) limits query ``i`` to keys ``(i - window, i]``.
+    """
     scores = (Q @ K.T).to(torch.bfloat16).float() * scale
     scores = scores.to(torch.bfloat16).float()
-    if causal:
-        mask = torch.triu(torch.ones(scores.shape[-2], scores.shape[-1], device=scores.device), diagonal=1).bool()
-        scores.masked_fill_(mask, float("-inf"))
+    if causal or sliding_window is not None:
+        scores.masked_fill_(_causal_mask_ref(scores, sliding_window), float("-inf"))
     attn = F.softmax(scores, dim=-1).to(torch.bfloat16).float()
     return (attn @ V).to(torch.bfloat16).float()
 
@@ -655,6 +830,7 @@ def _flash_attn_scheduled_ref(
     *,
     causal: bool,
     matmul_scale: float = 1.0,
+    sliding_window: int | None = None,
 ) -> torch.Tensor:
     q = _round(q, precision)
     k = _round(k, precision)
@@ -663,9 +839,8 @@ def _flash_attn_scheduled_ref(
     if matmul_scale != 1.0:
         scores = scores * matmul_scale
     scores = _round(scores, precision)
-    if causal:
-        mask = torch.triu(torch.ones(scores.shape[-2], scores.shape[-1], device=scores.device), diagonal=1).bool()
-        scores = scores.masked_fill(mask, float("-inf"))
+    if causal or sliding_window is not None:
+        scores = scores.masked_fill(_causal_mask_ref(scores, sliding_window), float("-inf"))
     scores = _round(scores * _scalar_preload_ref(scale, precision), precision)
     attn = _round(torch.softmax(scores, dim=-1), precision)
     return _round(attn @ v, precision)
@@ -22,12 +22,15 @@ for _path in [
         sys.path.insert(0, _path)
 
 from aten.models.gpt_oss.moe_reference import (
+    ExpertWeightCache,
     assert_clamp_inactive,
     clamp_stats,
     gpt_oss_moe_fixed_routing_host_smoke,
     gpt_oss_moe_golden_a,
     gpt_oss_moe_golden_b_plena_mxfp8,
     gpt_oss_swiglu,
+    gpt_oss_swiglu_plena,
+    select_hot_experts,
     split_packed_gate_up,
 )
 
@@ -203,6 +206,24 @@ def test_fixed_routing_wiring_smoke_matches_golden_a_without_clamp_or_quantizati
     assert torch.allclose(smoke.output, golden.output, atol=1e-6, rtol=1e-6)
 
 
+def test_fixed_routing_smoke_counts_tokens_per_expert_for_hot_expert_pinning():
+    args = _tiny_inputs(scale=0.02)
+    x, _, _, gate_up_w, gate_up_b, down_w, down_b = args
+    topk_indices = torch.tensor([[3, 1], [1, 4], [3, 1]])
+    topk_weights = torch.full((3, 2), 0.5)
+
+    smoke = gpt_oss_moe_fixed_routing_host_smoke(
+        x, topk_indices, topk_weights, gate_up_w, gate_up_b, down_w, down_b, bf16_intermediates=False
+    )
+
+    assert smoke.expert_token_counts.tolist() == [0, 3, 0, 2, 1]
+    assert select_hot_experts(smoke.expert_token_counts, max_experts=2) == [1, 3]
+    # Summed statistics across runs; ties break toward the lower expert id.
+    total = smoke.expert_token_counts + torch.tensor([0, 0, 0, 0, 1])
+    assert select_hot_experts(total, max_experts=2) == [1, 3]
+    assert select_hot_experts(total, max_experts=5, min_tokens=2) == [1, 3, 4]
+
+
 def test_fixed_routing_clamp_active_smoke_matches_golden_a_before_quantization():
     args = list(_tiny_inputs(scale=0.04))
     # Force an active clamp site without changing routing.  Golden A and the
@@ -311,6 +332,98 @@ def test_golden_b_uses_fixed_routing_and_plena_mxfp8_expert_weights():
     assert not torch.equal(a.output, b.output), "MXFP8 expert quantization should affect this seeded case"
 
 
+def test_grouped_experts_match_per_pair_einsum_reference():
+    args = _tiny_inputs(scale=0.3)
+    x, _router_w, _router_b, gate_up_w, gate_up_b, down_w, down_b = args
+    result = gpt_oss_moe_golden_a(*args, experts_per_token=3, bf16_intermediates=False)
+
+    idx = result.topk_indices
+    gate_up = torch.einsum("th,tkhe->tke", x, gate_up_w[idx]) + gate_up_b[idx]
+    activated = gpt_oss_swiglu(gate_up, bf16_intermediates=False)
+    expert_out = torch.einsum("tki,tkih->tkh", activated, down_w[idx]) + down_b[idx]
+    expected = (expert_out * result.topk_weights.unsqueeze(-1)).sum(dim=1)
+
+    assert torch.allclose(result.gate_up_preact, gate_up, atol=1e-6, rtol=1e-6)
+    assert torch.allclose(result.output, expected, atol=1e-6, rtol=1e-6)
+
+
+def test_expert_weight_cache_reuses_only_active_experts_per_layer():
+    args = _tiny_inputs(scale=0.02)
+    x, _, _, gate_up_w, gate_up_b, down_w, down_b = args
+    topk_indices = torch.tensor([[0, 3], [3, 1], [1, 0]])
+    topk_weights = torch.full(topk_indices.shape, 0.5)
+    cache = ExpertWeightCache(max_entries=8)
+
+    def run(layer):
+        return gpt_oss_moe_fixed_routing_host_smoke(
+            x, topk_indices, topk_weights, gate_up_w, gate_up_b, down_w, down_b, layer=layer, weight_cache=cache
+        )
+
+    first = run(layer=0)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 3)
+    second = run(layer=0)
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert torch.equal(first.output, second.output)
+    run(layer=1)
+    assert (cache.hits, cache.misses, len(cache)) == (3, 6, 6)
+
+    small = ExpertWeightCache(max_entries=2)
+    pair = (torch.zeros(1), torch.zeros(1))
+    for key in ["a", "b", "a", "c"]:
+        small.get(key, lambda: pair)
+    assert (small.hits, small.misses, len(small)) == (1, 3, 2)
+    small.get("b", lambda: pair)
+    assert small.misses == 4, "least recently used entry should have been evicted"
+    with pytest.raises(ValueError):
+        ExpertWeightCache(max_entries=0)
+
+
+def test_expert_weight_cache_misses_on_new_or_modified_weights():
+    args = _tiny_inputs(scale=0.02)
+    x, _, _, gate_up_w, gate_up_b, down_w, down_b = args
+    topk_indices = torch.tensor([[0, 3], [3, 1], [1, 0]])
+    topk_weights = torch.full(topk_indices.shape, 0.5)
+    cache = ExpertWeightCache(max_entries=8)
+
+    def run(gate_up, down, weight_cache=cache):
+        return gpt_oss_moe_fixed_routing_host_smoke(
+            x, topk_indices, topk_weights, gate_up, gate_up_b, down, down_b, layer=0, weight_cache=weight_cache
+        )
+
+    run(gate_up_w, down_w)
+    gate_up_w.mul_(2.0)
+    modified = run(gate_up_w, down_w)
+    assert (cache.hits, cache.misses) == (0, 6)
+    assert torch.equal(modified.output, run(gate_up_w, down_w, weight_cache=None).output)
+    run(gate_up_w, down_w.clone())
+    assert (cache.hits, cache.misses) == (0, 9)
+
+
+def test_gpt_oss_swiglu_plena_matches_stepwise_hardware_rounding():
+    def bf16(t):
+        return t.to(torch.bfloat16).float()
+
+    def fpram(value):
+        return torch.tensor(value, dtype=torch.float16).to(torch.bfloat16).float()
+
+    torch.manual_seed(3)
+    gate_up = bf16(torch.randn(4, 2, 16) * 4.0)
+    gate_up[0, 0, 0] = 9.0
+    gate_up[0, 0, 1] = -9.0
+    out = gpt_oss_swiglu_plena(gate_up)
+
+    gate = torch.minimum(gate_up[..., ::2], fpram(7.0))
+    up = torch.clamp(gate_up[..., 1::2], min=fpram(-7.0), max=fpram(7.0))
+    sigmoid = bf16(gate * fpram(-1.702))
+    sigmoid = bf16(sigmoid.exp())
+    sigmoid = bf16(bf16(sigmoid + 1.0).reciprocal())
+    expected = bf16(bf16(up + 1.0) * bf16(gate * sigmoid))
+
+    assert torch.equal(out, expected)
+    reference = gpt_oss_swiglu(gate_up, bf16_intermediates=True)
+    assert torch.allclose(out, reference, atol=1e-3, rtol=2.0**-5)
+
+
 if __name__ == "__main__":
     test_bf16_represents_gpt_oss_clamp_boundary_exactly()
     test_gpt_oss_swiglu_matches_manual_formula()
@@ -321,4 +434,8 @@ if __name__ == "__main__":
     test_fixed_routing_quantized_smoke_matches_golden_b()
     test_clamp_inactive_check_fails_when_gate_or_up_hits_limit()
     test_golden_b_uses_fixed_routing_and_plena_mxfp8_expert_weights()
+    test_grouped_experts_match_per_pair_einsum_reference()
+    test_expert_weight_cache_reuses_only_active_experts_per_layer()
+    test_expert_weight_cache_misses_on_new_or_modified_weights()
+    test_gpt_oss_swiglu_plena_matches_stepwise_hardware_rounding()
     print("PASS test_gpt_oss_moe_reference")
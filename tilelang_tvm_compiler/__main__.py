@@ -23,6 +23,7 @@ from __future__ import annotations
 import argparse
 import importlib
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -241,6 +242,17 @@ def _logical_2d(shape, layout: str = "BSHD") -> tuple[int, int]:
 
 def _cmd_compile(args: argparse.Namespace) -> int:
     kernel_kwargs = _parse_kernel_kwargs(args.kernel_kwargs)
+    compile_kwargs = {"gp_alloc": args.gp_alloc, "double_buffer": args.double_buffer}
+    if args.tuned:
+        from .autotune import TuningDB, tuned_config
+
+        tuned = tuned_config(args.tuned, kernel_kwargs, TuningDB(args.tuning_db))
+        if tuned is None:
+            print(f"[tuned] no entry for {args.tuned} {kernel_kwargs}; using defaults", file=sys.stderr)
+        else:
+            kernel_kwargs, tuned_compile = tuned
+            compile_kwargs.update(tuned_compile)
+            print(f"[tuned] {args.tuned}: {kernel_kwargs} {tuned_compile}", file=sys.stderr)
     func = _resolve_kernel(args.kernel, kernel_kwargs)
     target = PlenaTarget(
         mlen=args.mlen,
@@ -254,7 +266,10 @@ def _cmd_compile(args: argparse.Namespace) -> int:
         target=target,
         name=args.asm_name,
         midir_dump_dir=midir_dump_dir,
+        **compile_kwargs,
     )
+    if compiled.gp_alloc_report is not None:
+        print(compiled.gp_alloc_report.summary(), file=sys.stderr)
     isa_text = compiled.isa_text
     if args.stage_output:
         isa_text = isa_text.rstrip() + _emit_output_staging(
@@ -323,6 +338,32 @@ def _cmd_compile(args: argparse.Namespace) -> int:
     return 0
 
 
+def _cmd_autotune(args: argparse.Namespace) -> int:
+    from .autotune import ScoreConfig, TuningDB, autotune, format_results
+
+    target = PlenaTarget(
+        mlen=args.mlen,
+        blen=args.blen,
+        btmm_lane_count=args.btmm_lane_count,
+        btmm_hlen=args.btmm_hlen,
+    )
+    score = ScoreConfig(
+        vram_capacity=args.vram_capacity,
+        mram_capacity=args.mram_capacity,
+        fpram_capacity=args.fpram_capacity,
+    )
+    results = autotune(
+        args.kernel_name,
+        _parse_kernel_kwargs(args.shape),
+        target=target,
+        score=score,
+        jobs=args.jobs,
+        db=None if args.no_save else TuningDB(args.tuning_db),
+    )
+    print(format_results(results))
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(prog="tilelang_tvm_compiler")
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -370,8 +411,55 @@ def main(argv: list[str] | None = None) -> int:
         "addresses instead of mirroring them by hand. Single source of "
         "truth for FPRAM / VRAM / MRAM / HBM offsets.",
     )
+    p_compile.add_argument(
+        "--gp-alloc",
+        choices=("greedy", "linear_scan"),
+        default="greedy",
+        help="GP register allocator. `greedy` assigns physical GPs during "
+        "emit with on-demand IntRAM spill; `linear_scan` emits virtual GPs "
+        "and assigns them afterwards with loop-depth-weighted spill costs. "
+        "Either way a spill-count summary is printed to stderr.",
+    )
+    p_compile.add_argument(
+        "--double-buffer",
+        action="store_true",
+        help="Ping-pong the leading HBM->on-chip DMAs of serial loops so the "
+        "next tile's prefetch overlaps the current tile's compute. Emits the "
+        "loop body up to four times, so short loops come out unrolled.",
+    )
+    p_compile.add_argument(
+        "--tuned",
+        default=None,
+        metavar="KERNEL_NAME",
+        help="Look up --kernel-kwargs under this kernel name in the tuning "
+        "DB (see `autotune`) and apply the stored factory + compile knobs. "
+        "Falls back to the flags above for untuned shapes.",
+    )
+    p_compile.add_argument(
+        "--tuning-db",
+        default=None,
+        help="Tuning DB path (default: $PLENA_TUNING_DB or the packaged tuning_db.json).",
+    )
     p_compile.set_defaults(func=_cmd_compile)
 
+    p_tune = sub.add_parser(
+        "autotune",
+        help="Search a kernel's knob space with the static cost model and record the winner.",
+    )
+    p_tune.add_argument("--kernel-name", required=True, help="Key into autotune.TUNE_SPACES, e.g. flash_attention_min.")
+    p_tune.add_argument("--shape", default=None, help="Comma-separated k=v factory shape kwargs (fixed, not tuned).")
+    p_tune.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    p_tune.add_argument("--tuning-db", default=None)
+    p_tune.add_argument("--no-save", action="store_true", help="Print the ranking without updating the DB.")
+    p_tune.add_argument("--vram-capacity", type=int, default=None)
+    p_tune.add_argument("--mram-capacity", type=int, default=None)
+    p_tune.add_argument("--fpram-capacity", type=int, default=None)
+    p_tune.add_argument("--mlen", type=int, default=64)
+    p_tune.add_argument("--blen", type=int, default=4)
+    p_tune.add_argument("--btmm-lane-count", type=int, default=4)
+    p_tune.add_argument("--btmm-hlen", type=int, default=16)
+    p_tune.set_defaults(func=_cmd_autotune)
+
     args = parser.parse_args(argv)
     return args.func(args)
 
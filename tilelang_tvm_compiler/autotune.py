@@ -0,0 +1,454 @@
+"""Static-cost autotuner for the kernel factories in ``kernels/``.
+
+The factories' tile sizes are pinned to the hardware (``MLEN`` /
+``HLEN``) and their remaining kwargs are shape, so what is left to pick
+by hand is emission: ``T.unroll`` vs ``T.serial`` per loop, double
+buffering, which GP allocator. Factories that grow genuine tiling
+kwargs get them tuned too -- any plain knob name is forwarded to the
+factory. This module enumerates a per-kernel config space,
+compiles every candidate through :func:`pipeline.compile_kernel` (in a
+process pool -- TVM lowering is CPU-bound and holds the GIL), and ranks
+the results with a purely static cost model:
+
+  * **cycles** -- dynamic instruction count with ``C_LOOP_START n``
+    bodies multiplied by their trip count, each opcode weighted by a
+    coarse per-family latency (``OPCODE_WEIGHTS``). Not a simulator;
+    good enough to order candidates of the *same* kernel.
+  * **footprint** -- per-memory high-water mark (VRAM / MRAM / FPRAM,
+    in elements) read off the HLIR buffers after address allocation.
+    Candidates over ``ScoreConfig`` capacity are rejected; among the
+    rest footprint only breaks ties.
+
+Knob names in a :class:`TuneSpace`:
+
+  * plain names are forwarded to the factory as kwargs,
+  * ``gp_alloc`` / ``double_buffer`` are forwarded to ``compile_kernel``,
+  * ``loop_kind:<var>`` becomes ``compile_kernel(loop_kinds={var: ...})``.
+
+Winners are persisted in a :class:`TuningDB` (one JSON file) keyed by
+kernel name + shape kwargs. :func:`build_tuned` builds a kernel straight
+from its tuned entry (factory defaults for untuned shapes);
+:func:`tuned_config` (and ``python -m tilelang_tvm_compiler compile
+--tuned``) returns the stored factory + compile kwargs, or ``None``.
+
+CLI::
+
+    python -m tilelang_tvm_compiler autotune \\
+        --kernel-name flash_attention_min \\
+        --shape num_kv_blocks=4,num_q_blocks=2 --jobs 8
+"""
+
+from __future__ import annotations
+
+import importlib
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import scope as _scope
+from .pipeline import PlenaTarget, compile_kernel
+
+
+class AutotuneError(RuntimeError):
+    pass
+
+
+COMPILE_KNOBS = ("gp_alloc", "double_buffer")
+LOOP_KIND_PREFIX = "loop_kind:"
+
+DEFAULT_DB_PATH = Path(
+    os.environ.get(
+        "PLENA_TUNING_DB",
+        Path(__file__).resolve().parent / "tuning_db.json",
+    )
+)
+
+
+# --------------------------------------------------------------------
+# Config spaces
+# --------------------------------------------------------------------
+
+
+@dataclass
+class TuneSpace:
+    """One kernel's tunable knobs.
+
+    ``kernel`` is a ``module:factory`` spec (same form as the CLI's
+    ``--kernel``). ``knobs`` maps knob name -> candidate values; the
+    space is their cartesian product. Shape kwargs are supplied at
+    tune time and never varied.
+    """
+
+    kernel: str
+    knobs: dict[str, list] = field(default_factory=dict)
+
+    def candidates(self) -> list[dict[str, Any]]:
+        names = list(self.knobs)
+        return [dict(zip(names, values)) for values in itertools.product(*(self.knobs[n] for n in names))]
+
+
+_KERNELS = "tilelang_tvm_compiler.kernels"
+
+TUNE_SPACES: dict[str, TuneSpace] = {
+    "flash_attention_min": TuneSpace(
+        kernel=f"{_KERNELS}.flash_attention_min:make_flash_attention_min",
+        knobs={
+            "loop_kind:kv_block": ["serial", "unroll"],
+            "double_buffer": [False, True],
+            "gp_alloc": ["greedy", "linear_scan"],
+        },
+    ),
+    "flash_decode_min": TuneSpace(
+        kernel=f"{_KERNELS}.flash_decode_min:make_flash_decode_min",
+        knobs={
+            "loop_kind:kv_block": ["unroll", "serial"],
+            "gp_alloc": ["greedy", "linear_scan"],
+        },
+    ),
+    "linear_min": TuneSpace(
+        kernel=f"{_KERNELS}.linear_min:make_linear_min",
+        knobs={
+            "loop_kind:k_block": ["serial", "unroll"],
+            "double_buffer": [False, True],
+            "gp_alloc": ["greedy", "linear_scan"],
+        },
+    ),
+    "conv2d_min": TuneSpace(
+        kernel=f"{_KERNELS}.conv2d_min:make_conv2d_min",
+        knobs={
+            "loop_kind:kh_idx": ["unroll", "serial"],
+            "loop_kind:kw_idx": ["unroll", "serial"],
+            "gp_alloc": ["greedy", "linear_scan"],
+        },
+    ),
+}
+
+
+def split_knobs(config: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Split a flat knob dict into ``(factory_kwargs, compile_kwargs)``."""
+    factory_kwargs: dict[str, Any] = {}
+    compile_kwargs: dict[str, Any] = {}
+    loop_kinds: dict[str, str] = {}
+    for name, value in config.items():
+        if name.startswith(LOOP_KIND_PREFIX):
+            loop_kinds[name[len(LOOP_KIND_PREFIX) :]] = value
+        elif name in COMPILE_KNOBS:
+            compile_kwargs[name] = value
+        else:
+            factory_kwargs[name] = value
+    if loop_kinds:
+        compile_kwargs["loop_kinds"] = loop_kinds
+    return factory_kwargs, compile_kwargs
+
+
+# --------------------------------------------------------------------
+# Static cost model
+# --------------------------------------------------------------------
+
+# Relative issue cost per opcode family, longest prefix wins. HBM
+# traffic dominates, then systolic-array ops, then vector ops; scalar
+# and control instructions are single-issue.
+OPCODE_WEIGHTS: dict[str, int] = {
+    "H_": 64,
+    "M_": 16,
+    "V_": 4,
+    "S_": 1,
+    "C_": 1,
+}
+_DEFAULT_WEIGHT = 1
+
+_LOOP_START = re.compile(r"^C_LOOP_START\s+gp\d+\s*,\s*(\d+)")
+
+
+def _opcode_weight(opcode: str, weights: dict[str, int]) -> int:
+    best = None
+    for prefix in weights:
+        if opcode.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return weights[best] if best is not None else _DEFAULT_WEIGHT
+
+
+def estimate_cycles(isa_text: str, weights: dict[str, int] | None = None) -> tuple[int, int]:
+    """Return ``(static_instructions, weighted_dynamic_cycles)``.
+
+    Hardware-loop bodies are multiplied by their ``C_LOOP_START``
+    immediate; the loop-control instructions themselves are charged
+    once per iteration like any other body instruction.
+    """
+    weights = OPCODE_WEIGHTS if weights is None else weights
+    static = 0
+    cycles = 0
+    trip = [1]
+    for raw in isa_text.splitlines():
+        line = raw.split(";", 1)[0].strip()
+        if not line:
+            continue
+        opcode = line.split(None, 1)[0]
+        static += 1
+        cycles += trip[-1] * _opcode_weight(opcode, weights)
+        m = _LOOP_START.match(line)
+        if m:
+            trip.append(trip[-1] * int(m.group(1)))
+        elif opcode == "C_LOOP_END":
+            if len(trip) == 1:
+                raise AutotuneError("C_LOOP_END without matching C_LOOP_START")
+            trip.pop()
+    return static, cycles
+
+
+def memory_footprint(hlir) -> dict[str, int]:
+    """Per-scope high-water mark (elements) after address allocation."""
+    out = {_scope.VRAM: 0, _scope.MRAM: 0, _scope.FPRAM: 0}
+    for buf in hlir.buffers.values():
+        phys = _scope.physical_scope(buf.scope)
+        if phys not in out or buf.address is None:
+            continue
+        out[phys] = max(out[phys], int(buf.address) + buf.num_elements)
+    return out
+
+
+@dataclass
+class ScoreConfig:
+    """Per-scope capacities (elements) a candidate must fit in
+    (``None`` = unbounded) and optional ``OPCODE_WEIGHTS`` override."""
+
+    vram_capacity: int | None = None
+    mram_capacity: int | None = None
+    fpram_capacity: int | None = None
+    weights: dict[str, int] | None = None
+
+
+@dataclass
+class CandidateResult:
+    config: dict[str, Any]
+    ok: bool
+    static_instructions: int = 0
+    cycles: int = 0
+    footprint: dict[str, int] = field(default_factory=dict)
+    spill_instructions: int = 0
+    error: str | None = None
+
+    @property
+    def sort_key(self) -> tuple:
+        return (self.cycles, sum(self.footprint.values()), self.static_instructions)
+
+
+def _resolve_factory(spec: str):
+    if ":" not in spec:
+        raise AutotuneError(f"kernel spec must be module:factory, got {spec!r}")
+    mod_path, name = spec.split(":", 1)
+    return getattr(importlib.import_module(mod_path), name)
+
+
+def _fits(footprint: dict[str, int], score: ScoreConfig) -> str | None:
+    caps = {
+        _scope.VRAM: score.vram_capacity,
+        _scope.MRAM: score.mram_capacity,
+        _scope.FPRAM: score.fpram_capacity,
+    }
+    for phys, cap in caps.items():
+        if cap is not None and footprint.get(phys, 0) > cap:
+            return f"{phys} footprint {footprint[phys]} exceeds capacity {cap}"
+    return None
+
+
+def evaluate_candidate(
+    kernel: str,
+    shape: dict[str, Any],
+    config: dict[str, Any],
+    target: PlenaTarget,
+    score: ScoreConfig,
+) -> CandidateResult:
+    """Compile one candidate and score it. Never raises for compile
+    failures -- an illegal config is just a rejected candidate."""
+    factory_kwargs, compile_kwargs = split_knobs(config)
+    try:
+        prim = _resolve_factory(kernel)(**shape, **factory_kwargs)
+        if isinstance(prim, tuple):
+            prim = prim[0]
+        compiled = compile_kernel(prim, target=target, name="autotune", **compile_kwargs)
+    except Exception as exc:  # noqa: BLE001 -- any lowering failure rejects the config
+        return CandidateResult(config=config, ok=False, error=f"{type(exc).__name__}: {exc}")
+    static, cycles = estimate_cycles(compiled.isa_text, score.weights)
+    footprint = memory_footprint(compiled.hlir)
+    report = compiled.gp_alloc_report
+    result = CandidateResult(
+        config=config,
+        ok=True,
+        static_instructions=static,
+        cycles=cycles,
+        footprint=footprint,
+        spill_instructions=report.spill_instructions if report is not None else 0,
+    )
+    overflow = _fits(footprint, score)
+    if overflow is not None:
+        result.ok = False
+        result.error = overflow
+    return result
+
+
+# --------------------------------------------------------------------
+# Tuning database
+# --------------------------------------------------------------------
+
+
+def shape_key(kernel_name: str, shape: dict[str, Any]) -> str:
+    """Stable DB key: ``kernel|k1=v1,k2=v2`` with kwargs sorted."""
+    return kernel_name + "|" + ",".join(f"{k}={shape[k]}" for k in sorted(shape))
+
+
+class TuningDB:
+    """JSON-backed ``shape_key -> best config`` map.
+
+    Entries hold the flat knob dict plus the winning score so a later
+    re-tune can tell whether the cost model moved.
+    """
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_DB_PATH
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def lookup(self, kernel_name: str, shape: dict[str, Any]) -> dict | None:
+        return self.entries.get(shape_key(kernel_name, shape))
+
+    def record(self, kernel_name: str, shape: dict[str, Any], best: CandidateResult) -> None:
+        self.entries[shape_key(kernel_name, shape)] = {
+            "config": best.config,
+            "cycles": best.cycles,
+            "static_instructions": best.static_instructions,
+            "footprint": best.footprint,
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True) + "\n")
+
+
+def tuned_config(
+    kernel_name: str,
+    shape: dict[str, Any],
+    db: TuningDB | None = None,
+) -> tuple[dict[str, Any], dict[str, Any]] | None:
+    """``(factory_kwargs, compile_kwargs)`` for a tuned shape, else None.
+
+    Factory kwargs already include ``shape``; callers do
+    ``compile_kernel(factory(**fk), target=..., **ck)``.
+    """
+    entry = (db if db is not None else TuningDB()).lookup(kernel_name, shape)
+    if entry is None:
+        return None
+    factory_kwargs, compile_kwargs = split_knobs(entry["config"])
+    return {**shape, **factory_kwargs}, compile_kwargs
+
+
+def build_tuned(
+    kernel_name: str,
+    shape: dict[str, Any],
+    db: TuningDB | None = None,
+    space: TuneSpace | None = None,
+) -> tuple[Any, dict[str, Any]]:
+    """Call ``kernel_name``'s factory with its tuned knobs applied.
+
+    Returns ``(prim_func, compile_kwargs)``; untuned shapes get the
+    factory defaults and empty compile kwargs, so callers can always do
+    ``compile_kernel(prim, target=..., **compile_kwargs)``.
+    """
+    if space is None:
+        if kernel_name not in TUNE_SPACES:
+            raise AutotuneError(f"no tune space for {kernel_name!r}; known: {sorted(TUNE_SPACES)}")
+        space = TUNE_SPACES[kernel_name]
+    tuned = tuned_config(kernel_name, shape, db)
+    factory_kwargs, compile_kwargs = tuned if tuned is not None else (dict(shape), {})
+    prim = _resolve_factory(space.kernel)(**factory_kwargs)
+    if isinstance(prim, tuple):
+        prim = prim[0]
+    return prim, compile_kwargs
+
+
+# --------------------------------------------------------------------
+# Driver
+# --------------------------------------------------------------------
+
+
+def autotune(
+    kernel_name: str,
+    shape: dict[str, Any],
+    *,
+    target: PlenaTarget | None = None,
+    space: TuneSpace | None = None,
+    score: ScoreConfig | None = None,
+    jobs: int = 1,
+    db: TuningDB | None = None,
+) -> list[CandidateResult]:
+    """Compile + score every candidate; return results best-first.
+
+    ``space`` defaults to ``TUNE_SPACES[kernel_name]``. With ``jobs > 1``
+    candidates compile in a process pool. When ``db`` is given the
+    winner is recorded and saved. Raises :class:`AutotuneError` if no
+    candidate compiled.
+    """
+    if space is None:
+        if kernel_name not in TUNE_SPACES:
+            raise AutotuneError(f"no tune space for {kernel_name!r}; known: {sorted(TUNE_SPACES)}")
+        space = TUNE_SPACES[kernel_name]
+    target = target if target is not None else PlenaTarget()
+    score = score if score is not None else ScoreConfig()
+    configs = space.candidates()
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(evaluate_candidate, space.kernel, shape, c, target, score) for c in configs]
+            results = [f.result() for f in futures]
+    else:
+        results = [evaluate_candidate(space.kernel, shape, c, target, score) for c in configs]
+
+    ok = sorted((r for r in results if r.ok), key=lambda r: r.sort_key)
+    rejected = [r for r in results if not r.ok]
+    if not ok:
+        errors = "\n  ".join(f"{r.config}: {r.error}" for r in rejected)
+        raise AutotuneError(f"no candidate for {kernel_name} {shape} compiled:\n  {errors}")
+    if db is not None:
+        db.record(kernel_name, shape, ok[0])
+        db.save()
+    return ok + rejected
+
+
+def format_results(results: list[CandidateResult]) -> str:
+    lines = []
+    for r in results:
+        if r.ok:
+            fp = " ".join(f"{k}={v}" for k, v in r.footprint.items())
+            lines.append(
+                f"cycles={r.cycles:<10} insns={r.static_instructions:<7} "
+                f"spill={r.spill_instructions:<4} {fp}  {r.config}"
+            )
+        else:
+            lines.append(f"REJECTED {r.config}: {r.error}")
+    return "\n".join(lines)
+
+
+__all__ = [
+    "OPCODE_WEIGHTS",
+    "TUNE_SPACES",
+    "AutotuneError",
+    "CandidateResult",
+    "ScoreConfig",
+    "TuneSpace",
+    "TuningDB",
+    "autotune",
+    "build_tuned",
+    "estimate_cycles",
+    "evaluate_candidate",
+    "format_results",
+    "memory_footprint",
+    "shape_key",
+    "split_knobs",
+    "tuned_config",
+]
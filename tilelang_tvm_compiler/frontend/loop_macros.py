@@ -0,0 +1,58 @@
+"""User-facing helper for giving a serial loop a runtime trip count.
+
+PLENA's ``C_LOOP_START gp, imm`` only takes an immediate, so every
+``T.serial`` extent must be known at TIR-construction time. A loop
+whose real trip count is only known at run time (kv-cache length in
+decode, ragged sequence lengths, ...) is written against its
+**maximum** extent and tagged with the IntRAM word that will hold the
+actual count::
+
+    from tilelang_tvm_compiler.frontend.loop_macros import RUNTIME_EXTENT
+
+    @T.prim_func
+    def k(...):
+        ...
+        with T.attr(0, RUNTIME_EXTENT, KV_LEN_ADDR):
+            for kv_block in T.serial(MAX_KV_BLOCKS):
+                ...
+
+The ISA emitter still opens the hardware loop with ``MAX_KV_BLOCKS``,
+but at the end of every iteration it reloads the counter register from
+``intram[KV_LEN_ADDR] - (idx + 1)``. ``C_LOOP_END`` only jumps back
+while the counter is non-zero, so the loop exits after exactly
+``intram[KV_LEN_ADDR]`` iterations. Buffers indexed by the loop var
+must still be sized for the maximum.
+
+Contract for whoever writes the IntRAM word (testbench preload or a
+pre-kernel stub): ``1 <= count <= max extent``. The body always runs at
+least once (the hardware loop is do-while), and a count above the
+maximum would walk past the buffers sized for it.
+
+The address must lie in the user preload region below
+``register_alloc.SPILL_BASE``; the compiler owns everything above it.
+
+Kernels that pick between a runtime and a compile-time trip count with
+a Python flag wrap the static variant in ``STATIC_EXTENT`` instead, so
+the loop nest (and the body under it) is written once::
+
+    key = RUNTIME_EXTENT if runtime else STATIC_EXTENT
+    with T.attr(0, key, KV_LEN_ADDR):
+        for kv_block in (T.serial if runtime else T.unroll)(MAX_KV_BLOCKS):
+            ...
+
+``fold`` checks that a ``STATIC_EXTENT`` attr wraps exactly one loop
+and then drops it; the loop keeps its static extent as the trip count.
+"""
+
+from __future__ import annotations
+
+# AttrStmt key read by mid_ir ``fold``. Value is the IntRAM address of
+# the runtime trip count; the attr must wrap exactly one serial loop.
+RUNTIME_EXTENT = "plena.runtime_extent"
+
+# AttrStmt key read by mid_ir ``fold``: the wrapped loop's static extent
+# is its real trip count. Value is ignored.
+STATIC_EXTENT = "plena.static_extent"
+
+
+__all__ = ["RUNTIME_EXTENT", "STATIC_EXTENT"]
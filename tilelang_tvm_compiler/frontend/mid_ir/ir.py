@@ -536,6 +536,11 @@ class For:
     ``loop_var_var`` is the same loop var as a :class:`VarRef` —
     identity-based handle that downstream passes can match against
     ``BufferRef.indices`` entries. Optional during transitional period.
+
+    ``runtime_extent`` (serial only) is the IntRAM address of the
+    loop's real trip count, set when the kernel wraps the loop in
+    ``T.attr(0, RUNTIME_EXTENT, addr)`` (see frontend/loop_macros.py).
+    ``extent`` is then the maximum trip count.
     """
 
     loop_var: str
@@ -543,6 +548,7 @@ class For:
     body: list[Stmt]
     kind: str = "serial"  # "serial" | "unroll"
     loop_var_var: VarRef | None = None
+    runtime_extent: int | None = None
 
 
 @dataclass
@@ -712,6 +718,8 @@ def _print_stmt(s: Stmt, indent: int, out: list[str]) -> None:
         return
     if isinstance(s, For):
         kind = "" if s.kind == "serial" else f" ({s.kind})"
+        if s.runtime_extent is not None:
+            kind += f" (runtime extent intram[{s.runtime_extent}])"
         out.append(f"{pad}for {s.loop_var} in 0..{s.extent}{kind}:")
         for b in s.body:
             _print_stmt(b, indent + 1, out)
@@ -116,6 +116,7 @@ def _walk(stmt: Stmt, in_cluster: bool, ids: _IdCounter) -> Stmt:
             body=new_body,
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         # Already wrapped; preserve and recurse (idempotency).
@@ -323,6 +323,7 @@ def _walk(stmt: Stmt, new_defs: dict[str, BufferDef]) -> Stmt:
             body=[_walk(s, new_defs) for s in stmt.body],
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         return Async(
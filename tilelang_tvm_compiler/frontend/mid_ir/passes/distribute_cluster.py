@@ -141,6 +141,7 @@ def _distribute_one_cluster(cluster: ParallelAxis) -> list[Stmt]:
                 body=[_clone_cluster_with_body(cluster, inner_body)],
                 kind=child.kind,
                 loop_var_var=child.loop_var_var,
+                runtime_extent=child.runtime_extent,
             )
             out.append(new_for)
         else:
@@ -197,6 +198,7 @@ def _walk_stmt(stmt: Stmt) -> Stmt:
             body=_walk_stmts(stmt.body),
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         return Async(body=_walk_stmts(stmt.body), scope_id=stmt.scope_id)
@@ -0,0 +1,379 @@
+"""pass_5c_double_buffer: ping-pong the HBM→on-chip prefetch of serial loops.
+
+Why this pass exists
+--------------------
+
+A typical streaming loop (flash-attention's ``for kv_block``) looks like
+
+    for kv in 0..N:
+        dma K_hbm[kv] -> K_sh          # prefetch
+        dma V_hbm[kv] -> V_sh
+        <compute reading K_sh / V_sh>
+
+so every iteration serialises "fetch tile i → compute tile i → fetch
+tile i+1". With a second copy of each prefetched buffer the DMA for
+iteration i+1 can be issued *before* the compute of iteration i. The
+loop is rewritten (unrolled by two so each half of the ping-pong has a
+static buffer address) into
+
+    dma [0] -> B0                               # prologue
+    for kv in 0..(N-1)//2:                      # steady state
+        dma [2kv+1] -> B1 ; compute(2kv,   B0)
+        dma [2kv+2] -> B0 ; compute(2kv+1, B1)
+    dma [N-1] -> B1 ; compute(N-2, B0)          # epilogue (N even)
+    compute(N-1, B1)
+    -- or, N odd --
+    compute(N-1, B0)
+
+``B1`` is a fresh on-chip ``BufferDef`` (``<name>_pp1``) appended to
+``MidFunc.allocs``, so AddressAllocationPass reserves space for it like
+any other alloc — the doubled footprint is visible in the buffer
+layout dump and in VRAM/MRAM overflow checks.
+
+Code-size cost
+--------------
+
+The loop body is emitted up to four times (two halves of the steady
+state plus the even-N epilogue pair) instead of once. The steady loop
+itself stays a rolled ``For``, so the extra ISA is a constant ~3x the
+compute body regardless of N — but for small trip counts the steady
+extent collapses to 1 (N = 3, 4) and the result is effectively fully
+unrolled: flash-attention at ``kv_blocks=4`` goes from ~900 to ~2850
+ISA lines. The pass is a latency / instruction-memory trade; leave it
+off for short loops or when the kernel is already close to the
+instruction-buffer limit.
+
+Which loops qualify
+-------------------
+
+  * ``For`` with ``kind == "serial"`` and ``extent >= 2``, and no
+    ``runtime_extent`` (the prologue / epilogue split needs the real
+    trip count at compile time).
+  * Body starts with one or more DMAs (bare, ``Async``-wrapped or
+    inside a ``MultiLaneOp``) from a global buffer into a distinct
+    on-chip buffer.
+  * Each prefetched buffer is written by nothing else in the body and
+    referenced nowhere outside the loop (so the ping-pong copy never
+    has to be reconciled afterwards).
+  * The DMA source is not written anywhere in the body.
+  * No ``RawStore`` in the body — its ``value`` is opaque, so the loop
+    var cannot be substituted inside it.
+
+Anything else is left untouched. Opt-in via
+``compile_kernel(..., double_buffer=True)``; placed after burn_view so
+buffer shapes are final, before to_plena.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+from ..ir import (
+    Async,
+    Broadcast,
+    BufferDef,
+    BufferRef,
+    Dma,
+    Elementwise,
+    For,
+    Gemm,
+    MidFunc,
+    MultiLaneOp,
+    ParallelAxis,
+    RawStore,
+    Reduce,
+    Stmt,
+    VarRef,
+)
+
+
+class DoubleBufferError(RuntimeError):
+    pass
+
+
+PING_PONG_SUFFIX = "_pp1"
+
+
+# ---------------------------------------------------------------------------
+# Small helpers
+# ---------------------------------------------------------------------------
+
+
+def _is_onchip(buf: BufferDef) -> bool:
+    return buf.scope != "global" and not buf.scope.startswith("global")
+
+
+def _as_dma(s: Stmt) -> Dma | None:
+    if isinstance(s, Dma):
+        return s
+    if isinstance(s, MultiLaneOp) and isinstance(s.inner, Dma):
+        return s.inner
+    if isinstance(s, Async) and len(s.body) == 1:
+        return _as_dma(s.body[0])
+    return None
+
+
+def _refs_of(s: Stmt):
+    """Yield ``(ref, is_write)`` for every BufferRef under ``s``."""
+    if isinstance(s, (ParallelAxis, For, Async)):
+        for b in s.body:
+            yield from _refs_of(b)
+    elif isinstance(s, MultiLaneOp):
+        yield from _refs_of(s.inner)
+    elif isinstance(s, Dma):
+        yield s.src, False
+        yield s.dst, True
+    elif isinstance(s, Gemm):
+        yield s.a, False
+        yield s.b, False
+        yield s.c, True
+    elif isinstance(s, Elementwise):
+        for src in s.srcs:
+            yield (src.src if isinstance(src, Broadcast) else src), False
+        yield s.dst, True
+    elif isinstance(s, Reduce):
+        yield s.src, False
+        yield s.dst, True
+    elif isinstance(s, RawStore):
+        yield s.dst, True
+
+
+def _contains_raw_store(s: Stmt) -> bool:
+    if isinstance(s, RawStore):
+        return True
+    if isinstance(s, (ParallelAxis, For, Async)):
+        return any(_contains_raw_store(b) for b in s.body)
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Substitution (loop var → index expr, buffer rename)
+# ---------------------------------------------------------------------------
+
+
+class _Subst:
+    def __init__(self, loop: For, repl, rename: dict[str, BufferDef]) -> None:
+        self.loop = loop
+        self.repl = repl
+        self.rename = rename
+
+    def _is_loop_var(self, idx) -> bool:
+        if not isinstance(idx, VarRef):
+            return False
+        if self.loop.loop_var_var is not None:
+            return idx == self.loop.loop_var_var
+        return idx.name == self.loop.loop_var
+
+    def idx(self, idx):
+        if self._is_loop_var(idx):
+            return self.repl
+        if isinstance(idx, dict):
+            return {**idx, "args": [self.idx(a) for a in idx.get("args", [])]}
+        return idx
+
+    def ref(self, ref: BufferRef) -> BufferRef:
+        return BufferRef(
+            buffer=self.rename.get(ref.buffer.name, ref.buffer),
+            indices=[self.idx(i) for i in ref.indices],
+            view_perm=None if ref.view_perm is None else list(ref.view_perm),
+        )
+
+    def stmt(self, s: Stmt) -> Stmt:
+        if isinstance(s, ParallelAxis):
+            return replace(s, body=[self.stmt(b) for b in s.body])
+        if isinstance(s, For):
+            return replace(s, body=[self.stmt(b) for b in s.body])
+        if isinstance(s, Async):
+            return replace(s, body=[self.stmt(b) for b in s.body])
+        if isinstance(s, MultiLaneOp):
+            dim_map = {self.rename[k].name if k in self.rename else k: list(v) for k, v in s.dim_map.items()}
+            return replace(s, inner=self.stmt(s.inner), dim_map=dim_map)
+        if isinstance(s, Dma):
+            return replace(s, src=self.ref(s.src), dst=self.ref(s.dst))
+        if isinstance(s, Gemm):
+            return replace(s, a=self.ref(s.a), b=self.ref(s.b), c=self.ref(s.c))
+        if isinstance(s, Elementwise):
+            srcs = [
+                Broadcast(src=self.ref(x.src), broadcast_dims=list(x.broadcast_dims))
+                if isinstance(x, Broadcast)
+                else self.ref(x)
+                for x in s.srcs
+            ]
+            return replace(s, dst=self.ref(s.dst), srcs=srcs)
+        if isinstance(s, Reduce):
+            return replace(s, dst=self.ref(s.dst), src=self.ref(s.src))
+        raise DoubleBufferError(f"cannot substitute into {type(s).__name__}")
+
+
+def _affine(loop: For, scale: int, offset: int):
+    """``loop_var * scale + offset`` as a mid_ir compound index."""
+    var = loop.loop_var_var
+    if var is None:
+        raise DoubleBufferError(f"loop {loop.loop_var!r} has no loop_var_var; cannot build a rewritten index")
+    expr = var if scale == 1 else {"op": "mul", "args": [var, scale]}
+    if offset:
+        expr = {"op": "add", "args": [expr, offset]}
+    return expr
+
+
+# ---------------------------------------------------------------------------
+# Loop rewrite
+# ---------------------------------------------------------------------------
+
+
+def _prefetch_prefix(loop: For) -> list[Dma]:
+    out: list[Dma] = []
+    for s in loop.body:
+        dma = _as_dma(s)
+        if dma is None:
+            break
+        if _is_onchip(dma.src.buffer) or not _is_onchip(dma.dst.buffer):
+            break
+        if any(d.dst.buffer.name == dma.dst.buffer.name for d in out):
+            break
+        out.append(dma)
+    return out
+
+
+def _eligible(loop: For, outside_refs: set[str]) -> int:
+    """Number of leading prefetch DMAs to double-buffer (0 = none)."""
+    if loop.kind != "serial" or not isinstance(loop.extent, int) or loop.extent < 2:
+        return 0
+    if loop.runtime_extent is not None:
+        return 0
+    if loop.loop_var_var is None or any(_contains_raw_store(s) for s in loop.body):
+        return 0
+    prefix = _prefetch_prefix(loop)
+    if not prefix:
+        return 0
+    rest = loop.body[len(prefix) :]
+    written_in_rest = {ref.buffer.name for s in rest for ref, w in _refs_of(s) if w}
+    for dma in prefix:
+        if dma.dst.buffer.name in written_in_rest or dma.dst.buffer.name in outside_refs:
+            return 0
+        if dma.src.buffer.name in written_in_rest:
+            return 0
+    return len(prefix)
+
+
+def _rewrite_loop(loop: For, n_prefetch: int, pp_defs: dict[str, BufferDef]) -> list[Stmt]:
+    prefetch = loop.body[:n_prefetch]
+    compute = loop.body[n_prefetch:]
+    to_b1: dict[str, BufferDef] = {}
+    for s in prefetch:
+        orig = _as_dma(s).dst.buffer
+        if orig.name not in pp_defs:
+            pp_defs[orig.name] = replace(orig, name=f"{orig.name}{PING_PONG_SUFFIX}", shape=list(orig.shape))
+        to_b1[orig.name] = pp_defs[orig.name]
+
+    def emit(stmts, repl, rename):
+        sub = _Subst(loop, repl, rename)
+        return [sub.stmt(s) for s in stmts]
+
+    n = int(loop.extent)
+    even = n % 2 == 0
+    # Each steady iteration covers one pair and prefetches the first
+    # tile of the next pair, so the final pair (N even) or lone last
+    # tile (N odd) is peeled into the epilogue.
+    steady = (n - 1) // 2
+
+    out: list[Stmt] = []
+    out += emit(prefetch, 0, {})
+    if steady > 0:
+        body: list[Stmt] = []
+        body += emit(prefetch, _affine(loop, 2, 1), to_b1)
+        body += emit(compute, _affine(loop, 2, 0), {})
+        body += emit(prefetch, _affine(loop, 2, 2), {})
+        body += emit(compute, _affine(loop, 2, 1), to_b1)
+        out.append(replace(loop, extent=steady, body=body))
+    if even:
+        out += emit(prefetch, n - 1, to_b1)
+        out += emit(compute, n - 2, {})
+        out += emit(compute, n - 1, to_b1)
+    else:
+        out += emit(compute, n - 1, {})
+    return out
+
+
+def _walk_body(
+    stmts: list[Stmt],
+    func_refs: dict[int, set[str]],
+    pp_defs: dict[str, BufferDef],
+    rewritten: list[str],
+) -> list[Stmt]:
+    out: list[Stmt] = []
+    for s in stmts:
+        if isinstance(s, For):
+            outside = func_refs[id(s)]
+            n_prefetch = _eligible(s, outside)
+            if n_prefetch:
+                rewritten.append(s.loop_var)
+                out.extend(_rewrite_loop(s, n_prefetch, pp_defs))
+                continue
+            out.append(replace(s, body=_walk_body(s.body, func_refs, pp_defs, rewritten)))
+        elif isinstance(s, (ParallelAxis, Async)):
+            out.append(replace(s, body=_walk_body(s.body, func_refs, pp_defs, rewritten)))
+        else:
+            out.append(s)
+    return out
+
+
+def _outside_refs(func: MidFunc) -> dict[int, set[str]]:
+    """For every ``For`` in ``func``, the set of buffer names referenced
+    anywhere in the function *outside* that loop."""
+    all_counts: dict[str, int] = {}
+    per_loop: dict[int, dict[str, int]] = {}
+
+    def count(s: Stmt, acc: dict[str, int]) -> None:
+        for ref, _ in _refs_of(s):
+            acc[ref.buffer.name] = acc.get(ref.buffer.name, 0) + 1
+
+    def visit(s: Stmt) -> None:
+        if isinstance(s, For):
+            inner: dict[str, int] = {}
+            for b in s.body:
+                count(b, inner)
+            per_loop[id(s)] = inner
+        if isinstance(s, (ParallelAxis, For, Async)):
+            for b in s.body:
+                visit(b)
+
+    for s in func.body:
+        count(s, all_counts)
+        visit(s)
+    return {
+        loop_id: {name for name, c in all_counts.items() if c > inner.get(name, 0)}
+        for loop_id, inner in per_loop.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Public entry
+# ---------------------------------------------------------------------------
+
+
+def run(func: MidFunc) -> MidFunc:
+    """Double-buffer every eligible prefetch loop in ``func``.
+
+    The names of rewritten loops are recorded in
+    ``attrs["plena.double_buffered"]`` (comma-separated) so the midir
+    dump shows which loops were touched."""
+    pp_defs: dict[str, BufferDef] = {}
+    rewritten: list[str] = []
+    new_body = _walk_body(func.body, _outside_refs(func), pp_defs, rewritten)
+    if not rewritten:
+        return func
+    attrs = dict(func.attrs)
+    attrs["plena.double_buffered"] = ",".join(rewritten)
+    return MidFunc(
+        name=func.name,
+        params=list(func.params),
+        allocs=list(func.allocs) + list(pp_defs.values()),
+        body=new_body,
+        lane_axes=list(func.lane_axes),
+        cluster_counts=list(func.cluster_counts),
+        attrs=attrs,
+    )
+
+
+__all__ = ["PING_PONG_SUFFIX", "DoubleBufferError", "run"]
@@ -31,8 +31,8 @@ Anything that doesn't match one of the above is preserved as a raw
 flash_attention_min op set everything is expected to fold.
 
 Structure-preserving wrappers (For with thread_tag, AttrStmt for
-KIND, SeqStmt, BlockRealize) are translated to mid_ir's For + body
-list as appropriate. Raw structure isn't carried over verbatim — the
+KIND / RUNTIME_EXTENT / STATIC_EXTENT, SeqStmt, BlockRealize) are
+translated to mid_ir's For + body list as appropriate. Raw structure isn't carried over verbatim — the
 output is purely mid_ir nodes.
 
 Scope
@@ -89,6 +89,8 @@ _TILEOP_GEMM = "tl.tileop.gemm_py"
 _TILEOP_REDUCE = "tl.tileop.reduce"
 _TILEOP_REGION = "tl.tileop.region"
 _KIND_KEY = "plena.gemm_kind"
+_RUNTIME_EXTENT_KEY = "plena.runtime_extent"
+_STATIC_EXTENT_KEY = "plena.static_extent"
 _LANE_AXIS_FUNC_ATTR = "plena.lane_axis"
 
 
@@ -1127,6 +1129,28 @@ def _is_serial_for(stmt: tir.For) -> bool:
     return stmt.kind == tir.ForKind.SERIAL
 
 
+def _with_runtime_extent(attr: tir.AttrStmt, inner: list):
+    """Attach a ``T.attr(0, RUNTIME_EXTENT, addr)`` to the single serial
+    For it wraps (see frontend/loop_macros.py)."""
+    if not isinstance(attr.value, tir.IntImm):
+        raise FoldError(f"{_RUNTIME_EXTENT_KEY} value must be an IntRAM address literal, got {attr.value!r}")
+    if len(inner) != 1 or not isinstance(inner[0], For) or inner[0].kind != "serial":
+        raise FoldError(
+            f"{_RUNTIME_EXTENT_KEY} must wrap exactly one T.serial loop; got "
+            f"{[type(s).__name__ for s in inner]}"
+        )
+    inner[0].runtime_extent = int(attr.value.value)
+    return inner[0]
+
+
+def _with_static_extent(inner: list):
+    """Unwrap a ``T.attr(0, STATIC_EXTENT, _)`` -- the single For it
+    wraps keeps its static extent as the trip count."""
+    if len(inner) != 1 or not isinstance(inner[0], For):
+        raise FoldError(f"{_STATIC_EXTENT_KEY} must wrap exactly one loop; got {[type(s).__name__ for s in inner]}")
+    return inner[0]
+
+
 def _walk_stmt(stmt, buf_table: dict[str, BufferDef], current_kind: str | None) -> list:
     """Walk one TIR Stmt, return a list of mid_ir Stmt items.
 
@@ -1151,6 +1175,10 @@ def _walk_stmt(stmt, buf_table: dict[str, BufferDef], current_kind: str | None)
             v = stmt.value
             kind = v.value if isinstance(v, tir.StringImm) else str(v)
             return _walk_stmt(stmt.body, buf_table, current_kind=kind)
+        if stmt.attr_key == _RUNTIME_EXTENT_KEY:
+            return [_with_runtime_extent(stmt, _walk_stmt(stmt.body, buf_table, current_kind))]
+        if stmt.attr_key == _STATIC_EXTENT_KEY:
+            return [_with_static_extent(_walk_stmt(stmt.body, buf_table, current_kind))]
         if stmt.attr_key == "thread_extent" and isinstance(stmt.node, tir.IterVar):
             iv = stmt.node
             inner = _walk_stmt(stmt.body, buf_table, current_kind)
@@ -222,6 +222,7 @@ def _walk(stmt: Stmt, cluster_stack: list[_ClusterAxis]) -> Stmt:
             body=[_walk(s, cluster_stack) for s in stmt.body],
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         return _fuse_async(stmt, cluster_stack)
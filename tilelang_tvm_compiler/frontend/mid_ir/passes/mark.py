@@ -194,6 +194,7 @@ def _walk(stmt: Stmt) -> Stmt:
             body=[_walk(s) for s in stmt.body],
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, ParallelAxis):
         return ParallelAxis(
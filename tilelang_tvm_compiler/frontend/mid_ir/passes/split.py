@@ -249,6 +249,7 @@ def _walk_stmt(stmt: Stmt, ctx: _Ctx) -> Stmt:
             body=[_walk_stmt(s, ctx) for s in stmt.body],
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         return Async(
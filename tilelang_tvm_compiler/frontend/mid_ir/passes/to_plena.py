@@ -2524,6 +2524,8 @@ def _walk_stmt(
             body=body,
         )
         for_op.annotations["loop_kind"] = stmt.kind
+        if stmt.runtime_extent is not None:
+            for_op.annotations["runtime_extent"] = stmt.runtime_extent
         return [for_op]
     if isinstance(stmt, Async):
         # By pass_5 every Async should be MultiLaneOp; if it lingers,
@@ -557,6 +557,7 @@ def _walk(stmt: Stmt, ctx: _ClusterCtx | None, bhsd_buffers: set) -> Stmt:
             body=[_walk(s, ctx, bhsd_buffers) for s in stmt.body],
             kind=stmt.kind,
             loop_var_var=stmt.loop_var_var,
+            runtime_extent=stmt.runtime_extent,
         )
     if isinstance(stmt, Async):
         return Async(
@@ -0,0 +1,427 @@
+"""Two-phase GP register allocation: virtual-register emit + linear scan.
+
+The default ``RegisterAllocator`` is a greedy free-list that decides
+physical GPs *while* the ISA pass is emitting, and falls back to
+``S_ST_INT``/``S_LD_INT`` auto-spill whenever the pool runs dry. In
+nested kernels the spill victim is simply "most recently allocated
+unpinned GP", which can land inside hot inner loops.
+
+This module provides an opt-in alternative (``compile_kernel(...,
+gp_alloc="linear_scan")``):
+
+    Phase 1  ``VirtualRegisterAllocator`` hands out fresh *virtual* GP
+             ids (``gp16``, ``gp17``, ...) and never spills. The ISA
+             pass runs unchanged, producing ISA text over an unbounded
+             register file.
+    Phase 2  ``linear_scan_allocate`` parses that text into a typed
+             instruction buffer (``GpInstr``), computes one live
+             interval per virtual register (extended across every
+             hardware loop it is live into), then assigns the 15 usable
+             physical GPs with linear scan. When pressure exceeds the
+             register file, the interval with the lowest spill cost is
+             split into per-access ranges (spill-everywhere): a store
+             after every def, a reload into a reserved scratch GP before
+             every use. Spill cost weights every access by
+             ``LOOP_DEPTH_WEIGHT ** loop_depth`` so values touched inside
+             inner loops stay in registers.
+
+Hardware loop counters (``C_LOOP_START``/``C_LOOP_END`` operand) are
+never spilled: ``C_LOOP_END`` decrements the register in place.
+
+Both allocators produce a ``GpAllocReport`` so spill traffic can be
+compared directly (``report_from_greedy_trace`` for the greedy path).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from .register_alloc import (
+    SPILL_BASE,
+    SPILL_SLOTS,
+    BorrowToken,
+    RegisterAllocator,
+    RegisterExhausted,
+)
+
+# First virtual register id. Anything >= this is virtual; gp0..gp15
+# are physical (gp0 is the constant-zero register and is passed
+# through untouched).
+VIRTUAL_GP_BASE = 16
+
+# Spill-cost multiplier per level of hardware-loop nesting.
+LOOP_DEPTH_WEIGHT = 10
+
+# Opcodes whose first GP operand is written. Every other GP operand (and
+# every GP operand of any other opcode) is a read. Vector / matrix / DMA
+# ops take their SRAM/HBM addresses in GPs but never write them back.
+_GP_DEF_OPCODES = frozenset(
+    {
+        "S_ADD_INT",
+        "S_ADDI_INT",
+        "S_SUB_INT",
+        "S_MUL_INT",
+        "S_LUI_INT",
+        "S_LD_INT",
+        "S_SLL_INT",
+        "S_SLLI_INT",
+        "S_SRL_INT",
+        "S_SRLI_INT",
+        "C_LOOP_START",
+    }
+)
+
+_GP_TOKEN = re.compile(r"\bgp(\d+)\b")
+
+
+class VirtualRegisterAllocator(RegisterAllocator):
+    """Phase-1 allocator: every ``allocate_gp`` returns a fresh virtual
+    register id and nothing is ever spilled or reused.
+
+    Pin / unpin, the IntRAM idx-slot pool and the address-register pool
+    behave exactly as in ``RegisterAllocator`` so the ISA pass does not
+    need to know which mode it runs in."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._next_virtual = VIRTUAL_GP_BASE
+
+    def allocate_gp(self, n: int) -> list[int]:
+        out = list(range(self._next_virtual, self._next_virtual + n))
+        self._next_virtual += n
+        self._gp_in_use.extend(out)
+        self._record("allocate_gp", n=n, regs=",".join(str(r) for r in out))
+        return out
+
+    def free_gp(self, regs) -> None:
+        for r in regs:
+            if r in self._gp_in_use:
+                self._gp_in_use.remove(r)
+                self._record("free_gp", regs=str(r))
+            else:
+                self._record("free_gp_noop", regs=str(r))
+
+    def spill_borrow(self, n: int, *, compiler, protect=None) -> tuple[list[int], BorrowToken]:
+        borrowed = self.allocate_gp(n)
+        self._record("spill_borrow", n=n, regs=",".join(str(r) for r in borrowed), spilled="")
+        return borrowed, BorrowToken(borrowed=borrowed)
+
+    def spill_return(self, token: BorrowToken, *, compiler) -> None:
+        self.free_gp(token.borrowed)
+
+
+@dataclass
+class GpInstr:
+    """One line of the phase-1 ISA, with its GP operands classified."""
+
+    index: int
+    text: str
+    opcode: str | None  # None for comment / blank lines
+    defs: list[int] = field(default_factory=list)
+    uses: list[int] = field(default_factory=list)
+    loop_depth: int = 0
+
+
+@dataclass
+class LiveInterval:
+    vreg: int
+    start: int
+    end: int
+    cost: float = 0.0
+    spillable: bool = True
+    phys: int | None = None
+    spill_slot: int | None = None
+
+
+@dataclass
+class GpAllocReport:
+    """Spill statistics for one compiled kernel."""
+
+    allocator: str
+    spilled_values: int = 0
+    spill_stores: int = 0
+    spill_reloads: int = 0
+    virtual_registers: int = 0
+    max_pressure: int = 0
+
+    @property
+    def spill_instructions(self) -> int:
+        return self.spill_stores + self.spill_reloads
+
+    def summary(self) -> str:
+        return (
+            f"[gp-alloc:{self.allocator}] spilled_values={self.spilled_values} "
+            f"spill_instructions={self.spill_instructions} "
+            f"(stores={self.spill_stores}, reloads={self.spill_reloads})"
+            + (
+                f" virtual_regs={self.virtual_registers} max_pressure={self.max_pressure}"
+                if self.allocator != "greedy"
+                else ""
+            )
+        )
+
+
+def report_from_greedy_trace(trace: list[dict]) -> GpAllocReport:
+    """Summarise the greedy allocator's ``gp_trace`` as a ``GpAllocReport``."""
+    report = GpAllocReport(allocator="greedy")
+    for row in trace:
+        event = row.get("event")
+        if event in ("auto_spill", "borrow_spill"):
+            report.spilled_values += 1
+            report.spill_stores += 1
+        elif event in ("auto_reload", "borrow_reload"):
+            report.spill_reloads += 1
+    return report
+
+
+def parse_instructions(isa_text: str) -> list[GpInstr]:
+    """Split ISA text into ``GpInstr`` records with def/use sets and
+    hardware-loop depth filled in."""
+    out: list[GpInstr] = []
+    depth = 0
+    for i, line in enumerate(isa_text.splitlines()):
+        code = line.split(";", 1)[0].strip()
+        if not code:
+            out.append(GpInstr(index=i, text=line, opcode=None, loop_depth=depth))
+            continue
+        parts = code.split(None, 1)
+        opcode = parts[0]
+        operands = [o.strip() for o in parts[1].split(",")] if len(parts) > 1 else []
+        instr = GpInstr(index=i, text=line, opcode=opcode)
+        for pos, operand in enumerate(operands):
+            m = _GP_TOKEN.fullmatch(operand)
+            if m is None:
+                continue
+            reg = int(m.group(1))
+            if reg == 0:
+                continue
+            if pos == 0 and opcode in _GP_DEF_OPCODES:
+                instr.defs.append(reg)
+            else:
+                instr.uses.append(reg)
+        if opcode == "C_LOOP_END":
+            # Decrement-in-place: the counter is both read and written.
+            instr.defs.extend(instr.uses)
+            instr.loop_depth = depth
+            depth -= 1
+        else:
+            instr.loop_depth = depth
+            if opcode == "C_LOOP_START":
+                depth += 1
+        out.append(instr)
+    return out
+
+
+def _loop_spans(instrs: list[GpInstr]) -> list[tuple[int, int]]:
+    """Return ``(start_idx, end_idx)`` for every hardware loop."""
+    spans: list[tuple[int, int]] = []
+    stack: list[int] = []
+    for ins in instrs:
+        if ins.opcode == "C_LOOP_START":
+            stack.append(ins.index)
+        elif ins.opcode == "C_LOOP_END":
+            if not stack:
+                raise RegisterExhausted(f"unbalanced C_LOOP_END at line {ins.index}")
+            spans.append((stack.pop(), ins.index))
+    if stack:
+        raise RegisterExhausted(f"unterminated C_LOOP_START at line(s) {stack}")
+    return spans
+
+
+def build_intervals(instrs: list[GpInstr]) -> dict[int, LiveInterval]:
+    """One interval per virtual register, conservatively covering every
+    loop the value is live into (loop-carried values stay live for the
+    whole body, since the back-edge re-reads them)."""
+    intervals: dict[int, LiveInterval] = {}
+    first_access_is_use: dict[int, bool] = {}
+    for ins in instrs:
+        weight = LOOP_DEPTH_WEIGHT**ins.loop_depth
+        for reg in ins.uses + ins.defs:
+            if reg < VIRTUAL_GP_BASE:
+                continue
+            iv = intervals.get(reg)
+            if iv is None:
+                iv = intervals[reg] = LiveInterval(vreg=reg, start=ins.index, end=ins.index)
+                first_access_is_use[reg] = reg in ins.uses
+            iv.end = max(iv.end, ins.index)
+            iv.cost += weight
+            if ins.opcode in ("C_LOOP_START", "C_LOOP_END"):
+                iv.spillable = False
+
+    spans = _loop_spans(instrs)
+    changed = True
+    while changed:
+        changed = False
+        for lo, hi in spans:
+            for iv in intervals.values():
+                touches = iv.start <= hi and iv.end > lo
+                if not touches:
+                    continue
+                live_in = iv.start < lo or (iv.start > lo and first_access_is_use[iv.vreg])
+                if live_in and (iv.start > lo or iv.end < hi):
+                    iv.start = min(iv.start, lo)
+                    iv.end = max(iv.end, hi)
+                    changed = True
+    return intervals
+
+
+def _scan(
+    intervals: list[LiveInterval],
+    physical: list[int],
+) -> tuple[list[LiveInterval], int]:
+    """Classic linear scan. Returns (spilled intervals, max pressure)."""
+    free = list(physical)
+    active: list[LiveInterval] = []
+    spilled: list[LiveInterval] = []
+    max_pressure = 0
+    for iv in sorted(intervals, key=lambda x: (x.start, x.end)):
+        iv.phys = None
+        # Expire intervals that ended before this one starts.
+        for old in [a for a in active if a.end < iv.start]:
+            active.remove(old)
+            free.insert(0, old.phys)
+        max_pressure = max(max_pressure, len(active) + 1)
+        if free:
+            iv.phys = free.pop(0)
+            active.append(iv)
+            continue
+        candidates = [a for a in active if a.spillable]
+        if iv.spillable:
+            candidates.append(iv)
+        if not candidates:
+            raise RegisterExhausted(
+                f"linear-scan: {len(active) + 1} simultaneously-live unspillable "
+                f"GPs (loop counters) exceed the {len(physical)} available"
+            )
+        # Cheapest per unit of range freed; ties go to the longest range.
+        victim = min(candidates, key=lambda a: (a.cost / (a.end - a.start + 1), -a.end))
+        spilled.append(victim)
+        if victim is not iv:
+            iv.phys = victim.phys
+            victim.phys = None
+            active.remove(victim)
+            active.append(iv)
+    return spilled, max_pressure
+
+
+def linear_scan_allocate(
+    isa_text: str,
+    *,
+    gp_total: int = 16,
+    gp_reserved: tuple[int, ...] = (0,),
+    scratch_count: int = 3,
+) -> tuple[str, GpAllocReport]:
+    """Rewrite phase-1 ISA (virtual GPs) to physical GPs.
+
+    ``scratch_count`` GPs are held back for spill reloads only when the
+    first attempt without them runs out of registers; 3 covers the
+    widest GP-operand instruction (``S_ADD_INT rd, rs1, rs2``).
+    """
+    instrs = parse_instructions(isa_text)
+    intervals = build_intervals(instrs)
+    physical = [r for r in range(gp_total) if r not in set(gp_reserved)]
+    for reg in {r for ins in instrs for r in ins.uses + ins.defs}:
+        if reg < VIRTUAL_GP_BASE:
+            raise RegisterExhausted(
+                f"linear-scan: phase-1 ISA references physical gp{reg}; "
+                f"every GP must come from VirtualRegisterAllocator"
+            )
+
+    spilled, max_pressure = _scan(list(intervals.values()), physical)
+    scratch: list[int] = []
+    if spilled:
+        scratch = physical[-scratch_count:]
+        spilled, max_pressure = _scan(list(intervals.values()), physical[:-scratch_count])
+
+    # Spill slots: reuse a slot once the interval that held it has ended.
+    slot_free_at: list[int] = []
+    for iv in sorted(spilled, key=lambda x: x.start):
+        for slot, busy_until in enumerate(slot_free_at):
+            if busy_until < iv.start:
+                iv.spill_slot = slot
+                slot_free_at[slot] = iv.end
+                break
+        else:
+            iv.spill_slot = len(slot_free_at)
+            slot_free_at.append(iv.end)
+        if iv.spill_slot >= SPILL_SLOTS:
+            raise RegisterExhausted(f"linear-scan: spill slots exhausted ({SPILL_SLOTS} used)")
+
+    report = GpAllocReport(
+        allocator="linear_scan",
+        spilled_values=len(spilled),
+        virtual_registers=len(intervals),
+        max_pressure=max_pressure,
+    )
+
+    def _rename_comment(text: str) -> str:
+        def _sub(m: re.Match) -> str:
+            iv = intervals.get(int(m.group(1)))
+            if iv is None:
+                return m.group(0)
+            return f"gp{iv.phys}" if iv.phys is not None else f"vgp{iv.vreg}"
+
+        return _GP_TOKEN.sub(_sub, text)
+
+    lines: list[str] = []
+    for ins in instrs:
+        if ins.opcode is None:
+            lines.append(_rename_comment(ins.text))
+            continue
+        code, sep, comment = ins.text.partition(";")
+        # Map every spilled vreg touched by this instruction to a scratch.
+        local: dict[int, int] = {}
+        for reg in dict.fromkeys(ins.uses + ins.defs):
+            iv = intervals[reg]
+            if iv.phys is None:
+                if len(local) >= len(scratch):
+                    raise RegisterExhausted(
+                        f"linear-scan: line {ins.index} ({ins.text.strip()!r}) touches more "
+                        f"spilled values than the {len(scratch)} scratch GPs"
+                    )
+                local[reg] = scratch[len(local)]
+        reload_lines: list[str] = []
+        store_lines: list[str] = []
+        for reg, tmp in local.items():
+            addr = SPILL_BASE + intervals[reg].spill_slot
+            if reg in ins.uses:
+                reload_lines.append(f"S_LD_INT gp{tmp}, gp0, {addr}")
+                report.spill_reloads += 1
+            if reg in ins.defs:
+                store_lines.append(f"S_ST_INT gp{tmp}, gp0, {addr}")
+                report.spill_stores += 1
+
+        def _sub_code(m: re.Match, local=local) -> str:
+            reg = int(m.group(1))
+            if reg == 0:
+                return m.group(0)
+            if reg in local:
+                return f"gp{local[reg]}"
+            return f"gp{intervals[reg].phys}"
+
+        new_line = _GP_TOKEN.sub(_sub_code, code)
+        if sep:
+            new_line = new_line + sep + _rename_comment(comment)
+        lines.extend(reload_lines)
+        lines.append(new_line)
+        lines.extend(store_lines)
+
+    out = "\n".join(lines)
+    if isa_text.endswith("\n"):
+        out += "\n"
+    return out, report
+
+
+__all__ = [
+    "LOOP_DEPTH_WEIGHT",
+    "VIRTUAL_GP_BASE",
+    "GpAllocReport",
+    "GpInstr",
+    "LiveInterval",
+    "VirtualRegisterAllocator",
+    "build_intervals",
+    "linear_scan_allocate",
+    "parse_instructions",
+    "report_from_greedy_trace",
+]
@@ -0,0 +1,251 @@
+"""Shape-family HLIR templates: run mid_ir once, specialise per shape.
+
+Sweeping one shape knob (``num_kv_blocks``, ``num_s_blocks``, ...)
+used to mean one full raw-TIR compile per point, even though the
+pre-address-alloc HLIR of every point has the same op tree and only
+differs in a handful of integer leaves: buffer extents along the swept
+axis, loop extents, tile counts, slice extents.
+
+This module captures that: given the HLIR at two probe points ``p0`` /
+``p1`` of a scalar parameter ``p``, :func:`fit_template` walks both
+modules in lock-step and records every integer leaf that differs as an
+affine function ``v(p) = v0 + (v1 - v0) * (p - p0) / (p1 - p0)``. All
+other leaves must match exactly (``tir.Var`` objects are matched by
+position, so each probe's fresh loop vars line up). The result is an
+:class:`HlirTemplate`; :meth:`HlirTemplate.instantiate` rebuilds a
+fresh, unallocated ``HLIRModule`` for any ``p`` by substitution --
+no TIR, no mid_ir -- ready for AddressAllocationPass + ISA emit.
+
+Affine is an assumption, not a proof: callers validate a template
+against a third probe (:meth:`HlirTemplate.matches`) before trusting
+it, and only within the range the probes span -- a point outside
+:meth:`HlirTemplate.covers` must be compiled and checked (then
+:meth:`HlirTemplate.widen`) before the template is reused there. Anything structural that moves with ``p`` (a different op count,
+a ceildiv that isn't linear in ``p``, a changed dtype) raises
+:class:`HlirFamilyError` and the caller falls back to full compiles.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+from fractions import Fraction
+from typing import Any
+
+import tvm
+from tvm import tir
+
+from .hlir import HLIRModule
+
+
+class HlirFamilyError(RuntimeError):
+    pass
+
+
+# PrimExpr node types rebuilt child-by-child (so an affine constant
+# nested inside a slice start like ``kv_block * 64 + C`` still fits).
+_BINARY_EXPRS = (
+    tir.Add,
+    tir.Sub,
+    tir.Mul,
+    tir.Div,
+    tir.Mod,
+    tir.FloorDiv,
+    tir.FloorMod,
+    tir.Min,
+    tir.Max,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class _Affine:
+    """Integer leaf ``v0 + slope * (p - p0)``; ``dtype`` set for IntImm."""
+
+    v0: int
+    slope: Fraction
+    p0: int
+    dtype: str | None = None
+
+    def at(self, p: int) -> int:
+        v = self.v0 + self.slope * (p - self.p0)
+        if v.denominator != 1:
+            raise HlirFamilyError(f"affine leaf {self} is not integral at p={p} ({v})")
+        return int(v)
+
+
+@dataclasses.dataclass(frozen=True)
+class _ExprT:
+    """Binary PrimExpr whose children (transitively) hold an _Affine."""
+
+    cls: type
+    a: Any
+    b: Any
+
+
+class _Zipper:
+    """Lock-step walk of two HLIR values.
+
+    ``fit=True`` turns differing ints into :class:`_Affine` leaves;
+    ``fit=False`` raises on any difference (template validation).
+    """
+
+    def __init__(self, p0: int, p1: int, *, fit: bool) -> None:
+        self.p0 = p0
+        self.p1 = p1
+        self.fit = fit
+        # (b-var, a-var) pairs. tvm hands out fresh Python wrappers for
+        # the same node, so match with ``same_as`` rather than ``id``.
+        self.var_pairs: list[tuple[tir.Var, tir.Var]] = []
+        self.affine_leaves = 0
+
+    def _mismatch(self, a, b, path: str):
+        raise HlirFamilyError(f"HLIR differs at {path}: {a!r} vs {b!r}")
+
+    def _int(self, a: int, b: int, path: str, dtype: str | None = None):
+        if a == b:
+            return a
+        if not self.fit:
+            self._mismatch(a, b, path)
+        self.affine_leaves += 1
+        return _Affine(v0=a, slope=Fraction(b - a, self.p1 - self.p0), p0=self.p0, dtype=dtype)
+
+    def zip(self, a, b, path: str = "mod"):
+        if type(a) is not type(b):
+            self._mismatch(type(a).__name__, type(b).__name__, path)
+        if a is None or isinstance(a, (bool, str, float, enum.Enum)):
+            if a != b:
+                self._mismatch(a, b, path)
+            return a
+        if isinstance(a, int):
+            return self._int(a, b, path)
+        if isinstance(a, tir.IntImm):
+            if a.dtype != b.dtype:
+                self._mismatch(a.dtype, b.dtype, path)
+            if int(a.value) == int(b.value):
+                return a
+            return self._int(int(a.value), int(b.value), path, dtype=str(a.dtype))
+        if isinstance(a, tir.Var):
+            for vb, va in self.var_pairs:
+                if vb.same_as(b) or va.same_as(a):
+                    if not (vb.same_as(b) and va.same_as(a)):
+                        self._mismatch(a, b, path)
+                    return a
+            self.var_pairs.append((b, a))
+            return a
+        if isinstance(a, _BINARY_EXPRS):
+            ta = self.zip(a.a, b.a, f"{path}.a")
+            tb = self.zip(a.b, b.b, f"{path}.b")
+            if isinstance(ta, (_Affine, _ExprT)) or isinstance(tb, (_Affine, _ExprT)):
+                return _ExprT(type(a), ta, tb)
+            return a
+        if isinstance(a, (list, tuple)):
+            if len(a) != len(b):
+                self._mismatch(len(a), len(b), f"{path}.len")
+            return type(a)(self.zip(x, y, f"{path}[{i}]") for i, (x, y) in enumerate(zip(a, b)))
+        if isinstance(a, dict):
+            if list(a) != list(b):
+                self._mismatch(list(a), list(b), f"{path}.keys")
+            return {k: self.zip(a[k], b[k], f"{path}[{k!r}]") for k in a}
+        if dataclasses.is_dataclass(a):
+            fields = {
+                f.name: self.zip(getattr(a, f.name), getattr(b, f.name), f"{path}.{f.name}")
+                for f in dataclasses.fields(a)
+            }
+            return _DataT(type(a), fields)
+        if isinstance(a, tvm.runtime.Object):
+            if not tvm.ir.structural_equal(a, b, map_free_vars=True):
+                self._mismatch(a, b, path)
+            return a
+        if a != b:
+            self._mismatch(a, b, path)
+        return a
+
+
+@dataclasses.dataclass
+class _DataT:
+    """Dataclass instance in template form (rebuilt on instantiate)."""
+
+    cls: type
+    fields: dict[str, Any]
+
+
+def _instantiate(t, p: int):
+    if isinstance(t, _Affine):
+        v = t.at(p)
+        return v if t.dtype is None else tir.IntImm(t.dtype, v)
+    if isinstance(t, _ExprT):
+        return t.cls(_instantiate(t.a, p), _instantiate(t.b, p))
+    if isinstance(t, _DataT):
+        return t.cls(**{k: _instantiate(v, p) for k, v in t.fields.items()})
+    if isinstance(t, (list, tuple)):
+        return type(t)(_instantiate(x, p) for x in t)
+    if isinstance(t, dict):
+        return {k: _instantiate(v, p) for k, v in t.items()}
+    # Leaves (ints, strs, tir.Var, untouched PrimExprs) are immutable or
+    # shared by design -- loop vars are bound per-compile by identity.
+    return t
+
+
+@dataclasses.dataclass
+class HlirTemplate:
+    """Pre-address-alloc HLIR with affine integer leaves in ``param``.
+
+    ``lo`` / ``hi`` bound the probes the template has been checked
+    against; instantiating outside them is extrapolation.
+    """
+
+    param: str
+    p0: int
+    p1: int
+    tree: Any
+    affine_leaves: int
+    lo: int
+    hi: int
+
+    def covers(self, p: int) -> bool:
+        return self.lo <= p <= self.hi
+
+    def widen(self, p: int) -> None:
+        """Extend the validated range to ``p`` (after :meth:`matches`)."""
+        self.lo = min(self.lo, p)
+        self.hi = max(self.hi, p)
+
+    def instantiate(self, p: int) -> HLIRModule:
+        """Fresh, unallocated HLIRModule for ``param = p``."""
+        mod = _instantiate(self.tree, int(p))
+        if not isinstance(mod, HLIRModule):
+            raise HlirFamilyError(f"template root is {type(mod).__name__}, expected HLIRModule")
+        return mod
+
+    def matches(self, p: int, mod: HLIRModule) -> bool:
+        """True iff ``instantiate(p)`` is leaf-for-leaf equal to ``mod``."""
+        try:
+            _Zipper(p, p + 1, fit=False).zip(self.instantiate(p), mod)
+        except HlirFamilyError:
+            return False
+        return True
+
+
+def fit_template(param: str, p0: int, mod0: HLIRModule, p1: int, mod1: HLIRModule) -> HlirTemplate:
+    """Fit an affine-in-``param`` template from two probe modules.
+
+    Both modules must be pre-address-alloc (fresh from to_plena +
+    dead_buffer_elim). Raises :class:`HlirFamilyError` if they differ
+    structurally.
+    """
+    if p0 == p1:
+        raise HlirFamilyError(f"probe points must differ, got {param}={p0} twice")
+    z = _Zipper(p0, p1, fit=True)
+    tree = z.zip(mod0, mod1)
+    return HlirTemplate(
+        param=param,
+        p0=p0,
+        p1=p1,
+        tree=tree,
+        affine_leaves=z.affine_leaves,
+        lo=min(p0, p1),
+        hi=max(p0, p1),
+    )
+
+
+__all__ = ["HlirFamilyError", "HlirTemplate", "fit_template"]
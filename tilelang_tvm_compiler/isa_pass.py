@@ -27,6 +27,7 @@ from . import scope as _scope
 from .expr_materializer import ExprMaterializer, MaterializedExpr
 from .isa_emitter import ISAEmitter
 from .program_shim import ProgramShim
+from .register_alloc import SPILL_BASE
 
 
 class IsaEmissionError(RuntimeError):
@@ -2890,6 +2891,15 @@ class IsaEmitterPass:
             * init must be int (typically 0). PrimExpr inits are
               unsupported for the same reason: would force runtime
               loop-bound recomputation.
+
+        Runtime trip count (``annotations["runtime_extent"]`` = IntRAM
+        address, see frontend/loop_macros.py): ``extent`` is the
+        maximum and goes into C_LOOP_START as usual. After the idx
+        increment we overwrite the hardware counter with
+        ``intram[addr] - (idx + 1)`` -- the iterations still to run --
+        so C_LOOP_END falls through once ``idx`` reaches the runtime
+        count. Serial only; the runtime count must be in
+        ``[1, extent]``.
         """
         loop_var = op.annotations.get("loop_var")
         extent = op.annotations.get("extent")
@@ -2900,8 +2910,9 @@ class IsaEmitterPass:
             raise IsaEmissionError(
                 f"for-op extent must be a compile-time integer (PLENA's "
                 f"C_LOOP_START takes an immediate). Got {type(extent).__name__}: "
-                f"{extent!r}. Restructure the kernel so the loop bound is known "
-                f"at TIR-construction time."
+                f"{extent!r}. Give the loop its maximum extent and tag it with "
+                f"T.attr(0, RUNTIME_EXTENT, intram_addr) (frontend/loop_macros.py) "
+                f"for a trip count only known at run time."
             )
         if not isinstance(init, (int, tir.IntImm)):
             raise IsaEmissionError(f"for-op init must be a compile-time integer. Got {type(init).__name__}: {init!r}.")
@@ -2917,6 +2928,18 @@ class IsaEmitterPass:
 
         ra = self.shim.compiler.register_allocator
         loop_kind = op.annotations.get("loop_kind", "serial")
+        runtime_extent = op.annotations.get("runtime_extent")
+        if runtime_extent is not None:
+            if loop_kind in ("unroll", "unrolled"):
+                raise IsaEmissionError(
+                    f"loop {loop_var.name!r} has a runtime extent; it can't be "
+                    f"unrolled (the trip count isn't known at compile time)"
+                )
+            if not 0 <= int(runtime_extent) < SPILL_BASE:
+                raise IsaEmissionError(
+                    f"runtime_extent address {runtime_extent} of loop {loop_var.name!r} "
+                    f"must be in the IntRAM user region [0, {SPILL_BASE})"
+                )
 
         # Compile-time unroll: emit the body N times back-to-back with
         # loop_var rebound to a literal each iteration. Use this to break
@@ -3011,8 +3034,16 @@ class IsaEmitterPass:
             f"S_LD_INT gp{inc_gp}, gp0, {idx_addr}\n"
             f"S_ADDI_INT gp{inc_gp}, gp{inc_gp}, 1\n"
             f"S_ST_INT gp{inc_gp}, gp0, {idx_addr}\n"
-            f"C_LOOP_END gp{gp_loop}\n"
         )
+        if runtime_extent is not None:
+            # Remaining iterations = runtime count - iterations done.
+            # Zero makes C_LOOP_END fall through.
+            self.shim.compiler.generated_code += (
+                f"; runtime trip count: hw counter = ram[{runtime_extent}] - {loop_var.name}\n"
+                f"S_LD_INT gp{gp_loop}, gp0, {runtime_extent}\n"
+                f"S_SUB_INT gp{gp_loop}, gp{gp_loop}, gp{inc_gp}\n"
+            )
+        self.shim.compiler.generated_code += f"C_LOOP_END gp{gp_loop}\n"
         ra.free_gp([inc_gp])
 
         ra.unpin_gp(gp_loop)
@@ -43,6 +43,14 @@ FP slot layout (1 flat FPRAM region starting at FPRAM_USER_BASE):
 The kernel does NOT write back to HBM. The output ends up in FPRAM at
 ``O_FP``; the testbench reads FPRAM directly to compare against golden
 (``compare_fpsram_output=True`` in comparison_params).
+
+Runtime kv length (``runtime_kv_len=True``): ``num_kv_blocks`` becomes
+the *maximum* number of MLEN-row kv blocks the K/V HBM tensors are
+sized for, and the kv loop runs ``intram[kv_len_intram_addr]`` blocks
+(see frontend/loop_macros.py). One compiled kernel then serves any
+kv-cache length ``1..num_kv_blocks`` blocks; the testbench writes the
+block count through ``int_preload``. Lengths are in whole blocks —
+a partial last block would need score masking the kernel doesn't do.
 """
 
 import math
@@ -51,6 +59,7 @@ import tilelang.language as T
 
 from ..address_alloc import FPRAM_USER_BASE
 from ..frontend.gemm_macros import KIND
+from ..frontend.loop_macros import RUNTIME_EXTENT, STATIC_EXTENT
 
 
 def make_flash_decode_min(
@@ -59,6 +68,8 @@ def make_flash_decode_min(
     hlen: int = 16,
     head_count: int | None = None,
     num_kv_blocks: int = 2,
+    runtime_kv_len: bool = False,
+    kv_len_intram_addr: int = 0,
 ):
     MLEN = 64
     if rows != MLEN:
@@ -76,6 +87,12 @@ def make_flash_decode_min(
         raise ValueError(f"num_kv_blocks must be >= 1, got {num_kv_blocks}")
 
     kv_seq = num_kv_blocks * rows
+    # Runtime kv length needs a hardware loop (the trip count is patched
+    # into the loop counter each iteration); the static path keeps the
+    # unrolled loop under STATIC_EXTENT, so the kernel body stays shared
+    # between the two modes.
+    kv_loop = T.serial if runtime_kv_len else T.unroll
+    kv_loop_attr = RUNTIME_EXTENT if runtime_kv_len else STATIC_EXTENT
     # Softmax scale 1/sqrt(d_k). Embedded directly as a FloatImm via
     # ``T.float16(...)`` in the kernel body — the ``hoist_float_constants``
     # pre-pass turns it into a 1-slot global.fpram buffer at compile
@@ -149,61 +166,64 @@ def make_flash_decode_min(
                 M_OLD[row] = T.float16(-1.0e4)
                 L_OLD[row] = T.float16(0)
 
-            for kv_block in T.unroll(num_kv_blocks):
-                # K, V DMAs — sync, multi-lane. Explicit slice form so
-                # mid_ir's ranged_slice inference produces clean
-                # (extent=rows, extent=hlen) tile shapes.
-                T.copy(
-                    K_hbm[0, kv_block * rows : (kv_block + 1) * rows, by, 0:hlen],
-                    K_sh,
-                )
-                T.copy(
-                    V_hbm[0, kv_block * rows : (kv_block + 1) * rows, by, 0:hlen],
-                    V_sh,
-                )
-
-                # Q @ K^T → BTMV (rows=1 LHS auto-routes to plena.btmv).
-                with T.attr(0, KIND, "btmm"):
-                    T.gemm(Q_sh, K_sh, S_loc, transpose_B=True)
-
-                # Scale + grab current max baseline.
-                for row in T.serial(1):
-                    for col in T.Parallel(MLEN):
-                        S_loc[row, col] = S_loc[row, col] * T.float16(scale_val)
-                    M_CURR[row] = M_OLD[row]
-
-                T.reduce_max(S_loc, M_CURR, dim=1, clear=False)
-
-                for row in T.serial(1):
-                    M_RES[row] = M_OLD[row] - M_CURR[row]
-                    M_RES[row] = T.exp(M_RES[row])
-                    for col in T.Parallel(MLEN):
-                        S_loc[row, col] = S_loc[row, col] - M_CURR[row]
-                    for col in T.Parallel(MLEN):
-                        S_loc[row, col] = T.exp(S_loc[row, col])
-                    P_SUM[row] = T.float16(0)
-
-                T.reduce_sum(S_loc, P_SUM, dim=1, clear=False)
-
-                for row in T.serial(1):
-                    L_NEW[row] = L_OLD[row] * M_RES[row]
-                    L_NEW[row] = L_NEW[row] + P_SUM[row]
+            # Runtime-length mode: the kv loop runs intram[kv_len_intram_addr]
+            # iterations (<= num_kv_blocks); see module docstring.
+            with T.attr(0, kv_loop_attr, kv_len_intram_addr):
+                for kv_block in kv_loop(num_kv_blocks):
+                    # K, V DMAs — sync, multi-lane. Explicit slice form so
+                    # mid_ir's ranged_slice inference produces clean
+                    # (extent=rows, extent=hlen) tile shapes.
+                    T.copy(
+                        K_hbm[0, kv_block * rows : (kv_block + 1) * rows, by, 0:hlen],
+                        K_sh,
+                    )
+                    T.copy(
+                        V_hbm[0, kv_block * rows : (kv_block + 1) * rows, by, 0:hlen],
+                        V_sh,
+                    )
+
+                    # Q @ K^T → BTMV (rows=1 LHS auto-routes to plena.btmv).
+                    with T.attr(0, KIND, "btmm"):
+                        T.gemm(Q_sh, K_sh, S_loc, transpose_B=True)
+
+                    # Scale + grab current max baseline.
+                    for row in T.serial(1):
+                        for col in T.Parallel(MLEN):
+                            S_loc[row, col] = S_loc[row, col] * T.float16(scale_val)
+                        M_CURR[row] = M_OLD[row]
+
+                    T.reduce_max(S_loc, M_CURR, dim=1, clear=False)
+
+                    for row in T.serial(1):
+                        M_RES[row] = M_OLD[row] - M_CURR[row]
+                        M_RES[row] = T.exp(M_RES[row])
+                        for col in T.Parallel(MLEN):
+                            S_loc[row, col] = S_loc[row, col] - M_CURR[row]
+                        for col in T.Parallel(MLEN):
+                            S_loc[row, col] = T.exp(S_loc[row, col])
+                        P_SUM[row] = T.float16(0)
+
+                    T.reduce_sum(S_loc, P_SUM, dim=1, clear=False)
+
+                    for row in T.serial(1):
+                        L_NEW[row] = L_OLD[row] * M_RES[row]
+                        L_NEW[row] = L_NEW[row] + P_SUM[row]
+                        for col in T.Parallel(hlen):
+                            O_loc[row, col] = O_loc[row, col] * M_RES[row]
+                        M_OLD[row] = M_CURR[row]
+                        L_OLD[row] = L_NEW[row]
+
+                    # P @ V — default kind. Compiler picks plena.mv (M_MV)
+                    # because S_loc has rows=1; per-head lane offset
+                    # (S_loc row-stacked at by*MLEN, V_sh / PV_loc
+                    # col-packed at by*hlen) is auto-injected from each
+                    # buffer's lane-axis stride.
+                    T.gemm(S_loc, V_sh, PV_loc)
+
+                    # O += PV. T.Parallel + add is picked up by
+                    # fuse_elementwise → plena.v_add (multi-lane, sync).
                     for col in T.Parallel(hlen):
-                        O_loc[row, col] = O_loc[row, col] * M_RES[row]
-                    M_OLD[row] = M_CURR[row]
-                    L_OLD[row] = L_NEW[row]
-
-                # P @ V — default kind. Compiler picks plena.mv (M_MV)
-                # because S_loc has rows=1; per-head lane offset
-                # (S_loc row-stacked at by*MLEN, V_sh / PV_loc
-                # col-packed at by*hlen) is auto-injected from each
-                # buffer's lane-axis stride.
-                T.gemm(S_loc, V_sh, PV_loc)
-
-                # O += PV. T.Parallel + add is picked up by
-                # fuse_elementwise → plena.v_add (multi-lane, sync).
-                for col in T.Parallel(hlen):
-                    O_loc[0, col] = O_loc[0, col] + PV_loc[0, col]
+                        O_loc[0, col] = O_loc[0, col] + PV_loc[0, col]
 
             # Final O = O / L_new.
             for row in T.serial(1):
@@ -231,6 +251,8 @@ def make_flash_decode_min(
         "HARDWARE_LANE_COUNT": hardware_lane_count,
         "FPRAM_USER_BASE": FPRAM_USER_BASE,
         "NUM_KV_BLOCKS": num_kv_blocks,
+        "RUNTIME_KV_LEN": runtime_kv_len,
+        "KV_LEN_INTRAM_ADDR": kv_len_intram_addr if runtime_kv_len else None,
         "CACHE_NUM_MLEN_ROWS": (head_count * hlen) // MLEN,
         # Buffer addresses are exposed via the compiler's
         # --dump-buffer-addrs JSON (single source of truth — see
@@ -2,9 +2,15 @@
 
 Orchestrates:
     0. inline_let_stmts + lower_compound_fp_stores  (stmt prep)
-    1. mid_ir pipeline (10 passes, see frontend/mid_ir/passes/)
+    1. mid_ir pipeline (10 passes + opt-in double_buffer, see
+       frontend/mid_ir/passes/)
     2. AddressAllocationPass                         (HLIR + addresses)
     3. IsaEmitterPass                                (HLIR -> ISA text)
+    4. linear_scan_allocate (gp_alloc="linear_scan" only)
+
+``compile_kernel_family`` sweeps one shape parameter: steps 0-1 run for
+a few probe points only, the rest are specialised from a cached affine
+HLIR template (hlir_family.py) and go straight to steps 2-4.
 
 The legacy ``frontend/`` graph-IR pipeline + ``codegen.PlenaCodegen``
 are no longer in the call path. They're still on disk for reference
@@ -17,8 +23,11 @@ fixed per chip variant.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import warnings
+from collections.abc import Callable, Iterable
+from dataclasses import astuple, dataclass
 from pathlib import Path
+from typing import Any
 
 import tvm
 from tvm import tir
@@ -41,11 +50,19 @@ from .frontend.mid_ir.passes import async_wrap as _mid_async
 from .frontend.mid_ir.passes import view as _mid_view
 from .frontend.mid_ir.passes import fuse as _mid_fuse
 from .frontend.mid_ir.passes import burn_view as _mid_burn
+from .frontend.mid_ir.passes import double_buffer as _mid_double_buffer
 from .frontend.mid_ir.passes import to_plena as _mid_to_plena
 from .hlir import HLIRModule
+from .hlir_family import HlirFamilyError, HlirTemplate, fit_template
 from .isa_pass import IsaEmitterPass
 from .program_shim import make_shim
 from .register_alloc import RegisterAllocator
+from .gp_linear_scan import (
+    GpAllocReport,
+    VirtualRegisterAllocator,
+    linear_scan_allocate,
+    report_from_greedy_trace,
+)
 
 
 @dataclass
@@ -68,6 +85,9 @@ class CompiledKernel:
     # ``asm_line``/``site``/``event``/``free``/``in_use``/``pinned``
     # plus event-specific fields (regs, slot, addr, n, ...).
     gp_trace: list = None
+    # Spill statistics from whichever GP allocator produced ``isa_text``
+    # (see gp_linear_scan.GpAllocReport).
+    gp_alloc_report: GpAllocReport | None = None
 
     def __repr__(self) -> str:
         return (
@@ -85,6 +105,9 @@ def compile_kernel(
     name: str = "kernel",
     midir_dump_dir: Path | None = None,
     addr_config_override: AddressAllocConfig | None = None,
+    gp_alloc: str = "greedy",
+    double_buffer: bool = False,
+    loop_kinds: dict[str, str] | None = None,
 ) -> CompiledKernel:
     """Lower a raw TIR PrimFunc through the mid_ir pipeline + downstream
     address-alloc + ISA-emit passes.
@@ -97,7 +120,54 @@ def compile_kernel(
     one from ``target``. Used by multi-kernel drivers that stitch
     several kernels into one continuous ASM run and need to control
     the FPRAM / HBM bases per kernel (e.g. tvm_single_stream_block_test).
+
+    ``gp_alloc``: ``"greedy"`` (default) allocates physical GPs during
+    ISA emit with on-demand IntRAM spill. ``"linear_scan"`` emits over
+    virtual GPs first and assigns physical ones afterwards with the
+    loop-depth-weighted linear-scan allocator in gp_linear_scan.py.
+
+    ``double_buffer``: run the mid_ir double_buffer pass, which
+    ping-pongs the leading HBM->on-chip DMAs of serial loops so the
+    next tile's prefetch is issued before the current tile's compute.
+    Costs one extra copy of every prefetched buffer in VRAM/MRAM, and
+    the rewritten loop body is emitted up to four times, so short loops
+    come out effectively unrolled (see the pass docstring).
+
+    ``loop_kinds`` (when set): ``{loop_var_name: "serial" | "unroll"}``
+    overrides the emission kind the kernel author picked for every
+    for-op whose loop var has that name. Lets the autotuner flip a loop
+    between a hardware ``C_LOOP`` and compile-time unrolling without
+    editing the kernel. Naming a loop that doesn't exist is an error.
     """
+    if gp_alloc not in ("greedy", "linear_scan"):
+        raise ValueError(f"gp_alloc must be 'greedy' or 'linear_scan', got {gp_alloc!r}")
+    mod = _lower_to_hlir(
+        prim_func,
+        target=target,
+        name=name,
+        midir_dump_dir=midir_dump_dir,
+        double_buffer=double_buffer,
+    )
+    return _emit_hlir(
+        mod,
+        target=target,
+        name=name,
+        addr_config_override=addr_config_override,
+        gp_alloc=gp_alloc,
+        loop_kinds=loop_kinds,
+    )
+
+
+def _lower_to_hlir(
+    prim_func: tir.PrimFunc,
+    *,
+    target: PlenaTarget,
+    name: str,
+    midir_dump_dir: Path | None,
+    double_buffer: bool,
+) -> HLIRModule:
+    """Steps 0-1.5: raw TIR -> unallocated HLIR (shape-dependent only
+    through integer leaves; see hlir_family.py)."""
     # ---------- 0. stmt prep ----------
     func = _stmt_inline_let.run(prim_func)
     func = _stmt_lower_compound.run(func)
@@ -117,6 +187,8 @@ def compile_kernel(
     midfn = _mid_view.run(midfn)
     midfn = _mid_fuse.run(midfn)
     midfn = _mid_burn.run(midfn)
+    if double_buffer:
+        midfn = _mid_double_buffer.run(midfn)
     mod = _mid_to_plena.run(midfn, build_dir=midir_dump_dir, mlen=target.mlen)
 
     # DEBUG: dump HLIR immediately after to_plena so we can inspect it
@@ -133,6 +205,21 @@ def compile_kernel(
     # downstream shape checks if their post-expansion layout doesn't
     # match the lane mode that was never inferred.
     _dead_buffer_elim.run(mod)
+    return mod
+
+
+def _emit_hlir(
+    mod: HLIRModule,
+    *,
+    target: PlenaTarget,
+    name: str,
+    addr_config_override: AddressAllocConfig | None,
+    gp_alloc: str,
+    loop_kinds: dict[str, str] | None,
+) -> CompiledKernel:
+    """Steps 2-4: address alloc + ISA emit (+ linear-scan GP rewrite)."""
+    if loop_kinds:
+        _apply_loop_kinds(mod, loop_kinds)
 
     # ---------- 2. address alloc ----------
     if addr_config_override is not None:
@@ -147,7 +234,7 @@ def compile_kernel(
     addr_pass.run(mod)
 
     # ---------- 3. ISA emit ----------
-    allocator = RegisterAllocator()
+    allocator = VirtualRegisterAllocator() if gp_alloc == "linear_scan" else RegisterAllocator()
     shim = make_shim(
         mlen=target.mlen,
         blen=target.blen,
@@ -158,14 +245,181 @@ def compile_kernel(
     isa_pass = IsaEmitterPass(shim)
     isa_text = isa_pass.run(mod)
 
+    # ---------- 4. (optional) virtual -> physical GP assignment ----------
+    if gp_alloc == "linear_scan":
+        isa_text, gp_report = linear_scan_allocate(isa_text)
+    else:
+        gp_report = report_from_greedy_trace(allocator.trace_rows())
+
     return CompiledKernel(
         name=name,
         hlir=mod,
         isa_text=isa_text,
         gp_trace=allocator.trace_rows(),
+        gp_alloc_report=gp_report,
     )
 
 
+_LOOP_KINDS = ("serial", "unroll")
+
+
+def _apply_loop_kinds(mod: HLIRModule, loop_kinds: dict[str, str]) -> None:
+    for name, kind in loop_kinds.items():
+        if kind not in _LOOP_KINDS:
+            raise ValueError(f"loop_kinds[{name!r}] must be one of {_LOOP_KINDS}, got {kind!r}")
+    seen: set[str] = set()
+
+    def _walk(ops) -> None:
+        for op in ops:
+            if op.kind != "for":
+                continue
+            name = op.annotations["loop_var"].name
+            if name in loop_kinds:
+                op.annotations["loop_kind"] = loop_kinds[name]
+                seen.add(name)
+            _walk(op.body or [])
+
+    _walk(mod.ops)
+    missing = sorted(set(loop_kinds) - seen)
+    if missing:
+        raise ValueError(f"loop_kinds names loops not present in {mod.name!r}: {missing}")
+
+
+# Fitted shape-family templates, keyed by everything that feeds
+# _lower_to_hlir except the swept parameter. See compile_kernel_family.
+_FAMILY_TEMPLATES: dict[tuple, HlirTemplate] = {}
+# Two probes fit the affine template, a third validates it; below this
+# many points a family compile is just a loop of full compiles.
+_FAMILY_MIN_POINTS = 3
+
+
+def compile_kernel_family(
+    factory: Callable[..., Any],
+    *,
+    param: str,
+    values: Iterable[int],
+    target: PlenaTarget,
+    base_kwargs: dict[str, Any] | None = None,
+    name: str = "kernel",
+    addr_config_override: AddressAllocConfig | None = None,
+    gp_alloc: str = "greedy",
+    double_buffer: bool = False,
+    loop_kinds: dict[str, str] | None = None,
+) -> dict[int, CompiledKernel]:
+    """Compile ``factory(**base_kwargs, param=v)`` for every ``v`` in
+    ``values``, running stmt prep + mid_ir only for the probe points.
+
+    The unallocated HLIR of a kernel family only moves with ``param``
+    through integer leaves (buffer extents, loop extents, tile counts),
+    so the first call fits an affine template from two probes, checks
+    it against a third (the largest value), and caches it. Every other
+    point -- and every point of later calls with the same factory /
+    base_kwargs / target -- is specialised from the template and only
+    runs address alloc + ISA emit. A later call reaching outside the
+    range validated so far compiles its smallest / largest point in
+    full and checks the template there first; points the template
+    can't be validated for are compiled in full. Each call also lowers
+    one point it would specialise (the median) and compares, since
+    probes can't rule out a piecewise-affine leaf. If the probes
+    disagree structurally or a check doesn't match, this warns and
+    falls back to a full compile per point; a point where an affine
+    leaf isn't integral is compiled in full on its own. Either way the
+    result is what ``compile_kernel`` would produce.
+
+    Returns ``{value: CompiledKernel}``. Remaining kwargs are as in
+    :func:`compile_kernel` (``midir_dump_dir`` isn't supported here).
+    """
+    if gp_alloc not in ("greedy", "linear_scan"):
+        raise ValueError(f"gp_alloc must be 'greedy' or 'linear_scan', got {gp_alloc!r}")
+    base_kwargs = dict(base_kwargs or {})
+    if param in base_kwargs:
+        raise ValueError(f"{param!r} is the swept parameter; drop it from base_kwargs")
+    points = sorted({int(v) for v in values})
+
+    def _hlir_at(p: int) -> HLIRModule:
+        prim = factory(**base_kwargs, **{param: p})
+        if isinstance(prim, tuple):
+            # Factories like make_flash_decode_min return (PrimFunc, constants).
+            prim = prim[0]
+        return _lower_to_hlir(prim, target=target, name=name, midir_dump_dir=None, double_buffer=double_buffer)
+
+    key = (
+        factory.__module__,
+        factory.__qualname__,
+        param,
+        tuple(sorted(base_kwargs.items())),
+        astuple(target),
+        name,
+        double_buffer,
+    )
+    template = _FAMILY_TEMPLATES.get(key)
+    probes: dict[int, HLIRModule] = {}
+    if template is None and len(points) >= _FAMILY_MIN_POINTS:
+        p0, p1, p_check = points[0], points[1], points[-1]
+        for p in (p0, p1, p_check):
+            probes[p] = _hlir_at(p)
+        try:
+            fitted = fit_template(param, p0, probes[p0], p1, probes[p1])
+        except HlirFamilyError as exc:
+            warnings.warn(f"{name}: HLIR not templatable over {param} ({exc}); compiling every point")
+        else:
+            if fitted.matches(p_check, probes[p_check]):
+                fitted.widen(p_check)
+                template = _FAMILY_TEMPLATES[key] = fitted
+            else:
+                warnings.warn(
+                    f"{name}: HLIR is not affine in {param} (probe {param}={p_check} disagrees); compiling every point"
+                )
+    elif template is not None:
+        outside = [p for p in points if not template.covers(p)]
+        for p in sorted({min(outside), max(outside)}) if outside else ():
+            probes[p] = _hlir_at(p)
+            if template.matches(p, probes[p]):
+                template.widen(p)
+            else:
+                warnings.warn(
+                    f"{name}: cached {param} template does not hold at {param}={p} "
+                    f"(validated {template.lo}..{template.hi}); compiling points outside that range"
+                )
+    if template is not None:
+        # Probes only pin the template at a few points; a piecewise leaf
+        # (say a ceildiv of seq_len) can agree there and be wrong in
+        # between, so spot-check one point it would otherwise specialise.
+        pending = [p for p in points if p not in probes and template.covers(p)]
+        if pending:
+            p = pending[len(pending) // 2]
+            probes[p] = _hlir_at(p)
+            if not template.matches(p, probes[p]):
+                warnings.warn(
+                    f"{name}: {param} template disagrees with a fresh lowering at {param}={p}; "
+                    "dropping it and compiling every point"
+                )
+                _FAMILY_TEMPLATES.pop(key, None)
+                template = None
+
+    out: dict[int, CompiledKernel] = {}
+    for p in points:
+        if p in probes:
+            mod = probes.pop(p)
+        elif template is not None and template.covers(p):
+            try:
+                mod = template.instantiate(p)
+            except HlirFamilyError:
+                # An affine leaf that isn't integral here; this point isn't in the family.
+                mod = _hlir_at(p)
+        else:
+            mod = _hlir_at(p)
+        out[p] = _emit_hlir(
+            mod,
+            target=target,
+            name=name,
+            addr_config_override=addr_config_override,
+            gp_alloc=gp_alloc,
+            loop_kinds=loop_kinds,
+        )
+    return out
+
+
 def compile_module(
     mod: tvm.IRModule,
     *,
@@ -143,6 +143,11 @@ def main(argv) -> int:
     parser.add_argument("--num-q-blocks", type=int, default=2)
     parser.add_argument("--num-kv-blocks", type=int, default=2)
     parser.add_argument("--head-count", type=int, default=4)
+    parser.add_argument(
+        "--double-buffer",
+        action="store_true",
+        help="Run the double_buffer pass on the kv_block loop before lowering",
+    )
     args = parser.parse_args(argv)
 
     raw = build_raw_flash_attention_min(
@@ -169,6 +174,7 @@ def main(argv) -> int:
     from tilelang_tvm_compiler.frontend.mid_ir.passes.view import run as view_run
     from tilelang_tvm_compiler.frontend.mid_ir.passes.fuse import run as fuse_run
     from tilelang_tvm_compiler.frontend.mid_ir.passes.burn_view import run as burn_run
+    from tilelang_tvm_compiler.frontend.mid_ir.passes.double_buffer import run as double_buffer_run
     from tilelang_tvm_compiler.frontend.mid_ir.passes.to_plena import run as to_plena_run
 
     raw = infer_run(raw)
@@ -186,6 +192,9 @@ def main(argv) -> int:
     midfn = view_run(midfn)
     midfn = fuse_run(midfn)
     midfn = burn_run(midfn)
+    if args.double_buffer:
+        midfn = double_buffer_run(midfn)
+        print(f"[double_buffer] rewrote: {midfn.attrs.get('plena.double_buffered', '<none>')}", file=sys.stderr)
 
     hlir = to_plena_run(midfn, build_dir=args.build_dir)
 
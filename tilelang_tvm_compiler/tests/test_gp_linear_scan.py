@@ -0,0 +1,125 @@
+"""Standalone tests for the two-phase (virtual GP + linear scan) allocator.
+
+Coverage:
+  * virtual allocator never reuses ids and never spills
+  * no spills when pressure fits in 15 GPs; all vregs renamed
+  * under pressure, cold values spill and loop-resident values stay put
+  * hardware loop counters are never spilled
+  * values live into a loop stay live across the whole loop body
+  * greedy trace -> GpAllocReport summary
+
+Run:
+    python -m tilelang_tvm_compiler.tests.test_gp_linear_scan
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+
+from tilelang_tvm_compiler.gp_linear_scan import (
+    VIRTUAL_GP_BASE,
+    VirtualRegisterAllocator,
+    build_intervals,
+    linear_scan_allocate,
+    parse_instructions,
+    report_from_greedy_trace,
+)
+
+_VIRTUAL = re.compile(r"\bgp(\d+)\b")
+
+
+def _physical_only(text: str) -> bool:
+    return all(int(m.group(1)) < VIRTUAL_GP_BASE for m in _VIRTUAL.finditer(text))
+
+
+def test_virtual_allocator_fresh_ids():
+    ra = VirtualRegisterAllocator()
+    a = ra.allocate_gp(3)
+    ra.free_gp(a)
+    b = ra.allocate_gp(2)
+    assert set(a).isdisjoint(b), f"virtual ids reused: {a} / {b}"
+    borrowed, token = ra.spill_borrow(20, compiler=None)
+    assert len(borrowed) == 20 and token.spilled == []
+    ra.spill_return(token, compiler=None)
+    print("[ok] virtual allocator hands out fresh ids")
+
+
+def test_no_pressure_no_spill():
+    ra = VirtualRegisterAllocator()
+    x, y = ra.allocate_gp(2)
+    isa = f"S_ADDI_INT gp{x}, gp0, 4\nS_ADDI_INT gp{y}, gp{x}, 8\nH_PREFETCH_V gp{x}, gp{y}, a0, 1, 0\n"
+    out, report = linear_scan_allocate(isa)
+    assert _physical_only(out), out
+    assert report.spill_instructions == 0 and report.spilled_values == 0
+    print(f"[ok] no pressure: {report.summary()}")
+
+
+def test_cold_values_spill_hot_stay():
+    ra = VirtualRegisterAllocator()
+    cold = ra.allocate_gp(20)
+    counter = ra.allocate_gp(1)[0]
+    hot = ra.allocate_gp(1)[0]
+    lines = [f"S_ADDI_INT gp{r}, gp0, {i}" for i, r in enumerate(cold)]
+    lines.append(f"C_LOOP_START gp{counter}, 8")
+    lines.append(f"S_ADD_INT gp{hot}, gp{cold[0]}, gp{cold[1]}")
+    lines.append(f"C_LOOP_END gp{counter}")
+    lines += [f"H_PREFETCH_V gp{r}, gp{r}, a0, 1, 0" for r in cold]
+    out, report = linear_scan_allocate("\n".join(lines) + "\n")
+    assert _physical_only(out), out
+    assert report.spilled_values > 0
+    body = out.split("C_LOOP_START", 1)[1].split("C_LOOP_END", 1)[0]
+    assert "S_LD_INT" not in body and "S_ST_INT" not in body, f"spill traffic inside hot loop:\n{body}"
+    print(f"[ok] cold values spilled outside loop: {report.summary()}")
+
+
+def test_live_in_extends_over_loop():
+    ra = VirtualRegisterAllocator()
+    base, counter, tmp = ra.allocate_gp(3)
+    isa = (
+        f"S_ADDI_INT gp{base}, gp0, 64\n"
+        f"C_LOOP_START gp{counter}, 4\n"
+        f"S_ADDI_INT gp{tmp}, gp{base}, 1\n"
+        f"H_PREFETCH_V gp{tmp}, gp{tmp}, a0, 1, 0\n"
+        f"C_LOOP_END gp{counter}\n"
+    )
+    ivs = build_intervals(parse_instructions(isa))
+    assert ivs[base].end == 4, f"base must live to C_LOOP_END, got {ivs[base]}"
+    assert not ivs[counter].spillable
+    print("[ok] live-in value extended across loop body")
+
+
+def test_greedy_report():
+    trace = [
+        {"event": "auto_spill"},
+        {"event": "borrow_spill"},
+        {"event": "auto_reload"},
+        {"event": "borrow_reload"},
+        {"event": "allocate_gp"},
+    ]
+    report = report_from_greedy_trace(trace)
+    assert report.spilled_values == 2 and report.spill_instructions == 4
+    print(f"[ok] greedy report: {report.summary()}")
+
+
+def main() -> int:
+    tests = [
+        test_virtual_allocator_fresh_ids,
+        test_no_pressure_no_spill,
+        test_cold_values_spill_hot_stay,
+        test_live_in_extends_over_loop,
+        test_greedy_report,
+    ]
+    print("=" * 60)
+    print(f"gp_linear_scan tests ({len(tests)} cases)")
+    print("=" * 60)
+    for t in tests:
+        t()
+    print("=" * 60)
+    print(f"ALL {len(tests)} TESTS PASSED")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Unit tests for hlir_family (affine HLIR templates over one shape param).
+
+Coverage:
+  * buffer extents + loop extents that scale with the param become
+    affine leaves; everything else is copied through
+  * instantiate() yields fresh Buffers/Ops at any point (no aliasing
+    with the probes, which address alloc mutates later)
+  * loop vars are matched by position across probes
+  * a third probe that disagrees (non-affine leaf) fails ``matches``
+  * a structural difference (extra op) refuses to fit
+  * the validated range only grows through a matching probe
+  * compile_kernel_family matches compile_kernel at every point: on the
+    affine path, where an affine leaf is non-integral (per-point full
+    compile) and where a spot-check rejects a piecewise template
+
+Run:
+    python -m tilelang_tvm_compiler.tests.test_hlir_family
+"""
+
+from __future__ import annotations
+
+import sys
+import warnings
+
+from tvm import tir
+
+from tilelang_tvm_compiler import hlir as _hlir
+from tilelang_tvm_compiler import pipeline as _pipeline
+from tilelang_tvm_compiler.hlir_family import HlirFamilyError, fit_template
+from tilelang_tvm_compiler.kernels.flash_decode_min import make_flash_decode_min
+from tilelang_tvm_compiler.pipeline import (
+    PlenaTarget,
+    compile_kernel,
+    compile_kernel_family,
+)
+
+
+def _mod(blocks: int, *, rows: int = 64, extra_op: bool = False) -> _hlir.HLIRModule:
+    kv = tir.Var("kv_block", "int32")
+    k_hbm = _hlir.Buffer(name="K_hbm", scope="hbm", shape=(1, blocks * rows, 4, 16), dtype="float16")
+    k_sh = _hlir.Buffer(name="K_sh", scope="mram", shape=(rows, 64), dtype="float16")
+    dma = _hlir.Op(
+        kind="dma_h2m_slice",
+        buffer_args=[_hlir.BufferSlice(parent="K_hbm", starts=(0, kv * rows, 0, 0), extents=(1, rows, 4, 16)), "K_sh"],
+    )
+    body = [dma] + ([_hlir.Op(kind="zero_v", buffer_args=["K_sh"])] if extra_op else [])
+    loop = _hlir.make_for_op(loop_var=kv, extent=blocks, body=body)
+    return _hlir.HLIRModule(
+        name="fam",
+        buffers={"K_hbm": k_hbm, "K_sh": k_sh},
+        ops=[loop],
+        param_names=["K_hbm"],
+    )
+
+
+def test_fit_and_instantiate():
+    m2, m3 = _mod(2), _mod(3)
+    t = fit_template("num_kv_blocks", 2, m2, 3, m3)
+    assert t.affine_leaves == 2, t.affine_leaves  # K_hbm seq extent + loop extent
+    m7 = t.instantiate(7)
+    assert m7.buffers["K_hbm"].shape == (1, 7 * 64, 4, 16), m7.buffers["K_hbm"].shape
+    assert m7.ops[0].annotations["extent"] == 7
+    assert m7.buffers["K_sh"].shape == (64, 64)
+    assert m7.buffers["K_hbm"] is not m2.buffers["K_hbm"]
+    assert m7.ops[0] is not m2.ops[0]
+    m7.buffers["K_hbm"].address = 123
+    assert t.instantiate(7).buffers["K_hbm"].address is None, "template aliased an instance"
+    print(f"[ok] fitted {t.affine_leaves} affine leaves; instantiated num_kv_blocks=7")
+
+
+def test_loop_var_shared_across_body():
+    t = fit_template("num_kv_blocks", 2, _mod(2), 3, _mod(3))
+    m5 = t.instantiate(5)
+    loop = m5.ops[0]
+    start = loop.body[0].buffer_args[0].starts[1]
+    assert start.a.same_as(loop.annotations["loop_var"]), "slice start lost its binding to the loop var"
+    print("[ok] loop var in slice start matches the for-op loop var")
+
+
+def test_validation_probe():
+    t = fit_template("num_kv_blocks", 2, _mod(2), 3, _mod(3))
+    assert t.matches(6, _mod(6))
+    assert not t.matches(6, _mod(6, rows=32)), "non-affine probe should not match"
+    print("[ok] third probe validates / rejects the template")
+
+
+def test_structural_difference_refuses():
+    try:
+        fit_template("num_kv_blocks", 2, _mod(2), 3, _mod(3, extra_op=True))
+    except HlirFamilyError as exc:
+        print(f"[ok] structural mismatch refused: {exc}")
+        return
+    raise AssertionError("expected HlirFamilyError")
+
+
+def test_validated_range():
+    t = fit_template("num_kv_blocks", 2, _mod(2), 3, _mod(3))
+    assert (t.lo, t.hi) == (2, 3)
+    assert t.covers(2) and not t.covers(6)
+    assert t.matches(6, _mod(6))
+    t.widen(6)
+    assert t.covers(5) and t.covers(6) and not t.covers(1)
+    print(f"[ok] validated range widened to {t.lo}..{t.hi}")
+
+
+def _decode_by_seq_len(*, seq_len: int):
+    # Piecewise affine in seq_len: one KV block per started 64 rows.
+    return make_flash_decode_min(num_kv_blocks=-(-seq_len // 64), runtime_kv_len=True)
+
+
+def _compile_family(factory, param, values, **kwargs):
+    _pipeline._FAMILY_TEMPLATES.clear()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        family = compile_kernel_family(factory, param=param, values=values, target=PlenaTarget(), name="fd", **kwargs)
+    for value, ck in family.items():
+        prim = factory(**kwargs.get("base_kwargs", {}), **{param: value})[0]
+        assert ck.isa_text == compile_kernel(prim, target=PlenaTarget(), name="fd").isa_text, f"{param}={value}"
+    return family, [str(w.message) for w in caught]
+
+
+def test_compile_kernel_family_affine():
+    values = [1, 2, 3, 4, 6]
+    family, caught = _compile_family(
+        make_flash_decode_min, "num_kv_blocks", values, base_kwargs={"runtime_kv_len": True}
+    )
+    assert sorted(family) == values and not caught, caught
+    assert len(_pipeline._FAMILY_TEMPLATES) == 1, "affine family was not cached"
+    print(f"[ok] num_kv_blocks family {values} matches compile_kernel from a cached template")
+
+
+def test_compile_kernel_family_non_integral_point():
+    # Probes 64/128/512 and the 256 spot-check fit blocks = seq_len/64;
+    # 300 makes that leaf non-integral, so it alone is lowered in full.
+    family, caught = _compile_family(_decode_by_seq_len, "seq_len", [64, 128, 192, 256, 300, 512])
+    assert len(family) == 6 and not caught, caught
+    assert len(_pipeline._FAMILY_TEMPLATES) == 1
+    print("[ok] non-integral point falls back to a full compile")
+
+
+def test_compile_kernel_family_spot_check_rejects_piecewise():
+    # 64/128/512 sit on blocks = seq_len/64; only 200 (4 blocks) shows the kink.
+    family, caught = _compile_family(_decode_by_seq_len, "seq_len", [64, 128, 200, 512])
+    assert len(family) == 4
+    assert any("disagrees with a fresh lowering" in msg for msg in caught), caught
+    assert not _pipeline._FAMILY_TEMPLATES, "rejected template stayed cached"
+    print("[ok] spot-check drops a piecewise template")
+
+
+def main() -> int:
+    tests = [
+        test_fit_and_instantiate,
+        test_loop_var_shared_across_body,
+        test_validation_probe,
+        test_structural_difference_refuses,
+        test_validated_range,
+        test_compile_kernel_family_affine,
+        test_compile_kernel_family_non_integral_point,
+        test_compile_kernel_family_spot_check_rejects_piecewise,
+    ]
+    print("=" * 60)
+    print(f"hlir_family tests ({len(tests)} cases)")
+    print("=" * 60)
+    for t in tests:
+        t()
+    print("=" * 60)
+    print(f"ALL {len(tests)} TESTS PASSED")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
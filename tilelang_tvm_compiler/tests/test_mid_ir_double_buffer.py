@@ -0,0 +1,169 @@
+"""Unit tests for mid_ir.passes.double_buffer (pass_5c).
+
+Coverage:
+  * even extent → prologue / steady loop / 2-tile epilogue, ping-pong
+    buffer allocated and used on odd iterations
+  * odd extent → prologue / steady loop / 1-tile epilogue
+  * loop var rewritten to 2*kv / 2*kv+1 / 2*kv+2 in the steady body
+  * loops whose prefetched buffer is read outside the loop are skipped
+  * extent-1 loops are skipped
+  * runtime-extent loops are skipped
+
+Run:
+    python -m tilelang_tvm_compiler.tests.test_mid_ir_double_buffer
+"""
+
+from __future__ import annotations
+
+import sys
+
+from tilelang_tvm_compiler.frontend.mid_ir import ir
+from tilelang_tvm_compiler.frontend.mid_ir.passes.double_buffer import (
+    PING_PONG_SUFFIX,
+)
+from tilelang_tvm_compiler.frontend.mid_ir.passes.double_buffer import (
+    run as double_buffer_run,
+)
+
+
+class _FakeVar:
+    """Stand-in for tir.Var (VarRef only needs ``name`` + identity)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+def _mk_buf(name, shape, scope="shared"):
+    return ir.BufferDef(name=name, shape=shape, dtype="float16", scope=scope)
+
+
+def _check(label, actual, expected) -> int:
+    if actual == expected:
+        print(f"  [OK]   {label}: {actual!r}")
+        return 0
+    print(f"  [FAIL] {label}: got {actual!r}, expected {expected!r}")
+    return 1
+
+
+def _kv_loop(extent, extra_after=()):
+    kv = ir.VarRef(_FakeVar("kv"))
+    K_hbm = _mk_buf("K_hbm", [1, 64 * extent, 4, 16], scope="global")
+    K_sh = _mk_buf("K_sh", [64, 16])
+    S = _mk_buf("S", [64, 64], scope="fragment")
+    Q = _mk_buf("Q_sh", [64, 16])
+    dma = ir.Dma(
+        src=ir.BufferRef(K_hbm, [0, {"op": "ranged_slice", "args": [{"op": "mul", "args": [kv, 64]}, 64]}, 0, ir.Slice()]),
+        dst=ir.BufferRef(K_sh, [ir.Slice(), ir.Slice()]),
+        marker=ir.Marker.DMA,
+        can_async=True,
+    )
+    gemm = ir.Gemm(
+        a=ir.BufferRef(Q, [ir.Slice(), ir.Slice()]),
+        b=ir.BufferRef(K_sh, [ir.Slice(), ir.Slice()]),
+        c=ir.BufferRef(S, [ir.Slice(), ir.Slice()]),
+        transpose_b=True,
+        kind="btmm",
+    )
+    loop = ir.For(loop_var="kv", extent=extent, body=[ir.Async(body=[dma], scope_id=0), gemm], loop_var_var=kv)
+    fn = ir.MidFunc(
+        name="t",
+        params=[K_hbm],
+        allocs=[K_sh, S, Q],
+        body=[loop, *extra_after],
+    )
+    return fn, kv, K_sh
+
+
+def _dma_dst(s):
+    while isinstance(s, ir.Async):
+        s = s.body[0]
+    return s.dst.buffer.name
+
+
+def test_even_extent() -> int:
+    print("test_even_extent")
+    fn, kv, _ = _kv_loop(4)
+    out = double_buffer_run(fn)
+    failures = 0
+    pp = f"K_sh{PING_PONG_SUFFIX}"
+    failures += _check("pp alloc added", [a.name for a in out.allocs][-1], pp)
+    # prologue dma, steady for, epilogue dma + 2 gemms
+    kinds = [type(s).__name__ for s in out.body]
+    failures += _check("top-level shape", kinds, ["Async", "For", "Async", "Gemm", "Gemm"])
+    failures += _check("prologue fills B0", _dma_dst(out.body[0]), "K_sh")
+    steady = out.body[1]
+    failures += _check("steady extent", steady.extent, 1)
+    failures += _check(
+        "steady body order",
+        [type(s).__name__ for s in steady.body],
+        ["Async", "Gemm", "Async", "Gemm"],
+    )
+    failures += _check("steady prefetch i+1 into B1", _dma_dst(steady.body[0]), pp)
+    failures += _check("steady compute i reads B0", steady.body[1].b.buffer.name, "K_sh")
+    failures += _check("steady prefetch i+2 into B0", _dma_dst(steady.body[2]), "K_sh")
+    failures += _check("steady compute i+1 reads B1", steady.body[3].b.buffer.name, pp)
+    start = steady.body[0].body[0].src.indices[1]["args"][0]
+    failures += _check("odd prefetch index is 2*kv+1", start["args"][0]["args"][0], {"op": "mul", "args": [kv, 2]})
+    failures += _check("epilogue prefetch N-1 into B1", _dma_dst(out.body[2]), pp)
+    failures += _check("epilogue last gemm reads B1", out.body[4].b.buffer.name, pp)
+    return failures
+
+
+def test_odd_extent() -> int:
+    print("test_odd_extent")
+    fn, _, _ = _kv_loop(3)
+    out = double_buffer_run(fn)
+    failures = 0
+    kinds = [type(s).__name__ for s in out.body]
+    failures += _check("top-level shape", kinds, ["Async", "For", "Gemm"])
+    failures += _check("steady extent", out.body[1].extent, 1)
+    failures += _check("epilogue reads B0", out.body[2].b.buffer.name, "K_sh")
+    return failures
+
+
+def test_outside_use_skipped() -> int:
+    print("test_outside_use_skipped")
+    fn, _, K_sh = _kv_loop(4)
+    O = _mk_buf("O", [64, 16])
+    after = ir.Elementwise(
+        dst=ir.BufferRef(O, [ir.Slice(), ir.Slice()]),
+        srcs=[ir.BufferRef(K_sh, [ir.Slice(), ir.Slice()])],
+        op=ir.UnaryOp.COPY,
+    )
+    fn.body.append(after)
+    out = double_buffer_run(fn)
+    return _check("untouched", out is fn, True)
+
+
+def test_extent_one_skipped() -> int:
+    print("test_extent_one_skipped")
+    fn, _, _ = _kv_loop(1)
+    out = double_buffer_run(fn)
+    return _check("untouched", out is fn, True)
+
+
+def test_runtime_extent_skipped() -> int:
+    print("test_runtime_extent_skipped")
+    fn, _, _ = _kv_loop(4)
+    fn.body[0].runtime_extent = 0
+    out = double_buffer_run(fn)
+    return _check("untouched", out is fn, True)
+
+
+def main() -> int:
+    failures = 0
+    failures += test_even_extent()
+    failures += test_odd_extent()
+    failures += test_outside_use_skipped()
+    failures += test_extent_one_skipped()
+    failures += test_runtime_extent_skipped()
+    print()
+    if failures == 0:
+        print("PASS — all mid_ir.double_buffer tests")
+        return 0
+    print(f"FAIL — {failures} failed assertion(s)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Structural tests for runtime-extent hardware loops (flash_decode_min).
+
+Coverage:
+  * runtime_kv_len=True keeps a hardware kv loop sized for the max
+  * the loop tail reloads the hw counter from the IntRAM trip count
+    minus the incremented idx, right before C_LOOP_END
+  * the static path is unchanged (unrolled, no runtime reload)
+  * fold rejects a STATIC_EXTENT attr that does not wrap a loop
+
+Run:
+    LD_LIBRARY_PATH="" \\
+    PYTHONPATH=/home/.../PLENA_Simulator/compiler \\
+    /home/.../PLENA_Simulator/.venv-tvm/bin/python -m \\
+        tilelang_tvm_compiler.tests.test_runtime_extent_loop
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+
+from tvm import tir
+
+from tilelang_tvm_compiler.frontend.loop_macros import STATIC_EXTENT
+from tilelang_tvm_compiler.frontend.mid_ir.passes import fold
+from tilelang_tvm_compiler.kernels.flash_decode_min import make_flash_decode_min
+from tilelang_tvm_compiler.pipeline import PlenaTarget, compile_kernel
+
+MAX_KV_BLOCKS = 4
+KV_LEN_ADDR = 8
+
+
+def _compile(runtime: bool) -> str:
+    prim, _ = make_flash_decode_min(
+        num_kv_blocks=MAX_KV_BLOCKS,
+        runtime_kv_len=runtime,
+        kv_len_intram_addr=KV_LEN_ADDR,
+    )
+    return compile_kernel(prim, target=PlenaTarget(), name="flash_decode_min").isa_text
+
+
+def test_runtime_loop_uses_max_extent():
+    asm = _compile(runtime=True)
+    starts = re.findall(rf"C_LOOP_START gp(\d+), {MAX_KV_BLOCKS}\b", asm)
+    assert starts, f"expected a kv hardware loop with extent {MAX_KV_BLOCKS}"
+    print(f"[ok] kv loop opened with max extent {MAX_KV_BLOCKS} (gp{starts[0]})")
+
+
+def test_runtime_loop_reloads_counter():
+    asm = _compile(runtime=True)
+    tail = re.compile(
+        rf"S_ST_INT gp(\d+), gp0, \d+\s*\n"
+        rf"(?:;[^\n]*\n)?"
+        rf"S_LD_INT gp(\d+), gp0, {KV_LEN_ADDR}\s*\n"
+        rf"S_SUB_INT gp\2, gp\2, gp\1\s*\n"
+        rf"C_LOOP_END gp\2"
+    )
+    m = tail.search(asm)
+    assert m is not None, "expected hw counter = intram[kv_len] - idx right before C_LOOP_END"
+    print(f"[ok] tail: gp{m.group(2)} = ram[{KV_LEN_ADDR}] - gp{m.group(1)} then C_LOOP_END")
+
+
+def test_static_path_unchanged():
+    asm = _compile(runtime=False)
+    assert "runtime trip count" not in asm
+    assert "unroll for kv_block" in asm
+    print("[ok] static path still unrolls the kv loop")
+
+
+def test_static_extent_must_wrap_loop():
+    attr = tir.AttrStmt(0, STATIC_EXTENT, tir.IntImm("int32", 0), tir.Evaluate(0))
+    try:
+        fold._walk_stmt(attr, {}, None)
+    except fold.FoldError as exc:
+        assert STATIC_EXTENT in str(exc), exc
+    else:
+        raise AssertionError("STATIC_EXTENT around a non-loop should not fold")
+    print("[ok] STATIC_EXTENT must wrap a loop")
+
+
+def main() -> int:
+    tests = [
+        test_runtime_loop_uses_max_extent,
+        test_runtime_loop_reloads_counter,
+        test_static_path_unchanged,
+        test_static_extent_must_wrap_loop,
+    ]
+    print("=" * 60)
+    print(f"runtime-extent loop tests ({len(tests)} cases)")
+    print("=" * 60)
+    for t in tests:
+        t()
+    print("=" * 60)
+    print(f"ALL {len(tests)} TESTS PASSED")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())